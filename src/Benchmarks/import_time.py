@@ -0,0 +1,88 @@
+import os
+import sys
+import argparse
+import subprocess
+import statistics
+
+
+# Directory with the sources of the compiler (the modules are imported from there)
+SOURCE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Reporting libraries that must not be loaded by a compile (they are imported on demand)
+LAZY_MODULES = ["tabulate", "graphviz"]
+
+# Maximum cumulative import time of the main module (milliseconds, measured with -X importtime)
+DEFAULT_BUDGET = 200
+
+
+def import_times(module):
+    """
+    Imports the module in a new interpreter with -X importtime and returns the
+    cumulative import time (in microseconds) of every module it loaded
+
+    Args:
+        module (str): The name of the module (imported from the source directory)
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SOURCE_DIRECTORY, capture_output=True, text=True, check=True,
+    )
+
+    # Lines of the form "import time: <self> | <cumulative> | <indentation><module>"
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def startup_time(module):
+    """
+    Returns the seconds an interpreter takes to start and import the module
+    """
+    command = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    process = subprocess.run([sys.executable, "-c", command], cwd=SOURCE_DIRECTORY, capture_output=True, text=True, check=True)
+    return float(process.stdout)
+
+
+def main():
+    arguments = argparse.ArgumentParser(description="Import time of the compiler")
+    arguments.add_argument("--module", default="main", help="module to import")
+    arguments.add_argument("--runs", type=int, default=5, help="number of interpreters started (the median is reported)")
+    arguments.add_argument("--budget", type=float, default=DEFAULT_BUDGET, help="maximum import time in milliseconds")
+    arguments.add_argument("--top", type=int, default=10, help="number of top level modules listed")
+    options = arguments.parse_args()
+
+    # The first run also warms up the bytecode cache of the sources
+    runs = [import_times(options.module) for _ in range(options.runs + 1)][1:]
+    total = statistics.median(times[options.module] for times in runs) / 1000
+    wall = statistics.median(startup_time(options.module) for _ in range(options.runs)) * 1000
+
+    # Modules with the largest cumulative import time (in the last run)
+    times = runs[-1]
+    print(f"Slowest imports of {options.module}:")
+    for name, cumulative in sorted(times.items(), key=lambda item: -item[1])[:options.top]:
+        print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+    print(f"Import time of {options.module}: {total:.1f} ms (-X importtime, median of {options.runs}), {wall:.1f} ms wall")
+
+    failures = []
+    loaded = [name for name in LAZY_MODULES if name in times]
+    if loaded:
+        failures.append(f"{', '.join(loaded)} imported at startup (they must be imported on demand)")
+    if total > options.budget:
+        failures.append(f"import time {total:.1f} ms over the budget of {options.budget:.1f} ms")
+
+    for failure in failures:
+        print(f"FAIL -> {failure}")
+    if not failures:
+        print(f"OK   -> within the budget of {options.budget:.1f} ms")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m Benchmarks.import_time [--budget MS] [--runs N]
+    main()
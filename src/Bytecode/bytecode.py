@@ -0,0 +1,314 @@
+from array import array
+from Runtime.values import Function, display
+
+
+# Opcodes of the stack machine, an instruction is its opcode followed by its operands
+# in the code array (the operands are indexes of the pools, slots, sites or targets)
+LOAD_CONST = 0          # const: push a constant
+LOAD_STRING = 1         # string: push a string
+LOAD_LOCAL = 2          # slot: push a local variable
+STORE_LOCAL = 3         # slot: store the top in a local variable (it stays on the stack)
+LOAD_GLOBAL = 4         # slot: push a global variable
+STORE_GLOBAL = 5        # slot: store the top in a global variable (it stays on the stack)
+POP = 6                 # drop the top
+ADD = 7
+SUBTRACT = 8
+MULTIPLY = 9
+DIVIDE = 10
+MODULO = 11
+NEGATE = 12
+NOT = 13
+EQUAL = 14
+NOT_EQUAL = 15
+LESS = 16
+LESS_EQUAL = 17
+GREATER = 18
+GREATER_EQUAL = 19
+JUMP = 20               # target
+JUMP_IF_FALSE = 21      # target: pop the top, jump if it is false
+JUMP_IF_FALSE_OR_POP = 22   # target: jump if the top is false (and), pop it otherwise
+JUMP_IF_TRUE_OR_POP = 23    # target: jump if the top is true (or), pop it otherwise
+CALL = 24               # count: call the value under the arguments
+CALL_METHOD = 25        # string, count, site: call a method of the instance under the arguments
+GET_ATTRIBUTE = 26      # string, site: replace the instance on top with its attribute
+SET_ATTRIBUTE = 27      # string, site: pop the value and the instance, set the attribute, push the value
+GET_SUPER = 28          # string: replace this on top with the method of the parent class bound to it
+INDEX = 29              # replace the value and the position on top with the indexed character
+MAKE_CLASS = 30         # const: replace the parent class on top (nil if none) with a new class
+PRINT = 31              # pop the top and print it
+RETURN = 32             # return the top
+RETURN_NIL = 33         # return nil
+
+# Superinstructions, the pairs of instructions the generated code repeats the most
+# fused into one (see fuse)
+ADD_LOCAL = 34          # slot: LOAD_LOCAL slot, ADD
+ADD_CONST = 35          # const: LOAD_CONST const, ADD
+SUBTRACT_CONST = 36     # const: LOAD_CONST const, SUBTRACT
+LOAD_LOCAL_LOCAL = 37   # slot, slot: LOAD_LOCAL slot, LOAD_LOCAL slot
+STORE_LOCAL_POP = 38    # slot: STORE_LOCAL slot, POP
+STORE_GLOBAL_POP = 39   # slot: STORE_GLOBAL slot, POP
+GET_LOCAL_ATTRIBUTE = 40    # slot, string, site: LOAD_LOCAL slot, GET_ATTRIBUTE (this.attribute)
+JUMP_IF_NOT_EQUAL = 41      # target: EQUAL, JUMP_IF_FALSE
+JUMP_IF_EQUAL = 42          # target: NOT_EQUAL, JUMP_IF_FALSE
+JUMP_IF_NOT_LESS = 43       # target: LESS, JUMP_IF_FALSE
+JUMP_IF_NOT_LESS_EQUAL = 44     # target: LESS_EQUAL, JUMP_IF_FALSE
+JUMP_IF_NOT_GREATER = 45        # target: GREATER, JUMP_IF_FALSE
+JUMP_IF_NOT_GREATER_EQUAL = 46  # target: GREATER_EQUAL, JUMP_IF_FALSE
+
+# Name and number of operands of each opcode
+OPCODES = {
+    LOAD_CONST: ("LOAD_CONST", 1), LOAD_STRING: ("LOAD_STRING", 1),
+    LOAD_LOCAL: ("LOAD_LOCAL", 1), STORE_LOCAL: ("STORE_LOCAL", 1),
+    LOAD_GLOBAL: ("LOAD_GLOBAL", 1), STORE_GLOBAL: ("STORE_GLOBAL", 1), POP: ("POP", 0),
+    ADD: ("ADD", 0), SUBTRACT: ("SUBTRACT", 0), MULTIPLY: ("MULTIPLY", 0), DIVIDE: ("DIVIDE", 0), MODULO: ("MODULO", 0),
+    NEGATE: ("NEGATE", 0), NOT: ("NOT", 0),
+    EQUAL: ("EQUAL", 0), NOT_EQUAL: ("NOT_EQUAL", 0), LESS: ("LESS", 0), LESS_EQUAL: ("LESS_EQUAL", 0),
+    GREATER: ("GREATER", 0), GREATER_EQUAL: ("GREATER_EQUAL", 0),
+    JUMP: ("JUMP", 1), JUMP_IF_FALSE: ("JUMP_IF_FALSE", 1),
+    JUMP_IF_FALSE_OR_POP: ("JUMP_IF_FALSE_OR_POP", 1), JUMP_IF_TRUE_OR_POP: ("JUMP_IF_TRUE_OR_POP", 1),
+    CALL: ("CALL", 1), CALL_METHOD: ("CALL_METHOD", 3),
+    GET_ATTRIBUTE: ("GET_ATTRIBUTE", 2), SET_ATTRIBUTE: ("SET_ATTRIBUTE", 2), GET_SUPER: ("GET_SUPER", 1),
+    INDEX: ("INDEX", 0), MAKE_CLASS: ("MAKE_CLASS", 1), PRINT: ("PRINT", 0),
+    RETURN: ("RETURN", 0), RETURN_NIL: ("RETURN_NIL", 0),
+    ADD_LOCAL: ("ADD_LOCAL", 1), ADD_CONST: ("ADD_CONST", 1), SUBTRACT_CONST: ("SUBTRACT_CONST", 1),
+    LOAD_LOCAL_LOCAL: ("LOAD_LOCAL_LOCAL", 2), STORE_LOCAL_POP: ("STORE_LOCAL_POP", 1),
+    STORE_GLOBAL_POP: ("STORE_GLOBAL_POP", 1), GET_LOCAL_ATTRIBUTE: ("GET_LOCAL_ATTRIBUTE", 3),
+    JUMP_IF_NOT_EQUAL: ("JUMP_IF_NOT_EQUAL", 1), JUMP_IF_EQUAL: ("JUMP_IF_EQUAL", 1),
+    JUMP_IF_NOT_LESS: ("JUMP_IF_NOT_LESS", 1), JUMP_IF_NOT_LESS_EQUAL: ("JUMP_IF_NOT_LESS_EQUAL", 1),
+    JUMP_IF_NOT_GREATER: ("JUMP_IF_NOT_GREATER", 1), JUMP_IF_NOT_GREATER_EQUAL: ("JUMP_IF_NOT_GREATER_EQUAL", 1),
+}
+
+# Opcodes whose operand is a label (replaced with its position when the code is assembled)
+JUMPS = {
+    JUMP, JUMP_IF_FALSE, JUMP_IF_FALSE_OR_POP, JUMP_IF_TRUE_OR_POP,
+    JUMP_IF_NOT_EQUAL, JUMP_IF_EQUAL, JUMP_IF_NOT_LESS, JUMP_IF_NOT_LESS_EQUAL,
+    JUMP_IF_NOT_GREATER, JUMP_IF_NOT_GREATER_EQUAL,
+}
+
+# Pairs fused into a superinstruction that keeps the operands of both instructions,
+# the ones whose second instruction is an operation are fused first, so in
+# LOAD_LOCAL a, LOAD_LOCAL b, ADD the second load is fused with the ADD
+OPERATION_PAIRS = {
+    (LOAD_LOCAL, ADD): ADD_LOCAL,
+    (LOAD_CONST, ADD): ADD_CONST,
+    (LOAD_CONST, SUBTRACT): SUBTRACT_CONST,
+    (STORE_LOCAL, POP): STORE_LOCAL_POP,
+    (STORE_GLOBAL, POP): STORE_GLOBAL_POP,
+    (LOAD_LOCAL, GET_ATTRIBUTE): GET_LOCAL_ATTRIBUTE,
+    (EQUAL, JUMP_IF_FALSE): JUMP_IF_NOT_EQUAL,
+    (NOT_EQUAL, JUMP_IF_FALSE): JUMP_IF_EQUAL,
+    (LESS, JUMP_IF_FALSE): JUMP_IF_NOT_LESS,
+    (LESS_EQUAL, JUMP_IF_FALSE): JUMP_IF_NOT_LESS_EQUAL,
+    (GREATER, JUMP_IF_FALSE): JUMP_IF_NOT_GREATER,
+    (GREATER_EQUAL, JUMP_IF_FALSE): JUMP_IF_NOT_GREATER_EQUAL,
+}
+LOAD_PAIRS = {
+    (LOAD_LOCAL, LOAD_LOCAL): LOAD_LOCAL_LOCAL,
+}
+
+
+class Label():
+    """
+    A position of the code that jumps refer to before it is assembled
+    """
+    __slots__ = ("position",)
+
+    def __init__(self):
+        self.position = None
+
+
+class ClassTemplate():
+    """
+    What MAKE_CLASS needs to create a class: its name, its methods and the attributes
+    the semantic analyzer found for it (the initial layout of its instances)
+    """
+
+    def __init__(self, name, methods, attributes):
+        self.name = name
+        self.methods = methods
+        self.attributes = attributes
+
+    def __repr__(self):
+        return f"<class {self.name}>"
+
+
+class CodeObject():
+    """
+    The bytecode of a function (or of the top level of the program)
+
+    Attr:
+        name (str): The name of the function ("<script>" for the top level)
+        arity (int): The number of parameters (this is not counted)
+        locals (int): The number of local slots (this, the parameters and the variables)
+        code (array): The instructions, each opcode followed by its operands
+        lines (array): The line of the source of each word of the code
+        caches (list[list]): The inline cache of each site, [class, position or method]
+    """
+
+    def __init__(self, name, arity, locals, code, lines, sites):
+        self.name = name
+        self.arity = arity
+        self.locals = locals
+        self.code = code
+        self.lines = lines
+        self.caches = [[None, None] for _ in range(sites)]
+
+
+    def line(self, pc):
+        """
+        Returns the line of the source of the instruction at pc
+        """
+        return self.lines[pc] if 0 <= pc < len(self.lines) else None
+
+
+class Assembler():
+    """
+    Collects the instructions of a function while it is generated and assembles them
+    into a CodeObject. The instructions are kept as (opcode, operands, line) until the
+    function is complete, so the pairs can be fused into superinstructions and the
+    labels placed before the jumps are resolved.
+
+    Attr:
+        instructions (list): The instructions and the Labels placed between them
+        sites (int): The number of inline cache sites handed out
+    """
+
+    def __init__(self):
+        self.instructions = []
+        self.sites = 0
+
+
+    def emit(self, opcode, *operands, line=None):
+        self.instructions.append((opcode, operands, line))
+
+
+    def place(self, label:Label):
+        """
+        Places a label before the next instruction
+        """
+        self.instructions.append(label)
+
+
+    def site(self):
+        """
+        Returns a new inline cache site
+        """
+        self.sites += 1
+        return self.sites - 1
+
+
+    def assemble(self, name, arity, locals, superinstructions=True):
+        """
+        Returns the CodeObject of the instructions
+
+        Args:
+            superinstructions (bool): Fuse the pairs of instructions (see fuse)
+        """
+        instructions = self.instructions
+        if superinstructions:
+            instructions = fuse(fuse(instructions, OPERATION_PAIRS), LOAD_PAIRS)
+
+        # Place the labels, then write the code with the positions of the labels
+        position = 0
+        for instruction in instructions:
+            if type(instruction) is Label:
+                instruction.position = position
+            else:
+                position += 1 + len(instruction[1])
+
+        code = array("i")
+        lines = array("i")
+        for instruction in instructions:
+            if type(instruction) is Label:
+                continue
+            opcode, operands, line = instruction
+            if opcode in JUMPS:
+                operands = (operands[0].position,)
+            code.append(opcode)
+            code.extend(operands)
+            lines.extend([line if line is not None else -1] * (1 + len(operands)))
+        return CodeObject(name, arity, locals, code, lines, self.sites)
+
+
+def fuse(instructions, pairs):
+    """
+    Replaces the adjacent pairs of instructions with their superinstruction, a pair
+    isn't fused if there is a label between them (a jump lands on the second one)
+    """
+    fused = []
+    index = 0
+    while index < len(instructions):
+        instruction = instructions[index]
+        following = instructions[index + 1] if index + 1 < len(instructions) else None
+        if type(instruction) is not Label and following is not None and type(following) is not Label:
+            superinstruction = pairs.get((instruction[0], following[0]))
+            if superinstruction is not None:
+                # The line is the one of the instruction that can fail (the loads can't)
+                line = following[2] if instruction[0] in (LOAD_LOCAL, LOAD_CONST) else instruction[2]
+                fused.append((superinstruction, instruction[1] + following[1], line))
+                index += 2
+                continue
+        fused.append(instruction)
+        index += 1
+    return fused
+
+
+class BytecodeProgram():
+    """
+    A program compiled to bytecode (see BytecodeGenerator)
+
+    Attr:
+        script (CodeObject): The code of the top level of the program
+        constants (list): The constant pool (numbers, booleans, nil, functions and classes)
+        strings (list[str]): The string pool (the string literals and the names of the
+            attributes and methods)
+        globals (list[str]): The names of the global variables by their slot
+    """
+
+    def __init__(self, script, constants, strings, globals):
+        self.script = script
+        self.constants = constants
+        self.strings = strings
+        self.globals = globals
+
+
+    def code_objects(self):
+        """
+        Returns the code of the top level and of every function of the program
+        """
+        code_objects = [self.script]
+        for constant in self.constants:
+            if type(constant) is Function:
+                code_objects.append(constant.code)
+            elif type(constant) is ClassTemplate:
+                code_objects.extend(method.code for method in constant.methods)
+        return code_objects
+
+
+    def disassemble(self):
+        """
+        Returns the text of the code of the program, a section for each function
+        """
+        return "\n\n".join(f"{code_object.name}:\n{disassemble(code_object, self.constants, self.strings)}" for code_object in self.code_objects())
+
+
+def disassemble(code_object:CodeObject, constants, strings):
+    """
+    Returns the text of the instructions of a CodeObject, one per line
+    """
+    lines = []
+    code = code_object.code
+    pc = 0
+    while pc < len(code):
+        name, count = OPCODES[code[pc]]
+        operands = list(code[pc + 1:pc + 1 + count])
+        comment = ""
+        if code[pc] in (LOAD_CONST, ADD_CONST, SUBTRACT_CONST, MAKE_CLASS):
+            comment = f"  # {display(constants[operands[0]])}"
+        elif code[pc] in (LOAD_STRING, GET_SUPER, CALL_METHOD, GET_ATTRIBUTE, SET_ATTRIBUTE):
+            comment = f"  # {strings[operands[0]]!r}"
+        elif code[pc] == GET_LOCAL_ATTRIBUTE:
+            comment = f"  # {strings[operands[1]]!r}"
+        lines.append(f"{pc:5} {name} {' '.join(map(str, operands))}{comment}".rstrip())
+        pc += 1 + count
+    return "\n".join(lines)
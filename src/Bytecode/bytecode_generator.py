@@ -0,0 +1,429 @@
+from SyntaxTree.visitor import ASTVisitor
+from SyntaxTree.nodes import *
+from SyntaxTree import tokens
+from SyntaxTree.tokens import STRING, LEFT_PAREN, DOT, LEFT_BRACKET, BANG
+from Runtime.values import Function, literal
+from Bytecode.bytecode import *
+
+
+# Opcode of each binary operator (the comparison tokens and opcodes share their names)
+BINARY_OPCODES = {
+    tokens.EQUAL_EQUAL: EQUAL, tokens.BANG_EQUAL: NOT_EQUAL,
+    tokens.LESS: LESS, tokens.LESS_EQUAL: LESS_EQUAL, tokens.GREATER: GREATER, tokens.GREATER_EQUAL: GREATER_EQUAL,
+    tokens.PLUS: ADD, tokens.MINUS: SUBTRACT, tokens.STAR: MULTIPLY, tokens.SLASH: DIVIDE, tokens.PERCENT: MODULO,
+}
+
+
+class FunctionState():
+    """
+    The function being generated
+
+    Attr:
+        name (str): The name of the function
+        enclosing (FunctionState): The function it is declared in (None for the top level)
+        assembler (Assembler): Its instructions
+        scopes (list[dict]): The local variables of the open blocks by their name, and their slot
+        locals (int): The number of local slots handed out
+    """
+
+    def __init__(self, name, enclosing):
+        self.name = name
+        self.enclosing = enclosing
+        self.assembler = Assembler()
+        self.scopes = []
+        self.locals = 0
+
+
+    def declare(self, name):
+        """
+        Declares a local variable in the innermost block and returns its slot
+        (the slots aren't reused, a block closed doesn't free them)
+        """
+        slot = self.scopes[-1][name] = self.locals
+        self.locals += 1
+        return slot
+
+
+    def lookup(self, name):
+        """
+        Returns the slot of a local variable (None if it isn't one of this function)
+        """
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+
+class BytecodeGenerator(ASTVisitor):
+    """
+    Compiles the syntax tree into the bytecode of a stack machine (see bytecode.py and vm.py).
+
+    Like the IntermediateCodeGenerator it runs after the semantic analysis, the classes
+    get the attributes of their symbol (see Class.attributes) as the initial layout of
+    their instances. Each variable is resolved to a slot when it is compiled: the
+    declarations of the top level are globals and the rest locals of their function
+    (this is the slot 0 of the methods). The functions don't capture the variables of
+    the functions they are declared in, using one is a compile error.
+
+    Attr:
+        symbol_table (list): The symbols of the semantic analyzer
+        annotations (Annotations): The symbols of the nodes
+        superinstructions (bool): Fuse the common pairs of instructions (see bytecode.fuse)
+        constants (list): The constant pool
+        strings (list[str]): The string pool
+        globals (dict): The slot of each global variable by its name
+        function (FunctionState): The function being generated
+        program (BytecodeProgram): The compiled program (after visiting the Program)
+    """
+
+    def __init__(self, symbol_table, annotations, superinstructions=True):
+        self.symbol_table = symbol_table
+        self.annotations = annotations
+        self.superinstructions = superinstructions
+        self.constants = []
+        self.constant_indexes = {}      # The index of each number, boolean and nil of the pool
+        self.strings = []
+        self.string_indexes = {}        # The index of each string of the pool
+        self.globals = {}
+        self.function = None
+        self.program = None
+
+
+    def emit(self, opcode, *operands, node=None):
+        self.function.assembler.emit(opcode, *operands, line=node.line if node is not None else None)
+
+
+    def constant(self, value):
+        """
+        Returns the index of a value in the constant pool (the functions and classes are
+        added every time, the other values once)
+        """
+        if type(value) in (Function, ClassTemplate):
+            self.constants.append(value)
+            return len(self.constants) - 1
+        key = (type(value), value)
+        if key not in self.constant_indexes:
+            self.constant_indexes[key] = len(self.constants)
+            self.constants.append(value)
+        return self.constant_indexes[key]
+
+
+    def string(self, value):
+        """
+        Returns the index of a string in the string pool
+        """
+        if value not in self.string_indexes:
+            self.string_indexes[value] = len(self.strings)
+            self.strings.append(value)
+        return self.string_indexes[value]
+
+
+    def site(self):
+        """
+        Returns a new inline cache site of the function being generated
+        """
+        return self.function.assembler.site()
+
+
+    def declare(self, name):
+        """
+        Declares a variable in the current block and returns its store instruction
+        """
+        if self.function.enclosing is None and not self.function.scopes:
+            return STORE_GLOBAL, self.globals[name]
+        return STORE_LOCAL, self.function.declare(name)
+
+
+    def resolve(self, name, node):
+        """
+        Returns the (load, store) opcodes and the slot of a variable
+        """
+        slot = self.function.lookup(name)
+        if slot is not None:
+            return LOAD_LOCAL, STORE_LOCAL, slot
+        enclosing = self.function.enclosing
+        while enclosing is not None:
+            if enclosing.lookup(name) is not None:
+                raise Exception(f"Line {node.line}: {self.function.name} uses {name} of {enclosing.name}, the functions can't capture the variables of other functions")
+            enclosing = enclosing.enclosing
+        if name in self.globals:
+            return LOAD_GLOBAL, STORE_GLOBAL, self.globals[name]
+        if name == "this":
+            raise Exception(f"Line {node.line}: this used outside of a method")
+        raise Exception(f"Line {node.line}: Variable {name} not found")
+
+
+    def load(self, name, node):
+        load, _, slot = self.resolve(name, node)
+        self.emit(load, slot, node=node)
+
+
+    def function_value(self, name, parameters, body, node, method=False):
+        """
+        Generates a function and returns it
+
+        Args:
+            method (bool): The function is a method (this is its slot 0)
+        """
+        function = FunctionState(name, self.function)
+        function.scopes.append({})
+        if method:
+            function.declare("this")
+        names = parameters.names if parameters is not None else []
+        for parameter in names:
+            function.declare(parameter)
+
+        self.function = function
+        yield body
+        self.emit(RETURN_NIL, node=node)
+        self.function = function.enclosing
+
+        code = function.assembler.assemble(name, len(names), function.locals, self.superinstructions)
+        return Function(name, len(names), code)
+
+
+    def visitProgram(self, node:Program):
+        # The declarations of the top level are the globals
+        for declaration in node.declarations:
+            if type(declaration) in (VarDecl, FunDecl, ClassDecl) and declaration.name not in self.globals:
+                self.globals[declaration.name] = len(self.globals)
+
+        self.function = FunctionState("<script>", None)
+        for declaration in node.declarations:
+            yield declaration
+        self.emit(RETURN_NIL, node=node)
+        script = self.function.assembler.assemble("<script>", 0, self.function.locals, self.superinstructions)
+        self.function = None
+
+        self.program = BytecodeProgram(script, self.constants, self.strings, list(self.globals))
+        return self.program
+
+
+    def visitClassDecl(self, node:ClassDecl):
+        # The class is declared before its methods, so they can refer to it
+        store, slot = self.declare(node.name)
+
+        # The methods are generated as functions with this in the slot 0
+        methods = []
+        for method in node.methods:
+            methods.append((yield from self.function_value(method.name, method.parameters, method.body, method, method=True)))
+
+        # The initial layout of the instances is the attributes found by the semantic analyzer
+        symbol = self.annotations.symbol(node)
+        attributes = [attribute.id for attribute in symbol.attributes] if symbol is not None else []
+
+        if node.parent is not None:
+            self.load(node.parent, node)
+        else:
+            self.emit(LOAD_CONST, self.constant(None), node=node)
+        self.emit(MAKE_CLASS, self.constant(ClassTemplate(node.name, methods, attributes)), node=node)
+        self.emit(store, slot, node=node)
+        self.emit(POP, node=node)
+
+
+    def visitFunDecl(self, node:FunDecl):
+        # The function is declared before its body, so it can call itself
+        store, slot = self.declare(node.name)
+        function = yield from self.function_value(node.name, node.parameters, node.body, node)
+        self.emit(LOAD_CONST, self.constant(function), node=node)
+        self.emit(store, slot, node=node)
+        self.emit(POP, node=node)
+
+
+    def visitFunAnon(self, node:FunAnon):
+        function = yield from self.function_value("anonymous", node.parameters, node.body, node)
+        self.emit(LOAD_CONST, self.constant(function), node=node)
+
+
+    def visitVarDecl(self, node:VarDecl):
+        # The initializer is evaluated before the variable is declared
+        if node.value is not None:
+            yield node.value
+        else:
+            self.emit(LOAD_CONST, self.constant(None), node=node)
+        store, slot = self.declare(node.name)
+        self.emit(store, slot, node=node)
+        self.emit(POP, node=node)
+
+
+    def visitBlock(self, node:Block):
+        self.function.scopes.append({})
+        for declaration in node.declarations:
+            yield declaration
+        self.function.scopes.pop()
+
+
+    def visitExprStmt(self, node:ExprStmt):
+        yield node.expression
+        self.emit(POP, node=node)
+
+
+    def visitIfStmt(self, node:IfStmt):
+        otherwise, end = Label(), Label()
+        yield node.condition
+        self.emit(JUMP_IF_FALSE, otherwise, node=node)
+        yield node.then_branch
+        if node.else_branch is not None:
+            self.emit(JUMP, end, node=node)
+        self.function.assembler.place(otherwise)
+        if node.else_branch is not None:
+            yield node.else_branch
+            self.function.assembler.place(end)
+
+
+    def visitWhileStmt(self, node:WhileStmt):
+        start, end = Label(), Label()
+        self.function.assembler.place(start)
+        yield node.condition
+        self.emit(JUMP_IF_FALSE, end, node=node)
+        yield node.body
+        self.emit(JUMP, start, node=node)
+        self.function.assembler.place(end)
+
+
+    def visitForStmt(self, node:ForStmt):
+        # The variable of the initializer is local to the loop
+        self.function.scopes.append({})
+        if node.initializer is not None:
+            yield node.initializer
+        start, end = Label(), Label()
+        self.function.assembler.place(start)
+        if node.condition is not None:
+            yield node.condition
+            self.emit(JUMP_IF_FALSE, end, node=node)
+        yield node.body
+        if node.increment is not None:
+            yield node.increment
+            self.emit(POP, node=node)
+        self.emit(JUMP, start, node=node)
+        self.function.assembler.place(end)
+        self.function.scopes.pop()
+
+
+    def visitReturnStmt(self, node:ReturnStmt):
+        if node.value is None:
+            self.emit(RETURN_NIL, node=node)
+            return
+        yield node.value
+        self.emit(RETURN, node=node)
+
+
+    def visitPrintStmt(self, node:PrintStmt):
+        yield node.expression
+        self.emit(PRINT, node=node)
+
+
+    def visitAssignment(self, node:Assignment):
+        # The assigned value stays on the stack (an assignment is an expression)
+        if node.target is None:
+            yield node.value
+            _, store, slot = self.resolve(node.name, node)
+            self.emit(store, slot, node=node)
+            return
+        yield node.target
+        yield node.value
+        self.emit(SET_ATTRIBUTE, self.string(node.name), self.site(), node=node)
+
+
+    def visitLogicOr(self, node:LogicOr):
+        # The first true operand is the result, the rest aren't evaluated
+        end = Label()
+        yield node.operands[0]
+        for operand in node.operands[1:]:
+            self.emit(JUMP_IF_TRUE_OR_POP, end, node=node)
+            yield operand
+        self.function.assembler.place(end)
+
+
+    def visitLogicAnd(self, node:LogicAnd):
+        # The first false operand is the result, the rest aren't evaluated
+        end = Label()
+        yield node.operands[0]
+        for operand in node.operands[1:]:
+            self.emit(JUMP_IF_FALSE_OR_POP, end, node=node)
+            yield operand
+        self.function.assembler.place(end)
+
+
+    def visitBinary(self, node:Binary):
+        yield node.operands[0]
+        for operator, operand in zip(node.operators, node.operands[1:]):
+            yield operand
+            self.emit(BINARY_OPCODES[operator], node=node)
+
+
+    def visitEquality(self, node:Equality):
+        return self.visitBinary(node)
+
+    def visitComparison(self, node:Comparison):
+        return self.visitBinary(node)
+
+    def visitTerm(self, node:Term):
+        return self.visitBinary(node)
+
+    def visitFactor(self, node:Factor):
+        return self.visitBinary(node)
+
+
+    def visitUnary(self, node:Unary):
+        yield node.operand
+        self.emit(NOT if node.operator == BANG else NEGATE, node=node)
+
+
+    def visitCall(self, node:Call):
+        yield node.callee
+        suffixes = node.suffixes
+        position = 0
+        while position < len(suffixes):
+            operator, operand = suffixes[position]
+            if operator == DOT and position + 1 < len(suffixes) and suffixes[position + 1][0] == LEFT_PAREN:
+                # A method call (receiver.name(...)) looks the method up once, with an inline cache
+                arguments = suffixes[position + 1][1]
+                count = (yield arguments) if arguments is not None else 0
+                self.emit(CALL_METHOD, self.string(operand), count, self.site(), node=node)
+                position += 2
+                continue
+            if operator == DOT:
+                self.emit(GET_ATTRIBUTE, self.string(operand), self.site(), node=node)
+            elif operator == LEFT_PAREN:
+                count = (yield operand) if operand is not None else 0
+                self.emit(CALL, count, node=node)
+            elif operator == LEFT_BRACKET:
+                yield operand
+                self.emit(INDEX, node=node)
+            position += 1
+
+
+    def visitArguments(self, node:Arguments):
+        # The arguments are pushed in order, the count is returned to the call
+        for expression in node.expressions:
+            yield expression
+        return len(node.expressions)
+
+
+    def visitLiteral(self, node:Literal):
+        if node.kind == STRING:
+            self.emit(LOAD_STRING, self.string(literal(node.kind, node.value)), node=node)
+        else:
+            self.emit(LOAD_CONST, self.constant(literal(node.kind, node.value)), node=node)
+
+
+    def visitIdentifier(self, node:Identifier):
+        self.load(node.name, node)
+
+
+    def visitThis(self, node:This):
+        self.load("this", node)
+
+
+    def visitSuper(self, node:Super):
+        # The method of the parent of the class of the running method, bound to this
+        self.load("this", node)
+        self.emit(GET_SUPER, self.string(node.name), node=node)
+
+
+    def visitInstantiation(self, node:Instantiation):
+        # Calling a class creates an instance and runs its init
+        self.load(node.name, node)
+        count = (yield node.arguments) if node.arguments is not None else 0
+        self.emit(CALL, count, node=node)
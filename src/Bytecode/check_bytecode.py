@@ -0,0 +1,127 @@
+import io
+import sys
+import glob
+import time
+import contextlib
+from antlr4 import FileStream, CommonTokenStream
+from Lexer.fast_lexer import FastLexer
+from Parser.fast_parser import FastParser
+from SemanticAnalyzer.semantic_analyzer import SemanticAnalyzer
+from IntermediateCode.ci_generator import IntermediateCodeGenerator
+from Runtime.program import Program, ExecutionError
+from Runtime.threaded_code import ThreadedCode
+from Runtime.values import ScriptError
+from Bytecode.bytecode_generator import BytecodeGenerator
+from Bytecode.vm import VirtualMachine
+
+
+# Programs the bytecode is benchmarked with against the semi-MIPS code
+BENCHMARKS = ["src/Input/fibonacci.cspt", "src/Input/ackerman.cspt"]
+
+# Runs of each benchmark (the best time is kept)
+REPEAT = 20
+
+
+def analyze(path):
+    """
+    Parses and analyzes a source file, returns its syntax tree and semantic analyzer
+    """
+    tree = FastParser(CommonTokenStream(FastLexer(FileStream(path)))).program()
+    with contextlib.redirect_stdout(io.StringIO()):
+        semantic_analyzer = SemanticAnalyzer()
+        semantic_analyzer.visit(tree)
+    return tree, semantic_analyzer
+
+
+def run_bytecode(tree, semantic_analyzer, superinstructions=True):
+    """
+    Compiles the program to bytecode and runs it, returns what it printed, the error
+    that stopped it (None if it ended), the program and the time it took
+    """
+    output = io.StringIO()
+    start = time.perf_counter()
+    generator = BytecodeGenerator(semantic_analyzer.symbol_table, semantic_analyzer.annotations, superinstructions)
+    generator.visit(tree)
+    try:
+        VirtualMachine(generator.program).run(output)
+        error = None
+    except ScriptError as e:
+        error = e
+    return output.getvalue(), error, generator.program, time.perf_counter() - start
+
+
+def run_semi_mips(tree, semantic_analyzer):
+    """
+    Generates the intermediate code of the program and runs it as threaded code, returns
+    what it printed, the error that stopped it (None if it ended) and the time it took
+    """
+    output = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ci_generator = IntermediateCodeGenerator(semantic_analyzer.symbol_table, semantic_analyzer.annotations)
+        ci_generator.visit(tree)
+    program = Program.from_generator(ci_generator.instruction_generator, semantic_analyzer.symbol_table)
+    try:
+        ThreadedCode(program).run(output)
+        error = None
+    except ExecutionError as e:
+        error = e
+    return output.getvalue(), error, time.perf_counter() - start
+
+
+def size(program):
+    """
+    Returns the number of words of the code of a BytecodeProgram
+    """
+    return sum(len(code_object.code) for code_object in program.code_objects())
+
+
+def status(output, error):
+    result = "runs" if error is None else f"stops at line {error.line}"
+    return f"{result}, {output.count(chr(10))} lines printed"
+
+
+def main():
+    # Check every source file under the input directory (src/Input by default)
+    directory = sys.argv[1] if len(sys.argv) > 1 else "src/Input"
+    paths = sorted(glob.glob(f"{directory}/**/*.cspt", recursive=True))
+
+    failures = checks = 0
+    for path in paths:
+        try:
+            tree, semantic_analyzer = analyze(path)
+        except Exception as e:
+            print(f"SKIP {path} -> {e}")
+            continue
+
+        # The superinstructions don't change what the program does
+        checks += 1
+        expected, expected_error, plain, _ = run_bytecode(tree, semantic_analyzer, superinstructions=False)
+        got, error, fused, _ = run_bytecode(tree, semantic_analyzer)
+        if (got, str(error)) != (expected, str(expected_error)):
+            failures += 1
+            print(f"FAIL {path} -> the superinstructions change the output")
+            continue
+        print(f"DONE {path} ({status(got, error)}, {size(fused)} words of code, {size(plain)} without superinstructions)")
+    print(f"{checks - failures}/{checks} programs run the same with and without superinstructions")
+
+    # Compile and run time of the bytecode and of the semi-MIPS code (the intermediate
+    # code run as threaded code, see Runtime/threaded_code.py) from the analyzed tree
+    for path in BENCHMARKS:
+        tree, semantic_analyzer = analyze(path)
+        bytecode = semi_mips = None
+        for _ in range(REPEAT):
+            output, error, _, elapsed = run_bytecode(tree, semantic_analyzer)
+            bytecode = min(bytecode or elapsed, elapsed)
+            mips_output, mips_error, elapsed = run_semi_mips(tree, semantic_analyzer)
+            semi_mips = min(semi_mips or elapsed, elapsed)
+        print(f"BENCHMARK {path}: bytecode {bytecode * 1000:.2f} ms ({status(output, error)}), "
+              f"semi-MIPS {semi_mips * 1000:.2f} ms ({status(mips_output, mips_error)})")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m Bytecode.check_bytecode [directory]
+    main()
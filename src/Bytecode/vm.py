@@ -0,0 +1,372 @@
+import sys
+from Runtime.values import (
+    ScriptError, Function, BoundMethod, RuntimeClass, Instance, MAX_CALL_DEPTH,
+    display, add, subtract, multiply, divide, modulo, negate, equal, compare, index,
+    get_attribute, set_attribute, find_method, check_arity,
+)
+from Bytecode.bytecode import *
+
+
+class VirtualMachine():
+    """
+    Runs a BytecodeProgram on a stack machine.
+
+    Each call gets a frame with its own operand stack and a list with its local slots,
+    the frames of the callers are kept in a list (not on the Python stack), so the depth
+    of the recursion is only limited by MAX_CALL_DEPTH. The loop dispatches on the
+    opcode with the most frequent instructions tested first.
+
+    The attribute accesses and the method calls have an inline cache in their site
+    (see CodeObject.caches): the class of the last instance seen there and the
+    position of the attribute in its layout (or the method found). While the site sees
+    instances of that class the attribute is read from its position and the method
+    called without looking them up.
+
+    Attr:
+        program (BytecodeProgram): The program to run
+    """
+
+    def __init__(self, program:BytecodeProgram):
+        self.program = program
+
+
+    def run(self, output=None):
+        """
+        Runs the program, the lines it prints are written to output (stdout by default)
+        """
+        write = (output or sys.stdout).write
+        constants = self.program.constants
+        strings = self.program.strings
+        globals_ = [None] * len(self.program.globals)
+        frames = []                 # The frames of the callers
+
+        # The frame running
+        function = None             # Its function (None for the top level)
+        code_object = self.program.script
+        code = code_object.code
+        caches = code_object.caches
+        locals_ = [None] * code_object.locals
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        constructor = None          # The instance it returns if it is an init
+        pc = 0
+
+        try:
+            while True:
+                opcode = code[pc]
+
+                if opcode == LOAD_LOCAL:
+                    push(locals_[code[pc + 1]])
+                    pc += 2
+                elif opcode == LOAD_CONST:
+                    push(constants[code[pc + 1]])
+                    pc += 2
+                elif opcode == LOAD_GLOBAL:
+                    push(globals_[code[pc + 1]])
+                    pc += 2
+                elif opcode == GET_LOCAL_ATTRIBUTE:
+                    instance = locals_[code[pc + 1]]
+                    cache = caches[code[pc + 3]]
+                    if type(instance) is Instance and cache[0] is instance.cls:
+                        values = instance.values
+                        position = cache[1]
+                        push(values[position] if position < len(values) else None)
+                    else:
+                        push(self.get_attribute(instance, strings[code[pc + 2]], cache))
+                    pc += 4
+                elif opcode == STORE_LOCAL_POP:
+                    locals_[code[pc + 1]] = pop()
+                    pc += 2
+                elif opcode == LOAD_LOCAL_LOCAL:
+                    push(locals_[code[pc + 1]])
+                    push(locals_[code[pc + 2]])
+                    pc += 3
+                elif opcode == ADD_CONST:
+                    left = pop()
+                    right = constants[code[pc + 1]]
+                    push(left + right if type(left) is int and type(right) is int else add(left, right))
+                    pc += 2
+                elif opcode == SUBTRACT_CONST:
+                    left = pop()
+                    right = constants[code[pc + 1]]
+                    push(left - right if type(left) is int and type(right) is int else subtract(left, right))
+                    pc += 2
+                elif opcode == ADD_LOCAL:
+                    left = pop()
+                    right = locals_[code[pc + 1]]
+                    push(left + right if type(left) is int and type(right) is int else add(left, right))
+                    pc += 2
+                elif opcode == ADD:
+                    right = pop()
+                    left = pop()
+                    push(left + right if type(left) is int and type(right) is int else add(left, right))
+                    pc += 1
+                elif opcode == SUBTRACT:
+                    right = pop()
+                    left = pop()
+                    push(left - right if type(left) is int and type(right) is int else subtract(left, right))
+                    pc += 1
+                elif JUMP_IF_NOT_EQUAL <= opcode <= JUMP_IF_NOT_GREATER_EQUAL:
+                    right = pop()
+                    left = pop()
+                    if opcode == JUMP_IF_NOT_EQUAL:
+                        result = equal(left, right)
+                    elif opcode == JUMP_IF_EQUAL:
+                        result = not equal(left, right)
+                    elif type(left) is int and type(right) is int:
+                        if opcode == JUMP_IF_NOT_LESS:
+                            result = left < right
+                        elif opcode == JUMP_IF_NOT_LESS_EQUAL:
+                            result = left <= right
+                        elif opcode == JUMP_IF_NOT_GREATER:
+                            result = left > right
+                        else:
+                            result = left >= right
+                    else:
+                        result = compare(COMPARISONS[opcode], left, right)
+                    pc = pc + 2 if result else code[pc + 1]
+                elif opcode == JUMP_IF_FALSE:
+                    value = pop()
+                    pc = code[pc + 1] if value is None or value is False else pc + 2
+                elif opcode == JUMP:
+                    pc = code[pc + 1]
+
+                elif opcode == CALL or opcode == CALL_METHOD:
+                    if opcode == CALL:
+                        count = code[pc + 1]
+                        callee = stack[-count - 1]
+                        following = pc + 2
+                        receiver = None
+                        if type(callee) is BoundMethod:
+                            receiver, callee = callee.receiver, callee.method
+                    else:
+                        count = code[pc + 2]
+                        receiver = stack[-count - 1]
+                        following = pc + 4
+                        callee = self.find_method(receiver, strings[code[pc + 1]], caches[code[pc + 3]])
+                        # A function in an attribute of the instance is called without it
+                        if type(callee) is BoundMethod:
+                            receiver, callee = callee.receiver, callee.method
+                        elif type(callee) is not Function or callee.owner is None:
+                            receiver = None
+
+                    arguments = stack[len(stack) - count:]
+                    del stack[len(stack) - count - 1:]
+                    if type(callee) is Function:
+                        check_arity(callee, count)
+                        callee_locals = arguments if receiver is None else [receiver] + arguments
+                        callee_constructor = None
+                    elif type(callee) is RuntimeClass:
+                        # A class creates an instance, its init runs in a frame that returns it
+                        instance = Instance(callee)
+                        callee = callee.methods.get("init")
+                        if callee is None:
+                            if count != 0:
+                                raise ScriptError(f"{instance.cls.name} has no init, it takes 0 arguments, got {count}")
+                            push(instance)
+                            pc = following
+                            continue
+                        check_arity(callee, count)
+                        callee_locals = [instance] + arguments
+                        callee_constructor = instance
+                    else:
+                        raise ScriptError(f"Only the functions and the classes can be called, got {display(callee)}")
+
+                    # Push the frame of the caller and run the one of the callee
+                    if len(frames) >= MAX_CALL_DEPTH:
+                        raise ScriptError("Call stack overflow")
+                    frames.append((function, code_object, following, locals_, stack, constructor))
+                    function = callee
+                    code_object = callee.code
+                    code = code_object.code
+                    caches = code_object.caches
+                    locals_ = callee_locals
+                    if len(locals_) < code_object.locals:
+                        locals_.extend([None] * (code_object.locals - len(locals_)))
+                    stack = []
+                    push = stack.append
+                    pop = stack.pop
+                    constructor = callee_constructor
+                    pc = 0
+
+                elif opcode == RETURN or opcode == RETURN_NIL:
+                    value = pop() if opcode == RETURN else None
+                    if constructor is not None:
+                        value = constructor
+                    if not frames:
+                        return
+                    function, code_object, pc, locals_, stack, constructor = frames.pop()
+                    code = code_object.code
+                    caches = code_object.caches
+                    push = stack.append
+                    pop = stack.pop
+                    push(value)
+
+                elif opcode == STORE_GLOBAL_POP:
+                    globals_[code[pc + 1]] = pop()
+                    pc += 2
+                elif opcode == STORE_LOCAL:
+                    locals_[code[pc + 1]] = stack[-1]
+                    pc += 2
+                elif opcode == STORE_GLOBAL:
+                    globals_[code[pc + 1]] = stack[-1]
+                    pc += 2
+                elif opcode == LOAD_STRING:
+                    push(strings[code[pc + 1]])
+                    pc += 2
+                elif opcode == POP:
+                    pop()
+                    pc += 1
+                elif opcode == GET_ATTRIBUTE:
+                    instance = stack[-1]
+                    cache = caches[code[pc + 2]]
+                    if type(instance) is Instance and cache[0] is instance.cls:
+                        values = instance.values
+                        position = cache[1]
+                        stack[-1] = values[position] if position < len(values) else None
+                    else:
+                        stack[-1] = self.get_attribute(instance, strings[code[pc + 1]], cache)
+                    pc += 3
+                elif opcode == SET_ATTRIBUTE:
+                    value = pop()
+                    instance = stack[-1]
+                    cache = caches[code[pc + 2]]
+                    if type(instance) is Instance and cache[0] is instance.cls:
+                        position = cache[1]
+                    elif type(instance) is Instance:
+                        position = instance.cls.slot(strings[code[pc + 1]])
+                        cache[0] = instance.cls
+                        cache[1] = position
+                    else:
+                        set_attribute(instance, strings[code[pc + 1]], value)
+                    values = instance.values
+                    if position < len(values):
+                        values[position] = value
+                    else:
+                        instance.set(position, value)
+                    stack[-1] = value
+                    pc += 3
+                elif opcode == MULTIPLY:
+                    right = pop()
+                    left = pop()
+                    push(left * right if type(left) is int and type(right) is int else multiply(left, right))
+                    pc += 1
+                elif opcode == DIVIDE:
+                    right = pop()
+                    push(divide(pop(), right))
+                    pc += 1
+                elif opcode == MODULO:
+                    right = pop()
+                    push(modulo(pop(), right))
+                    pc += 1
+                elif EQUAL <= opcode <= GREATER_EQUAL:
+                    right = pop()
+                    left = pop()
+                    if opcode == EQUAL:
+                        push(equal(left, right))
+                    elif opcode == NOT_EQUAL:
+                        push(not equal(left, right))
+                    else:
+                        push(compare(COMPARISONS[opcode], left, right))
+                    pc += 1
+                elif opcode == JUMP_IF_FALSE_OR_POP:
+                    value = stack[-1]
+                    if value is None or value is False:
+                        pc = code[pc + 1]
+                    else:
+                        pop()
+                        pc += 2
+                elif opcode == JUMP_IF_TRUE_OR_POP:
+                    value = stack[-1]
+                    if value is None or value is False:
+                        pop()
+                        pc += 2
+                    else:
+                        pc = code[pc + 1]
+                elif opcode == NOT:
+                    value = stack[-1]
+                    stack[-1] = value is None or value is False
+                    pc += 1
+                elif opcode == NEGATE:
+                    stack[-1] = negate(stack[-1])
+                    pc += 1
+                elif opcode == PRINT:
+                    write(display(pop()) + "\n")
+                    pc += 1
+                elif opcode == INDEX:
+                    position = pop()
+                    stack[-1] = index(stack[-1], position)
+                    pc += 1
+                elif opcode == GET_SUPER:
+                    # The parent of the class that declares the running method
+                    name = strings[code[pc + 1]]
+                    parent = function.owner.parent if function is not None and function.owner is not None else None
+                    method = parent.methods.get(name) if parent is not None else None
+                    if method is None:
+                        raise ScriptError(f"Undefined method {name} of the parent class")
+                    stack[-1] = BoundMethod(stack[-1], method)
+                    pc += 2
+                elif opcode == MAKE_CLASS:
+                    template = constants[code[pc + 1]]
+                    parent = stack[-1]
+                    if parent is not None and type(parent) is not RuntimeClass:
+                        raise ScriptError(f"{template.name} can only extend a class, got {display(parent)}")
+                    stack[-1] = RuntimeClass(template.name, parent, template.methods, template.attributes)
+                    pc += 2
+                else:
+                    raise ScriptError(f"Invalid opcode {opcode}")
+        except ScriptError as e:
+            raise ScriptError(e.message, code_object.line(pc)) from None
+
+
+    def get_attribute(self, instance, name, cache):
+        """
+        Returns an attribute of an instance (or its bound method) and caches its position
+        """
+        if type(instance) is Instance:
+            position = instance.cls.layout.get(name)
+            if position is not None:
+                cache[0] = instance.cls
+                cache[1] = position
+                return instance.get(position)
+        return get_attribute(instance, name)
+
+
+    def find_method(self, instance, name, cache):
+        """
+        Returns the method called by instance.name(...) and caches it for the class
+        """
+        if type(instance) is Instance:
+            if cache[0] is instance.cls:
+                return cache[1]
+            method = instance.cls.methods.get(name)
+            if method is not None:
+                cache[0] = instance.cls
+                cache[1] = method
+                return method
+        return find_method(instance, name)
+
+
+# The comparison of each comparison opcode (and of its jump)
+COMPARISONS = {
+    LESS: "<", LESS_EQUAL: "<=", GREATER: ">", GREATER_EQUAL: ">=",
+    JUMP_IF_NOT_LESS: "<", JUMP_IF_NOT_LESS_EQUAL: "<=", JUMP_IF_NOT_GREATER: ">", JUMP_IF_NOT_GREATER_EQUAL: ">=",
+}
+
+
+def run_program(syntax_tree, symbol_table, annotations, output=None, superinstructions=True):
+    """
+    Compiles an analyzed syntax tree to bytecode and runs it (see BytecodeGenerator)
+
+    Args:
+        syntax_tree (Program): The syntax tree of the program
+        symbol_table (list): The symbols of the semantic analyzer
+        annotations (Annotations): The symbols of the nodes
+        output: The sink of the lines the program prints (stdout by default)
+        superinstructions (bool): Fuse the common pairs of instructions
+    """
+    from Bytecode.bytecode_generator import BytecodeGenerator
+    generator = BytecodeGenerator(symbol_table, annotations, superinstructions)
+    generator.visit(syntax_tree)
+    VirtualMachine(generator.program).run(output)
@@ -0,0 +1,104 @@
+import io
+import re
+import sys
+import glob
+import time
+import contextlib
+from antlr4 import InputStream, CommonTokenStream
+from Lexer.fast_lexer import FastLexer
+from Parser.fast_parser import FastParser
+from Parser.incremental_parser import IncrementalParser
+from SemanticAnalyzer.semantic_analyzer import SemanticAnalyzer
+from SemanticAnalyzer.symbol_export import symbol_rows
+from IntermediateCode.ci_generator import IntermediateCodeGenerator
+from Incremental.incremental_compiler import IncrementalCompiler
+
+
+def syntax_tree(source):
+    """
+    Builds the syntax tree of a source (the same parser for both compiles)
+    """
+    return FastParser(CommonTokenStream(FastLexer(InputStream(source)))).program()
+
+
+def result(semantic_analyzer, ci_generator):
+    """
+    Returns the intermediate code and the rows of the symbol table of a compile
+    """
+    code = io.StringIO()
+    ci_generator.generate_intermediate_code(code)
+    return code.getvalue(), list(symbol_rows(semantic_analyzer.symbol_table))
+
+
+def full_compile(source):
+    """
+    Compiles a source from scratch, returns its result (or the error message) and the time it took
+    """
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            tree = syntax_tree(source)
+            semantic_analyzer = SemanticAnalyzer()
+            semantic_analyzer.visit(tree)
+            ci_generator = IntermediateCodeGenerator(semantic_analyzer.symbol_table, semantic_analyzer.annotations)
+            ci_generator.visit(tree)
+        output = result(semantic_analyzer, ci_generator)
+    except Exception as e:
+        output = str(e)
+    return output, time.perf_counter() - start
+
+
+def incremental_compile(session, parse_session, source):
+    """
+    Compiles a source with the incremental parser and compiler of the file, returns its
+    result (or the error message) and the time it took
+    """
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            output = result(*session.compile(parse_session.parse(source)))
+    except Exception as e:
+        output = str(e)
+    return output, time.perf_counter() - start
+
+
+def versions(source):
+    """
+    Returns the successive versions of a file that are compiled: the file, the file
+    again, its first number changed, the file again and the file with blank lines
+    (every declaration after them moves, none of them changes)
+    """
+    changed = re.sub(r"\b(\d+)\b", lambda match: str(int(match[1]) + 1), source, count=1)
+    moved = source.replace("\n", "\n\n", 3)
+    return [source, source, changed, source, moved]
+
+
+def main():
+    # Check every source file under the input directory (src/Input by default)
+    directory = sys.argv[1] if len(sys.argv) > 1 else "src/Input"
+    paths = sorted(glob.glob(f"{directory}/**/*.cspt", recursive=True))
+
+    failures = checks = 0
+    for path in paths:
+        with open(path) as file:
+            source = file.read()
+
+        session, parse_session = IncrementalCompiler(), IncrementalParser()
+        for number, version in enumerate(versions(source)):
+            checks += 1
+            expected, full_time = full_compile(version)
+            got, incremental_time = incremental_compile(session, parse_session, version)
+            if expected == got:
+                print(f"OK   {path} #{number} (full {full_time * 1000:.1f} ms, incremental {incremental_time * 1000:.1f} ms)")
+            else:
+                failures += 1
+                print(f"FAIL {path} #{number} -> the incremental compile is different")
+
+    print(f"{checks - failures}/{checks} incremental compiles match the full compile")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m Incremental.check_incremental [directory]
+    main()
@@ -0,0 +1,661 @@
+import re
+import hashlib
+from itertools import compress
+from collections import OrderedDict
+from SyntaxTree.nodes import *
+from SemanticAnalyzer.semantic_analyzer import SemanticAnalyzer
+from SemanticAnalyzer.annotations import Annotations
+from SemanticAnalyzer.symbols import Symbol, Scope
+from SemanticAnalyzer.types import DataType, StringType
+from IntermediateCode.ci_generator import IntermediateCodeGenerator
+from IntermediateCode.structures import Register, Stack
+
+
+# Labels created by the code generator (L0, L1, ...) and names of the string constants
+LABEL = re.compile(r"\bL(\d+)\b")
+STRING_LABEL = re.compile(r"\bSTR_\d+\b")
+
+# Line the code generator adds to the data section for the concatenation buffer
+BUFFER_LINE = "BUFFER: .space 200"
+
+# Fields of each node type that are part of its fingerprint (the position is left out)
+FIELDS = {
+    node_type: [name for cls in reversed(node_type.__mro__) for name in getattr(cls, "__slots__", ()) if name not in Node.__slots__]
+    for node_type in NODE_TYPES
+}
+
+# Field with the name a node refers to (the parent of a class, the variable of an assignment, ...)
+REFERENCES = {Identifier: "name", Assignment: "name", Instantiation: "name", ClassDecl: "parent"}
+
+# State the analyzer carries from a top level declaration to the next one
+ANALYZER_STATE = ("current_variable", "current_function", "current_class", "for_qty", "while_qty", "if_qty", "else_qty",
+                  "in_init", "in_class_assignment", "method_flag", "in_print", "super_call")
+
+# State the code generator carries from a top level declaration to the next one
+GENERATOR_STATE = ("current_variable", "current_function", "current_class", "current_jump_call", "current_inverse_call",
+                   "in_init", "in_class_assignment", "method_flag", "in_print", "super_call", "has_return")
+
+# Fields that are set but never read before they are set again, left out of the keys
+# (a reference to a new object would make every later declaration miss the cache)
+UNREAD_STATE = {"current_variable": SemanticAnalyzer, "current_function": IntermediateCodeGenerator}
+
+# Number of optimized programs kept (the optimization passes run over whole sections)
+OPTIMIZED_CACHE_SIZE = 4
+
+
+def scan(declaration):
+    """
+    Walks a top level declaration and returns its fingerprint, the names it refers to,
+    the index of its first node and its number of nodes.
+
+    The fingerprint is the hash of its structure (the type and fields of every node and
+    the index of each node relative to the first one), the lines and columns are left out
+    so a declaration that only moves keeps its fingerprint.
+    """
+    parts = []      # Node types, field values and node indexes
+    indexes = []    # Index of each node
+    names = set()
+    stack = [declaration]
+
+    while stack:
+        value = stack.pop()
+        if isinstance(value, Node):
+            node_type = type(value)
+            parts.append(node_type.__name__)
+            parts.append(value.index)   # Made relative to the first node below
+            indexes.append(value.index)
+            if node_type in REFERENCES and getattr(value, REFERENCES[node_type]) is not None:
+                names.add(getattr(value, REFERENCES[node_type]))
+            # Pushed in reverse so the fields are read in order
+            stack.extend(getattr(value, field) for field in reversed(FIELDS[node_type]))
+        elif isinstance(value, (list, tuple)):
+            parts.append(f"[{len(value)}")
+            stack.extend(reversed(value))
+        else:
+            parts.append(repr(value))
+
+    first = min(indexes)
+    # The side tables of a declaration are copied as slices of the annotations
+    if max(indexes) - first + 1 != len(indexes):
+        raise ValueError(f"The nodes of the declaration at line {declaration.line} are not numbered contiguously")
+
+    text = "\x00".join(str(part - first) if type(part) is int else part for part in parts)
+    return hashlib.sha256(text.encode()).digest(), names, first, len(indexes)
+
+
+def identity(value, keep):
+    """
+    Returns the part of a key that stands for a value: symbols (and any other object)
+    by identity, data types by their fields. The objects compared by identity are added
+    to keep, the cache entry keeps them alive so their ids are not reused.
+    """
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, DataType):
+        class_ref = getattr(value, "class_ref", None)
+        if class_ref is not None:
+            keep.append(class_ref)
+        return (type(value).__name__, value.name, value.size, value.value, id(class_ref))
+    keep.append(value)
+    return id(value)
+
+
+def capture(obj, names):
+    """
+    Returns the values of the fields of an object (see restore)
+    """
+    return tuple(getattr(obj, name) for name in names)
+
+
+def restore(obj, names, values):
+    """
+    Sets the fields of an object to the values returned by capture
+    """
+    for name, value in zip(names, values):
+        setattr(obj, name, value)
+
+
+def state_key(obj, names, keep):
+    """
+    Returns the part of a key for the state of the analyzer or the code generator
+    """
+    return tuple(identity(getattr(obj, name), keep) for name in names if not isinstance(obj, UNREAD_STATE.get(name, ())))
+
+
+def controller_state(controller):
+    """
+    Returns the state of a register controller: its fields (the registers of the stacks as
+    positions in a table, the same register can be pushed twice) and the table of registers
+    """
+    table = []
+    positions = {}
+
+    def position(register):
+        if id(register) not in positions:
+            positions[id(register)] = len(table)
+            table.append(register)
+        return positions[id(register)]
+
+    fields = []
+    for name, value in vars(controller).items():
+        if isinstance(value, Stack):
+            fields.append((name, "stack", tuple(position(register) for register in value.stack)))
+        elif isinstance(value, Register):
+            fields.append((name, "register", position(value)))
+        elif isinstance(value, dict):
+            fields.append((name, "dict", (tuple(value), tuple(value.values()))))
+        else:
+            fields.append((name, "value", value))
+    return tuple(fields), tuple((register.id, register.type, register.value, register.symbol) for register in table)
+
+
+def controller_key(state, keep):
+    """
+    Returns the part of a key for the state of a register controller. The values held by
+    the free registers are left out, they are replaced when the register is taken again.
+    """
+    fields, table = state
+    key = []
+    for name, kind, value in fields:
+        if kind == "dict":
+            # The registers used so far (the dictionary keeps the freed ones with None, their
+            # order is part of the state) and the symbols held, only a symbol is ever looked
+            # up in it (see RegisterController.get_register_with_symbol)
+            registers, held = value
+            value = (registers, tuple((register, identity(item, keep)) for register, item in compress(zip(registers, held), held) if isinstance(item, Symbol)))
+        elif kind == "value":
+            value = identity(value, keep)
+        key.append((name, value))
+    return tuple(key), tuple((register_id, identity(register_type, keep)) for register_id, register_type, _, _ in table)
+
+
+def restore_controller(controller, state):
+    """
+    Sets a register controller to a state returned by controller_state (with new registers,
+    the registers are changed in place when they are taken)
+    """
+    fields, table = state
+    registers = [Register(*values) for values in table]
+    for name, kind, value in fields:
+        if kind == "stack":
+            stack = Stack()
+            stack.stack = [registers[position] for position in value]
+            value = stack
+        elif kind == "register":
+            value = registers[value]
+        elif kind == "dict":
+            value = dict(zip(*value))
+        setattr(controller, name, value)
+
+
+def class_state(classes):
+    """
+    Returns the fields of the classes that a declaration after them can change
+    (an instantiation completes the layout of its class and of the inherited attributes)
+    """
+    attributes = OrderedDict()
+    for class_symbol in classes:
+        for attribute in class_symbol.attributes:
+            attributes[id(attribute)] = attribute
+    return (tuple((class_symbol, class_symbol.completed, class_symbol.size) for class_symbol in classes),
+            tuple((attribute, attribute.data_type, attribute.size, attribute.offset) for attribute in attributes.values()))
+
+
+def class_key(state, keep):
+    """
+    Returns the part of a key for the state of the classes returned by class_state
+    """
+    classes, attributes = state
+    return (tuple((identity(class_symbol, keep), completed, size) for class_symbol, completed, size in classes),
+            tuple((identity(attribute, keep), identity(data_type, keep), size, offset) for attribute, data_type, size, offset in attributes))
+
+
+def restore_classes(state):
+    """
+    Sets the classes to a state returned by class_state
+    """
+    classes, attributes = state
+    for class_symbol, completed, size in classes:
+        class_symbol.completed = completed
+        class_symbol.size = size
+    for attribute, data_type, size, offset in attributes:
+        attribute.data_type = data_type
+        attribute.size = size
+        attribute.offset = offset
+
+
+class StringConstants(dict):
+    """
+    The string constants of the code generator (string -> label). While a declaration is
+    generated it records the strings looked up and whether they were constants already,
+    the cached code of the declaration is only valid while the same ones are.
+
+    Attr:
+        lookups (dict): Whether each string looked up was a constant the first time (None when not recording)
+    """
+    def __init__(self):
+        super().__init__()
+        self.lookups = None
+
+    def __contains__(self, value):
+        found = super().__contains__(value)
+        if self.lookups is not None and isinstance(value, str):
+            self.lookups.setdefault(value, found)
+        return found
+
+    def get(self, value, default=None):
+        if self.lookups is not None and isinstance(value, str):
+            self.lookups.setdefault(value, super().__contains__(value))
+        return super().get(value, default)
+
+    def has(self, value):
+        """
+        Returns whether the string is a constant (without recording it)
+        """
+        return super().__contains__(value)
+
+
+class Declaration():
+    """
+    A top level declaration (or statement) of the program being compiled.
+
+    Attr:
+        node (Node): The node of the declaration
+        fingerprint (bytes): The hash of its structure (see scan)
+        names (set): The names it refers to (and the name it declares, redeclarations are errors)
+        first (int): The index of its first node
+        size (int): The number of nodes
+        dependencies (list[int]): The positions of the earlier declarations of the names it refers to
+        closure (set): The positions of its dependencies and theirs
+        analysis (Analysis): The result of its analysis in the current compile
+    """
+    def __init__(self, node):
+        self.node = node
+        self.fingerprint, self.names, self.first, self.size = scan(node)
+        if isinstance(node, (FunDecl, ClassDecl, VarDecl)):
+            self.names.add(node.name)
+        self.dependencies = []
+        self.closure = set()
+        self.analysis = None
+
+
+class Analysis():
+    """
+    The effects of the semantic analysis of a top level declaration, replayed while the
+    declaration, the results of its dependencies and the state of the analyzer are the same.
+
+    Attr:
+        serial (int): Identifies the result (the key of a declaration has the serials of its dependencies)
+        symbols (list[Symbol]): The symbols added to the symbol table
+        annotations (tuple): The symbols, types and scopes of its nodes
+        state (tuple): The state of the analyzer after the declaration (see ANALYZER_STATE)
+        offset (int): The offset of the global scope after the declaration
+        classes (tuple): The state of the classes it refers to after the declaration (see class_state)
+        keep (list): The objects of the key compared by identity
+    """
+    def __init__(self, serial, symbols, annotations, state, offset, classes, keep):
+        self.serial = serial
+        self.symbols = symbols
+        self.annotations = annotations
+        self.state = state
+        self.offset = offset
+        self.classes = classes
+        self.keep = keep
+
+
+class CodeBlock():
+    """
+    The intermediate code generated for a top level declaration, spliced into the program
+    while the declaration has the same analysis, the code generator the same state and the
+    strings it looks up are (or are not) constants as when it was generated.
+
+    Attr:
+        main (list[str]): The lines added to the main section
+        local (list[str]): The lines added to the local context (functions and methods)
+        data (list): The entries added to the data section in order (a string or BUFFER_LINE)
+        labels (tuple): The first label it created and the number of labels
+        lookups (dict): Whether each string looked up was a constant (see StringConstants)
+        names (dict): The label of each of those strings when the code was generated
+        exit (tuple): The state of the code generator after the declaration and its key (see boundary)
+        keep (list): The objects of the key compared by identity
+    """
+    def __init__(self, main, local, data, labels, lookups, names, exit, keep):
+        self.main = main
+        self.local = local
+        self.data = data
+        self.labels = labels
+        self.lookups = lookups
+        self.names = names
+        self.exit = exit
+        self.keep = keep
+
+
+class IncrementalCompiler():
+    """
+    Compiles new versions of a program reusing the work done for the previous ones.
+
+    Each top level declaration (function, class, global variable or statement) is
+    fingerprinted and depends on the earlier declarations of the names it refers to
+    (the functions it calls, the classes it instantiates or inherits from and the globals
+    it reads or writes). A declaration is only analyzed again if it changed, the result of
+    a dependency changed or the analyzer reaches it in another state (another number of
+    scopes before it, globals before it that take another size, ...). The same goes for
+    its code: the instructions of the unchanged declarations are spliced into the sections
+    from the cache, with their labels and string constants renamed to fit the program.
+
+    The result is the same as compiling the program from scratch. The optimization
+    passes still run over the whole sections (the registers of the hoisted values are
+    unique in the program), only the result of the last unchanged sections is reused.
+
+    Attr:
+        optimize (bool): Whether the optimization passes run over the generated code
+        global_scope (Scope): The global scope, shared by every compile so the reused symbols are in it
+        analyses (dict): The results of the analysis of the declarations by their key
+        blocks (dict): The code of the declarations by their key
+        optimized (OrderedDict): The optimized sections by the hash of the generated ones
+        serial (int): The serial of the last analysis result
+        stats (dict): Counters of the declarations analyzed, generated and reused
+    """
+    def __init__(self, optimize=True):
+        self.optimize = optimize
+        self.global_scope = Scope("global", 0)
+        self.analyses = {}
+        self.blocks = {}
+        self.optimized = OrderedDict()
+        self.serial = 0
+        self.stats = {"compiles": 0, "analyzed": 0, "analyses_reused": 0, "generated": 0, "blocks_reused": 0, "optimized": 0, "optimizations_reused": 0}
+
+
+    def compile(self, program:Program):
+        """
+        Runs the semantic analysis and the code generation over the program and returns
+        the semantic analyzer and the CI generator (as compile_file in main.py)
+
+        Args:
+            program (Program): The syntax tree of the new version of the program
+        """
+        declarations = [Declaration(node) for node in program.declarations]
+
+        # Each declaration depends on the earlier declarations of the names it refers to
+        declared = {}   # Positions of the declarations of each name
+        for position, declaration in enumerate(declarations):
+            declaration.dependencies = sorted({dependency for name in declaration.names for dependency in declared.get(name, ())})
+            for dependency in declaration.dependencies:
+                declaration.closure.add(dependency)
+                declaration.closure |= declarations[dependency].closure
+            if isinstance(declaration.node, (FunDecl, ClassDecl, VarDecl)):
+                declared.setdefault(declaration.node.name, []).append(position)
+
+        used_analyses, used_blocks = {}, {}
+        semantic_analyzer, analyzed = self.analyze(program, declarations, used_analyses)
+        ci_generator, generated = self.generate(semantic_analyzer, declarations, used_blocks)
+        print(f"INFO -> Incremental compile: {analyzed} of {len(declarations)} declarations analyzed, {generated} generated")
+
+        # Run the optimization passes over the spliced sections
+        if self.optimize:
+            self.optimize_sections(ci_generator)
+
+        # Keep the results of this compile (the ones of the older versions are dropped)
+        self.analyses, self.blocks = used_analyses, used_blocks
+        self.stats["compiles"] += 1
+        self.stats["analyzed"] += analyzed
+        self.stats["analyses_reused"] += len(declarations) - analyzed
+        self.stats["generated"] += generated
+        self.stats["blocks_reused"] += len(declarations) - generated
+        return semantic_analyzer, ci_generator
+
+
+    def classes(self, semantic_analyzer, declarations, positions):
+        """
+        Returns the class symbols of the declarations at the positions
+        """
+        return [semantic_analyzer.annotations.symbol(declarations[position].node)
+                for position in sorted(positions) if isinstance(declarations[position].node, ClassDecl)]
+
+
+    def analyze(self, program:Program, declarations, used):
+        """
+        Runs the semantic analysis one declaration at a time (as SemanticAnalyzer.visitProgram)
+        replaying the results of the declarations that didn't change, returns the semantic
+        analyzer and the number of declarations analyzed
+        """
+        semantic_analyzer = SemanticAnalyzer()
+        semantic_analyzer.annotations = annotations = Annotations(program.size)
+        # Enter the global scope
+        self.global_scope.offset = 0
+        semantic_analyzer.current_scope = self.global_scope
+        semantic_analyzer.scope_stack.append(self.global_scope)
+        tables = (annotations.symbols, annotations.types, annotations.scopes)
+        analyzed = 0
+
+        for position, declaration in enumerate(declarations):
+            classes = self.classes(semantic_analyzer, declarations, declaration.closure)
+            keep = []
+            key = (
+                declaration.fingerprint,
+                tuple(declarations[dependency].analysis.serial for dependency in declaration.dependencies),
+                state_key(semantic_analyzer, ANALYZER_STATE, keep),
+                self.global_scope.offset,
+                class_key(class_state(classes), keep),
+            )
+
+            analysis = self.analyses.get(key)
+            if analysis is None:
+                analyzed += 1
+                start = len(semantic_analyzer.symbol_table)
+                semantic_analyzer.visit(declaration.node)
+                if isinstance(declaration.node, ClassDecl):
+                    classes.append(annotations.symbol(declaration.node))
+
+                self.serial += 1
+                end = declaration.first + declaration.size
+                analysis = Analysis(
+                    self.serial,
+                    semantic_analyzer.symbol_table[start:],
+                    tuple(table[declaration.first:end] for table in tables),
+                    capture(semantic_analyzer, ANALYZER_STATE),
+                    self.global_scope.offset,
+                    class_state(classes),
+                    keep,
+                )
+            else:
+                # Replay the effects of the declaration
+                semantic_analyzer.symbol_table.extend(analysis.symbols)
+                for table, values in zip(tables, analysis.annotations):
+                    table[declaration.first:declaration.first + declaration.size] = values
+                restore(semantic_analyzer, ANALYZER_STATE, analysis.state)
+                self.global_scope.offset = analysis.offset
+                restore_classes(analysis.classes)
+
+            declaration.analysis = used[key] = analysis
+
+        # The program node is analyzed in the global scope
+        semantic_analyzer.leave(program, None)
+        print("SUCCESS -> Semantic Analysis completed\n")
+        return semantic_analyzer, analyzed
+
+
+    def boundary(self, ci_generator):
+        """
+        Returns the state of the code generator between two declarations (see splice), its
+        key and the objects the key refers to by identity
+        """
+        instruction_generator = ci_generator.instruction_generator
+        keep = []
+        controller = controller_state(ci_generator.register_controller)
+        context = self.current_block(instruction_generator)
+        temporary = tuple(instruction_generator.temporary_context)
+        key = (
+            state_key(ci_generator, GENERATOR_STATE, keep),
+            controller_key(controller, keep),
+            instruction_generator.has_buffer,
+            context,
+            temporary,
+        )
+        return (capture(ci_generator, GENERATOR_STATE), controller, context, temporary), key, keep
+
+
+    def current_block(self, instruction_generator):
+        """
+        Returns the context the instructions are added to (see InstructionGenerator.switch_context)
+        """
+        if instruction_generator.instruction_block is instruction_generator.main_section:
+            return 0
+        if instruction_generator.instruction_block is instruction_generator.local_context:
+            return 1
+        return 2
+
+
+    def generate(self, semantic_analyzer, declarations, used):
+        """
+        Generates the intermediate code one declaration at a time (as IntermediateCodeGenerator.visitProgram,
+        without the optimization passes) splicing the code of the declarations that didn't change,
+        returns the CI generator and the number of declarations generated
+        """
+        ci_generator = IntermediateCodeGenerator(semantic_analyzer.symbol_table, semantic_analyzer.annotations, optimize=self.optimize)
+        ci_generator.string_constants = strings = StringConstants()
+        generated = 0
+
+        # The state before the first declaration, then the state each declaration leaves
+        # (the one a spliced block left when it was generated)
+        boundary = self.boundary(ci_generator)
+        for position, declaration in enumerate(declarations):
+            _, state, keep = boundary
+            keep = list(keep)
+            # The code reads the final layout of the classes the declaration refers to
+            classes = self.classes(semantic_analyzer, declarations, declaration.closure | {position})
+            key = (declaration.analysis.serial, state, class_key(class_state(classes), keep))
+
+            block = self.blocks.get(key)
+            if block is not None and all(strings.has(value) == found for value, found in block.lookups.items()):
+                self.splice(ci_generator, block)
+            else:
+                generated += 1
+                block = self.record(ci_generator, declaration, keep)
+            boundary = block.exit if block is not None else self.boundary(ci_generator)
+            if block is not None:
+                used[key] = block
+
+        return ci_generator, generated
+
+
+    def record(self, ci_generator, declaration, keep):
+        """
+        Generates the code of a declaration and returns it as a code block
+        (None if the declaration changed the program in a way that can't be replayed)
+        """
+        instruction_generator = ci_generator.instruction_generator
+        strings = ci_generator.string_constants
+        main_start = len(instruction_generator.main_section)
+        local_start = len(instruction_generator.local_context)
+        data_start = len(instruction_generator.data_section)
+        label_start = ci_generator.label_counter
+
+        strings.lookups = {}
+        try:
+            ci_generator.visit(declaration.node)
+        finally:
+            lookups, strings.lookups = strings.lookups, None
+
+        # The strings looked up that are constants now and their labels
+        names = {value: strings[value] for value in lookups if strings.has(value)}
+        values = {label: value for value, label in names.items()}
+
+        # The data section only grows with the string constants and the buffer
+        data = []
+        for line in instruction_generator.data_section[data_start:]:
+            label = line.split(":", 1)[0]
+            if line == BUFFER_LINE:
+                data.append(BUFFER_LINE)
+            elif label in values and not lookups[values[label]]:
+                data.append(values[label])
+            else:
+                return None
+
+        return CodeBlock(
+            instruction_generator.main_section[main_start:],
+            instruction_generator.local_context[local_start:],
+            data,
+            (label_start, ci_generator.label_counter - label_start),
+            lookups,
+            names,
+            self.boundary(ci_generator),
+            keep,
+        )
+
+
+    def splice(self, ci_generator, block:CodeBlock):
+        """
+        Adds the code of a block to the program as if the declaration was generated again
+        """
+        instruction_generator = ci_generator.instruction_generator
+        strings = ci_generator.string_constants
+
+        # Add the data entries (as visitLiteral and InstructionGenerator.concatenate)
+        for entry in block.data:
+            if entry == BUFFER_LINE:
+                instruction_generator.data_section.append(BUFFER_LINE)
+                instruction_generator.has_buffer = True
+            else:
+                strings[entry] = ci_generator.create_string_label()
+                instruction_generator.add_to_data(StringType(value=entry), strings[entry])
+
+        # Rename the labels and the string constants that have another name in this program
+        first, count = block.labels
+        shift = ci_generator.label_counter - first
+        renames = {label: strings[value] for value, label in block.names.items() if strings[value] != label}
+
+        def relocate(match):
+            number = int(match.group(1))
+            return f"L{number + shift}" if first <= number < first + count else match.group(0)
+
+        def rename(lines):
+            if not shift and not renames:
+                return lines
+            renamed = []
+            for line in lines:
+                if shift:
+                    line = LABEL.sub(relocate, line)
+                if renames:
+                    line = STRING_LABEL.sub(lambda match: renames.get(match.group(0), match.group(0)), line)
+                renamed.append(line)
+            return renamed
+
+        instruction_generator.main_section.extend(rename(block.main))
+        instruction_generator.local_context.extend(rename(block.local))
+        ci_generator.label_counter += count
+
+        # Leave the code generator as the declaration left it
+        (fields, controller, context, temporary), _, _ = block.exit
+        restore(ci_generator, GENERATOR_STATE, fields)
+        restore_controller(ci_generator.register_controller, controller)
+        instruction_generator.temporary_context = list(temporary)
+        instruction_generator.switch_context(context)
+
+
+    def optimize_sections(self, ci_generator):
+        """
+        Runs the optimization passes over the sections, unless they are the same as the
+        sections of a recent compile
+        """
+        instruction_generator = ci_generator.instruction_generator
+        digest = hashlib.sha256()
+        for section in (instruction_generator.main_section, instruction_generator.local_context):
+            digest.update("\n".join(section).encode())
+            digest.update(b"\x00")
+        key = digest.digest()
+
+        if key in self.optimized:
+            self.optimized.move_to_end(key)
+            main_section, local_context = self.optimized[key]
+            self.stats["optimizations_reused"] += 1
+        else:
+            ci_generator.optimize_sections()
+            main_section, local_context = list(instruction_generator.main_section), list(instruction_generator.local_context)
+            self.optimized[key] = (main_section, local_context)
+            if len(self.optimized) > OPTIMIZED_CACHE_SIZE:
+                self.optimized.popitem(last=False)
+            self.stats["optimized"] += 1
+
+        instruction_generator.main_section[:] = main_section
+        instruction_generator.local_context[:] = local_context
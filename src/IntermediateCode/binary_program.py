@@ -0,0 +1,394 @@
+import re
+import sys
+import mmap
+import struct
+from IntermediateCode.instruction_builder import InstructionGenerator
+from SemanticAnalyzer.symbol_export import symbol_rows
+
+
+# Header of the binary program: magic bytes, version and the position and number of
+# entries of each table (strings, string bytes, opcodes, operands, instructions, symbols)
+# followed by the number of instructions of each section (data, main, local context)
+MAGIC = b"CSIR"
+VERSION = 1
+HEADER = struct.Struct("<4sHH" + "II" * 6 + "III")
+TABLES = ("strings", "string_bytes", "opcodes", "operands", "instructions", "symbols")
+SECTIONS = ("data", "main", "local")
+
+# Records of the tables
+STRING = struct.Struct("<I")            # Offset of the string in the string bytes (plus the end of the last one)
+OPCODE = struct.Struct("<I")            # String of the opcode
+OPERAND = struct.Struct("<IBxxx")       # String of the operand and its kind
+INSTRUCTION = struct.Struct("<BB2xIIII")  # Opcode, number of operands, operands and the comment
+SYMBOL = struct.Struct("<IIIIIiiB3x")   # id, type, scope, scope index, data type, size, offset and flags
+
+# Opcode of the lines that are not an opcode with operands (they are kept as they are, in the comment)
+RAW = 0
+# Maximum number of opcodes (the opcode is a byte) and of operands of an instruction
+MAX_OPCODES = 256
+MAX_OPERANDS = 3
+# String of the missing operands, comments and data types
+NONE = 0xFFFFFFFF
+
+# Kinds of the operands
+REGISTER, IMMEDIATE, LABEL = 0, 1, 2
+IMMEDIATE_PATTERN = re.compile(r"-?\d+$")
+
+# Flags of the optional fields of a symbol record
+HAS_DATA_TYPE, HAS_SIZE, HAS_OFFSET = 1, 2, 4
+
+# Lines of an instruction: opcode, operands separated by commas and the comment (with the spaces before it)
+LINE = re.compile(r"(\S+)(?: (.*?))?(\s+#.*)?", re.DOTALL)
+
+# Alignment of the tables in the file
+ALIGNMENT = 8
+
+
+def operand_kind(operand):
+    """
+    Returns the kind of an operand: a register ($t0, PARAM::n, SELF::x), an immediate or a label
+    """
+    if operand.startswith("$") or "::" in operand or operand == "SELF":
+        return REGISTER
+    if IMMEDIATE_PATTERN.match(operand):
+        return IMMEDIATE
+    return LABEL
+
+
+class BinaryWriter():
+    """
+    Builds the tables of a binary program: every string is stored once in the string
+    pool, every operand once in the operand table (with its kind) and every opcode once
+    in the opcode table, the instructions are fixed size records of their indexes.
+    """
+
+    def __init__(self):
+        self.strings = {}
+        self.opcodes = {}
+        self.operands = {}
+        self.instructions = bytearray()
+        self.symbols = bytearray()
+        self.count = 0
+        self.records = {}   # The record of each line added (the same lines repeat a lot)
+
+
+    def string(self, value):
+        """
+        Returns the index of a string in the pool (added if it is new)
+        """
+        if value is None:
+            return NONE
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+
+
+    def operand(self, value):
+        index = self.operands.get(value)
+        if index is None:
+            index = self.operands[value] = len(self.operands)
+        return index
+
+
+    def opcode(self, name):
+        """
+        Returns the opcode of an instruction name (None once the opcodes run out)
+        """
+        opcode = self.opcodes.get(name)
+        if opcode is None and len(self.opcodes) < MAX_OPCODES - 1:
+            opcode = self.opcodes[name] = len(self.opcodes) + 1
+        return opcode
+
+
+    def add_line(self, line):
+        """
+        Adds a line of the instruction stream as an instruction record. The lines that
+        are not an opcode with its operands (labels, data, blank lines) are kept as they
+        are in the comment of a RAW record.
+        """
+        record = self.records.get(line)
+        if record is not None:
+            self.instructions += record
+            self.count += 1
+            return
+
+        opcode, operands, comment = RAW, [], line
+        match = LINE.fullmatch(line)
+        if match is not None:
+            name, arguments, tail = match.groups()
+            split = arguments.split(", ") if arguments is not None else []
+            if len(split) <= MAX_OPERANDS and not name.endswith(":") and self.opcode(name) is not None:
+                opcode, operands, comment = self.opcodes[name], split, tail
+
+        indexes = [self.operand(operand) for operand in operands] + [NONE] * (MAX_OPERANDS - len(operands))
+        record = self.records[line] = INSTRUCTION.pack(opcode, len(operands), *indexes, self.string(comment))
+        self.instructions += record
+        self.count += 1
+
+
+    def add_symbols(self, symbol_table):
+        """
+        Adds a record for each symbol (the columns of the exported symbol table)
+        """
+        for id, type, scope, scope_index, data_type, size, offset in symbol_rows(symbol_table):
+            flags = (HAS_DATA_TYPE if data_type is not None else 0) | (HAS_SIZE if size is not None else 0) | (HAS_OFFSET if offset is not None else 0)
+            self.symbols += SYMBOL.pack(self.string(id), self.string(type), self.string(scope), scope_index,
+                                        self.string(data_type), size or 0, offset or 0, flags)
+
+
+    def write(self, file, sections):
+        """
+        Writes the tables to a binary file
+
+        Args:
+            sections (tuple): The number of instructions of each section
+        """
+        # The operands and opcodes refer to their strings (added before the pool is written)
+        operands = b"".join(OPERAND.pack(self.string(operand), operand_kind(operand)) for operand in self.operands)
+        opcodes = b"".join(OPCODE.pack(self.string(opcode)) for opcode in self.opcodes)
+
+        encoded = [value.encode("utf8") for value in self.strings]
+        offsets = bytearray()
+        position = 0
+        for value in encoded:
+            offsets += STRING.pack(position)
+            position += len(value)
+        offsets += STRING.pack(position)
+
+        tables = [(offsets, len(encoded)), (b"".join(encoded), position), (opcodes, len(self.opcodes)),
+                  (operands, len(self.operands)), (self.instructions, self.count), (self.symbols, len(self.symbols) // SYMBOL.size)]
+
+        # The tables follow the header, each one aligned
+        entries = []
+        position = HEADER.size
+        for content, count in tables:
+            position += -position % ALIGNMENT
+            entries += [position, count]
+            position += len(content)
+
+        file.write(HEADER.pack(MAGIC, VERSION, 0, *entries, *sections))
+        written = HEADER.size
+        for (content, _), start in zip(tables, entries[::2]):
+            file.write(b"\x00" * (start - written))
+            file.write(content)
+            written = start + len(content)
+
+
+def write_program(instruction_generator, symbol_table, output):
+    """
+    Writes the intermediate code and the symbol table as a binary program
+
+    Args:
+        instruction_generator (InstructionGenerator): The sections of the intermediate code
+        symbol_table (list): The symbols of the semantic analyzer (None to leave them out)
+        output: The path of the file or a writable binary sink
+    """
+    writer = BinaryWriter()
+    sections = (instruction_generator.data_section, instruction_generator.main_section, instruction_generator.local_context)
+    for section in sections:
+        for line in section:
+            writer.add_line(line)
+    if symbol_table is not None:
+        writer.add_symbols(symbol_table)
+
+    if isinstance(output, str):
+        with open(output, "wb") as file:
+            writer.write(file, tuple(len(section) for section in sections))
+    else:
+        writer.write(output, tuple(len(section) for section in sections))
+
+
+class BinaryProgram():
+    """
+    A binary program read in place: the file is memory mapped and the records are
+    read from it when they are used (nothing is parsed or copied when it is opened,
+    a string is only decoded when it is read).
+
+    Attr:
+        buffer (memoryview): The content of the file
+        tables (dict): The position and number of entries of each table
+        sections (dict): The number of instructions of each section
+    """
+
+    def __init__(self, buffer, file=None, mapping=None):
+        self.buffer = memoryview(buffer)
+        self.file = file
+        self.mapping = mapping
+        fields = HEADER.unpack_from(self.buffer, 0)
+        if fields[0] != MAGIC or fields[1] != VERSION:
+            raise ValueError("Not a CompiScript binary program (or an unsupported version)")
+        entries = fields[3:3 + 2 * len(TABLES)]
+        self.tables = {name: (entries[2 * i], entries[2 * i + 1]) for i, name in enumerate(TABLES)}
+        self.sections = dict(zip(SECTIONS, fields[3 + 2 * len(TABLES):]))
+        self.cache = {}
+
+
+    @classmethod
+    def open(cls, path):
+        """
+        Maps a binary program file to memory
+        """
+        file = open(path, "rb")
+        try:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file can't be mapped
+            file.close()
+            raise ValueError("Not a CompiScript binary program (or an unsupported version)")
+        return cls(mapping, file, mapping)
+
+
+    def close(self):
+        self.buffer.release()
+        if self.mapping is not None:
+            self.mapping.close()
+        if self.file is not None:
+            self.file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+    def string(self, index):
+        """
+        Returns a string of the pool (None for the missing ones)
+        """
+        if index == NONE:
+            return None
+        value = self.cache.get(index)
+        if value is None:
+            offsets, _ = self.tables["strings"]
+            start, end = struct.unpack_from("<II", self.buffer, offsets + index * STRING.size)
+            base = self.tables["string_bytes"][0]
+            value = self.cache[index] = str(self.buffer[base + start:base + end], "utf8")
+        return value
+
+
+    def opcode(self, opcode):
+        """
+        Returns the name of an opcode
+        """
+        return self.string(OPCODE.unpack_from(self.buffer, self.tables["opcodes"][0] + (opcode - 1) * OPCODE.size)[0])
+
+
+    def operand(self, index):
+        """
+        Returns an operand and its kind
+        """
+        string, kind = OPERAND.unpack_from(self.buffer, self.tables["operands"][0] + index * OPERAND.size)
+        return self.string(string), kind
+
+
+    def __len__(self):
+        return self.tables["instructions"][1]
+
+
+    def instruction(self, index):
+        """
+        Returns an instruction as its opcode (None for the lines kept as they are), its
+        operands and its comment
+        """
+        opcode, count, first, second, third, comment = INSTRUCTION.unpack_from(self.buffer, self.tables["instructions"][0] + index * INSTRUCTION.size)
+        if opcode == RAW:
+            return None, [], self.string(comment)
+        return self.opcode(opcode), [self.operand(operand)[0] for operand in (first, second, third)[:count]], self.string(comment)
+
+
+    def line(self, index):
+        """
+        Returns an instruction as the line of the intermediate code
+        """
+        opcode, operands, comment = self.instruction(index)
+        if opcode is None:
+            return comment
+        return opcode + (" " + ", ".join(operands) if operands else "") + (comment or "")
+
+
+    def section(self, name):
+        """
+        Yields the lines of a section (data, main or local), the records are read in bulk
+        """
+        start = 0
+        for section in SECTIONS:
+            if section == name:
+                break
+            start += self.sections[section]
+        base = self.tables["instructions"][0] + start * INSTRUCTION.size
+        records = self.buffer[base:base + self.sections[name] * INSTRUCTION.size]
+
+        # Each operand and opcode is decoded once
+        operands, opcodes = {}, {}
+        for opcode, count, first, second, third, comment in INSTRUCTION.iter_unpack(records):
+            comment = self.string(comment)
+            if opcode == RAW:
+                yield comment
+                continue
+            name = opcodes.get(opcode)
+            if name is None:
+                name = opcodes[opcode] = self.opcode(opcode)
+            if count:
+                values = []
+                for index in (first, second, third)[:count]:
+                    value = operands.get(index)
+                    if value is None:
+                        value = operands[index] = self.operand(index)[0]
+                    values.append(value)
+                name += " " + ", ".join(values)
+            yield name + comment if comment is not None else name
+
+
+    def instruction_generator(self):
+        """
+        Returns an InstructionGenerator with the sections of the program (its intermediate
+        code is written as the code the program was written from)
+        """
+        generator = InstructionGenerator()
+        generator.data_section = list(self.section("data"))
+        generator.main_section = list(self.section("main"))
+        generator.local_context = list(self.section("local"))
+        generator.instruction_block = generator.main_section
+        generator.has_buffer = "BUFFER: .space 200" in generator.data_section
+        return generator
+
+
+    def symbol_rows(self):
+        """
+        Yields the rows of the symbol table (as SemanticAnalyzer.symbol_export.symbol_rows)
+        """
+        start, count = self.tables["symbols"]
+        for record in SYMBOL.iter_unpack(self.buffer[start:start + count * SYMBOL.size]):
+            id, type, scope, scope_index, data_type, size, offset, flags = record
+            yield (
+                self.string(id),
+                self.string(type),
+                self.string(scope),
+                scope_index,
+                self.string(data_type) if flags & HAS_DATA_TYPE else None,
+                size if flags & HAS_SIZE else None,
+                offset if flags & HAS_OFFSET else None,
+            )
+
+
+def main():
+    # Print the intermediate code (or the symbol table) of a binary program
+    if len(sys.argv) < 2:
+        print("Usage: python -m IntermediateCode.binary_program <program.csir> [code|symbols]", file=sys.stderr)
+        sys.exit(2)
+    with BinaryProgram.open(sys.argv[1]) as program:
+        if len(sys.argv) > 2 and sys.argv[2] == "symbols":
+            for row in program.symbol_rows():
+                print("\t".join("-" if value is None else str(value) for value in row))
+        else:
+            program.instruction_generator().write_instruction_set(sys.stdout)
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m IntermediateCode.binary_program <program.csir> [code|symbols]
+    main()
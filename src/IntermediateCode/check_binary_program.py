@@ -0,0 +1,67 @@
+import io
+import os
+import sys
+import glob
+import time
+import tempfile
+import contextlib
+from antlr4 import FileStream, CommonTokenStream
+from Lexer.fast_lexer import FastLexer
+from Parser.fast_parser import FastParser
+from SemanticAnalyzer.semantic_analyzer import SemanticAnalyzer
+from SemanticAnalyzer.symbol_export import symbol_rows
+from IntermediateCode.ci_generator import IntermediateCodeGenerator
+from IntermediateCode.binary_program import BinaryProgram, write_program
+
+
+def main():
+    # Check every source file under the input directory (src/Input by default)
+    directory = sys.argv[1] if len(sys.argv) > 1 else "src/Input"
+    paths = sorted(glob.glob(f"{directory}/**/*.cspt", recursive=True))
+
+    failures = checks = 0
+    with tempfile.TemporaryDirectory() as temporary:
+        for path in paths:
+            try:
+                tree = FastParser(CommonTokenStream(FastLexer(FileStream(path)))).program()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    semantic_analyzer = SemanticAnalyzer()
+                    semantic_analyzer.visit(tree)
+                    ci_generator = IntermediateCodeGenerator(semantic_analyzer.symbol_table, semantic_analyzer.annotations)
+                    ci_generator.visit(tree)
+            except Exception as e:
+                print(f"SKIP {path} -> {e}")
+                continue
+            code = io.StringIO()
+            ci_generator.generate_intermediate_code(code)
+            expected = code.getvalue()
+
+            # The binary program gives back the same code and symbol table
+            checks += 1
+            program_path = os.path.join(temporary, "program.csir")
+            write_program(ci_generator.instruction_generator, semantic_analyzer.symbol_table, program_path)
+            start = time.perf_counter()
+            with BinaryProgram.open(program_path) as program:
+                open_time = time.perf_counter() - start
+                code = io.StringIO()
+                program.instruction_generator().write_instruction_set(code)
+                rows = list(program.symbol_rows())
+            load_time = time.perf_counter() - start
+            if code.getvalue() != expected:
+                failures += 1
+                print(f"FAIL {path} -> the intermediate code is different")
+            elif rows != list(symbol_rows(semantic_analyzer.symbol_table)):
+                failures += 1
+                print(f"FAIL {path} -> the symbol table is different")
+            else:
+                print(f"DONE {path} (text {len(expected.encode())} bytes, binary {os.path.getsize(program_path)} bytes, "
+                      f"open {open_time * 1e6:.0f} us, load {load_time * 1000:.2f} ms)")
+
+    print(f"{checks - failures}/{checks} binary programs match the compile")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m IntermediateCode.check_binary_program [directory]
+    main()
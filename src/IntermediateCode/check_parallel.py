@@ -0,0 +1,102 @@
+import io
+import sys
+import glob
+import time
+import contextlib
+from antlr4 import FileStream, CommonTokenStream
+from Lexer.fast_lexer import FastLexer
+from Parser.fast_parser import FastParser
+from SemanticAnalyzer.semantic_analyzer import SemanticAnalyzer
+from IntermediateCode.ci_generator import IntermediateCodeGenerator
+from IntermediateCode.parallel_generator import ParallelCodeGenerator
+from Runtime.program import Program, ExecutionError
+from Runtime.threaded_code import ThreadedCode
+
+
+# Worker counts compared with the parallel generation in a single worker
+JOBS = [2, 4]
+
+
+def generate(tree, semantic_analyzer, jobs):
+    """
+    Generates the intermediate code of an analyzed tree, returns it (or the error
+    message), the code generator (None if it failed) and the time it took (jobs None
+    for the sequential generator)
+    """
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if jobs is None:
+                ci_generator = IntermediateCodeGenerator(semantic_analyzer.symbol_table, semantic_analyzer.annotations)
+            else:
+                ci_generator = ParallelCodeGenerator(semantic_analyzer.symbol_table, semantic_analyzer.annotations, jobs=jobs)
+            ci_generator.visit(tree)
+        code = io.StringIO()
+        ci_generator.generate_intermediate_code(code)
+        output = code.getvalue()
+    except Exception as e:
+        output, ci_generator = str(e), None
+    return output, ci_generator, time.perf_counter() - start
+
+
+def behavior(ci_generator, semantic_analyzer):
+    """
+    Runs the intermediate code as threaded code, returns what it printed and whether it
+    ended (False if it stopped with an error)
+    """
+    output = io.StringIO()
+    try:
+        ThreadedCode(Program.from_generator(ci_generator.instruction_generator, semantic_analyzer.symbol_table)).run(output)
+        ended = True
+    except ExecutionError:
+        ended = False
+    return output.getvalue(), ended
+
+
+def main():
+    # Check every source file under the input directory (src/Input by default)
+    directory = sys.argv[1] if len(sys.argv) > 1 else "src/Input"
+    paths = sorted(glob.glob(f"{directory}/**/*.cspt", recursive=True))
+
+    failures = checks = programs = differences = 0
+    for path in paths:
+        try:
+            tree = FastParser(CommonTokenStream(FastLexer(FileStream(path)))).program()
+            with contextlib.redirect_stdout(io.StringIO()):
+                semantic_analyzer = SemanticAnalyzer()
+                semantic_analyzer.visit(tree)
+        except Exception as e:
+            print(f"SKIP {path} -> {e}")
+            continue
+
+        # The output of the parallel generation can't depend on the number of workers
+        _, sequential, sequential_time = generate(tree, semantic_analyzer, None)
+        expected, parallel, single_time = generate(tree, semantic_analyzer, 1)
+        times = []
+        for jobs in JOBS:
+            checks += 1
+            got, _, elapsed = generate(tree, semantic_analyzer, jobs)
+            times.append(f"{jobs} jobs {elapsed * 1000:.1f} ms")
+            if got != expected:
+                failures += 1
+                print(f"FAIL {path} ({jobs} jobs) -> the intermediate code is different")
+
+        # The code of the sequential generator is different (its registers carry over
+        # from a declaration to the next one and its functions are optimized together),
+        # the program prints the same and ends (or stops with an error) the same way
+        if sequential is not None and parallel is not None:
+            programs += 1
+            if behavior(sequential, semantic_analyzer) != behavior(parallel, semantic_analyzer):
+                differences += 1
+                print(f"FAIL {path} -> the sequential and the parallel code run differently")
+        print(f"DONE {path} (sequential {sequential_time * 1000:.1f} ms, 1 job {single_time * 1000:.1f} ms, {', '.join(times)})")
+
+    print(f"{checks - failures}/{checks} parallel generations match the parallel generation with one worker")
+    print(f"{programs - differences}/{programs} programs run the same with the sequential and the parallel generation")
+    sys.exit(1 if failures or differences else 0)
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m IntermediateCode.check_parallel [directory]
+    main()
@@ -0,0 +1,549 @@
+import re
+
+
+# Opcodes grouped by their shape, used to know which operands are read and written
+ARITHMETIC_OPS = {"add", "addu", "sub", "subu", "mult", "mulh", "slt", "sltu", "and", "or", "xor"}    # op dest, left, right
+IMMEDIATE_OPS = {"addi", "subi", "slti", "sltiu", "andi", "ori", "xori", "sll", "srl", "sra"}   # op dest, src, imm
+COMMUTATIVE_OPS = {"add", "addu", "mult", "mulh", "and", "or", "xor"}
+HILO_OPS = {"div"}                                                      # op left, right (writes HI and LO)
+HILO_MOVES = {"mflo": "$lo", "mfhi": "$hi"}                             # op dest
+BRANCH_OPS = {"beq", "bne", "blt", "ble", "bgt", "bge"}                 # op left, right, label
+ZERO_BRANCH_OPS = {"beqz", "bnez", "bltz", "blez", "bgtz", "bgez"}      # op src, label
+
+# Registers of the target, used when a pass needs a register nobody else touches
+TEMPORAL_REGISTERS = [f"$t{i}" for i in range(10)]
+SAVE_REGISTERS = [f"$s{i}" for i in range(8)]
+
+# Matches the stack slots handed out by the RegisterController (e.g. 4($sp))
+STACK_SLOT = re.compile(r"^-?\d+\(\$sp\)$")
+# Matches immediate values (numbers)
+IMMEDIATE = re.compile(r"^-?\d+(\.\d+)?$")
+
+
+def is_register(operand):
+    """
+    Checks if an operand is a register (or a stack slot used as a register)
+    """
+    return operand.startswith("$") or STACK_SLOT.match(operand) is not None
+
+
+def is_immediate(operand):
+    """
+    Checks if an operand is an immediate value
+    """
+    return IMMEDIATE.match(operand) is not None
+
+
+class Instruction():
+    """
+    A single line of the 'semi' MIPS instruction set, split into its parts.
+
+    Attr:
+        text (str): The original line, kept to write unchanged instructions back as they were.
+        label (str): The label defined by the line (if it is a label line).
+        op (str): The opcode of the instruction (None for labels, directives and comments).
+        operands (list): The operands of the instruction.
+        comment (str): The comment at the end of the line.
+    """
+    def __init__(self, text):
+        self.text = text
+        self.label = None
+        self.op = None
+        self.operands = []
+        self.comment = ""
+
+        # Split the code from the comment
+        code, _, comment = text.partition("#")
+        code = code.strip()
+        self.comment = comment.strip()
+
+        # Check if the line is a label definition
+        if code.endswith(":") and " " not in code:
+            self.label = code[:-1]
+
+        # Check if the line is an instruction (directives start with a dot)
+        elif code and not code.startswith("."):
+            op, _, rest = code.partition(" ")
+            self.op = op
+            self.operands = [operand.strip() for operand in rest.split(",")] if rest.strip() else []
+
+
+    @classmethod
+    def build(cls, op, operands, comment=""):
+        """
+        Creates a new instruction from its parts (used by the passes that rewrite code)
+        """
+        instruction = cls("")
+        instruction.op = op
+        instruction.operands = list(operands)
+        instruction.comment = comment
+        instruction.text = instruction.render()
+        return instruction
+
+
+    def render(self):
+        """
+        Returns the text of the instruction, rebuilt from its parts
+        """
+        text = f"{self.op} {', '.join(self.operands)}"
+        if self.comment:
+            text += f"    # {self.comment}"
+        return text
+
+
+    def replace_operand(self, index, operand):
+        """
+        Replaces an operand of the instruction and updates its text
+        (the register names in the comment are updated too)
+        """
+        previous = self.operands[index]
+        self.operands[index] = operand
+        if is_register(previous):
+            self.comment = re.sub(re.escape(previous) + r"\b", operand, self.comment)
+        self.text = self.render()
+
+
+    def is_jump(self):
+        """
+        Checks if the instruction transfers control (ends a basic block)
+        """
+        return self.op in BRANCH_OPS or self.op in ZERO_BRANCH_OPS or self.op in ("j", "jr")
+
+
+    def jump_target(self):
+        """
+        Returns the label the instruction may jump to (None if it doesn't jump to a label)
+        """
+        if self.op in BRANCH_OPS or self.op in ZERO_BRANCH_OPS or self.op == "j":
+            return self.operands[-1]
+        return None
+
+
+    def is_barrier(self):
+        """
+        Checks if the instruction can read or write any register or memory location
+        (calls and system calls), so no value can be assumed to survive it
+        """
+        return self.op in ("jal", "jr", "syscall")
+
+
+    def definitions(self):
+        """
+        Returns the registers written by the instruction
+        """
+        op = self.op
+        if op in ARITHMETIC_OPS or op in IMMEDIATE_OPS or op in HILO_MOVES or op in ("move", "li", "concat"):
+            return [self.operands[0]]
+        if op == "load" and is_register(self.operands[0]):
+            return [self.operands[0]]
+        if op in HILO_OPS:
+            return ["$hi", "$lo"]
+        if op == "syscall":
+            return ["$v0"]
+        return []
+
+
+    def uses(self):
+        """
+        Returns the registers read by the instruction
+        """
+        op = self.op
+        if op in ARITHMETIC_OPS or op == "concat":
+            operands = self.operands[1:]
+        elif op in IMMEDIATE_OPS or op == "move":
+            operands = self.operands[1:2]
+        elif op in HILO_MOVES:
+            return [HILO_MOVES[op]]
+        elif op in HILO_OPS or op == "save":
+            operands = self.operands
+        elif op == "load":
+            operands = self.operands[1:]
+        elif op in BRANCH_OPS:
+            operands = self.operands[:2]
+        elif op in ZERO_BRANCH_OPS:
+            operands = self.operands[:1]
+        elif op == "syscall":
+            return ["$v0", "$a0"]
+        else:
+            operands = []
+        return [operand for operand in operands if is_register(operand)]
+
+
+    def use_positions(self):
+        """
+        Returns the indexes of the operands that are read by the instruction
+        """
+        op = self.op
+        if op in ARITHMETIC_OPS or op == "concat":
+            positions = range(1, len(self.operands))
+        elif op in IMMEDIATE_OPS or op == "move" or op == "load":
+            positions = range(1, min(2, len(self.operands)))
+        elif op in HILO_OPS or op == "save":
+            positions = range(len(self.operands))
+        elif op in BRANCH_OPS:
+            positions = range(2)
+        elif op in ZERO_BRANCH_OPS:
+            positions = range(1)
+        else:
+            positions = range(0)
+        return [i for i in positions if is_register(self.operands[i])]
+
+
+    def __str__(self):
+        return self.text
+
+
+class BasicBlock():
+    """
+    A straight line sequence of instructions, only entered at the top and left at the bottom.
+
+    Attr:
+        index (int): The position of the block in the section.
+        instructions (list): The instructions (and labels, comments, directives) of the block.
+        successors (list): The blocks that can run right after this one.
+        predecessors (list): The blocks that can run right before this one.
+    """
+    def __init__(self, index):
+        self.index = index
+        self.instructions: list[Instruction] = []
+        self.successors: list[BasicBlock] = []
+        self.predecessors: list[BasicBlock] = []
+
+
+    def labels(self):
+        """
+        Returns the labels defined at the top of the block
+        """
+        return [instruction.label for instruction in self.instructions if instruction.label]
+
+
+    def terminator(self):
+        """
+        Returns the last real instruction of the block (None if the block has no instructions)
+        """
+        for instruction in reversed(self.instructions):
+            if instruction.op:
+                return instruction
+        return None
+
+
+class Loop():
+    """
+    A natural loop of the control flow graph.
+
+    Attr:
+        header (BasicBlock): The block every iteration starts at.
+        body (set): The indexes of the blocks of the loop (header included).
+        back_edges (list): The blocks that jump back to the header.
+    """
+    def __init__(self, header:BasicBlock):
+        self.header = header
+        self.body = {header.index}
+        self.back_edges: list[BasicBlock] = []
+
+
+class ControlFlowGraph():
+    """
+    Control flow graph of a section of the intermediate code (main or local context).
+
+    The section is split into basic blocks, a new block starts at every label
+    and right after every branch or jump. Calls (jal) return to the next instruction
+    so they don't end a block.
+    """
+    def __init__(self, lines):
+        self.blocks: list[BasicBlock] = []
+        self.label_map = {}     # Dictionary from label to the block it starts
+
+        # The lines can be text or Instructions already split (see regions)
+        self.build_blocks([line if isinstance(line, Instruction) else Instruction(line) for line in lines])
+        self.link_blocks()
+
+
+    def build_blocks(self, instructions):
+        """
+        Splits the instructions into basic blocks
+        """
+        current = BasicBlock(0)
+        for instruction in instructions:
+            # A label starts a new block (unless the current block has no instructions yet)
+            if instruction.label and any(i.op for i in current.instructions):
+                self.blocks.append(current)
+                current = BasicBlock(len(self.blocks))
+
+            current.instructions.append(instruction)
+
+            # Save the block each label points to
+            if instruction.label:
+                self.label_map[instruction.label] = current
+
+            # A jump ends the block
+            if instruction.is_jump():
+                self.blocks.append(current)
+                current = BasicBlock(len(self.blocks))
+
+        # Add the last block
+        self.blocks.append(current)
+
+
+    def link_blocks(self):
+        """
+        Connects the blocks with their successors and predecessors
+        """
+        for block in self.blocks:
+            terminator = block.terminator()
+            successors = []
+
+            # Check if the block jumps to a label
+            if terminator is not None and terminator.jump_target() in self.label_map:
+                successors.append(self.label_map[terminator.jump_target()])
+
+            # Check if the block falls through into the next one
+            falls_through = terminator is None or terminator.op not in ("j", "jr")
+            if falls_through and block.index + 1 < len(self.blocks):
+                successors.append(self.blocks[block.index + 1])
+
+            for successor in successors:
+                if successor not in block.successors:
+                    block.successors.append(successor)
+                    successor.predecessors.append(block)
+
+
+    def reverse_postorder(self):
+        """
+        Returns the blocks in reverse postorder, starting from every block that has no predecessors
+        (the entry of the section and the entry of every function)
+        """
+        visited = set()
+        order = []
+        roots = [block for block in self.blocks if not block.predecessors or block.index == 0]
+
+        for root in roots:
+            if root.index in visited:
+                continue
+            # Iterative depth first search (explicit stack of block, next successor index)
+            stack = [(root, 0)]
+            visited.add(root.index)
+            while stack:
+                block, position = stack.pop()
+                if position < len(block.successors):
+                    stack.append((block, position + 1))
+                    successor = block.successors[position]
+                    if successor.index not in visited:
+                        visited.add(successor.index)
+                        stack.append((successor, 0))
+                else:
+                    order.append(block)
+
+        # Blocks that can't be reached from any root are kept at the end
+        order.reverse()
+        order.extend(block for block in self.blocks if block.index not in visited)
+        return order
+
+
+    def regions(self):
+        """
+        Returns the section split into the parts no edge goes across (a ControlFlowGraph
+        for each one, with the same Instructions). Functions only reach each other through
+        calls, so each part is a function (or the main code) and the passes that work one
+        part at a time don't walk the rest of the section.
+        """
+        # Each edge covers the cuts between its ends, count them with a difference array
+        covered = [0] * (len(self.blocks) + 1)
+        for block in self.blocks:
+            for successor in block.successors:
+                low, high = min(block.index, successor.index), max(block.index, successor.index)
+                covered[low + 1] += 1
+                covered[high + 1] -= 1
+
+        regions = []
+        start, edges = 0, 0
+        for block in self.blocks:
+            edges += covered[block.index]
+            # Cut before the block if no edge goes over it
+            if block.index > start and edges == 0:
+                regions.append(self.blocks[start:block.index])
+                start = block.index
+        regions.append(self.blocks[start:])
+
+        return [ControlFlowGraph([instruction for block in blocks for instruction in block.instructions]) for blocks in regions]
+
+
+    def immediate_dominators(self):
+        """
+        Returns a dictionary from each reachable block index to the index of its immediate
+        dominator (the closest block every path from an entry to it goes through). The
+        entries are dominated by a virtual root (-1), so a block reached from several
+        entries is only dominated by itself.
+
+        Uses the algorithm of Cooper, Harvey and Kennedy: the dominator of each block is the
+        common ancestor (in the tree built so far) of its processed predecessors, the blocks
+        are visited in reverse postorder until the tree is stable.
+        """
+        order = self.reverse_postorder()
+        position = {block.index: number for number, block in enumerate(order)}
+        position[-1] = -1
+        entries = {block.index for block in self.blocks if not block.predecessors or block.index == 0}
+        idom = {index: -1 for index in entries}
+
+        def intersect(left, right):
+            # Walk up the tree from the deepest block until both paths meet
+            while left != right:
+                while position[left] > position[right]:
+                    left = idom[left]
+                while position[right] > position[left]:
+                    right = idom[right]
+            return left
+
+        # Iterate until the tree is stable
+        changed = True
+        while changed:
+            changed = False
+            for block in order:
+                if block.index in entries:
+                    continue
+                dominator = None
+                for predecessor in block.predecessors:
+                    # Predecessors without a dominator yet (or unreachable) are skipped
+                    if predecessor.index in idom:
+                        dominator = predecessor.index if dominator is None else intersect(predecessor.index, dominator)
+                if dominator is not None and idom.get(block.index) != dominator:
+                    idom[block.index] = dominator
+                    changed = True
+
+        return idom
+
+
+    def dominator_intervals(self):
+        """
+        Returns a dictionary from each reachable block index to the interval (first, last)
+        of the preorder numbers of its subtree in the dominator tree. A block dominates
+        another one when the number of the other one is inside its interval.
+        """
+        children = {}
+        for index, dominator in self.immediate_dominators().items():
+            children.setdefault(dominator, []).append(index)
+
+        # Iterative depth first search of the tree (explicit stack of block, leaving flag)
+        intervals = {}
+        first = {}
+        counter = 0
+        stack = [(-1, False)]
+        while stack:
+            index, leaving = stack.pop()
+            if leaving:
+                intervals[index] = (first[index], counter - 1)
+                continue
+            first[index] = counter
+            counter += 1
+            stack.append((index, True))
+            stack.extend((child, False) for child in children.get(index, ()))
+
+        del intervals[-1]
+        return intervals
+
+
+    def natural_loops(self):
+        """
+        Returns the loops of the section, found from the back edges (edges into a block
+        that dominates the source of the edge). Loops with the same header are merged,
+        the innermost loops (fewer blocks) come first.
+        """
+        intervals = self.dominator_intervals()
+        loops = {}
+
+        for block in self.blocks:
+            if block.index not in intervals:
+                continue
+            number = intervals[block.index][0]
+            for successor in block.successors:
+                # Check if the edge is a back edge
+                header = intervals.get(successor.index)
+                if header is None or not header[0] <= number <= header[1]:
+                    continue
+                loop = loops.setdefault(successor.index, Loop(successor))
+                loop.back_edges.append(block)
+
+                # Walk backwards from the source of the edge up to the header
+                stack = [block]
+                while stack:
+                    current = stack.pop()
+                    if current.index in loop.body:
+                        continue
+                    loop.body.add(current.index)
+                    stack.extend(current.predecessors)
+
+        return sorted(loops.values(), key=lambda loop: len(loop.body))
+
+
+    def liveness(self, reserved=None, exits=False):
+        """
+        Returns a dictionary from each block index to the set of registers that may be read
+        after the block ends. Calls, returns and the end of the section count as reading
+        every register, since the code on the other side is not known.
+
+        Args:
+            - reserved: the registers used by the other sections of the program
+            - exits: if the program ends after the section (nothing is read after it)
+        """
+        self.every_register = self.registers() | set(reserved or ()) | {"$v0", "$a0", "$hi", "$lo"}
+        live_in = {block.index: set() for block in self.blocks}
+        live_out = {block.index: set() for block in self.blocks}
+
+        # Iterate backwards until the sets are stable
+        changed = True
+        while changed:
+            changed = False
+            for block in reversed(self.blocks):
+                # The last block of the section may continue into unknown code
+                live = set()
+                if block.index == len(self.blocks) - 1 and not exits:
+                    live = set(self.every_register)
+                for successor in block.successors:
+                    live |= live_in[successor.index]
+                live_out[block.index] = set(live)
+
+                for instruction in reversed(block.instructions):
+                    if instruction.op is not None:
+                        live = self.live_before(instruction, live)
+
+                if live != live_in[block.index]:
+                    live_in[block.index] = live
+                    changed = True
+
+        return live_out
+
+
+    def live_before(self, instruction:Instruction, live):
+        """
+        Returns the registers live before an instruction, given the ones live after it
+        """
+        if instruction.op in ("jal", "jr"):
+            return set(self.every_register)
+        live = live - set(instruction.definitions())
+        live |= set(instruction.uses())
+        return live
+
+
+    def registers(self):
+        """
+        Returns every register named in the section
+        """
+        registers = set()
+        for block in self.blocks:
+            for instruction in block.instructions:
+                registers.update(operand for operand in instruction.operands if is_register(operand))
+        return registers
+
+
+    def instructions(self):
+        """
+        Returns the Instructions of the section, in the order of the blocks
+        """
+        return [instruction for block in self.blocks for instruction in block.instructions]
+
+
+    def lines(self):
+        """
+        Returns the text of the section, rebuilt from the blocks
+        """
+        return [instruction.text for block in self.blocks for instruction in block.instructions]
@@ -2,6 +2,13 @@
 from IntermediateCode.structures import Register
 from SemanticAnalyzer.symbols import *
 from SemanticAnalyzer.types import *
+from SyntaxTree.tokens import text, LESS, LESS_EQUAL, GREATER, GREATER_EQUAL, EQUAL_EQUAL, BANG_EQUAL
+
+
+# Fused compare and branch instructions for each comparison operator (keyed by token type)
+BRANCHES = {LESS: "blt", LESS_EQUAL: "ble", GREATER: "bgt", GREATER_EQUAL: "bge", EQUAL_EQUAL: "beq", BANG_EQUAL: "bne"}
+# Compare with zero and branch instructions for each comparison operator (keyed by token type)
+ZERO_BRANCHES = {LESS: "bltz", LESS_EQUAL: "blez", GREATER: "bgtz", GREATER_EQUAL: "bgez", EQUAL_EQUAL: "beqz", BANG_EQUAL: "bnez"}
 
 
 class InstructionGenerator():
@@ -98,6 +105,24 @@ class InstructionGenerator():
         self.instruction_block.append(f'sub {result.id}, {left.id}, {right.id}    # Subtraction operation')
     
 
+    def add_unsigned(self, result:Register, left:Register, right:Register):
+        """
+        Semi instruction to add the value of two registers with one another without
+        the overflow check (the sum wraps to 32 bits), saves the result into the
+        register passed as result
+        """
+        self.instruction_block.append(f'addu {result.id}, {left.id}, {right.id}    # Addition without overflow')
+
+
+    def sub_unsigned(self, result:Register, left:Register, right:Register):
+        """
+        Semi instruction to subtract the value of two registers with one another without
+        the overflow check (the difference wraps to 32 bits), saves the result into the
+        register passed as result
+        """
+        self.instruction_block.append(f'subu {result.id}, {left.id}, {right.id}    # Subtraction without overflow')
+
+
     def mult(self, result:Register, left:Register, right:Register):
         """
         Semi instruction to multiply the value of two registers with one another,
@@ -124,6 +149,95 @@ class InstructionGenerator():
         self.instruction_block.append(f"mfhi {result.id}    # Save the remainder (from HI register) into destination")
 
 
+    def add_immediate(self, result:Register, left:Register, immediate):
+        """
+        Semi instruction to add an immediate value to a register,
+        saves the result into the register passed as result
+        """
+        self.instruction_block.append(f'addi {result.id}, {left.id}, {immediate}    # Addition with immediate {immediate}')
+
+
+    def and_immediate(self, result:Register, left:Register, immediate):
+        """
+        Semi instruction to apply a bitwise and between a register and an immediate value,
+        saves the result into the register passed as result
+        """
+        self.instruction_block.append(f'andi {result.id}, {left.id}, {immediate}    # Bitwise and with immediate {immediate}')
+
+
+    def xor_immediate(self, result:Register, left:Register, immediate):
+        """
+        Semi instruction to apply a bitwise xor between a register and an immediate value,
+        saves the result into the register passed as result
+        """
+        self.instruction_block.append(f'xori {result.id}, {left.id}, {immediate}    # Bitwise xor with immediate {immediate}')
+
+
+    def shift_left(self, result:Register, left:Register, amount):
+        """
+        Semi instruction to shift the value of a register to the left (multiply by 2^amount),
+        saves the result into the register passed as result
+        """
+        self.instruction_block.append(f'sll {result.id}, {left.id}, {amount}    # Shift left by {amount} (multiply by {2 ** amount})')
+
+
+    def shift_right_arithmetic(self, result:Register, left:Register, amount):
+        """
+        Semi instruction to shift the value of a register to the right keeping its sign,
+        saves the result into the register passed as result
+        """
+        self.instruction_block.append(f'sra {result.id}, {left.id}, {amount}    # Arithmetic shift right by {amount}')
+
+
+    def shift_right_logical(self, result:Register, left:Register, amount):
+        """
+        Semi instruction to shift the value of a register to the right filling with zeros,
+        saves the result into the register passed as result
+        """
+        self.instruction_block.append(f'srl {result.id}, {left.id}, {amount}    # Logical shift right by {amount}')
+
+
+    def mult_high(self, result:Register, left:Register, right:Register):
+        """
+        Semi instruction to multiply the value of two registers with one another,
+        saves the upper 32 bits of the 64 bit product into the register passed as result
+        (mult followed by mfhi)
+        """
+        self.instruction_block.append(f'mulh {result.id}, {left.id}, {right.id}    # Upper word of the multiplication')
+
+
+    def save_less_than_immediate(self, destination:Register, left:Register, immediate):
+        """
+        Semi instruction that compares a register with an immediate value, if left is less than
+        the immediate, saves the result into the destination
+        """
+        self.instruction_block.append(f'slti {destination.id}, {left.id}, {immediate}   # Save 1 if {left.id} < {immediate} else 0')
+
+
+    def save_less_than_unsigned(self, destination:Register, left:Register, right:Register):
+        """
+        Semi instruction that compares two registers as unsigned values, if left is less than right,
+        saves the result into the destination
+        """
+        self.instruction_block.append(f'sltu {destination.id}, {left.id}, {right.id}   # Save 1 if {left.id} < {right.id} (unsigned) else 0')
+
+
+    def save_less_than_immediate_unsigned(self, destination:Register, left:Register, immediate):
+        """
+        Semi instruction that compares a register with an immediate value as unsigned values,
+        if left is less than the immediate, saves the result into the destination
+        """
+        self.instruction_block.append(f'sltiu {destination.id}, {left.id}, {immediate}   # Save 1 if {left.id} < {immediate} (unsigned) else 0')
+
+
+    def xor(self, result:Register, left:Register, right:Register):
+        """
+        Semi instruction to apply a bitwise xor between two registers,
+        saves the result into the register passed as result
+        """
+        self.instruction_block.append(f'xor {result.id}, {left.id}, {right.id}    # Bitwise xor operation')
+
+
     def move(self, destination:Register, source:Register):
         """
         Semi instruction to move the value from source into the destination register
@@ -164,6 +278,31 @@ class InstructionGenerator():
             self.instruction_block.append(f'bne {left.id}, {right.id}, {jump}    # Jump to {jump} if not equals')
     
 
+    def branch_compare(self, operator, left:Register, right, jump):
+        """
+        Semi intruction that compares a register with another register or an immediate value,
+        jumps to the label if the comparison is met (fused compare and branch).
+        The operator is the token type of <, <=, >, >=, == or !=
+        """
+        # Check if jump is not empty
+        if jump != "":
+            op = BRANCHES[operator]
+            right = right.id if isinstance(right, Register) else right
+            self.instruction_block.append(f'{op} {left.id}, {right}, {jump}    # Jump to {jump} if {left.id} {text(operator)} {right}')
+
+
+    def branch_compare_zero(self, operator, register:Register, jump):
+        """
+        Semi intruction that compares a register with zero,
+        jumps to the label if the comparison is met.
+        The operator is the token type of <, <=, >, >=, == or !=
+        """
+        # Check if jump is not empty
+        if jump != "":
+            op = ZERO_BRANCHES[operator]
+            self.instruction_block.append(f'{op} {register.id}, {jump}    # Jump to {jump} if {register.id} {text(operator)} 0')
+
+
     def save_less_than(self, destination:Register, left:Register, right:Register):
         """
         Semi instruction that compares two registers, if left is less than right, 
@@ -290,17 +429,44 @@ class InstructionGenerator():
         self.instruction_block.append("syscall  # Print the value")
     
 
-    def get_instruction_set(self):
-        self.data_section.append("\n")  # Add a new line
-        self.data_section.extend(self.main_section) # Add the main section
+    def iter_instruction_set(self):
+        """
+        Yields the lines of the program in order: the data section, the main section with
+        the end of program instructions and the local context (the functions).
+        The sections are not modified, so the program can be read any number of times.
+        """
+        yield from self.data_section
+        yield "\n"  # Add a new line
+        yield from self.main_section
 
         # Add the end of program instructions
-        self.data_section.append("# End of program")
-        self.data_section.append("li $v0, 10     # Set mode to exit")
-        self.data_section.append("syscall       # Exit the program")
-        self.data_section.append("\n")
+        yield "# End of program"
+        yield "li $v0, 10     # Set mode to exit"
+        yield "syscall       # Exit the program"
+        yield "\n"
 
-        # Add the local context to the data section
-        self.data_section.extend(self.local_context)
-        
-        return self.data_section
\ No newline at end of file
+        # Add the local context
+        yield from self.local_context
+
+
+    def get_instruction_set(self):
+        """
+        Returns the lines of the program as a list (see iter_instruction_set)
+        """
+        return list(self.iter_instruction_set())
+
+
+    def write_instruction_set(self, sink):
+        """
+        Writes the lines of the program separated by new lines to a writable sink
+        (a file, sys.stdout, io.StringIO, ...) in a single pass, without building the
+        whole text first (the output is the same as "\\n".join(get_instruction_set()))
+
+        Args:
+            sink: Any object with a write method that takes a str
+        """
+        lines = self.iter_instruction_set()
+        sink.write(next(lines))
+        for line in lines:
+            sink.write("\n")
+            sink.write(line)
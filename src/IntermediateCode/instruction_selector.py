@@ -0,0 +1,722 @@
+from IntermediateCode.structures import Register
+from SemanticAnalyzer.symbols import *
+from SemanticAnalyzer.types import *
+from SyntaxTree.tokens import PLUS, MINUS, STAR, SLASH, PERCENT
+from SyntaxTree.tokens import LESS, LESS_EQUAL, GREATER, GREATER_EQUAL, EQUAL_EQUAL, BANG_EQUAL
+
+
+# Kinds of the operands (see InstructionSelector.classify)
+IMM = 0     # An integer constant
+REG = 1     # Anything else
+
+# Comparison operator to use when the operands are swapped (a < b is the same as b > a)
+MIRRORED = {
+    LESS: GREATER, LESS_EQUAL: GREATER_EQUAL, GREATER: LESS, GREATER_EQUAL: LESS_EQUAL,
+    EQUAL_EQUAL: EQUAL_EQUAL, BANG_EQUAL: BANG_EQUAL,
+}
+# Comparison operator that is met when the original one is not
+NEGATED = {
+    LESS: GREATER_EQUAL, LESS_EQUAL: GREATER, GREATER: LESS_EQUAL, GREATER_EQUAL: LESS,
+    EQUAL_EQUAL: BANG_EQUAL, BANG_EQUAL: EQUAL_EQUAL,
+}
+# Result of a comparison between two constants
+COMPARISONS = {
+    LESS: lambda a, b: a < b, LESS_EQUAL: lambda a, b: a <= b,
+    GREATER: lambda a, b: a > b, GREATER_EQUAL: lambda a, b: a >= b,
+    EQUAL_EQUAL: lambda a, b: a == b, BANG_EQUAL: lambda a, b: a != b,
+}
+
+
+def is_power_of_two(value):
+    """
+    Checks if a positive integer is a power of two
+    """
+    return value > 0 and value & (value - 1) == 0
+
+
+def magic_number(divisor):
+    """
+    Returns the magic number and the shift amount that replace the signed 32 bit
+    division by a constant (divisor >= 2) with a multiplication, so that
+    n / divisor = ((n * magic) >> (32 + shift)) plus one if n is negative
+    (Hacker's Delight, chapter 10)
+    """
+    two31 = 1 << 31
+    anc = two31 - 1 - two31 % divisor   # Absolute value of the largest dividend that gives the right result
+    p = 31
+    q1, r1 = divmod(two31, anc)         # Quotient and remainder of 2^p / anc
+    q2, r2 = divmod(two31, divisor)     # Quotient and remainder of 2^p / divisor
+
+    # Increase p until 2^p / anc is big enough
+    while True:
+        p += 1
+        q1, r1 = 2 * q1, 2 * r1
+        if r1 >= anc:
+            q1, r1 = q1 + 1, r1 - anc
+        q2, r2 = 2 * q2, 2 * r2
+        if r2 >= divisor:
+            q2, r2 = q2 + 1, r2 - divisor
+        delta = divisor - r2
+        if not (q1 < delta or (q1 == delta and r1 == 0)):
+            break
+
+    # The magic number is used as a signed 32 bit value
+    magic = q2 + 1
+    if magic >= two31:
+        magic -= 1 << 32
+    return magic, p - 32
+
+
+class InstructionSelector():
+    """
+    Tree pattern matching instruction selector for the expression nodes
+    (term, factor, comparison, equality and unary).
+
+    Each operand of an operation is classified by its kind:
+        - IMM: an integer constant, can be used as an immediate value
+        - REG: anything else, must be loaded into a register
+
+    Concatenations are picked by the generator from the types inferred by the
+    semantic analyzer (see visitTerm), so strings never reach the pattern table.
+
+    The pattern table maps (operator, left kind, right kind) to the method that generates
+    the instructions for that shape, so constants are folded, immediates are used with
+    addi/slti, comparisons with zero use the $zero register forms and (when the code is
+    optimized) multiplications, divisions and modulos by constants are reduced to shifts,
+    masks and additions. The additions and subtractions of the reduced sequences are the
+    ones that wrap (addu, subu): their partial results (x << 3 in x * 7) can overflow
+    when the final result doesn't.
+    """
+
+    def __init__(self, generator):
+        self.generator = generator                                      # Reference to the IntermediateCodeGenerator
+        self.instruction_generator = generator.instruction_generator    # Object that builds semi mips instructions
+        self.register_controller = generator.register_controller        # Object that manages the registers
+
+        # Patterns for the arithmetic operators (term and factor nodes)
+        self.patterns = {
+            (PLUS, IMM, IMM): self.fold,
+            (PLUS, REG, IMM): self.add_immediate,
+            (PLUS, IMM, REG): self.add_immediate_swapped,
+            (PLUS, REG, REG): self.add,
+            (MINUS, IMM, IMM): self.fold,
+            (MINUS, REG, IMM): self.subtract_immediate,
+            (MINUS, IMM, REG): self.subtract_from_immediate,
+            (MINUS, REG, REG): self.subtract,
+            (STAR, IMM, IMM): self.fold,
+            (STAR, REG, IMM): self.multiply_immediate,
+            (STAR, IMM, REG): self.multiply_immediate_swapped,
+            (STAR, REG, REG): self.multiply,
+            (SLASH, IMM, IMM): self.fold,
+            (SLASH, REG, IMM): self.divide_immediate,
+            (SLASH, IMM, REG): self.divide,
+            (SLASH, REG, REG): self.divide,
+            (PERCENT, IMM, IMM): self.fold,
+            (PERCENT, REG, IMM): self.modulo_immediate,
+            (PERCENT, IMM, REG): self.modulo,
+            (PERCENT, REG, REG): self.modulo,
+        }
+
+        # Without the optimizations the constants are operands like any other
+        if not generator.optimize:
+            self.patterns.update({
+                (STAR, REG, IMM): self.multiply,
+                (STAR, IMM, REG): self.multiply,
+                (SLASH, REG, IMM): self.divide,
+                (PERCENT, REG, IMM): self.modulo,
+            })
+
+
+    # --------------------------------------------------------------------- #
+    # Operand helpers
+
+    def classify(self, operand):
+        """
+        Returns the kind of an operand (IMM or REG)
+        """
+        if isinstance(operand, NumberType) and self.integer(operand) is not None:
+            return IMM
+        return REG
+
+
+    def integer(self, operand):
+        """
+        Returns the integer value of a number constant (None if it isn't an integer)
+        """
+        try:
+            return int(str(operand.value))
+        except ValueError:
+            return None
+
+
+    def constant(self, value):
+        """
+        Returns a number constant with the value passed
+        """
+        return NumberType(value=str(value))
+
+
+    def materialize(self, operand) -> Register:
+        """
+        Returns a register holding the value of the operand,
+        loading it if it isn't in a register already
+        """
+        # Check if the operand is a register
+        if isinstance(operand, Register):
+            if operand.type == "return":
+                # A return register ($v0, $v1) value must
+                # be moved to a temporal register in order to use it
+                # in the operation (and not lose the return value)
+                temp = self.register_controller.new_temporal(operand.value, operand.symbol)
+                self.register_controller.move(temp, operand)  # Move the value to the temporal register
+                self.instruction_generator.move(temp, operand)  # Move the value to the temporal register
+                self.register_controller.free_register(operand)  # Free the return register
+                return temp
+            return operand
+
+        # Check if the operand is a variable
+        if isinstance(operand, Variable):
+            # Search for the register holding the variable
+            tmp = self.register_controller.get_register_with_symbol(operand)
+            if tmp is None:
+                # If the register is not found, create a new register and load the value to it
+                tmp = self.register_controller.new_temporal(operand.data_type, operand)
+                self.instruction_generator.load(tmp, operand.id)
+            return tmp
+
+        # Zero is always available in the $zero register
+        if self.classify(operand) == IMM and self.integer(operand) == 0:
+            return self.register_controller.zero
+
+        # Otherwise the operand is an immediate value, load it to a register
+        temp = self.register_controller.new_temporal(operand)
+        # Check if the operand is a string
+        if isinstance(operand, StringType):
+            # If it is, load the value from the string constants buffer
+            self.instruction_generator.load(temp, self.generator.string_constants.get(operand.value, "BUFFER"))
+        else:
+            # Otherwise, load the value to the register
+            self.instruction_generator.load(temp, operand.value)
+        return temp
+
+
+    def copy(self, operand) -> Register:
+        """
+        Returns a new temporal register holding the value of the operand
+        (the register of a variable can't be handed out as the result of an operation)
+        """
+        operand = self.materialize(operand)
+        temp = self.register_controller.new_temporal(operand.value)
+        self.instruction_generator.move(temp, operand)
+        self.release(operand)
+        return temp
+
+
+    def release(self, *registers):
+        """
+        Frees the registers used as operands
+        """
+        for register in registers:
+            # The $zero register is never allocated, so it is never freed
+            if isinstance(register, Register) and register is not self.register_controller.zero:
+                self.register_controller.free_register(register)
+
+
+    # --------------------------------------------------------------------- #
+    # Arithmetic (term and factor nodes)
+
+    def select(self, operator, left, right):
+        """
+        Generates the instructions for an arithmetic operation and returns
+        the result (a register, or a constant if it could be folded)
+
+        Args:
+            - operator: the operator of the operation (+, -, *, /, %)
+            - left: the left operand (register, variable or constant)
+            - right: the right operand (register, variable or constant)
+        """
+        left_kind = self.classify(left)
+        right_kind = self.classify(right)
+        return self.patterns[(operator, left_kind, right_kind)](operator, left, right)
+
+
+    def fold(self, operator, left, right):
+        """
+        Pattern (constant, constant): the operation is done at compile time
+        """
+        a, b = self.integer(left), self.integer(right)
+        if operator == PLUS:
+            return self.constant(a + b)
+        if operator == MINUS:
+            return self.constant(a - b)
+        if operator == STAR:
+            return self.constant(a * b)
+        # Division by zero is left for the program to fail at runtime
+        if b == 0:
+            return self.patterns[(operator, REG, REG)](operator, left, right)
+        # The division truncates towards zero (like the div instruction)
+        quotient = abs(a) // abs(b) * (1 if (a < 0) == (b < 0) else -1)
+        if operator == SLASH:
+            return self.constant(quotient)
+        return self.constant(a - b * quotient)
+
+
+    def concatenate(self, operator, left, right):
+        """
+        Concatenation, used by the generator when any of the operands of + is a string
+        """
+        left = self.materialize(left)
+        right = self.materialize(right)
+        temp = self.register_controller.new_temporal(StringType(value=str(left)+str(right)))
+        self.instruction_generator.concatenate(temp, left, right)
+        self.release(right, left)
+        return temp
+
+
+    def add(self, operator, left, right):
+        """
+        Pattern (register, register) with +: add
+        """
+        left = self.materialize(left)
+        right = self.materialize(right)
+        temp = self.register_controller.new_temporal(right.value)
+        self.instruction_generator.add(temp, left, right)
+        self.release(right, left)
+        return temp
+
+
+    def add_immediate(self, operator, left, right):
+        """
+        Pattern (register, constant) with +: addi
+        """
+        left = self.materialize(left)
+        temp = self.register_controller.new_temporal(right)
+        self.instruction_generator.add_immediate(temp, left, self.integer(right))
+        self.release(left)
+        return temp
+
+
+    def add_immediate_swapped(self, operator, left, right):
+        """
+        Pattern (constant, register) with +: addi (the addition is commutative)
+        """
+        return self.add_immediate(operator, right, left)
+
+
+    def subtract(self, operator, left, right):
+        """
+        Pattern (register, register) with -: sub
+        """
+        left = self.materialize(left)
+        right = self.materialize(right)
+        temp = self.register_controller.new_temporal(right.value)
+        self.instruction_generator.sub(temp, left, right)
+        self.release(right, left)
+        return temp
+
+
+    def subtract_immediate(self, operator, left, right):
+        """
+        Pattern (register, constant) with -: addi with the negated constant
+        """
+        return self.add_immediate(operator, left, self.constant(-self.integer(right)))
+
+
+    def subtract_from_immediate(self, operator, left, right):
+        """
+        Pattern (constant, register) with -: sub (from $zero if the constant is zero)
+        """
+        return self.subtract(operator, left, right)
+
+
+    def multiply(self, operator, left, right):
+        """
+        Pattern (register, register) with *: mult
+        """
+        left = self.materialize(left)
+        right = self.materialize(right)
+        temp = self.register_controller.new_temporal(right.value)
+        self.instruction_generator.mult(temp, left, right)
+        self.release(right, left)
+        return temp
+
+
+    def multiply_immediate(self, operator, left, right):
+        """
+        Pattern (register, constant) with *: sll for powers of two,
+        shift and add sequences for small constants, mult otherwise
+        """
+        value = self.integer(right)
+        # Multiplying by zero gives zero, by one gives the same value
+        if value == 0:
+            return self.constant(0)
+        if value == 1:
+            return self.copy(left)
+        if value == -1:
+            return self.negate(left)
+
+        # Check if the constant can be reduced to shifts and additions
+        if not self.has_shift_add(abs(value)):
+            return self.multiply(operator, left, right)
+
+        left = self.materialize(left)
+        temp = self.shift_add(left, abs(value))
+        # Negative constants negate the result
+        if value < 0:
+            self.instruction_generator.sub_unsigned(temp, self.register_controller.zero, temp)
+        self.release(left)
+        return temp
+
+
+    def multiply_immediate_swapped(self, operator, left, right):
+        """
+        Pattern (constant, register) with *: same as (register, constant)
+        """
+        return self.multiply_immediate(operator, right, left)
+
+
+    def divide(self, operator, left, right):
+        """
+        Pattern (any, any) with /: div, the quotient is taken from LO
+        """
+        left = self.materialize(left)
+        right = self.materialize(right)
+        temp = self.register_controller.new_temporal(right.value)
+        self.instruction_generator.div(temp, left, right)
+        self.release(right, left)
+        return temp
+
+
+    def divide_immediate(self, operator, left, right):
+        """
+        Pattern (register, constant) with /: shifts for powers of two,
+        multiplication by a magic number otherwise
+        """
+        value = self.integer(right)
+        # Division by zero is left for the program to fail at runtime
+        if value == 0:
+            return self.divide(operator, left, right)
+        if value == 1:
+            return self.copy(left)
+        if value == -1:
+            return self.negate(left)
+
+        left = self.materialize(left)
+        temp = self.quotient(left, abs(value))
+        # Negative constants negate the result
+        if value < 0:
+            self.instruction_generator.sub_unsigned(temp, self.register_controller.zero, temp)
+        self.release(left)
+        return temp
+
+
+    def modulo(self, operator, left, right):
+        """
+        Pattern (any, any) with %: div, the remainder is taken from HI
+        """
+        left = self.materialize(left)
+        right = self.materialize(right)
+        temp = self.register_controller.new_temporal(right.value)
+        self.instruction_generator.mod(temp, left, right)
+        self.release(right, left)
+        return temp
+
+
+    def modulo_immediate(self, operator, left, right):
+        """
+        Pattern (register, constant) with %: a mask for powers of two,
+        left - (left / constant) * constant otherwise.
+        The remainder has the sign of the left value (like the div instruction)
+        """
+        # The sign of the constant doesn't change the remainder
+        value = abs(self.integer(right))
+        if value == 0:
+            return self.modulo(operator, left, right)
+        if value == 1:
+            return self.constant(0)
+
+        left = self.materialize(left)
+        if is_power_of_two(value):
+            # Bias negative values so the mask works like a truncating division:
+            # left % 2^k = ((left + bias) & (2^k - 1)) - bias
+            bias = self.bias(left, value.bit_length() - 1)
+            temp = self.register_controller.new_temporal(NumberType())
+            self.instruction_generator.add_unsigned(temp, left, bias)
+            self.instruction_generator.and_immediate(temp, temp, value - 1)
+            self.instruction_generator.sub_unsigned(temp, temp, bias)
+            self.release(bias)
+        else:
+            quotient = self.quotient(left, value)
+            product = self.product(quotient, value)
+            self.release(quotient)
+            temp = self.register_controller.new_temporal(NumberType())
+            self.instruction_generator.sub_unsigned(temp, left, product)
+            self.release(product)
+        self.release(left)
+        return temp
+
+
+    # --------------------------------------------------------------------- #
+    # Strength reduction helpers (the register passed is never freed). Their partial
+    # results can overflow, so they are added and subtracted with wrapping (like sll)
+
+    def negate(self, operand) -> Register:
+        """
+        Returns a new register with the operand negated without the overflow check
+        (the negation of the smallest word wraps to itself)
+        """
+        operand = self.materialize(operand)
+        temp = self.register_controller.new_temporal(NumberType())
+        self.instruction_generator.sub_unsigned(temp, self.register_controller.zero, operand)
+        self.release(operand)
+        return temp
+
+
+    def has_shift_add(self, value):
+        """
+        Checks if multiplying by a positive constant can be done with at most
+        two shifts and an addition or subtraction
+        """
+        return is_power_of_two(value) or bin(value).count("1") == 2 or is_power_of_two(value + 1)
+
+
+    def shift_add(self, register, value) -> Register:
+        """
+        Multiplies a register by a positive constant with shifts and additions,
+        returns a new register with the result (see has_shift_add)
+        """
+        temp = self.register_controller.new_temporal(NumberType())
+        high = value.bit_length() - 1
+
+        if is_power_of_two(value):
+            # x * 2^a = x << a
+            self.instruction_generator.shift_left(temp, register, high)
+
+        elif is_power_of_two(value + 1):
+            # x * (2^a - 1) = (x << a) - x
+            self.instruction_generator.shift_left(temp, register, high + 1)
+            self.instruction_generator.sub_unsigned(temp, temp, register)
+
+        else:
+            # x * (2^a + 2^b) = (x << a) + (x << b)
+            low = (value & -value).bit_length() - 1
+            self.instruction_generator.shift_left(temp, register, high)
+            if low == 0:
+                self.instruction_generator.add_unsigned(temp, temp, register)
+            else:
+                shifted = self.register_controller.new_temporal(NumberType())
+                self.instruction_generator.shift_left(shifted, register, low)
+                self.instruction_generator.add_unsigned(temp, temp, shifted)
+                self.release(shifted)
+
+        return temp
+
+
+    def product(self, register, value) -> Register:
+        """
+        Multiplies a register by a positive constant,
+        returns a new register with the result
+        """
+        if self.has_shift_add(value):
+            return self.shift_add(register, value)
+
+        constant = self.register_controller.new_temporal(NumberType())
+        self.instruction_generator.load(constant, value)
+        temp = self.register_controller.new_temporal(NumberType())
+        self.instruction_generator.mult(temp, register, constant)
+        self.release(constant)
+        return temp
+
+
+    def bias(self, register, shift) -> Register:
+        """
+        Returns a new register holding 2^shift - 1 if the register is negative and 0 otherwise,
+        adding it before shifting right makes the division round towards zero
+        """
+        temp = self.register_controller.new_temporal(NumberType())
+        if shift == 1:
+            # The bias is the sign bit
+            self.instruction_generator.shift_right_logical(temp, register, 31)
+        else:
+            # Fill with the sign bit and keep the lowest bits
+            self.instruction_generator.shift_right_arithmetic(temp, register, 31)
+            self.instruction_generator.shift_right_logical(temp, temp, 32 - shift)
+        return temp
+
+
+    def quotient(self, register, value) -> Register:
+        """
+        Divides a register by a constant (value >= 2) without the div instruction,
+        returns a new register with the quotient (rounded towards zero)
+        """
+        if is_power_of_two(value):
+            # (x + bias) >> k
+            shift = value.bit_length() - 1
+            temp = self.bias(register, shift)
+            self.instruction_generator.add_unsigned(temp, register, temp)
+            self.instruction_generator.shift_right_arithmetic(temp, temp, shift)
+            return temp
+
+        # Multiply by the magic number and keep the upper word
+        magic, shift = magic_number(value)
+        constant = self.register_controller.new_temporal(NumberType())
+        self.instruction_generator.load(constant, magic)
+        temp = self.register_controller.new_temporal(NumberType())
+        self.instruction_generator.mult_high(temp, register, constant)
+        # Magic numbers that overflowed into the sign bit need the dividend added back
+        if magic < 0:
+            self.instruction_generator.add_unsigned(temp, temp, register)
+        if shift > 0:
+            self.instruction_generator.shift_right_arithmetic(temp, temp, shift)
+        # Add one if the dividend is negative (round towards zero)
+        self.instruction_generator.shift_right_logical(constant, register, 31)
+        self.instruction_generator.add_unsigned(temp, temp, constant)
+        self.release(constant)
+        return temp
+
+
+    # --------------------------------------------------------------------- #
+    # Comparisons (comparison and equality nodes)
+
+    def select_comparison(self, operator, left, right, jump, inverse):
+        """
+        Generates the instructions for a comparison. If there are labels to jump to,
+        fused compare and branch instructions are used and None is returned,
+        otherwise the result (1 or 0) is saved into a register and returned.
+
+        Args:
+            - operator: the comparison operator (<, <=, >, >=, ==, !=)
+            - left: the left operand (register, variable or constant)
+            - right: the right operand (register, variable or constant)
+            - jump: the label to jump to if the comparison is met ("" if none)
+            - inverse: the label to jump to if the comparison is not met ("" if none)
+        """
+        left_kind = self.classify(left)
+        right_kind = self.classify(right)
+
+        # Both operands are constants, the result is known at compile time
+        if left_kind == IMM and right_kind == IMM:
+            return self.fold_comparison(operator, left, right, jump, inverse)
+
+        # Keep the constant on the right side, so it can be used as an immediate
+        if left_kind == IMM:
+            operator = MIRRORED[operator]
+            left, right, right_kind = right, left, left_kind
+
+        # Result needed as a value (not in a condition)
+        if jump == "" and inverse == "":
+            return self.compare_value(operator, left, right, right_kind)
+
+        left = self.materialize(left)
+
+        # Comparison with zero, use the single register branches
+        if right_kind == IMM and self.integer(right) == 0:
+            self.instruction_generator.branch_compare_zero(operator, left, jump)
+            self.instruction_generator.branch_compare_zero(NEGATED[operator], left, inverse)
+            self.release(left)
+            return None
+
+        # Comparison with an immediate value or another register
+        if right_kind == IMM:
+            right = self.integer(right)
+        else:
+            right = self.materialize(right)
+        self.instruction_generator.branch_compare(operator, left, right, jump)
+        self.instruction_generator.branch_compare(NEGATED[operator], left, right, inverse)
+        self.release(right, left)
+        return None
+
+
+    def fold_comparison(self, operator, left, right, jump, inverse):
+        """
+        Pattern (constant, constant): the comparison is done at compile time
+        """
+        a, b = self.integer(left), self.integer(right)
+        result = COMPARISONS[operator](a, b)
+
+        # Result needed as a value
+        if jump == "" and inverse == "":
+            return BooleanType(value="true" if result else "false")
+
+        # Jump directly to the label that applies
+        label = jump if result else inverse
+        if label != "":
+            self.instruction_generator.jump_to(label)
+        return None
+
+
+    def compare_value(self, operator, left, right, right_kind):
+        """
+        Saves the result of a comparison (1 or 0) into a register
+        """
+        left = self.materialize(left)
+        temp = self.register_controller.new_temporal(BooleanType())
+
+        if operator == LESS and right_kind == IMM:
+            # left < imm
+            self.instruction_generator.save_less_than_immediate(temp, left, self.integer(right))
+        elif operator == GREATER_EQUAL and right_kind == IMM:
+            # left >= imm is not (left < imm)
+            self.instruction_generator.save_less_than_immediate(temp, left, self.integer(right))
+            self.instruction_generator.xor_immediate(temp, temp, 1)
+        else:
+            right = self.materialize(right)
+            if operator == LESS:
+                self.instruction_generator.save_less_than(temp, left, right)
+            elif operator == GREATER:
+                self.instruction_generator.save_less_than(temp, right, left)
+            elif operator == LESS_EQUAL:
+                # left <= right is not (right < left)
+                self.instruction_generator.save_less_than(temp, right, left)
+                self.instruction_generator.xor_immediate(temp, temp, 1)
+            elif operator == GREATER_EQUAL:
+                # left >= right is not (left < right)
+                self.instruction_generator.save_less_than(temp, left, right)
+                self.instruction_generator.xor_immediate(temp, temp, 1)
+            elif operator == EQUAL_EQUAL:
+                # The xor is zero only if both values are equal
+                self.instruction_generator.xor(temp, left, right)
+                self.instruction_generator.save_less_than_immediate_unsigned(temp, temp, 1)
+            elif operator == BANG_EQUAL:
+                # The xor is not zero if the values are different
+                self.instruction_generator.xor(temp, left, right)
+                self.instruction_generator.save_less_than_unsigned(temp, self.register_controller.zero, temp)
+            self.release(right)
+
+        self.release(left)
+        return temp
+
+
+    # --------------------------------------------------------------------- #
+    # Unary operators
+
+    def select_negation(self, operand):
+        """
+        Generates the instructions for the - unary operator
+        """
+        # Fold the negation of constants
+        if self.classify(operand) == IMM:
+            return self.constant(-self.integer(operand))
+
+        # Otherwise subtract the value from $zero
+        operand = self.materialize(operand)
+        temp = self.register_controller.new_temporal(operand.value)
+        self.instruction_generator.sub(temp, self.register_controller.zero, operand)
+        self.release(operand)
+        return temp
+
+
+    def select_not(self, operand):
+        """
+        Generates the instructions for the ! unary operator when its value is needed
+        """
+        # Fold the negation of boolean constants
+        if isinstance(operand, BooleanType) and operand.value is not None:
+            return BooleanType(value="false" if operand.value == "true" else "true")
+
+        # Otherwise flip the lowest bit of the value
+        operand = self.materialize(operand)
+        temp = self.register_controller.new_temporal(BooleanType())
+        self.instruction_generator.xor_immediate(temp, operand, 1)
+        self.release(operand)
+        return temp
@@ -0,0 +1,721 @@
+from IntermediateCode.control_flow import *
+
+
+# Labels of the string constants, their address never changes (STR@n are the placeholders
+# of the functions the ParallelCodeGenerator optimizes before they are linked)
+CONSTANT_LABEL = re.compile(r"^STR[_@]\d+$")
+
+
+def depends_on(value, memory=None):
+    """
+    Checks if a value depends on the contents of memory
+
+    Args:
+        - value: the value (tuple) to check
+        - memory: the label to check for, if None any non constant label counts
+    """
+    if value[0] == "mem":
+        return memory is None or value[1] == memory
+    return any(isinstance(part, tuple) and depends_on(part, memory) for part in value[1:])
+
+
+class ValueNumbering():
+    """
+    Value numbering pass over the control flow graph of a section.
+
+    Every register is tagged with the value it holds, values are built from the operation
+    and the values of its operands (so the same computation gets the same value no matter
+    which registers were used). When an instruction computes a value that is already held
+    by a register, it is removed (same register) or replaced by a move.
+
+    The values available at the start of a block are the ones that reach it along every
+    incoming path, so the tables extend from a block into the blocks it dominates.
+    Calls and system calls clear the tables, saves clear the values read from the
+    memory location they write.
+    """
+    def __init__(self, cfg:ControlFlowGraph):
+        self.cfg = cfg
+        self.block_in = {}      # Values available at the start of each block
+        self.block_out = {}     # Values available at the end of each block
+        self.removed = 0        # Counter of removed or replaced instructions
+
+
+    def run(self):
+        """
+        Runs the analysis until the tables are stable and then rewrites the blocks
+        """
+        order = self.analyze()
+
+        # Rewrite the blocks with the stable tables
+        for block in order:
+            holds = dict(self.block_in[block.index])
+            rewritten = []
+            for position, instruction in enumerate(block.instructions):
+                rewritten.extend(self.transfer(instruction, holds, (block.index, position), rewrite=True))
+            block.instructions = rewritten
+
+        return self.removed
+
+
+    def analyze(self):
+        """
+        Runs the analysis until the tables are stable (without changing the blocks),
+        returns the blocks in reverse postorder
+        """
+        order = self.cfg.reverse_postorder()
+
+        # Iterate until the values at the end of the blocks don't change anymore
+        changed = True
+        while changed:
+            changed = False
+            for block in order:
+                holds = self.merge(block)
+                self.block_in[block.index] = dict(holds)
+                for position, instruction in enumerate(block.instructions):
+                    self.transfer(instruction, holds, (block.index, position))
+                if self.block_out.get(block.index) != holds:
+                    self.block_out[block.index] = holds
+                    changed = True
+
+        return order
+
+
+    def merge(self, block:BasicBlock):
+        """
+        Returns the values that reach the start of the block along every processed path
+        """
+        # Predecessors that haven't been processed yet (loop back edges) are skipped,
+        # they are taken into account in the next iteration
+        incoming = [self.block_out[p.index] for p in block.predecessors if p.index in self.block_out]
+        # Entry blocks start empty
+        if not incoming:
+            return {}
+        holds = dict(incoming[0])
+        for other in incoming[1:]:
+            for register in list(holds):
+                if other.get(register) != holds[register]:
+                    del holds[register]
+        return holds
+
+
+    def value_of(self, operand, holds, point):
+        """
+        Returns the value of an operand, registers without a known value
+        get a new value that is unique to the point where they were first read
+        """
+        if is_register(operand):
+            if operand == "$zero":
+                return ("imm", "0")
+            if operand not in holds:
+                holds[operand] = ("unknown", point, operand)
+            return holds[operand]
+        if is_immediate(operand):
+            return ("imm", operand)
+        if CONSTANT_LABEL.match(operand):
+            return ("const", operand)
+        return ("mem", operand)
+
+
+    def kill_memory(self, holds, memory=None):
+        """
+        Forgets the values read from memory (only from the label passed, or every label)
+        """
+        for register in list(holds):
+            if depends_on(holds[register], memory):
+                del holds[register]
+
+
+    def find_holder(self, value, holds):
+        """
+        Returns the register holding a value (None if no register holds it)
+        """
+        for register, held in holds.items():
+            if held == value and register not in ("$hi", "$lo"):
+                return register
+        return None
+
+
+    def compute(self, instruction:Instruction, holds, point):
+        """
+        Returns the value computed by an instruction (None if it doesn't compute a reusable value)
+        """
+        op = instruction.op
+        operands = instruction.operands
+
+        if op == "load" or op == "move" or op == "li":
+            return self.value_of(operands[1], holds, point)
+
+        if op in ARITHMETIC_OPS:
+            left = self.value_of(operands[1], holds, point)
+            right = self.value_of(operands[2], holds, point)
+            # The order of the operands doesn't matter for commutative operations
+            if op in COMMUTATIVE_OPS and repr(right) < repr(left):
+                left, right = right, left
+            return (op, left, right)
+
+        if op in IMMEDIATE_OPS:
+            return (op, self.value_of(operands[1], holds, point), ("imm", operands[2]))
+
+        if op in HILO_MOVES:
+            return holds.get(HILO_MOVES[op])
+
+        return None
+
+
+    def transfer(self, instruction:Instruction, holds, point, rewrite=False):
+        """
+        Updates the table with the effects of an instruction,
+        returns the instructions that replace it (when rewriting)
+        """
+        op = instruction.op
+        result = [instruction]
+
+        # Labels, comments and directives don't change anything
+        if op is None:
+            return result
+
+        # Calls and system calls may change any register or memory location
+        if op == "jal" or op == "jr":
+            holds.clear()
+            return result
+        if op == "syscall":
+            holds.pop("$v0", None)
+            return result
+
+        # Division writes both the quotient (LO) and the remainder (HI)
+        if op in HILO_OPS:
+            left = self.value_of(instruction.operands[0], holds, point)
+            right = self.value_of(instruction.operands[1], holds, point)
+            quotient, remainder = ("div", left, right), ("rem", left, right)
+            # If HI and LO already hold the result, the division is not needed
+            if rewrite and holds.get("$lo") == quotient and holds.get("$hi") == remainder:
+                self.removed += 1
+                return []
+            holds["$lo"], holds["$hi"] = quotient, remainder
+            return result
+
+        # Saves write to the memory location the register points to
+        if op == "save":
+            target = holds.get(instruction.operands[0])
+            if target is not None and target[0] == "mem":
+                self.kill_memory(holds, target[1])
+            else:
+                self.kill_memory(holds)
+            return result
+
+        # Concatenation writes into the string buffer
+        if op == "concat":
+            self.kill_memory(holds, "BUFFER")
+            holds[instruction.operands[0]] = ("unknown", point, instruction.operands[0])
+            return result
+
+        # Loads into something that is not a register (PARAM::, SELF) write memory
+        if op == "load" and not is_register(instruction.operands[0]):
+            self.kill_memory(holds)
+            return result
+
+        # Moving the stack pointer changes the meaning of the stack slots
+        definitions = instruction.definitions()
+        if "$sp" in definitions:
+            for register in list(holds):
+                if STACK_SLOT.match(register):
+                    del holds[register]
+
+        # Get the value computed by the instruction
+        value = self.compute(instruction, holds, point)
+        if value is None:
+            # Unknown instructions: the registers written get new unique values
+            for register in definitions:
+                holds[register] = ("unknown", point, register)
+            return result
+
+        destination = definitions[0]
+        if rewrite:
+            # Check if the destination already holds the value
+            if holds.get(destination) == value:
+                self.removed += 1
+                return []
+
+            # Check if another register holds the value
+            holder = self.find_holder(value, holds)
+            if holder is not None and op != "move":
+                self.removed += 1
+                result = [Instruction.build("move", [destination, holder], f"Reuse value from {holder}")]
+
+        holds[destination] = value
+        return result
+
+
+def propagate_copies(cfg:ControlFlowGraph):
+    """
+    Replaces the uses of the destination of a move with its source, while both of them
+    keep their values. The replacement continues into the following blocks that can only
+    be reached from the current one. Moves that end up unused are removed later by
+    remove_dead_definitions.
+    """
+    replaced = 0
+    for block in cfg.blocks:
+        for position, instruction in enumerate(block.instructions):
+            if instruction.op != "move" or not is_register(instruction.operands[1]):
+                continue
+            destination, source = instruction.operands
+            if destination == source:
+                continue
+
+            # Explicit stack of (block, first instruction) still to walk
+            stack = [(block, position + 1)]
+            while stack:
+                current, start = stack.pop()
+                stopped = False
+                for following in current.instructions[start:]:
+                    if following.op is None:
+                        continue
+                    # Calls may read any register, stop here
+                    if following.is_barrier():
+                        stopped = True
+                        break
+                    for index in following.use_positions():
+                        if following.operands[index] == destination:
+                            following.replace_operand(index, source)
+                            replaced += 1
+                    # Stop when either register is written again
+                    definitions = following.definitions()
+                    if destination in definitions or source in definitions:
+                        stopped = True
+                        break
+
+                # Continue into the successors only reachable from this block
+                if not stopped:
+                    for successor in current.successors:
+                        if len(successor.predecessors) == 1 and successor is not block:
+                            stack.append((successor, 0))
+
+    return replaced
+
+
+class LoopTransformation():
+    """
+    Base class of the passes that transform one loop at a time.
+
+    The section is split into its regions (the functions, see ControlFlowGraph.regions)
+    and the loops of each region are found once. The transformations only add
+    instructions inside the blocks (the preheader goes before the label of the header),
+    so the blocks, the edges and the loops of the region stay valid for the next loop.
+
+    The registers added are only used by loops without calls (and the code that follows
+    them up to the next call), so no other region runs while they hold their values: each
+    region picks them among the registers the rest of the program doesn't use, and a
+    function gives the same code optimized on its own or in the whole section (with
+    the same reserved registers).
+
+    Subclasses implement transform(cfg, loop), and prepare(cfg) for the analyses
+    the loops of a region share.
+    """
+    def __init__(self, lines, reserved=None):
+        self.lines = lines
+        self.reserved = set(reserved or ())     # Registers used by the rest of the program
+
+
+    def run(self):
+        """
+        Transforms every loop (innermost loops of each region first) and returns the new
+        instructions (the next pass doesn't have to parse the lines again)
+        """
+        section = ControlFlowGraph(self.lines)
+        # The registers of the other regions are used by the rest of the program too
+        program = self.reserved | section.registers()
+
+        instructions = []
+        for cfg in section.regions():
+            # The registers added to the previous regions can be used again
+            self.reserved = set(program)
+            loops = cfg.natural_loops()
+            # Regions without loops are left as they are
+            if loops:
+                self.prepare(cfg)
+            for loop in loops:
+                self.transform(cfg, loop)
+            instructions.extend(cfg.instructions())
+        return instructions
+
+
+    def prepare(self, cfg:ControlFlowGraph):
+        """
+        Runs the analyses of a region before its first loop is transformed (none by default)
+        """
+        return
+
+
+    def transform(self, cfg:ControlFlowGraph, loop:Loop):
+        """
+        Transforms a single loop, the blocks of the cfg are edited in place
+        """
+        raise NotImplementedError
+
+
+    def free_register(self, cfg:ControlFlowGraph):
+        """
+        Returns a register that is not used anywhere in the program (None if all are taken)
+        """
+        used = self.reserved | cfg.registers()
+        for register in reversed(SAVE_REGISTERS + TEMPORAL_REGISTERS):
+            if register not in used:
+                return register
+        return None
+
+
+    def insertion_point(self, loop:Loop):
+        """
+        Returns the position in the header block (right before the label the back edges
+        jump to) where the code runs when the loop is entered but not when it repeats,
+        None if the loop is entered in a way that doesn't allow it
+        """
+        header = loop.header
+
+        # Every back edge must jump to a label of the header
+        back_labels = set()
+        for block in loop.back_edges:
+            terminator = block.terminator()
+            if terminator is None or terminator.jump_target() not in header.labels():
+                return None
+            back_labels.add(terminator.jump_target())
+
+        # Find the first label of the header targeted by a back edge
+        position = next(i for i, instruction in enumerate(header.instructions) if instruction.label in back_labels)
+
+        # The blocks outside the loop must not jump to that label (or the ones after it)
+        inner_labels = {instruction.label for instruction in header.instructions[position:] if instruction.label}
+        for predecessor in header.predecessors:
+            if predecessor.index not in loop.body and predecessor.terminator() is not None:
+                if predecessor.terminator().jump_target() in inner_labels:
+                    return None
+
+        return position
+
+
+    def has_calls(self, cfg:ControlFlowGraph, loop:Loop):
+        """
+        Checks if the loop calls a function
+        """
+        return any(instruction.op == "jal" for index in loop.body for instruction in cfg.blocks[index].instructions)
+
+
+    def written_memory(self, cfg:ControlFlowGraph, loop:Loop):
+        """
+        Returns the labels written inside the loop, None if the loop may write any label
+        """
+        written = set()
+        for index in loop.body:
+            references = {}     # Register to the label it was last loaded from (inside the block)
+            for instruction in cfg.blocks[index].instructions:
+                op = instruction.op
+                if op == "jal":
+                    return None
+                if op == "concat":
+                    written.add("BUFFER")
+                elif op == "save":
+                    target = references.get(instruction.operands[0])
+                    if target is None:
+                        return None
+                    written.add(target)
+                elif op == "load" and not is_register(instruction.operands[0]):
+                    destination = instruction.operands[0]
+                    # Changing the instance changes every attribute
+                    if destination == "SELF":
+                        written.add("SELF::")
+                    else:
+                        written.update({destination, destination.replace("PARAM::", "")})
+
+                # Keep track of the labels loaded into registers
+                for register in instruction.definitions():
+                    references.pop(register, None)
+                if op == "load" and is_register(instruction.operands[0]) and not is_register(instruction.operands[1]):
+                    references[instruction.operands[0]] = instruction.operands[1]
+
+        return written
+
+
+class LoopInvariantCodeMotion(LoopTransformation):
+    """
+    Moves the loads that give the same value on every iteration of a loop
+    (string constants, globals and attributes that the loop never writes)
+    into a preheader, right before the label of the loop header.
+
+    Each hoisted value gets a register that is not used anywhere else in the program,
+    the loads inside the loop are replaced by moves from that register.
+    Loops with calls are skipped, the called function could use the register for a
+    value of its own. Loops that save through an unknown address only hoist string
+    constants, since they may write any global or attribute.
+    """
+    def __init__(self, lines, reserved=None):
+        super().__init__(lines, reserved)
+        self.hoisted = 0                        # Counter of hoisted values
+
+
+    def is_invariant(self, source, written):
+        """
+        Checks if loading the source gives the same value on every iteration
+        (immediates are left in place, loading them costs the same as a move)
+        """
+        if is_register(source) or is_immediate(source):
+            return False
+        if CONSTANT_LABEL.match(source):
+            return True
+        if written is None:
+            return False
+        if source.startswith("SELF::") and "SELF::" in written:
+            return False
+        return source not in written
+
+
+    def transform(self, cfg:ControlFlowGraph, loop:Loop):
+        """
+        Hoists the invariant loads of a loop into its preheader
+        """
+        position = self.insertion_point(loop)
+        if position is None:
+            return
+
+        # The functions it calls could use the registers (see LoopTransformation)
+        if self.has_calls(cfg, loop):
+            return
+
+        written = self.written_memory(cfg, loop)
+        registers = {}      # Source to the register that holds it
+        preheader = []      # Instructions of the preheader
+
+        for index in sorted(loop.body):
+            block = cfg.blocks[index]
+            for i, instruction in enumerate(block.instructions):
+                if instruction.op != "load" or not is_register(instruction.operands[0]):
+                    continue
+                source = instruction.operands[1]
+                if not self.is_invariant(source, written):
+                    continue
+
+                # Load the value in the preheader the first time it is found
+                if source not in registers:
+                    register = self.free_register(cfg)
+                    if register is None:
+                        break
+                    registers[source] = register
+                    preheader.append(Instruction.build("load", [register, source], f"Hoisted out of loop {loop.header.labels()[-1]}"))
+                    self.reserved.add(register)
+                    self.hoisted += 1
+
+                # Replace the load with a move from the hoisted register
+                block.instructions[i] = Instruction.build("move", [instruction.operands[0], registers[source]], f"Loop invariant {source}")
+
+        # Add the preheader right before the label the loop jumps back to
+        loop.header.instructions[position:position] = preheader
+
+
+class InductionVariableStrengthReduction(LoopTransformation):
+    """
+    Strength reduction of the induction variables of a loop.
+
+    A label is a basic induction variable when every write to it inside the loop
+    is a save of its own value plus a constant (i = i + c). The products of a basic
+    induction variable by a constant (sll and mult) are replaced by a register that
+    is set to label * constant in the preheader and increased by c * constant right
+    after each write to the label, so no multiplication is left inside the loop.
+
+    Loops with calls are skipped, since the called function may write the label.
+    """
+    def __init__(self, lines, reserved=None):
+        super().__init__(lines, reserved)
+        self.reduced = 0                        # Counter of reduced products
+        self.numbering = None                   # Value numbering analysis of the current region
+
+
+    def prepare(self, cfg:ControlFlowGraph):
+        """
+        Runs the value numbering analysis of the region once for all its loops. The tables
+        stay true after a loop is transformed: the products are replaced by moves of the
+        same value and the registers added are not in the tables.
+        """
+        self.numbering = ValueNumbering(cfg)
+        self.numbering.analyze()
+
+
+    def scan(self, numbering:ValueNumbering, block:BasicBlock, updates, products, others):
+        """
+        Collects the writes and the products of the labels in a block,
+        returns False if the block may write any label
+
+        Args:
+            - numbering: the value numbering analysis of the region (tells what each register holds)
+            - block: the block to scan
+            - updates: list where the (block, position, label, step) of the increments are added
+            - products: list where the (block, position, label, factor) of the products are added
+            - others: set where the labels written in any other way are added
+        """
+        holds = dict(numbering.block_in[block.index])
+
+        for position, instruction in enumerate(block.instructions):
+            op = instruction.op
+            operands = instruction.operands
+
+            # Calls may write any label
+            if op == "jal":
+                return False
+
+            if op == "save":
+                target = holds.get(operands[0])
+                if target is None or target[0] != "mem":
+                    return False
+                label = target[1]
+                # The only write allowed is the label plus a constant
+                value = holds.get(operands[1])
+                if value is not None and value[:2] == ("addi", ("mem", label)):
+                    updates.append((block, position, label, int(value[2][1])))
+                else:
+                    others.add(label)
+
+            elif op == "load" and not is_register(operands[0]):
+                # Parameters and instances are written (only before calls, but just in case)
+                others.update({operands[0], operands[0].replace("PARAM::", "")})
+
+            # Products of a label by a constant
+            elif op == "sll":
+                value = holds.get(operands[1])
+                if value is not None and value[0] == "mem":
+                    products.append((block, position, value[1], 2 ** int(operands[2])))
+
+            elif op == "mult":
+                left, right = holds.get(operands[1]), holds.get(operands[2])
+                if left is not None and right is not None:
+                    if right[0] == "mem":
+                        left, right = right, left
+                    if left[0] == "mem" and right[0] == "imm" and "." not in right[1]:
+                        products.append((block, position, left[1], int(right[1])))
+
+            # The positions may have moved since the analysis, the unknown values read
+            # here get points of their own so they can't match the ones in the tables
+            numbering.transfer(instruction, holds, ("scan", block.index, position))
+
+        return True
+
+
+    def transform(self, cfg:ControlFlowGraph, loop:Loop):
+        """
+        Replaces the products of the induction variables of a loop
+        """
+        position = self.insertion_point(loop)
+        if position is None:
+            return
+
+        updates, products, others = [], [], set()
+        for index in sorted(loop.body):
+            if not self.scan(self.numbering, cfg.blocks[index], updates, products, others):
+                return
+
+        # Labels only written by increments
+        steps = {}
+        for block, i, label, step in updates:
+            steps.setdefault(label, []).append((block, i, step))
+        induction = {label for label in steps if label not in others}
+
+        registers = {}      # (label, factor) to the register that holds the product
+        preheader = []      # Instructions of the preheader
+        edits = {}          # Block to the (position, replacement) edits
+        constant = None     # Register used to load the factors in the preheader
+
+        for block, i, label, factor in products:
+            if label not in induction:
+                continue
+
+            key = (label, factor)
+            if key not in registers:
+                register = self.free_register(cfg)
+                if register is None:
+                    break
+                self.reserved.add(register)
+                registers[key] = register
+
+                # Set the register to label * factor before entering the loop
+                comment = f"Induction variable {label} * {factor}"
+                preheader.append(Instruction.build("load", [register, label], comment))
+                if factor > 0 and factor & (factor - 1) == 0:
+                    preheader.append(Instruction.build("sll", [register, register, str(factor.bit_length() - 1)], comment))
+                else:
+                    if constant is None:
+                        constant = self.free_register(cfg)
+                        if constant is None:
+                            break
+                        self.reserved.add(constant)
+                    preheader.append(Instruction.build("load", [constant, str(factor)], comment))
+                    preheader.append(Instruction.build("mult", [register, register, constant], comment))
+
+                # Increase the register after every write to the label
+                for update_block, j, step in steps[label]:
+                    edits.setdefault(update_block, []).append(
+                        (j + 1, Instruction.build("addi", [register, register, str(step * factor)], f"Update induction variable {label} * {factor}"))
+                    )
+
+            # Replace the product with a move from the register
+            destination = block.instructions[i].operands[0]
+            edits.setdefault(block, []).append(
+                (i, Instruction.build("move", [destination, registers[key]], f"Induction variable {label} * {factor}"))
+            )
+            self.reduced += 1
+
+        # Apply the edits from the bottom of each block, so the positions stay valid
+        for block, changes in edits.items():
+            # Replacements go before the insertions at the same position
+            for i, instruction in sorted(changes, key=lambda change: (change[0], change[1].op == "move"), reverse=True):
+                if instruction.op == "move":
+                    block.instructions[i] = instruction
+                else:
+                    block.instructions.insert(i, instruction)
+
+        # Add the preheader right before the label the loop jumps back to
+        loop.header.instructions[position:position] = preheader
+
+
+def remove_dead_definitions(cfg:ControlFlowGraph, reserved=None, exits=False):
+    """
+    Removes the instructions without side effects whose result is never read
+    (the register is written again or never used before the end of the program)
+    """
+    # Instructions without side effects (only write their destination register)
+    pure = ARITHMETIC_OPS | IMMEDIATE_OPS | set(HILO_MOVES) | {"load", "move", "li"}
+    live_out = cfg.liveness(reserved, exits)
+    removed = 0
+
+    for block in cfg.blocks:
+        live = set(live_out[block.index])
+        kept = []
+        # Walk the block backwards keeping track of the live registers
+        for instruction in reversed(block.instructions):
+            if instruction.op in pure and is_register(instruction.operands[0]) and instruction.operands[0] not in live:
+                removed += 1
+                continue
+            kept.append(instruction)
+            if instruction.op is not None:
+                live = cfg.live_before(instruction, live)
+        kept.reverse()
+        block.instructions = kept
+
+    return removed
+
+
+def optimize(lines, reserved=None, exits=False):
+    """
+    Runs the optimization passes over a section of the intermediate code
+    and returns the optimized lines
+
+    Args:
+        - lines: the lines of the section (main section or local context)
+        - reserved: the registers used by the other sections of the program
+        - exits: if the program ends after the section (main section)
+    """
+    cfg = ControlFlowGraph(lines)
+    ValueNumbering(cfg).run()
+    instructions = LoopInvariantCodeMotion(cfg.instructions(), reserved).run()
+    instructions = InductionVariableStrengthReduction(instructions, reserved).run()
+
+    cfg = ControlFlowGraph(instructions)
+    propagate_copies(cfg)
+    remove_dead_definitions(cfg, reserved, exits)
+    return cfg.lines()
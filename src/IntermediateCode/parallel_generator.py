@@ -0,0 +1,281 @@
+import io
+import os
+import re
+import contextlib
+import multiprocessing
+from SyntaxTree.nodes import Program, ClassDecl, FunDecl
+from IntermediateCode.ci_generator import IntermediateCodeGenerator
+from IntermediateCode.control_flow import ControlFlowGraph
+from IntermediateCode.optimizer import optimize
+from SemanticAnalyzer.types import StringType
+
+
+# Placeholders of the labels and string constants of a unit (they can't be CompiScript
+# identifiers, so the link step only renames the names the generator created)
+LABEL_PLACEHOLDER = "L@"
+STRING_PLACEHOLDER = "STR@"
+PLACEHOLDER = re.compile(r"(L|STR)@(\d+)")
+
+# Line the InstructionGenerator adds to the data section the first time it concatenates
+BUFFER_LINE = "BUFFER: .space 200"
+
+# Units of the parallel generation (set before the workers are forked, they read it from
+# the memory they inherit instead of receiving the syntax tree and the symbol table)
+_units = None
+
+
+class Segment():
+    """
+    The code generated for a top level declaration (or a function of a class), with
+    the labels and string constants of its namespace still as placeholders.
+
+    Attr:
+        main (list[str]): The lines added to the main section
+        local (list[str]): The lines added to the local context (the functions)
+        labels (tuple): The first placeholder label of the segment and the number of labels it created
+        data (list): The entries added to the data section in order, the value of
+            each new string constant (None for the string buffer)
+        namespace (int): The namespace of the placeholders (0 for the main code, a
+            function generated on its own has its own namespace)
+    """
+
+    def __init__(self, main, local, labels, data, namespace):
+        self.main = main
+        self.local = local
+        self.labels = labels
+        self.data = data
+        self.namespace = namespace
+
+
+class UnitGenerator(IntermediateCodeGenerator):
+    """
+    IntermediateCodeGenerator for a part of a program. It doesn't add the variables
+    to the data section (the linked program has them) and its labels and string
+    constants are numbered from 0 as placeholders (L@n, STR@n) the link step renames.
+    The optimize flag only picks the instructions of the expressions (see
+    InstructionSelector), the passes run over the linked code.
+    """
+
+    def __init__(self, symbol_table, annotations, optimize):
+        # The progress message is printed once by the ParallelCodeGenerator
+        with contextlib.redirect_stdout(io.StringIO()):
+            super().__init__(symbol_table, annotations, optimize=optimize)
+
+
+    def add_symbols(self):
+        return
+
+
+    def optimize_sections(self):
+        return
+
+
+    def create_label(self):
+        label = f"{LABEL_PLACEHOLDER}{self.label_counter}"
+        self.label_counter += 1
+        return label
+
+
+    def create_string_label(self):
+        label = f"{STRING_PLACEHOLDER}{self.strings_counter}"
+        self.strings_counter += 1
+        return label
+
+
+    def generate(self, node, namespace):
+        """
+        Visits a declaration and returns the Segment with the code generated for it
+        """
+        instruction_generator = self.instruction_generator
+        main = len(instruction_generator.main_section)
+        local = len(instruction_generator.local_context)
+        data = len(instruction_generator.data_section)
+        label = self.label_counter
+        strings = self.strings_counter
+
+        self.visit(node)
+
+        # The new data lines are the string constants (in the order of their placeholders) and the buffer
+        values = list(self.string_constants)[strings:]
+        entries = []
+        for line in instruction_generator.data_section[data:]:
+            entries.append(None if line == BUFFER_LINE else values.pop(0))
+
+        return Segment(
+            instruction_generator.main_section[main:],
+            instruction_generator.local_context[local:],
+            (label, self.label_counter - label),
+            entries,
+            namespace,
+        )
+
+
+def generate_unit(position):
+    """
+    Generates a function in a fresh UnitGenerator (a job of the workers)
+
+    Args:
+        position (int): The position of the function in the units
+    """
+    symbol_table, annotations, units, optimize = _units
+    node, class_symbol, in_init = units[position]
+    generator = UnitGenerator(symbol_table, annotations, optimize)
+    # The state of the class the function is declared in (see visitClassDecl and visitFunDecl)
+    generator.current_class = class_symbol
+    generator.in_class_assignment = class_symbol is not None
+    generator.in_init = in_init
+    segment = generator.generate(node, position + 1)
+    return segment, ControlFlowGraph(segment.main + segment.local).registers()
+
+
+def optimize_unit(job):
+    """
+    Runs the optimization passes over the functions of a unit (a job of the workers)
+
+    Args:
+        job (tuple): The lines of the local context of the unit and the registers
+            used by the code of the whole program
+    """
+    lines, reserved = job
+    return optimize(lines, reserved)
+
+
+class ParallelCodeGenerator(IntermediateCodeGenerator):
+    """
+    IntermediateCodeGenerator that generates and optimizes the functions and methods of
+    the program in worker processes.
+
+    Once the symbol table is built the functions are independent: each one is a unit
+    generated by a fresh UnitGenerator (with its own registers, labels and string
+    constants), the top level statements are generated in order by another one. The
+    link step walks the declarations in source order, gives the labels consecutive
+    numbers and the string constants the number of their first use (the numbers a
+    sequential generation gives them), merges the strings used by several units and
+    concatenates the sections. The output only depends on the program, not on the
+    number of workers or the order they finish in.
+
+    The registers of each function start unused (the sequential generator carries the
+    registers of the previous declarations). The workers optimize the functions too,
+    once every unit is generated: the passes only need the registers the code of the
+    whole program uses (see LoopTransformation), so each function is optimized on its
+    own and the main code is optimized after the link.
+
+    Attr:
+        jobs (int): The number of worker processes (None for one per CPU, 1 to
+            generate the units in this process)
+    """
+
+    def __init__(self, symbol_table, annotations, logging=False, optimize=True, jobs=None):
+        super().__init__(symbol_table, annotations, logging, optimize)
+        self.jobs = jobs or os.cpu_count() or 1
+
+
+    def units(self, node:Program):
+        """
+        Returns the functions of the program as (node, class symbol, in_init flag) and the
+        declarations in order, each one as a unit position or the node of a top level statement
+        """
+        units, order = [], []
+        in_init = False     # The flag is not reset after a constructor (see visitFunDecl)
+        for declaration in node.declarations:
+            if isinstance(declaration, FunDecl):
+                order.append(len(units))
+                units.append((declaration, None, in_init))
+            elif isinstance(declaration, ClassDecl):
+                class_symbol = self.annotations.symbol(declaration)
+                for method in declaration.methods:
+                    order.append(len(units))
+                    units.append((method, class_symbol, in_init))
+                    in_init = in_init or method.name == "init"
+            else:
+                order.append(declaration)
+        return units, order
+
+
+    def visitProgram(self, node:Program):
+        global _units
+        self.log("VISIT -> Program node")
+        units, order = self.units(node)
+
+        pool = None
+        chunksize = max(1, len(units) // (self.jobs * 4))
+        _units = (self.symbol_table, self.annotations, units, self.optimize)
+        try:
+            if self.jobs > 1 and len(units) > 1 and "fork" in multiprocessing.get_all_start_methods():
+                # The workers are forked after the units are set, they share the tree and the symbols
+                pool = multiprocessing.get_context("fork").Pool(min(self.jobs, len(units)))
+                pending = pool.map_async(generate_unit, range(len(units)), chunksize=chunksize)
+
+            # The top level statements are generated while the workers generate the functions
+            main = UnitGenerator(self.symbol_table, self.annotations, self.optimize)
+            main.logging = self.logging
+            segments = [declaration if isinstance(declaration, int) else main.generate(declaration, 0) for declaration in order]
+
+            functions = pending.get() if pool is not None else [generate_unit(position) for position in range(len(units))]
+            segments = [functions[segment][0] if isinstance(segment, int) else segment for segment in segments]
+
+            if self.optimize:
+                # The registers the passes add can't be any of the registers of the program
+                reserved = ControlFlowGraph([line for segment in segments if segment.namespace == 0 for line in segment.main + segment.local]).registers()
+                for _, registers in functions:
+                    reserved |= registers
+
+                # The functions of each unit are optimized before they are linked
+                jobs = [(segment.local, reserved) for segment in segments]
+                if pool is not None:
+                    optimized = pool.map(optimize_unit, jobs, chunksize=chunksize)
+                else:
+                    optimized = [optimize_unit(job) for job in jobs]
+                for segment, local in zip(segments, optimized):
+                    segment.local = local
+        finally:
+            _units = None
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        self.link(segments)
+
+        # The main code runs the passes over the linked section (the functions are done)
+        if self.optimize:
+            main_section = self.instruction_generator.main_section
+            main_section[:] = optimize(main_section, reserved, exits=True)
+
+
+    def link(self, segments):
+        """
+        Adds the segments to the sections in order, renaming their placeholders
+
+        Args:
+            segments (list[Segment]): The code of the declarations in source order
+        """
+        instruction_generator = self.instruction_generator
+        names = {}  # The name of each string placeholder by namespace
+
+        for segment in segments:
+            namespace = names.setdefault(segment.namespace, [])
+
+            # Add the data entries (as visitLiteral and InstructionGenerator.concatenate)
+            for value in segment.data:
+                if value is None:
+                    if not instruction_generator.has_buffer:
+                        instruction_generator.data_section.append(BUFFER_LINE)
+                        instruction_generator.has_buffer = True
+                    continue
+                if value not in self.string_constants:
+                    self.string_constants[value] = self.create_string_label()
+                    instruction_generator.add_to_data(StringType(value=value), self.string_constants[value])
+                namespace.append(self.string_constants[value])
+
+            # The labels of the segment follow the labels of the previous ones
+            first, count = segment.labels
+            shift = self.label_counter - first
+
+            def rename(match):
+                if match.group(1) == "L":
+                    return f"L{int(match.group(2)) + shift}"
+                return namespace[int(match.group(2))]
+
+            for lines, section in ((segment.main, instruction_generator.main_section), (segment.local, instruction_generator.local_context)):
+                section.extend(PLACEHOLDER.sub(rename, line) if "@" in line else line for line in lines)
+            self.label_counter += count
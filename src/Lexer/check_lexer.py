@@ -0,0 +1,81 @@
+import sys
+import glob
+import time
+from antlr4 import FileStream
+from antlr4.Token import Token
+from CompiScript.compiscriptLexer import compiscriptLexer
+from Lexer.fast_lexer import FastLexer
+from Utils.custom_exception import ThrowingErrorListener
+
+
+def tokenize(lexer_class, input_stream):
+    """
+    Returns the tokens of the input as tuples with every field the parser reads
+    (or the syntax error message if the input can't be tokenized)
+    """
+    lexer = lexer_class(input_stream)
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(ThrowingErrorListener.INSTANCE)
+
+    tokens = []
+    try:
+        token = lexer.nextToken()
+        while True:
+            tokens.append((token.type, token.text, token.channel, token.start, token.stop, token.line, token.column))
+            if token.type == Token.EOF:
+                break
+            token = lexer.nextToken()
+    except Exception as e:
+        tokens.append(str(e))
+    return tokens
+
+
+def compare(path):
+    """
+    Tokenizes a file with both lexers and returns the first difference (None if they match),
+    and the time each lexer took
+
+    Args:
+        path (str): The path of the source file
+    """
+    start = time.perf_counter()
+    expected = tokenize(compiscriptLexer, FileStream(path))
+    antlr_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = tokenize(FastLexer, FileStream(path))
+    fast_time = time.perf_counter() - start
+
+    difference = None
+    for i in range(max(len(expected), len(got))):
+        left = expected[i] if i < len(expected) else None
+        right = got[i] if i < len(got) else None
+        if left != right:
+            difference = f"token {i}: compiscriptLexer {left} != FastLexer {right}"
+            break
+
+    return difference, antlr_time, fast_time
+
+
+def main():
+    # Check every source file under the input directory (src/Input by default)
+    directory = sys.argv[1] if len(sys.argv) > 1 else "src/Input"
+    paths = sorted(glob.glob(f"{directory}/**/*.cspt", recursive=True))
+
+    failures = 0
+    for path in paths:
+        difference, antlr_time, fast_time = compare(path)
+        if difference is None:
+            print(f"OK   {path} (compiscriptLexer {antlr_time * 1000:.1f} ms, FastLexer {fast_time * 1000:.1f} ms)")
+        else:
+            failures += 1
+            print(f"FAIL {path} -> {difference}")
+
+    print(f"{len(paths) - failures}/{len(paths)} files produce the same tokens")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m Lexer.check_lexer [directory]
+    main()
@@ -0,0 +1,181 @@
+import re
+from antlr4 import InputStream
+from antlr4.Token import Token, CommonToken
+from antlr4.Recognizer import Recognizer
+from antlr4.CommonTokenFactory import CommonTokenFactory
+from antlr4.error.Errors import LexerNoViableAltException
+from CompiScript.compiscriptParser import compiscriptParser
+
+
+IDENTIFIER = r"[a-zA-Z_][a-zA-Z_0-9]*"
+
+# Rules of the master regex, tried in this order at each position (the first match wins).
+# The order gives the same result as the longest match of the ANTLR lexer for the
+# CompiScript grammar: the comment goes before '/', the literal tokens are sorted
+# longest first and the keywords are matched as identifiers and looked up after.
+RULES = [
+    ("WS", r"[ \t\r\n]+"),
+    ("COMMENT", r"//[^\n]*\n?"),
+    ("NUMBER", r"[0-9]+(?:\.[0-9]+)?"),
+    ("STRING", r'"[^"\\]*"'),
+    ("IDENTIFIER", IDENTIFIER),
+    ("LITERAL", None),  # The punctuation and operators (built from the grammar)
+    # Text the lexer can't match: an unterminated string (up to the invalid
+    # backslash or the end of file, like ANTLR reports it) or a single character
+    ("ERROR", r'"[^"\\]*\\?|.'),
+]
+
+# Token types of the literal tokens of the grammar by their text ('class', '{', '==', ...)
+LITERALS = {name[1:-1]: token_type for token_type, name in enumerate(compiscriptParser.literalNames) if name.startswith("'")}
+
+# The keywords are the literal tokens that look like identifiers
+KEYWORDS = {text: token_type for text, token_type in LITERALS.items() if re.fullmatch(IDENTIFIER, text)}
+
+# The punctuation and operators, the longest first so '==' is tried before '='
+OPERATORS = sorted((text for text in LITERALS if text not in KEYWORDS), key=len, reverse=True)
+
+
+def master_pattern():
+    """
+    Compiles the rules into a single regex with a group per rule (group i + 1 is RULES[i])
+    """
+    alternatives = []
+    for name, pattern in RULES:
+        if pattern is None:
+            pattern = "|".join(re.escape(operator) for operator in OPERATORS)
+        alternatives.append(f"({pattern})")
+    return re.compile("|".join(alternatives), re.DOTALL)
+
+
+MASTER = master_pattern()
+
+# What to do with the match of each group (indexed by match.lastindex)
+SKIP, EMIT, KEYWORD, OPERATOR, ERROR = range(5)
+ACTIONS = [None, SKIP, SKIP, EMIT, EMIT, KEYWORD, OPERATOR, ERROR]
+# Token type of the groups that are emitted as they are
+TYPES = [None, None, None, compiscriptParser.NUMBER, compiscriptParser.STRING, None, None, None]
+# Groups whose text may span several lines
+MULTILINE = [False, True, True, False, True, False, False, True]
+
+
+class FastToken(CommonToken):
+    """
+    CommonToken built with all its fields in a single call
+    (the CommonToken constructor reads the position from the token source and sets
+    every field twice, which is most of the time of the lexer for small tokens).
+    """
+
+    def __init__(self, source, type, start, stop, line, column, text):
+        self.source = source
+        self.type = type
+        self.channel = Token.DEFAULT_CHANNEL
+        self.start = start
+        self.stop = stop
+        self.tokenIndex = -1
+        self.line = line
+        self.column = column
+        self._text = text
+
+
+class FastLexer(Recognizer):
+    """
+    Table driven lexer for the CompiScript tokens, an alternative to the ANTLR generated
+    compiscriptLexer (that interprets the lexer ATN character by character).
+    All the token rules are compiled into a single regex (see RULES) and each match is
+    turned into a token with a lookup in the tables above.
+
+    It is a token source for CommonTokenStream: it produces the same tokens
+    (type, text, channel, start, stop, line and column) and reports the same
+    'token recognition error' messages to its error listeners.
+
+    The lexer can also start in the middle of the source (at the first character of
+    a token), the incremental parser lexes only the text around an edit.
+
+    Attr:
+        input_stream (InputStream): The stream with the source (FileStream or InputStream).
+        line (int): The line of the current position (1 based).
+        column (int): The column of the current position (0 based).
+    """
+
+    literalNames = compiscriptParser.literalNames
+    symbolicNames = compiscriptParser.symbolicNames
+    grammarFileName = "compiscript.g4"
+
+    def __init__(self, input_stream:InputStream, start=0, line=1, line_start=0):
+        super().__init__()
+        self.input_stream = input_stream
+        self.source_text = input_stream.strdata
+        self._factory = CommonTokenFactory.DEFAULT                  # Used by the parser to conjure missing tokens
+        self.source = (self, input_stream)                          # Token source pair of the tokens
+        self.matches = MASTER.finditer(self.source_text, start)     # Every position of the text is matched by a rule
+        self.line = line
+        self.line_start = line_start    # Index where the current line starts
+        self.column = start - line_start
+        self.eof = None
+
+
+    def nextToken(self):
+        """
+        Returns the next token of the input (the EOF token once the input is consumed)
+        """
+        for match in self.matches:
+            group = match.lastindex
+            text = match.group()
+            start = match.start()
+            line = self.line
+            column = start - self.line_start
+
+            # Keep track of the line of the next token
+            if MULTILINE[group]:
+                newline = text.rfind("\n")
+                if newline != -1:
+                    self.line += text.count("\n")
+                    self.line_start = start + newline + 1
+
+            action = ACTIONS[group]
+            if action == SKIP:
+                continue
+
+            if action == EMIT:
+                token_type = TYPES[group]
+            elif action == KEYWORD:
+                token_type = KEYWORDS.get(text, compiscriptParser.IDENTIFIER)
+            elif action == OPERATOR:
+                token_type = LITERALS[text]
+            else:
+                self.recognition_error(text, start, line, column)
+                continue
+
+            return FastToken(self.source, token_type, start, match.end() - 1, line, column, text)
+
+        # The input is consumed, emit (always the same) EOF token
+        if self.eof is None:
+            end = len(self.source_text)
+            self.column = end - self.line_start
+            self.eof = CommonToken(self.source, Token.EOF, Token.DEFAULT_CHANNEL, end, end - 1)
+        return self.eof
+
+
+    def recognition_error(self, text, start, line, column):
+        """
+        Reports a text that doesn't match any token, with the message of the ANTLR lexer
+        """
+        display = text.replace("\n", "\\n").replace("\t", "\\t").replace("\r", "\\r")
+        exception = LexerNoViableAltException(self, self.input_stream, start, None)
+        self.getErrorListenerDispatch().syntaxError(self, None, line, column, f"token recognition error at: '{display}'", exception)
+
+
+    def getAllTokens(self):
+        """
+        Returns the tokens of the input (without the EOF token)
+        """
+        tokens = []
+        token = self.nextToken()
+        while token.type != Token.EOF:
+            tokens.append(token)
+            token = self.nextToken()
+        return tokens
+
+
+    def getInputStream(self):
+        return self.input_stream
@@ -0,0 +1,106 @@
+import io
+import re
+import json
+import sys
+import glob
+import contextlib
+from antlr4 import InputStream, CommonTokenStream
+from Lexer.fast_lexer import FastLexer
+from Parser.fast_parser import FastParser
+from Parser.incremental_parser import IncrementalParser
+from SemanticAnalyzer.semantic_analyzer import SemanticAnalyzer
+from IntermediateCode.ci_generator import IntermediateCodeGenerator
+from Linker.object_module import ObjectModule, compile_module
+from Linker.linker import link
+
+
+def syntax_tree(source):
+    return FastParser(CommonTokenStream(FastLexer(InputStream(source)))).program()
+
+
+def code(ci_generator):
+    """
+    Returns the intermediate code of a compile or a link
+    """
+    output = io.StringIO()
+    ci_generator.generate_intermediate_code(output)
+    return output.getvalue()
+
+
+def full_compile(source):
+    semantic_analyzer = SemanticAnalyzer()
+    tree = syntax_tree(source)
+    semantic_analyzer.visit(tree)
+    ci_generator = IntermediateCodeGenerator(semantic_analyzer.symbol_table, semantic_analyzer.annotations)
+    ci_generator.visit(tree)
+    return code(ci_generator)
+
+
+def layout(program):
+    """
+    Returns the data section and the labels of a program (the registers of the code
+    after the first module depend on where the program is split)
+    """
+    data, text = program.split("\n\n", 1)
+    return data, sorted(re.findall(r"^(\w+):", text, re.MULTILINE))
+
+
+def roundtrip(module):
+    """
+    Returns the module as it is read from its file
+    """
+    return ObjectModule.from_dict(json.loads(json.dumps(module.to_dict())))
+
+
+def main():
+    # Check every source file under the input directory (src/Input by default)
+    directory = sys.argv[1] if len(sys.argv) > 1 else "src/Input"
+    paths = sorted(glob.glob(f"{directory}/**/*.cspt", recursive=True))
+
+    failures = checks = 0
+    for path in paths:
+        with open(path) as file:
+            source = file.read()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                expected = full_compile(source)
+        except Exception as e:
+            print(f"SKIP {path} -> {e}")
+            continue
+
+        # The file as a single module links into the code of the compile
+        checks += 1
+        with contextlib.redirect_stdout(io.StringIO()):
+            module, _ = compile_module("main", syntax_tree(source))
+            got = code(link([roundtrip(module)]))
+        if got != expected:
+            failures += 1
+            print(f"FAIL {path} -> the linked module is different")
+
+        # The file split in two modules (at each top level declaration), the second one
+        # imports the first one
+        starts = IncrementalParser()
+        starts.parse_all(source)
+        for start in starts.starts[1:]:
+            checks += 1
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    first, _ = compile_module("first", syntax_tree(source[:start]))
+                    second, _ = compile_module("second", syntax_tree(source[start:]), [roundtrip(first)])
+                    got = code(link([roundtrip(first), roundtrip(second)]))
+            except Exception as e:
+                got = str(e)
+            if got == expected or (got.startswith(".data") and layout(got) == layout(expected)):
+                continue
+            failures += 1
+            print(f"FAIL {path} (split at offset {start}) -> the data section or the labels are different")
+        print(f"DONE {path} ({len(starts.starts)} declarations)")
+
+    print(f"{checks - failures}/{checks} linked programs match the compile of the file")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m Linker.check_linker [directory]
+    main()
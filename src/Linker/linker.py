@@ -0,0 +1,273 @@
+import io
+import os
+import hashlib
+import contextlib
+import multiprocessing
+from IntermediateCode.parallel_generator import Segment, ParallelCodeGenerator
+from SyntaxTree.nodes import FunDecl, ClassDecl, VarDecl
+from Linker.object_module import ObjectModule, OBJECT_EXTENSION, compile_module, references
+
+
+# Jobs of the module compiles (set before the workers are forked, see compile_job)
+_jobs = None
+
+
+class Linker(ParallelCodeGenerator):
+    """
+    Links object modules (see object_module.py) into a program.
+
+    The imports of every module are resolved: each one must be exported by exactly
+    one module, as it was when the module was compiled (a module compiled against
+    an older version of another one must be compiled again). The variables of the
+    modules are added to the data section in order, then their code is added as the
+    segments of the parallel generation: the labels of each module follow the ones
+    of the previous modules and the string constants get the number of their first
+    use (the strings used by several modules are merged). The optimization passes
+    run over the linked sections.
+
+    Linking the module of a single file gives the code a compile of the file gives.
+
+    Attr:
+        modules (list[ObjectModule]): The modules in the order their code is run
+    """
+
+    def __init__(self, modules, optimize=True):
+        # The progress message of the generator is replaced by the one of the linker
+        with contextlib.redirect_stdout(io.StringIO()):
+            super().__init__([], None, optimize=optimize, jobs=1)
+        self.modules = list(modules)
+
+
+    def resolve(self):
+        """
+        Checks that every import of the modules is exported by one of them, returns the
+        module that exports each symbol by its name
+        """
+        owners = {}
+        for module in self.modules:
+            for export in module.exports:
+                owner = owners.setdefault(export["name"], module)
+                if owner is not module:
+                    raise Exception(f"Symbol {export['name']} is declared in modules {owner.name} and {module.name}")
+
+        for module in self.modules:
+            for record in module.imports:
+                owner = owners.get(record["name"])
+                if owner is None:
+                    raise Exception(f"Undefined {record['kind']} {record['name']} used by module {module.name}")
+                if record not in owner.exports:
+                    raise Exception(f"Module {module.name} was compiled against another version of {record['kind']} {record['name']} of module {owner.name}")
+        return owners
+
+
+    def link_modules(self):
+        """
+        Resolves the symbols and adds the sections of the modules to the program
+        """
+        print(f"Linking {len(self.modules)} modules...")
+        names = [module.name for module in self.modules]
+        for name in names:
+            if names.count(name) > 1:
+                raise Exception(f"Module {name} is linked more than once")
+        self.resolve()
+
+        # The variables of every module come first (as add_symbols adds them)
+        for module in self.modules:
+            self.instruction_generator.data_section.extend(module.symbols)
+
+        # Each module has its own namespace of string placeholders
+        self.link([Segment(module.segment.main, module.segment.local, module.segment.labels, module.segment.data, position)
+                   for position, module in enumerate(self.modules)])
+
+        # Run the optimization passes over the linked sections
+        if self.optimize:
+            self.optimize_sections()
+        print("SUCCESS -> Modules linked\n")
+        return self
+
+
+def link(modules, optimize=True):
+    """
+    Links the modules and returns the Linker with the code of the program
+    (written with generate_intermediate_code, as the code of a compile)
+    """
+    return Linker(modules, optimize).link_modules()
+
+
+def module_name(path):
+    """
+    Returns the name of the module of a source file
+    """
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def compile_job(position):
+    """
+    Compiles a module (a job of the workers), returns its ObjectModule
+
+    Args:
+        position (int): The position of the job in the jobs of the build step
+    """
+    parse_file, jobs, optimize = _jobs
+    name, path, syntax_tree, digest, modules = jobs[position]
+    # The modules whose source didn't change are parsed again only if they are compiled
+    module, _ = compile_module(name, syntax_tree if syntax_tree is not None else parse_file(path), modules, digest, optimize)
+    return module
+
+
+class ModuleBuilder():
+    """
+    Builds a program from its source files, compiling each one as a module and only
+    the ones that changed since the last build.
+
+    A module depends on the modules that declare the names it refers to. The modules
+    are compiled in steps: the modules of a step only depend on the modules of the
+    previous ones, so they are compiled at the same time (in worker processes), each
+    one with the exports of the modules it depends on (directly or not). The object
+    module of each file is kept in the object directory, and a module is compiled
+    again only if its source changed or the exports of a module it depends on did.
+
+    Attr:
+        parse_file (function): Returns the syntax tree of a source file
+        directory (str): The directory of the object modules
+        jobs (int): The number of worker processes (None for one per CPU)
+        optimize (bool): Whether the modules are compiled and linked with the optimizations
+        stats (dict): Counters of the modules compiled and reused by the last build
+    """
+
+    def __init__(self, parse_file, directory="build", jobs=None, optimize=True):
+        self.parse_file = parse_file
+        self.directory = directory
+        self.jobs = jobs or os.cpu_count() or 1
+        self.optimize = optimize
+        self.stats = {"modules": 0, "compiled": 0, "reused": 0}
+
+
+    def object_path(self, name):
+        return os.path.join(self.directory, name + OBJECT_EXTENSION)
+
+
+    def previous(self, name):
+        """
+        Returns the object module of the last build of a module (None if there is none
+        or it can't be read)
+        """
+        try:
+            return ObjectModule.read(self.object_path(name))
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+    def steps(self, names, dependencies):
+        """
+        Returns the modules grouped in steps, each module after the modules it depends on
+        """
+        levels = {}
+        visiting = set()
+
+        def level(name):
+            if name in levels:
+                return levels[name]
+            if name in visiting:
+                raise Exception(f"Circular dependency between the modules of {name}")
+            visiting.add(name)
+            levels[name] = 1 + max((level(dependency) for dependency in dependencies[name]), default=-1)
+            visiting.discard(name)
+            return levels[name]
+
+        steps = []
+        for name in names:
+            while len(steps) <= level(name):
+                steps.append([])
+            steps[level(name)].append(name)
+        return steps
+
+
+    def build(self, paths):
+        """
+        Builds the modules of the source files and links them (in the order of the
+        files), returns the Linker with the code of the program
+
+        Args:
+            paths (list[str]): The source files
+        """
+        global _jobs
+        os.makedirs(self.directory, exist_ok=True)
+        names = [module_name(path) for path in paths]
+        for name in names:
+            if names.count(name) > 1:
+                raise Exception(f"Module {name} is given more than once")
+        sources = dict(zip(names, paths))
+
+        # The names each module declares and refers to (from the last build if the
+        # source didn't change, otherwise from its syntax tree)
+        digests, modules, trees = {}, {}, {}
+        declared, referenced = {}, {}
+        for name, path in sources.items():
+            with open(path, "rb") as file:
+                digests[name] = hashlib.sha256(file.read()).hexdigest()
+            previous = self.previous(name)
+            if previous is not None and previous.source_digest == digests[name] and previous.optimized == self.optimize:
+                modules[name] = previous
+                declared[name] = [export["name"] for export in previous.exports]
+                referenced[name] = previous.references
+            else:
+                trees[name] = self.parse_file(path)
+                declared[name] = [declaration.name for declaration in trees[name].declarations if isinstance(declaration, (FunDecl, ClassDecl, VarDecl))]
+                referenced[name] = references(trees[name])
+
+        owners = {}
+        for name in names:
+            for symbol in declared[name]:
+                owner = owners.setdefault(symbol, name)
+                if owner != name:
+                    raise Exception(f"Symbol {symbol} is declared in modules {owner} and {name}")
+        dependencies = {name: sorted({owners[symbol] for symbol in referenced[name] if symbol in owners and owners[symbol] != name}, key=names.index)
+                        for name in names}
+
+        compiled = 0
+        steps = self.steps(names, dependencies)
+        for step in steps:
+            jobs = []
+            for name in step:
+                # Every module it depends on, directly or not, in build order
+                closure = set()
+                pending = list(dependencies[name])
+                while pending:
+                    dependency = pending.pop()
+                    if dependency not in closure:
+                        closure.add(dependency)
+                        pending.extend(dependencies[dependency])
+                imports = [modules[other] for level in steps for other in level if other in closure]
+
+                previous = modules.get(name)
+                interfaces = {module.name: module.interface() for module in imports}
+                if previous is not None and all(interfaces.get(other) == digest for other, digest in previous.dependencies.items()):
+                    continue
+                jobs.append((name, sources[name], trees.get(name), digests[name], imports))
+
+            if not jobs:
+                continue
+            _jobs = (self.parse_file, jobs, self.optimize)
+            pool = None
+            try:
+                if self.jobs > 1 and len(jobs) > 1 and "fork" in multiprocessing.get_all_start_methods():
+                    # The workers are forked after the jobs are set, they inherit the syntax trees
+                    pool = multiprocessing.get_context("fork").Pool(min(self.jobs, len(jobs)))
+                    results = pool.map(compile_job, range(len(jobs)))
+                else:
+                    results = [compile_job(position) for position in range(len(jobs))]
+            finally:
+                _jobs = None
+                if pool is not None:
+                    pool.close()
+                    pool.join()
+
+            for module in results:
+                module.write(self.object_path(module.name))
+                modules[module.name] = module
+            compiled += len(results)
+
+        self.stats = {"modules": len(names), "compiled": compiled, "reused": len(names) - compiled}
+        print(f"INFO -> Build: {compiled} of {len(names)} modules compiled")
+        return link([modules[name] for name in names], self.optimize)
@@ -0,0 +1,358 @@
+import io
+import json
+import hashlib
+import contextlib
+from SyntaxTree.nodes import Program
+from Parser.incremental_parser import nodes
+from Incremental.incremental_compiler import REFERENCES
+from SemanticAnalyzer.semantic_analyzer import SemanticAnalyzer
+from SemanticAnalyzer.annotations import Annotations
+from SemanticAnalyzer.symbols import Variable, Function, Class, Scope
+from SemanticAnalyzer.types import StringType, BooleanType, NumberType, NilType, AnyType, InstanceType
+from IntermediateCode.ci_generator import IntermediateCodeGenerator
+from IntermediateCode.parallel_generator import Segment, UnitGenerator
+
+
+# Header of the object module files: format name and version
+OBJECT_FORMAT = "CompiScript object module"
+OBJECT_VERSION = 1
+
+# Extension of the object module files
+OBJECT_EXTENSION = ".cso"
+
+# Data types by their name (see SemanticAnalyzer/types.py)
+TYPES = {"num": NumberType, "str": StringType, "bool": BooleanType, "nil": NilType, "any": AnyType, "instance": InstanceType}
+
+
+def references(syntax_tree:Program):
+    """
+    Returns the names the declarations of a module refer to (the functions it calls,
+    the classes it instantiates or inherits from and the variables it reads or writes)
+    """
+    names = set()
+    for declaration in syntax_tree.declarations:
+        for node in nodes(declaration):
+            field = REFERENCES.get(type(node))
+            if field is not None and getattr(node, field) is not None:
+                names.add(getattr(node, field))
+    return sorted(names)
+
+
+def dump_type(data_type):
+    """
+    Returns a data type as a JSON object (the class of an instance by its name)
+    """
+    if data_type is None:
+        return None
+    record = {"name": data_type.name, "size": data_type.size, "value": data_type.value}
+    if isinstance(data_type, InstanceType) and data_type.class_ref is not None:
+        record["class"] = data_type.class_ref.id
+    return record
+
+
+def load_type(record, classes):
+    """
+    Returns the data type of a JSON object written by dump_type
+
+    Args:
+        record (dict): The data type
+        classes (dict): The classes declared so far by their name
+    """
+    if record is None:
+        return None
+    data_type = TYPES[record["name"]]()
+    data_type.size = record["size"]
+    data_type.value = record["value"]
+    if "class" in record:
+        if record["class"] not in classes:
+            raise Exception(f"Class {record['class']} not found in the imported modules")
+        data_type.class_ref = classes[record["class"]]
+    return data_type
+
+
+def dump_function(function:Function):
+    """
+    Returns the interface of a function or method (the callers load the arguments
+    into the PARAM::<name> of each parameter)
+    """
+    return {
+        "name": function.id,
+        "parameters": [{"name": parameter.id, "type": dump_type(parameter.data_type)} for parameter in function.parameters],
+        "return_type": dump_type(function.return_type),
+    }
+
+
+def dump_symbol(symbol):
+    """
+    Returns an exported symbol as a JSON object: a function, a class with its layout
+    (only the attributes and methods it doesn't inherit) or a global variable
+    """
+    if isinstance(symbol, Function):
+        return dict(kind="function", **dump_function(symbol))
+
+    if isinstance(symbol, Class):
+        inherited_attributes = {id(attribute) for attribute in symbol.parent.attributes} if symbol.parent else set()
+        inherited_methods = {id(method) for method in symbol.parent.methods} if symbol.parent else set()
+        return {
+            "kind": "class",
+            "name": symbol.id,
+            "parent": symbol.parent.id if symbol.parent else None,
+            "size": symbol.size,
+            "completed": symbol.completed,
+            "attributes": [{"name": attribute.id, "type": dump_type(attribute.data_type), "offset": attribute.offset}
+                           for attribute in symbol.attributes if id(attribute) not in inherited_attributes],
+            "methods": [dump_function(method) for method in symbol.methods if id(method) not in inherited_methods],
+        }
+
+    return {"kind": "global", "name": symbol.id, "type": dump_type(symbol.data_type)}
+
+
+class ObjectModule():
+    """
+    A source file compiled on its own: the lines of its data section, its code and the
+    symbols it exports to (and imports from) the other modules of the program.
+
+    The code is a Segment (see IntermediateCode/parallel_generator.py): its labels and
+    string constants are placeholders (L@n, STR@n) numbered from 0 in the module, the
+    linker gives them their number in the program. The optimization passes run when
+    the program is linked (the registers they add must be unique in the program), only
+    the instructions of the expressions are picked when the module is compiled.
+
+    Attr:
+        name (str): The name of the module (the name of the source file)
+        source_digest (str): The SHA-256 of the source the module was compiled from
+        exports (list[dict]): The functions, classes (with their layout) and global
+            variables the module declares, in the order they are declared
+        imports (list[dict]): The exports of other modules the module uses, as they were
+            when it was compiled (the linker checks the modules still export them)
+        dependencies (dict): The interface digest of each module it was compiled against
+        references (list[str]): The names its declarations refer to (see references)
+        symbols (list[str]): The lines of its variables in the data section
+        segment (Segment): Its code
+        optimized (bool): Whether its expressions were compiled with the optimizations
+            (see InstructionSelector)
+    """
+
+    def __init__(self, name, source_digest, exports, imports, dependencies, references, symbols, segment, optimized=True):
+        self.name = name
+        self.source_digest = source_digest
+        self.exports = exports
+        self.imports = imports
+        self.dependencies = dependencies
+        self.references = references
+        self.symbols = symbols
+        self.segment = segment
+        self.optimized = optimized
+
+
+    def interface(self):
+        """
+        Returns the digest of the exports, the modules compiled against this one only
+        need to be compiled again if it changes
+        """
+        return hashlib.sha256(json.dumps(self.exports, sort_keys=True).encode()).hexdigest()
+
+
+    def to_dict(self):
+        return {
+            "format": OBJECT_FORMAT,
+            "version": OBJECT_VERSION,
+            "name": self.name,
+            "source_digest": self.source_digest,
+            "exports": self.exports,
+            "imports": self.imports,
+            "dependencies": self.dependencies,
+            "references": self.references,
+            "data": {"symbols": self.symbols, "entries": self.segment.data},
+            "text": {"main": self.segment.main, "functions": self.segment.local, "labels": self.segment.labels[1]},
+            "optimized": self.optimized,
+        }
+
+
+    @classmethod
+    def from_dict(cls, record):
+        if record.get("format") != OBJECT_FORMAT or record.get("version") != OBJECT_VERSION:
+            raise ValueError("Not a CompiScript object module (or an unsupported version)")
+        text = record["text"]
+        segment = Segment(text["main"], text["functions"], (0, text["labels"]), record["data"]["entries"], 0)
+        return cls(record["name"], record["source_digest"], record["exports"], record["imports"],
+                   record["dependencies"], record["references"], record["data"]["symbols"], segment,
+                   record.get("optimized", True))
+
+
+    def write(self, path):
+        """
+        Writes the module to a file (JSON)
+        """
+        with open(path, "w", encoding="utf8") as file:
+            json.dump(self.to_dict(), file)
+
+
+    @classmethod
+    def read(cls, path):
+        """
+        Reads a module written by write
+        """
+        with open(path, encoding="utf8") as file:
+            return cls.from_dict(json.load(file))
+
+
+class ModuleAnalyzer(SemanticAnalyzer):
+    """
+    SemanticAnalyzer for a module: the symbols exported by the modules it imports are
+    declared in the global scope before its own declarations (as if they were declared
+    before them in the same file).
+
+    Attr:
+        modules (list[ObjectModule]): The modules whose exports can be used
+        imported (dict): The export each imported symbol (or one of its attributes and
+            methods) was declared from, by the id of the symbol
+    """
+
+    def __init__(self, modules, logging=False):
+        super().__init__(logging)
+        self.modules = modules
+        self.imported = {}
+
+
+    def visitProgram(self, node:Program):
+        self.log("VISIT -> Program node")
+        # Create the annotations for the nodes of the tree
+        self.annotations = Annotations(node.size)
+        # Enter the global scope
+        self.enter_scope("global")
+        # Declare the symbols of the imported modules
+        self.declare_imports()
+        # visit the declarations of the program node
+        for declaration in node.declarations:
+            yield declaration
+        print("SUCCESS -> Semantic Analysis completed\n")
+
+
+    def declare_imports(self):
+        """
+        Adds the exports of the imported modules to the symbol table (the attributes and
+        methods of a class are added before it, as the analysis of the class adds them)
+        """
+        classes = {}
+        # The data types are set once every class is declared (an attribute can hold
+        # an instance of a class declared after it)
+        pending = []
+        for module in self.modules:
+            for export in module.exports:
+                if export["kind"] == "function":
+                    symbol = self.load_function(export, pending)
+                elif export["kind"] == "class":
+                    symbol = classes[export["name"]] = self.load_class(export, classes, pending)
+                else:
+                    symbol = Variable(export["name"])
+                    pending.append((symbol.set_type, export["type"]))
+                symbol.scope = self.current_scope
+                self.symbol_table.append(symbol)
+                self.imported[id(symbol)] = export
+
+        for set_type, record in pending:
+            set_type(load_type(record, classes))
+
+
+    def load_function(self, record, pending, scope=None):
+        """
+        Returns the function of an export
+        """
+        function = Function(record["name"])
+        function.scope = scope
+        for parameter_record in record["parameters"]:
+            parameter = Variable(parameter_record["name"], type="param")
+            parameter.scope = scope
+            pending.append((parameter.set_type, parameter_record["type"]))
+            function.parameters.append(parameter)
+        pending.append((function.set_return_type, record["return_type"]))
+        return function
+
+
+    def load_class(self, record, classes, pending):
+        """
+        Returns the class of an export with the attributes and methods it inherits
+        """
+        parent = None
+        if record["parent"] is not None:
+            parent = classes.get(record["parent"])
+            if parent is None:
+                raise Exception(f"Parent class {record['parent']} of class {record['name']} not found in the imported modules")
+
+        class_symbol = Class(record["name"], parent=parent)
+        scope = Scope(record["name"], 1)
+        for attribute_record in record["attributes"]:
+            attribute = Variable(attribute_record["name"], type="attr")
+            attribute.scope = scope
+            attribute.offset = attribute_record["offset"]
+            pending.append((attribute.set_type, attribute_record["type"]))
+            class_symbol.attributes.append(attribute)
+            self.symbol_table.append(attribute)
+            self.imported[id(attribute)] = record
+        for method_record in record["methods"]:
+            method = self.load_function(method_record, pending, scope)
+            class_symbol.methods.append(method)
+            self.symbol_table.append(method)
+            self.imported[id(method)] = record
+        class_symbol.size = record["size"]
+        class_symbol.completed = record["completed"]
+        return class_symbol
+
+
+class ModuleGenerator(UnitGenerator):
+    """
+    IntermediateCodeGenerator for a module: its labels and string constants are
+    placeholders like the ones of a unit, and only its own variables are added to
+    the data section (the imported ones are in the data of their modules).
+    """
+
+    # The variables of the module (the symbol table of the generator only has its own symbols)
+    add_symbols = IntermediateCodeGenerator.add_symbols
+
+
+def compile_module(name, syntax_tree, modules=(), source_digest=None, optimize=True):
+    """
+    Analyzes and generates a module, returns the ObjectModule and the semantic analyzer
+
+    Args:
+        name (str): The name of the module
+        syntax_tree (Program): The syntax tree of its source
+        modules (list[ObjectModule]): The modules it can import symbols from
+        source_digest (str): The SHA-256 of its source
+        optimize (bool): Whether the expressions are compiled with the optimizations
+    """
+    modules = list(modules)
+    semantic_analyzer = ModuleAnalyzer(modules)
+    semantic_analyzer.visit(syntax_tree)
+
+    # The symbols declared by the module (the imported ones are declared first)
+    imported = semantic_analyzer.imported
+    own = [symbol for symbol in semantic_analyzer.symbol_table if id(symbol) not in imported]
+    exports = [dump_symbol(symbol) for symbol in own
+               if symbol.scope.index == 0 and (isinstance(symbol, (Function, Class)) or symbol.type == "var")]
+
+    # The imports are the exports of other modules the module refers to (the classes of the
+    # instances and the parents of the classes too)
+    used = {}
+    annotations = semantic_analyzer.annotations
+    for value in annotations.symbols + annotations.types:
+        if isinstance(value, InstanceType) and value.class_ref is not None:
+            value = value.class_ref
+        if value is not None and id(value) in imported:
+            used[imported[id(value)]["name"]] = imported[id(value)]
+    for symbol in own:
+        if isinstance(symbol, Class) and symbol.parent is not None and id(symbol.parent) in imported:
+            used[symbol.parent.id] = imported[id(symbol.parent)]
+    imports = [export for module in modules for export in module.exports if used.get(export["name"]) is export]
+
+    # Generate the code, the progress message of the generator is printed here
+    print("Generating Intermediate Code...")
+    with contextlib.redirect_stdout(io.StringIO()):
+        ci_generator = ModuleGenerator(own, annotations, optimize)
+    symbols = ci_generator.instruction_generator.data_section[1:]
+    segment = ci_generator.generate(syntax_tree, 0)
+
+    dependencies = {module.name: module.interface() for module in modules
+                    if any(export in imports for export in module.exports)}
+    return ObjectModule(name, source_digest, exports, imports, dependencies, references(syntax_tree), symbols, segment, optimize), semantic_analyzer
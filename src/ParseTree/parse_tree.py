@@ -1,109 +1,247 @@
-from graphviz import Digraph
+import os
+import sys
+import json
+import argparse
 from antlr4 import ParserRuleContext
 from Utils.file_utils import generate_name
 
+
+# Formats the tree is written in directly (any other format is rendered by graphviz from the DOT)
+TEXT_FORMATS = {"dot": ".dot", "text": ".txt", "json": ".json"}
+
+# Chains with more rules than this are labeled with their first and last rule only
+CHAIN_LABEL_LIMIT = 3
+
+
 class TreeVisualizer:
     """
     Class to visualize the parse tree generated by ANTLR4.
 
+    The tree is walked with an explicit stack and each node is written as soon as it is
+    visited (as DOT, an indented text outline or nested JSON arrays), so no graph is
+    kept in memory and trees of any size can be exported. Images are rendered by
+    graphviz from the DOT file.
+
     Attributes:
-        - graph: Digraph object from the graphviz library.
-        - node_count: Integer to keep track of the number of nodes in the graph.
+        - name: The name of the output file (parse_tree_<input file name>).
+        - collapse: Whether the chains of rules with a single child rule
+          (Expression -> Assignment -> Logic_or -> ... -> Primary) are shown as one node.
+        - max_depth: The nodes deeper than this are left out (None for the whole tree),
+          the label of a node whose children are left out ends with '...'.
+        - roots: Rule names (e.g. 'FunDecl', or 'FunDecl:12' for the one that starts at
+          line 12), only the subtrees of the matching rules are shown (None for the whole tree).
+        - tree: The parse tree to visualize (set by visit).
+        - node_count: Integer to keep track of the number of nodes written.
 
     Methods:
-        - add_node: Adds a node to the graph.
-        - add_edge: Adds an edge between two nodes.
-        - visit: Visits a node in the parse tree and adds it to the graph.
-        - render: Renders the graph to a file in the specified format and directory.
+        - visit: Sets the parse tree to visualize.
+        - nodes: Yields the nodes to show in pre-order.
+        - write: Writes the tree to a sink in the specified format.
+        - render: Writes or renders the tree to a file in the specified format and directory.
     """
-    def __init__(self, file_path):
+    def __init__(self, file_path, collapse=True, max_depth=None, roots=None):
         print("Generating Parse Tree...")
-        self.graph = Digraph(comment='Parse Tree')
-        self.node_count = 0
         self.name = generate_name(file_path, "parse_tree_")
+        self.collapse = collapse
+        self.max_depth = max_depth
+        self.roots = roots
+        self.tree = None
+        self.node_count = 0
+
 
-    def add_node(self, label):
+    def visit(self, ctx: ParserRuleContext):
         """
-        Adds a node to the graph with the specified label.
+        Sets the parse tree to visualize (the nodes are visited when the tree is written).
 
         Args:
-            - label: The label of the node.
+            - ctx: The root of the parse tree.
 
         Returns:
-            - The name of the node.
+            - The name of the root node.
         """
-        # Generate a unique node name
-        node_name = f"node{self.node_count}"
-        # Add the node to the graph
-        self.graph.node(node_name, label)
-        # Increment the node count
-        self.node_count += 1
+        self.tree = ctx
+        return "node0"
 
-        return node_name
 
-
-    def add_edge(self, parent, child):
+    def matches(self, ctx):
+        """
+        Returns whether a rule is one of the subtree roots to show.
         """
-        Adds an edge between two nodes in the graph.
+        name = type(ctx).__name__.replace("Context", "")
+        for root in self.roots:
+            rule, _, line = root.partition(":")
+            if rule.lower() == name.lower() and (not line or int(line) == ctx.start.line):
+                return True
+        return False
 
-        Args:
-            - parent: The name of the parent node.
-            - child: The name of the child node.
 
-        Returns:
-            - None
+    def subtrees(self):
         """
-        self.graph.edge(parent, child)
-
+        Yields the roots of the subtrees to show in pre-order (the whole tree if
+        there is no filter). The subtrees of a match are not searched again.
+        """
+        if not self.roots:
+            yield self.tree
+            return
+
+        stack = [self.tree]
+        while stack:
+            ctx = stack.pop()
+            if not isinstance(ctx, ParserRuleContext):
+                continue
+            if self.matches(ctx):
+                yield ctx
+                continue
+            for i in range(ctx.getChildCount() - 1, -1, -1):
+                stack.append(ctx.getChild(i))
+
+
+    def nodes(self):
+        """
+        Yields the nodes to show in pre-order as (depth, name, parent name, label).
+        The depth of the subtree roots is 0.
+        """
+        self.node_count = 0
 
-    def visit(self, ctx: ParserRuleContext, parent=None):
+        for subtree in self.subtrees():
+            # Pending nodes with their depth and the name of their parent
+            stack = [(subtree, 0, None)]
+            while stack:
+                ctx, depth, parent = stack.pop()
+
+                # Determine the label for the current node
+                if ctx.getChildCount() == 0:  # Terminal node
+                    label = ctx.getText()
+                else:  # Non-terminal node (rule)
+                    rules = [type(ctx).__name__.replace("Context", "")]
+                    # Follow the chain of rules with a single child rule
+                    while self.collapse and ctx.getChildCount() == 1 and isinstance(ctx.getChild(0), ParserRuleContext):
+                        ctx = ctx.getChild(0)
+                        rules.append(type(ctx).__name__.replace("Context", ""))
+                    if len(rules) > CHAIN_LABEL_LIMIT:
+                        rules = [rules[0], "...", rules[-1]]
+                    label = " > ".join(rules)
+
+                # Leave out the children below the maximum depth
+                children = ctx.getChildCount()
+                if self.max_depth is not None and depth >= self.max_depth and children:
+                    label += " ..."
+                    children = 0
+
+                name = f"node{self.node_count}"
+                self.node_count += 1
+                yield depth, name, parent, label
+
+                # Push the children in reverse so the first child is visited first
+                for i in range(children - 1, -1, -1):
+                    stack.append((ctx.getChild(i), depth + 1, name))
+
+
+    def write(self, sink, format="dot"):
         """
-        Visits a node in the parse tree and adds it to the graph.
+        Writes the tree to a sink, one node at a time.
 
         Args:
-            - ctx: The context node to visit.
-            - parent: The parent node of the current context node.
+            - sink: Any object with a write method that takes a str (a file, sys.stdout, ...).
+            - format: 'dot' (graphviz source), 'text' (a line per node indented by its
+              depth) or 'json' (a list of subtrees, each node is a list with its label
+              and its children).
 
         Returns:
-            - The name of the current node.
-        """        
-        # Determine the label for the current node
-        if ctx.getChildCount() == 0:  # Terminal node
-            label = ctx.getText()
-        else:  # Non-terminal node (rule)
-            label = type(ctx).__name__.replace("Context", "")
-        
-        # Add the current node
-        current_node = self.add_node(label)
-
-        # If there is a parent, create an edge
-        if parent:
-            self.add_edge(parent, current_node)
-        
-        # Visit all children
-        for i in range(ctx.getChildCount()):
-            self.visit(ctx.getChild(i), current_node)
-
-        return current_node
-
-
-    def render(self, output_file='parse_tree', format='png', output_dir='.', cleanup=True):
+            - The number of nodes written.
+        """
+        if format == "dot":
+            sink.write("// Parse Tree\ndigraph {\n")
+            for _, name, parent, label in self.nodes():
+                sink.write(f"\t{name} [label={json.dumps(label, ensure_ascii=False)}]\n")
+                if parent is not None:
+                    sink.write(f"\t{parent} -> {name}\n")
+            sink.write("}\n")
+
+        elif format == "text":
+            for depth, _, _, label in self.nodes():
+                sink.write("  " * depth + label + "\n")
+
+        elif format == "json":
+            # Whether each open list already has an item (the first one is the list of subtrees)
+            open_lists = [False]
+            sink.write("[")
+            for depth, _, _, label in self.nodes():
+                # Close the lists of the nodes that are not ancestors of this one
+                while len(open_lists) > depth + 1:
+                    sink.write("]")
+                    open_lists.pop()
+                if open_lists[-1]:
+                    sink.write(",")
+                open_lists[-1] = True
+                sink.write("[" + json.dumps(label, ensure_ascii=False))
+                open_lists.append(True)
+            sink.write("]" * len(open_lists) + "\n")
+
+        else:
+            raise ValueError(f"Unknown parse tree format '{format}'")
+
+        return self.node_count
+
+
+    def render(self, output_file=None, format='png', output_dir='.', cleanup=True):
         """
-        Renders the graph to a file in the specified format and directory.
+        Writes the tree to a file in the specified format and directory.
 
         Args:
-            - output_file: The name of the output file.
-            - format: The format of the output file (e.g., 'png', 'pdf', 'svg').
+            - output_file: The name of the output file (the name of the visualizer by default).
+            - format: 'dot', 'text', 'json' or an image format of graphviz (e.g., 'png', 'pdf', 'svg').
             - output_dir: The directory where the output file will be saved.
-            - cleanup: Whether to clean up the graph after rendering.
+            - cleanup: Whether to remove the DOT file after rendering an image.
 
         Returns:
-            - None
+            - The path of the output file.
         """
-        # Define the full output path
-        output_path = f"{output_dir}/{output_file}"
-
-        # Render the graph to the specified format and path
-        self.graph.render(filename=output_path, format=format, cleanup=cleanup)
-
-        print(f"SUCCESS -> Parse tree generated at: {output_path}.{format}\n")
\ No newline at end of file
+        # Define the full output path (the directory is created if it doesn't exist)
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, output_file or self.name)
+        extension = TEXT_FORMATS.get(format, ".dot")
+
+        with open(output_path + extension, "w", encoding="utf8", buffering=1 << 16) as file:
+            self.write(file, format if format in TEXT_FORMATS else "dot")
+
+        if format not in TEXT_FORMATS:
+            # Imported on demand, graphviz is only needed when a tree image is rendered
+            import graphviz
+            graphviz.render("dot", format, output_path + extension)
+            if cleanup:
+                os.remove(output_path + extension)
+            # graphviz names the image after the DOT file
+            os.replace(f"{output_path}{extension}.{format}", f"{output_path}.{format}")
+            extension = f".{format}"
+
+        print(f"SUCCESS -> Parse tree with {self.node_count} nodes generated at: {output_path}{extension}\n")
+        return output_path + extension
+
+
+def main():
+    # Imported here, the visualizer module is also imported by the compiler
+    from antlr4 import FileStream, CommonTokenStream
+    from CompiScript.compiscriptLexer import compiscriptLexer
+    from CompiScript.compiscriptParser import compiscriptParser
+
+    arguments = argparse.ArgumentParser(description="CompiScript parse tree visualizer")
+    arguments.add_argument("input", help="source file")
+    arguments.add_argument("--format", default="png", help="dot, text, json or an image format of graphviz")
+    arguments.add_argument("--output-dir", default="src/ParseTree/Output", help="directory of the output file")
+    arguments.add_argument("--max-depth", type=int, help="leave out the nodes deeper than this")
+    arguments.add_argument("--root", action="append", dest="roots", metavar="RULE[:LINE]", help="only show the subtrees of this rule (repeatable)")
+    arguments.add_argument("--no-collapse", dest="collapse", action="store_false", help="show every rule of the single child chains")
+    options = arguments.parse_args()
+
+    parser = compiscriptParser(CommonTokenStream(compiscriptLexer(FileStream(options.input))))
+    visualizer = TreeVisualizer(options.input, options.collapse, options.max_depth, options.roots)
+    visualizer.visit(parser.program())
+    visualizer.render(format=options.format, output_dir=options.output_dir)
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m ParseTree.parse_tree <file> [--format text] [--max-depth N] [--root FunDecl]
+    sys.setrecursionlimit(10000)    # The generated parser still recurses on nested expressions
+    main()
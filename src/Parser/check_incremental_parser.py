@@ -0,0 +1,103 @@
+import re
+import sys
+import glob
+import time
+from antlr4 import InputStream, CommonTokenStream
+from Lexer.fast_lexer import FastLexer
+from Parser.fast_parser import FastParser
+from Parser.incremental_parser import IncrementalParser, nodes
+from Parser.check_parser import fields
+from Utils.custom_exception import ThrowingErrorListener
+
+
+def numbered(program):
+    """
+    Returns the fields of the tree with the index of every node (the incremental parser
+    numbers the nodes itself, they must be numbered like a full parse numbers them)
+    """
+    return fields(program), program.size, [(type(node).__name__, node.index, node.line, node.column) for node in nodes(program)]
+
+
+def full_parse(source):
+    """
+    Parses the whole source with the FastParser, returns the tree (or the error message) and the time it took
+    """
+    start = time.perf_counter()
+    try:
+        lexer = FastLexer(InputStream(source))
+        lexer.removeErrorListeners()
+        lexer.addErrorListener(ThrowingErrorListener.INSTANCE)
+        parser = FastParser(CommonTokenStream(lexer))
+        parser.removeErrorListeners()
+        parser.addErrorListener(ThrowingErrorListener.INSTANCE)
+        program = parser.program()
+    except Exception as e:
+        return str(e), time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    return numbered(program), elapsed
+
+
+def incremental_parse(parser, source):
+    """
+    Parses the source with the incremental parser of the file, returns the tree (or the error message) and the time it took
+    """
+    start = time.perf_counter()
+    try:
+        program = parser.parse(source)
+    except Exception as e:
+        return str(e), time.perf_counter() - start
+    elapsed = time.perf_counter() - start
+    return numbered(program), elapsed
+
+
+def versions(source):
+    """
+    Returns the successive versions of a file that are parsed: the file, then with a
+    blank line in the middle, a line repeated, a number changed, a line removed, a
+    comment at the start, a declaration at the end and the file again
+    """
+    lines = source.split("\n")
+    middle = len(lines) // 2
+    return [
+        source,
+        "\n".join(lines[:middle] + [""] + lines[middle:]),
+        "\n".join(lines[:middle] + [lines[middle]] + lines[middle:]),
+        re.sub(r"\b(\d+)\b", lambda match: str(int(match[1]) + 1), source, count=1),
+        "\n".join(lines[:middle] + lines[middle + 1:]),
+        "// edited\n" + source,
+        source + "\nvar edited = 1;\n",
+        source,
+    ]
+
+
+def main():
+    # Check every source file under the input directory (src/Input by default)
+    directory = sys.argv[1] if len(sys.argv) > 1 else "src/Input"
+    paths = sorted(glob.glob(f"{directory}/**/*.cspt", recursive=True))
+
+    failures = checks = 0
+    for path in paths:
+        with open(path) as file:
+            source = file.read()
+
+        parser = IncrementalParser()
+        full_time = incremental_time = 0
+        for number, version in enumerate(versions(source)):
+            checks += 1
+            expected, elapsed = full_parse(version)
+            full_time += elapsed
+            got, elapsed = incremental_parse(parser, version)
+            incremental_time += elapsed
+            if expected != got:
+                failures += 1
+                print(f"FAIL {path} #{number} -> the syntax trees are different")
+        print(f"DONE {path} (full {full_time * 1000:.1f} ms, incremental {incremental_time * 1000:.1f} ms, {parser.stats['parsed']} declarations parsed, {parser.stats['reused']} reused)")
+
+    print(f"{checks - failures}/{checks} incremental parses produce the same syntax tree")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m Parser.check_incremental_parser [directory]
+    main()
@@ -0,0 +1,92 @@
+import sys
+import glob
+import time
+from antlr4 import FileStream, CommonTokenStream
+from antlr4.error.ErrorStrategy import DefaultErrorStrategy
+from CompiScript.compiscriptParser import compiscriptParser
+from Lexer.fast_lexer import FastLexer
+from Parser.fast_parser import FastParser
+from SyntaxTree.builder import ASTBuilder
+from SyntaxTree.nodes import Node
+from Utils.custom_exception import ThrowingErrorListener
+
+
+def fields(node):
+    """
+    Returns the node as nested tuples with its class, position and every field
+    (the preorder index and size are left out, they are checked through the structure)
+    """
+    if isinstance(node, Node):
+        names = [name for cls in type(node).__mro__ for name in getattr(cls, "__slots__", ()) if name not in ("index", "size")]
+        return (type(node).__name__, node.line, node.column) + tuple((name, fields(getattr(node, name))) for name in names)
+    if isinstance(node, (list, tuple)):
+        return tuple(fields(item) for item in node)
+    return node
+
+
+def token_stream(path):
+    """
+    Returns the tokens of a file (the lexer is the same for both parsers)
+    """
+    lexer = FastLexer(FileStream(path))
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(ThrowingErrorListener.INSTANCE)
+    return CommonTokenStream(lexer)
+
+
+def antlr_tree(path):
+    """
+    Builds the syntax tree with compiscriptParser and the ASTBuilder
+    """
+    parser = compiscriptParser(token_stream(path))
+    parser._errHandler = DefaultErrorStrategy()
+    parser.removeErrorListeners()
+    parser.addErrorListener(ThrowingErrorListener.INSTANCE)
+    return ASTBuilder().build(parser.program())
+
+
+def fast_tree(path):
+    """
+    Builds the syntax tree with the FastParser
+    """
+    parser = FastParser(token_stream(path))
+    parser.removeErrorListeners()
+    parser.addErrorListener(ThrowingErrorListener.INSTANCE)
+    return parser.program()
+
+
+def build(parse, path):
+    """
+    Returns the fields of the syntax tree (or the syntax error message) and the time it took
+    """
+    start = time.perf_counter()
+    try:
+        result = fields(parse(path))
+    except Exception as e:
+        result = str(e)
+    return result, time.perf_counter() - start
+
+
+def main():
+    # Check every source file under the input directory (src/Input by default)
+    directory = sys.argv[1] if len(sys.argv) > 1 else "src/Input"
+    paths = sorted(glob.glob(f"{directory}/**/*.cspt", recursive=True))
+
+    failures = 0
+    for path in paths:
+        expected, antlr_time = build(antlr_tree, path)
+        got, fast_time = build(fast_tree, path)
+        if expected == got:
+            print(f"OK   {path} (compiscriptParser {antlr_time * 1000:.1f} ms, FastParser {fast_time * 1000:.1f} ms)")
+        else:
+            failures += 1
+            print(f"FAIL {path} -> the syntax trees are different")
+
+    print(f"{len(paths) - failures}/{len(paths)} files produce the same syntax tree")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m Parser.check_parser [directory]
+    main()
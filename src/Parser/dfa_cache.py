@@ -0,0 +1,284 @@
+import io
+import os
+import sys
+import glob
+import time
+import pickle
+import hashlib
+from antlr4 import FileStream, CommonTokenStream
+from antlr4.atn.ATNState import ATNState
+from antlr4.dfa.DFA import DFA
+from antlr4.dfa.DFAState import DFAState
+from antlr4.atn.ATNConfigSet import ATNConfigSet
+from antlr4.atn.ATNSimulator import ATNSimulator
+from antlr4.atn.LexerATNSimulator import LexerATNSimulator
+from antlr4.atn.LexerAction import LexerAction
+from antlr4.atn.LexerActionExecutor import LexerActionExecutor
+from antlr4.atn.SemanticContext import SemanticContext
+from antlr4.PredictionContext import PredictionContext, SingletonPredictionContext, ArrayPredictionContext
+from antlr4.error.ErrorStrategy import DefaultErrorStrategy
+from CompiScript import compiscriptLexer as lexer_module, compiscriptParser as parser_module
+from CompiScript.compiscriptLexer import compiscriptLexer
+from CompiScript.compiscriptParser import compiscriptParser
+from Utils.custom_exception import ThrowingErrorListener
+
+
+# Where the snapshot of the warmed DFA is kept (next to the generated recognizers it belongs to)
+DEFAULT_PATH = "src/CompiScript/compiscript.dfa"
+
+# Training corpus used when no directories are given
+DEFAULT_CORPUS = ["src/Input"]
+
+# Shared objects of the runtime that the DFA points to. They are saved by name
+# (they are compared by identity) and resolved to the objects of the current process.
+SINGLETONS = {
+    "EMPTY": PredictionContext.EMPTY,
+    "NONE": SemanticContext.NONE,
+    "ERROR": ATNSimulator.ERROR,
+    "LEXER_ERROR": LexerATNSimulator.ERROR,
+}
+
+# Modules of the antlr4 runtime whose classes a snapshot can name (the objects of the DFA)
+DFA_MODULES = {
+    "antlr4.PredictionContext",
+    "antlr4.atn.ATNConfig",
+    "antlr4.atn.ATNConfigSet",
+    "antlr4.atn.LexerAction",
+    "antlr4.atn.LexerActionExecutor",
+    "antlr4.atn.SemanticContext",
+    "antlr4.dfa.DFA",
+    "antlr4.dfa.DFAState",
+}
+
+# Functions of this module a snapshot calls to recreate its objects (see DFAPickler)
+REBUILD_FUNCTIONS = {"rebuild_config_set", "rebuild_dfa_state", "rebuild_dfa"}
+
+
+def fingerprint():
+    """
+    Returns the key of the grammar the DFA was built for. The DFA states point into the
+    deserialized ATN by state number, so a snapshot is only valid for the same generated
+    recognizers (a snapshot of another runtime fails to load and is ignored too).
+    """
+    key = hashlib.sha256()
+    key.update(str(lexer_module.serializedATN()).encode())
+    key.update(str(parser_module.serializedATN()).encode())
+    return key.hexdigest()
+
+
+def rebuild_config_set(config_set_class, state):
+    """
+    Recreates a (read only) configuration set without its cached hash code
+    (an ATNConfigSet of the parser or an OrderedATNConfigSet of the lexer)
+    """
+    config_set = config_set_class.__new__(config_set_class)
+    for name, value in state.items():
+        setattr(config_set, name, value)
+    config_set.cachedHashCode = -1
+    return config_set
+
+
+def rebuild_dfa_state(state):
+    """
+    Recreates a DFA state (its edges are restored by rebuild_dfa)
+    """
+    dfa_state = DFAState.__new__(DFAState)
+    for name, value in state.items():
+        setattr(dfa_state, name, value)
+    dfa_state.edges = None
+    return dfa_state
+
+
+def rebuild_dfa(start_state, decision, states, edges, start, error):
+    """
+    Recreates a DFA from its table of states (see DFAPickler.reducer_override)
+
+    Args:
+        start_state (DecisionState): The ATN state the DFA was created from
+        decision (int): The decision number of the DFA
+        states (list): The DFA states (without their edges)
+        edges (list): The edges of each state, as indexes into states (-1 for a missing
+            edge, -2 for the error state) or None if the state has no edges
+        start (int): The index of the start state (None if the DFA is empty)
+        error (DFAState): The error state of the simulator (the target of the failed edges)
+    """
+    dfa = DFA(start_state, decision)
+    for state, targets in zip(states, edges):
+        if targets is not None:
+            state.edges = [None if target == -1 else error if target == -2 else states[target] for target in targets]
+        dfa._states[state] = state  # Hashed now, with the hash codes of this process
+    if start is not None:
+        dfa.s0 = states[start]
+    return dfa
+
+
+class DFAPickler(pickle.Pickler):
+    """
+    Pickler for the DFA of the recognizers.
+
+    The ATN states and the runtime singletons are saved by reference (see persistent_id),
+    and the objects that cache a hash code are saved by their constructor arguments so
+    the hash is computed again when they are loaded: the cached codes depend on
+    hash("") and str hashes are randomized on each process, so a stale code would make
+    every lookup of the DFA miss.
+    """
+
+    def persistent_id(self, obj):
+        if isinstance(obj, ATNState):
+            recognizer = "lexer" if obj.atn is compiscriptLexer.atn else "parser"
+            return (recognizer, obj.stateNumber)
+        for name, singleton in SINGLETONS.items():
+            if obj is singleton:
+                return name
+        # Lexer actions without arguments are singletons too (skip, more, popMode)
+        if isinstance(obj, LexerAction) and getattr(type(obj), "INSTANCE", None) is obj:
+            return ("INSTANCE", type(obj))
+        return None
+
+
+    def reducer_override(self, obj):
+        if type(obj) is SingletonPredictionContext:
+            return SingletonPredictionContext, (obj.parentCtx, obj.returnState)
+        if type(obj) is ArrayPredictionContext:
+            return ArrayPredictionContext, (obj.parents, obj.returnStates)
+        if type(obj) is LexerActionExecutor:
+            return LexerActionExecutor, (obj.lexerActions,)
+        if type(obj) is DFA:
+            if obj.precedenceDfa:
+                # Its start states are indexed by precedence (the CompiScript grammar has
+                # no left recursive rules), it is saved empty and warmed up again
+                return DFA, (obj.atnStartState, obj.decision)
+            # The states are saved as a table and the edges as indexes into it, pickling
+            # the edges as references would recurse once per state of the longest path
+            error = LexerATNSimulator.ERROR if obj.atnStartState.atn is compiscriptLexer.atn else ATNSimulator.ERROR
+            states = list(obj._states)
+            index = {id(state): i for i, state in enumerate(states)}
+            index[id(error)] = -2
+            edges = [None if state.edges is None else [-1 if target is None else index[id(target)] for target in state.edges] for state in states]
+            start = index[id(obj.s0)] if obj.s0 is not None else None
+            return rebuild_dfa, (obj.atnStartState, obj.decision, states, edges, start, error)
+        if type(obj) is DFAState:
+            return rebuild_dfa_state, ({name: getattr(obj, name) for name in DFAState.__slots__ if name != "edges"},)
+        if isinstance(obj, ATNConfigSet):
+            state = {name: getattr(obj, name) for name in ATNConfigSet.__slots__ if name != "cachedHashCode"}
+            return rebuild_config_set, (type(obj), state)
+        return NotImplemented
+
+
+class DFAUnpickler(pickle.Unpickler):
+    """
+    Unpickler that resolves the references saved by the DFAPickler.
+
+    The snapshot path comes from the command line, so the classes and functions a
+    snapshot can name are limited to the ones a DFA is made of (any other global would
+    let a planted file call arbitrary code while it is loaded).
+    """
+
+    def find_class(self, module, name):
+        if module == __name__ and name in REBUILD_FUNCTIONS:
+            return globals()[name]
+        # Only classes defined in the modules of the DFA (no attributes of them)
+        if module in DFA_MODULES and "." not in name:
+            value = super().find_class(module, name)
+            if isinstance(value, type) and value.__module__ == module:
+                return value
+        raise pickle.UnpicklingError(f"{module}.{name} can't be loaded from a DFA snapshot")
+
+
+    def persistent_load(self, pid):
+        if isinstance(pid, str):
+            return SINGLETONS[pid]
+        kind, value = pid
+        if kind == "INSTANCE":
+            return value.INSTANCE
+        atn = compiscriptLexer.atn if kind == "lexer" else compiscriptParser.atn
+        return atn.states[value]
+
+
+def warm_up(paths):
+    """
+    Parses the files with the ANTLR recognizers to fill their (class level) DFA.
+    The files that have syntax errors are parsed up to the error, that is still useful.
+
+    Args:
+        paths (list): The source files of the training corpus
+    """
+    for path in paths:
+        lexer = compiscriptLexer(FileStream(path))
+        lexer.removeErrorListeners()
+        lexer.addErrorListener(ThrowingErrorListener.INSTANCE)
+
+        parser = compiscriptParser(CommonTokenStream(lexer))
+        parser._errHandler = DefaultErrorStrategy()
+        parser.removeErrorListeners()
+        parser.addErrorListener(ThrowingErrorListener.INSTANCE)
+        try:
+            parser.program()
+        except Exception as e:
+            print(f"WARNING -> {path}: {e}")
+
+
+def save(path=DEFAULT_PATH):
+    """
+    Writes the current DFA of the lexer and the parser (and the prediction contexts
+    shared by the parsers) to the snapshot file
+    """
+    buffer = io.BytesIO()
+    DFAPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump({
+        "fingerprint": fingerprint(),
+        "lexer": compiscriptLexer.decisionsToDFA,
+        "parser": compiscriptParser.decisionsToDFA,
+        "contexts": list(compiscriptParser.sharedContextCache.cache),
+    })
+    with open(path, "wb") as file:
+        file.write(buffer.getvalue())
+
+
+def load(path=DEFAULT_PATH):
+    """
+    Replaces the (empty) DFA of the lexer and the parser with the snapshot, so the
+    recognizers created after this start with the predictions of the training corpus.
+    Returns False (and leaves the recognizers as they are) if there is no snapshot or
+    it was built for another grammar or runtime.
+    """
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path, "rb") as file:
+            snapshot = DFAUnpickler(file).load()
+    except Exception:
+        return False
+    if snapshot.get("fingerprint") != fingerprint():
+        return False
+
+    # Replaced in place, the simulators hold a reference to the lists
+    compiscriptLexer.decisionsToDFA[:] = snapshot["lexer"]
+    compiscriptParser.decisionsToDFA[:] = snapshot["parser"]
+
+    for context in snapshot["contexts"]:
+        compiscriptParser.sharedContextCache.add(context)
+    return True
+
+
+def main():
+    # Build the snapshot from the source files under the given directories
+    directories = sys.argv[1:] or DEFAULT_CORPUS
+    paths = sorted({path for directory in directories for path in glob.glob(f"{directory}/**/*.cspt", recursive=True)})
+
+    start = time.perf_counter()
+    warm_up(paths)
+    save()
+
+    lexer_states = sum(len(dfa._states) for dfa in compiscriptLexer.decisionsToDFA)
+    parser_states = sum(len(dfa._states) for dfa in compiscriptParser.decisionsToDFA)
+    print(f"SUCCESS -> {len(paths)} files, {lexer_states} lexer and {parser_states} parser DFA states "
+          f"written to {DEFAULT_PATH} ({os.path.getsize(DEFAULT_PATH)} bytes, {time.perf_counter() - start:.2f} s)")
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m Parser.dfa_cache [directory ...]
+    # (run from the imported module, the snapshot refers to the rebuild functions by
+    # their module and __main__ is not the module that loads it)
+    from Parser import dfa_cache
+    dfa_cache.main()
@@ -0,0 +1,507 @@
+from antlr4 import CommonTokenStream
+from antlr4.Token import Token
+from antlr4.Recognizer import Recognizer
+from antlr4.error.Errors import RecognitionException, ParseCancellationException
+from CompiScript.compiscriptParser import compiscriptParser
+from SyntaxTree.nodes import *
+from SyntaxTree.tokens import *
+
+
+# Precedence level of the binary operators (a higher level binds tighter)
+LEVELS = {
+    literal("or"): 1,
+    literal("and"): 2,
+    BANG_EQUAL: 3, EQUAL_EQUAL: 3,
+    GREATER: 4, GREATER_EQUAL: 4, LESS: 4, LESS_EQUAL: 4,
+    MINUS: 5, PLUS: 5,
+    SLASH: 6, STAR: 6, PERCENT: 6,
+}
+
+# Node built for the chain of each level (the logic chains don't keep their operators)
+CHAINS = {1: LogicOr, 2: LogicAnd, 3: Equality, 4: Comparison, 5: Term, 6: Factor}
+
+# Keyword and punctuation tokens of the statements
+CLASS = literal("class")
+EXTENDS = literal("extends")
+FUN = literal("fun")
+VAR = literal("var")
+FOR = literal("for")
+IF = literal("if")
+ELSE = literal("else")
+PRINT = literal("print")
+RETURN = literal("return")
+WHILE = literal("while")
+NEW = literal("new")
+SUPER = literal("super")
+LEFT_BRACE = literal("{")
+RIGHT_BRACE = literal("}")
+RIGHT_PAREN = literal(")")
+RIGHT_BRACKET = literal("]")
+EQUAL = literal("=")
+SEMICOLON = literal(";")
+COMMA = literal(",")
+
+
+class FastParser(Recognizer):
+    """
+    Hand written recursive descent parser for the CompiScript grammar (CompiScript/compiscript.g4),
+    an alternative to the ANTLR generated compiscriptParser that builds the abstract syntax tree
+    (see SyntaxTree/nodes.py) directly, without a parse tree.
+
+    The statements are picked by their first token (see the statements table) and the
+    expressions are parsed by precedence climbing: instead of descending through the eight
+    rules of the precedence chain (logic_or -> ... -> primary) for every operand, an operand
+    is parsed once and the loop only goes into the levels of the operators that follow it.
+    The chains of a level are built flat, like the ASTBuilder does.
+
+    The nodes get the same positions the ASTBuilder gives them (the first token of the rule),
+    and the syntax errors are reported to the error listeners in the ANTLR form
+    (mismatched input 'x' expecting 'y'), so the ThrowingErrorListener works the same.
+
+    Attr:
+        tokens (list[Token]): The tokens of the input (ending with the EOF token), or a
+            list that lexes them on demand (see Parser/incremental_parser.py).
+        current (int): The index of the current token.
+    """
+
+    def __init__(self, token_stream:CommonTokenStream, tokens=None):
+        super().__init__()
+        self.token_stream = token_stream
+        if tokens is None:
+            # Tokenize the whole input, the parser only needs a list of tokens
+            token_stream.fill()
+            tokens = [token for token in token_stream.tokens if token.channel == Token.DEFAULT_CHANNEL]
+        self.tokens = tokens
+        self.current = 0
+        self.grouped = None     # The last expression parsed between parenthesis
+
+        # Parse function of the statements that start with a keyword
+        self.statements = {
+            FOR: self.forStmt,
+            IF: self.ifStmt,
+            PRINT: self.printStmt,
+            RETURN: self.returnStmt,
+            WHILE: self.whileStmt,
+            LEFT_BRACE: self.block,
+        }
+
+
+    # --------------------------------------------------------------------- #
+    # Tokens
+
+    def peek(self, offset=0):
+        """
+        Returns the token type at the offset from the current token
+        """
+        index = min(self.current + offset, len(self.tokens) - 1)
+        return self.tokens[index].type
+
+
+    def advance(self):
+        """
+        Consumes the current token and returns it
+        """
+        token = self.tokens[self.current]
+        if token.type != Token.EOF:
+            self.current += 1
+        return token
+
+
+    def match(self, token_type):
+        """
+        Consumes the current token if its of the type, otherwise reports a syntax error
+        """
+        if self.tokens[self.current].type != token_type:
+            self.error(self.display_type(token_type))
+        return self.advance()
+
+
+    def display_type(self, token_type):
+        """
+        Returns how ANTLR displays a token type in the expected tokens of a message
+        """
+        if token_type == Token.EOF:
+            return "<EOF>"
+        if token_type in (NUMBER, STRING, IDENTIFIER):
+            return compiscriptParser.symbolicNames[token_type]
+        return compiscriptParser.literalNames[token_type]
+
+
+    def error(self, expected):
+        """
+        Reports a syntax error at the current token to the error listeners
+
+        Args:
+            expected (str): What was expected instead of the current token
+        """
+        token = self.tokens[self.current]
+        # Display the token like ANTLR does (escaped, between quotes)
+        text = "<EOF>" if token.type == Token.EOF else token.text
+        text = text.replace("\n", "\\n").replace("\t", "\\t").replace("\r", "\\r")
+        if expected is None:
+            message = f"no viable alternative at input '{text}'"
+        else:
+            message = f"mismatched input '{text}' expecting {expected}"
+        exception = RecognitionException(message, self, self.token_stream, None)
+        exception.offendingToken = token
+        self.getErrorListenerDispatch().syntaxError(self, token, token.line, token.column, message, exception)
+        # The parser doesn't recover from errors, stop even if the listeners don't raise
+        raise ParseCancellationException(message)
+
+
+    def getInputStream(self):
+        return self.token_stream
+
+
+    def position(self, node:Node, token:Token):
+        # Keep the position of the first token of the rule
+        node.line = token.line
+        node.column = token.column
+        return node
+
+
+    # --------------------------------------------------------------------- #
+    # Declarations
+
+    def program(self):
+        """
+        Parses the whole input and returns the Program node of the syntax tree
+        """
+        start = self.tokens[self.current]
+        declarations = []
+        while self.peek() != Token.EOF:
+            declarations.append(self.declaration())
+        program = self.position(Program(declarations), start)
+        self.number(program)
+        return program
+
+
+    def number(self, program:Program):
+        """
+        Numbers the nodes of the tree (in pre-order) and sets the size of the program
+        """
+        size = 0
+        stack = [program]
+        while stack:
+            node = stack.pop()
+            node.index = size
+            size += 1
+            stack.extend(node.children())
+        program.size = size
+
+
+    def declaration(self):
+        token_type = self.peek()
+        if token_type == CLASS:
+            return self.classDecl()
+        # 'fun' followed by a name is a function, 'fun' followed by '(' an anonymous function
+        if token_type == FUN and self.peek(1) == IDENTIFIER:
+            self.advance()
+            return self.function()
+        if token_type == VAR:
+            return self.varDecl()
+        return self.statement()
+
+
+    def classDecl(self):
+        start = self.match(CLASS)
+        name = self.match(IDENTIFIER).text
+        parent = None
+        if self.peek() == EXTENDS:
+            self.advance()
+            parent = self.match(IDENTIFIER).text
+
+        self.match(LEFT_BRACE)
+        methods = []
+        while self.peek() == IDENTIFIER:
+            methods.append(self.function())
+        self.match(RIGHT_BRACE)
+        return self.position(ClassDecl(name, parent, methods), start)
+
+
+    def function(self):
+        start = self.match(IDENTIFIER)
+        self.match(LEFT_PAREN)
+        parameters = self.parameters() if self.peek() == IDENTIFIER else None
+        self.match(RIGHT_PAREN)
+        body = self.block()
+        return self.position(FunDecl(start.text, parameters, body), start)
+
+
+    def funAnon(self):
+        start = self.match(FUN)
+        self.match(LEFT_PAREN)
+        parameters = self.parameters() if self.peek() == IDENTIFIER else None
+        self.match(RIGHT_PAREN)
+        body = self.block()
+        return self.position(FunAnon(parameters, body), start)
+
+
+    def parameters(self):
+        start = self.tokens[self.current]
+        names = [self.match(IDENTIFIER).text]
+        while self.peek() == COMMA:
+            self.advance()
+            names.append(self.match(IDENTIFIER).text)
+        return self.position(Parameters(names), start)
+
+
+    def varDecl(self):
+        start = self.match(VAR)
+        name = self.match(IDENTIFIER).text
+        value = None
+        if self.peek() == EQUAL:
+            self.advance()
+            value = self.expression()
+        self.match(SEMICOLON)
+        return self.position(VarDecl(name, value), start)
+
+
+    # --------------------------------------------------------------------- #
+    # Statements
+
+    def statement(self):
+        # Statements that start with a keyword, otherwise its an expression statement
+        parse = self.statements.get(self.peek())
+        if parse is not None:
+            return parse()
+        return self.exprStmt()
+
+
+    def exprStmt(self):
+        start = self.tokens[self.current]
+        expression = self.expression()
+        self.match(SEMICOLON)
+        return self.position(ExprStmt(expression), start)
+
+
+    def forStmt(self):
+        start = self.match(FOR)
+        self.match(LEFT_PAREN)
+
+        # The initializer is a variable declaration, an expression statement or empty
+        initializer = None
+        if self.peek() == VAR:
+            initializer = self.varDecl()
+        elif self.peek() == SEMICOLON:
+            self.advance()
+        else:
+            initializer = self.exprStmt()
+
+        condition = None
+        if self.peek() != SEMICOLON:
+            condition = self.expression()
+        self.match(SEMICOLON)
+
+        increment = None
+        if self.peek() != RIGHT_PAREN:
+            increment = self.expression()
+        self.match(RIGHT_PAREN)
+
+        body = self.statement()
+        return self.position(ForStmt(initializer, condition, increment, body), start)
+
+
+    def ifStmt(self):
+        start = self.match(IF)
+        self.match(LEFT_PAREN)
+        condition = self.expression()
+        self.match(RIGHT_PAREN)
+        then_branch = self.statement()
+        # The else belongs to the closest if
+        else_branch = None
+        if self.peek() == ELSE:
+            self.advance()
+            else_branch = self.statement()
+        return self.position(IfStmt(condition, then_branch, else_branch), start)
+
+
+    def printStmt(self):
+        start = self.match(PRINT)
+        expression = self.expression()
+        self.match(SEMICOLON)
+        return self.position(PrintStmt(expression), start)
+
+
+    def returnStmt(self):
+        start = self.match(RETURN)
+        value = None
+        if self.peek() != SEMICOLON:
+            value = self.expression()
+        self.match(SEMICOLON)
+        return self.position(ReturnStmt(value), start)
+
+
+    def whileStmt(self):
+        start = self.match(WHILE)
+        self.match(LEFT_PAREN)
+        condition = self.expression()
+        self.match(RIGHT_PAREN)
+        body = self.statement()
+        return self.position(WhileStmt(condition, body), start)
+
+
+    def block(self):
+        start = self.match(LEFT_BRACE)
+        declarations = []
+        while self.peek() != RIGHT_BRACE and self.peek() != Token.EOF:
+            declarations.append(self.declaration())
+        self.match(RIGHT_BRACE)
+        return self.position(Block(declarations), start)
+
+
+    # --------------------------------------------------------------------- #
+    # Expressions
+
+    def expression(self):
+        """
+        Parses an assignment or any expression of the precedence chain
+        """
+        start = self.tokens[self.current]
+        node = self.binary(1)
+
+        # An anonymous function can't have suffixes, but its attributes can be assigned (call '.' IDENTIFIER '=')
+        if isinstance(node, FunAnon) and self.peek() == DOT and self.peek(1) == IDENTIFIER and self.peek(2) == EQUAL:
+            self.advance()
+            name = self.advance().text
+            self.advance()
+            value = self.expression()
+            return self.position(Assignment(node, name, value), start)
+
+        if self.peek() != EQUAL:
+            return node
+
+        # The assigned expression must be a name, or an attribute of a call chain (call '.' IDENTIFIER)
+        # that is not between parenthesis. Otherwise the '=' is left for the rule that
+        # follows to report (like ANTLR does, "mismatched input '=' expecting ';'")
+        if node is self.grouped:
+            return node
+        if isinstance(node, Identifier):
+            target, name = None, node.name
+        elif isinstance(node, Call) and node.suffixes[-1][0] == DOT:
+            suffixes = node.suffixes[:-1]
+            name = node.suffixes[-1][1]
+            # The target is the call without the attribute (or only its primary)
+            target = self.position(Call(node.callee, suffixes), start) if suffixes else node.callee
+        else:
+            return node
+
+        self.advance()
+        # The assignment is right associative (a = b = c)
+        value = self.expression()
+        return self.position(Assignment(target, name, value), start)
+
+
+    def binary(self, level):
+        """
+        Parses the operations with operators of the level or above (precedence climbing)
+
+        Args:
+            level (int): The lowest precedence level to parse (see LEVELS)
+        """
+        start = self.tokens[self.current]
+        left = self.unary()
+
+        # Build a chain for each operator that follows, while its level is high enough
+        operator_level = LEVELS.get(self.peek(), 0)
+        while operator_level >= level:
+            chain_level = operator_level
+            operands = [left]
+            operators = []
+            # The operands of the chain are the operations of the next level
+            while operator_level == chain_level:
+                operators.append(self.advance().type)
+                operands.append(self.binary(chain_level + 1))
+                operator_level = LEVELS.get(self.peek(), 0)
+
+            chain = CHAINS[chain_level]
+            if chain_level <= 2:
+                left = self.position(chain(operands), start)
+            else:
+                left = self.position(chain(operands, operators), start)
+
+        return left
+
+
+    def unary(self):
+        start = self.tokens[self.current]
+        if start.type == BANG or start.type == MINUS:
+            self.advance()
+            return self.position(Unary(start.type, self.unary()), start)
+        return self.call()
+
+
+    def call(self):
+        start = self.tokens[self.current]
+        # An anonymous function can't have suffixes
+        if start.type == FUN:
+            return self.funAnon()
+
+        primary = self.primary()
+
+        suffixes = []
+        while True:
+            token_type = self.peek()
+            if token_type == LEFT_PAREN:
+                self.advance()
+                arguments = self.arguments() if self.peek() != RIGHT_PAREN else None
+                self.match(RIGHT_PAREN)
+                suffixes.append((LEFT_PAREN, arguments))
+            elif token_type == DOT:
+                self.advance()
+                suffixes.append((DOT, self.match(IDENTIFIER).text))
+            elif token_type == LEFT_BRACKET:
+                self.advance()
+                suffixes.append((LEFT_BRACKET, self.expression()))
+                self.match(RIGHT_BRACKET)
+            else:
+                break
+
+        if not suffixes:
+            return primary
+        return self.position(Call(primary, suffixes), start)
+
+
+    def primary(self):
+        index = self.current
+        token = self.advance()
+        token_type = token.type
+
+        if token_type == IDENTIFIER:
+            return self.position(Identifier(token.text), token)
+        if token_type == NUMBER or token_type == STRING or token_type == TRUE or token_type == FALSE or token_type == NIL:
+            return self.position(Literal(token_type, token.text), token)
+        if token_type == THIS:
+            return self.position(This(), token)
+
+        if token_type == LEFT_PAREN:
+            # The parenthesis are only for grouping, return the expression node
+            # (remember it, a grouped expression can't be assigned)
+            expression = self.expression()
+            self.match(RIGHT_PAREN)
+            self.grouped = expression
+            return expression
+
+        if token_type == SUPER:
+            self.match(DOT)
+            return self.position(Super(self.match(IDENTIFIER).text), token)
+
+        if token_type == NEW:
+            name = self.match(IDENTIFIER).text
+            self.match(LEFT_PAREN)
+            arguments = self.arguments() if self.peek() != RIGHT_PAREN else None
+            self.match(RIGHT_PAREN)
+            return self.position(Instantiation(name, arguments), token)
+
+        # The token can't start an expression
+        self.current = index
+        self.error(None)
+
+
+    def arguments(self):
+        start = self.tokens[self.current]
+        expressions = [self.expression()]
+        while self.peek() == COMMA:
+            self.advance()
+            expressions.append(self.expression())
+        return self.position(Arguments(expressions), start)
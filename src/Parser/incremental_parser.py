@@ -0,0 +1,306 @@
+import sys
+from bisect import bisect_left
+from antlr4 import InputStream, CommonTokenStream
+from antlr4.Token import Token
+from antlr4.error.Errors import ParseCancellationException
+from Lexer.fast_lexer import FastLexer
+from Parser.fast_parser import FastParser
+from SyntaxTree.nodes import Program
+from Utils.custom_exception import ThrowingErrorListener
+
+
+class SourceStream(InputStream):
+    """
+    InputStream that only converts the source to code points if they are read
+    (the FastLexer matches the text itself, so a reparse doesn't pay for the whole file)
+    """
+
+    def _loadString(self):
+        self._index = 0
+        self._size = len(self.strdata)
+
+    @property
+    def data(self):
+        return [ord(c) for c in self.strdata]
+
+
+class LazyTokens(list):
+    """
+    Token list of the FastParser that lexes the tokens as the parser reads them,
+    the parser stops at the first unchanged declaration after the edit
+    """
+
+    def __init__(self, lexer):
+        super().__init__()
+        self.lexer = lexer
+
+    def __getitem__(self, index):
+        while index >= list.__len__(self):
+            if self.lexer.eof is not None:
+                # Every token past the end is the EOF token
+                return self.lexer.eof
+            self.append(self.lexer.nextToken())
+        return list.__getitem__(self, index)
+
+    def __len__(self):
+        # Unknown until the EOF token is lexed (the parser only uses it to stop at the EOF token)
+        return sys.maxsize if self.lexer.eof is None else list.__len__(self)
+
+
+def common_prefix(a, b):
+    """
+    Returns the length of the common prefix of two strings
+    (the slices are compared in halves, each character is compared about once)
+    """
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_suffix(a, b, limit):
+    """
+    Returns the length of the common suffix of two strings (at most limit characters)
+    """
+    low, high = 0, limit
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:len(a) - low] == b[len(b) - middle:len(b) - low]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def nodes(declaration):
+    """
+    Yields the nodes of a declaration (the same traversal FastParser.number uses)
+    """
+    stack = [declaration]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.children())
+
+
+class IncrementalParser():
+    """
+    Parses the successive versions of a source file, reusing the syntax tree of the
+    top level declarations the edits didn't touch.
+
+    The new source is compared with the previous one, the changed text is between the
+    common prefix and the common suffix. Only the declarations around it are lexed and
+    parsed again (with the FastLexer and the FastParser): lexing starts at the first
+    token of the last declaration before the edit (the token that follows a declaration
+    can change how it is parsed, an 'else' after an 'if') and the declarations are
+    parsed until the next token is in the unchanged suffix and starts a declaration of
+    the previous tree. The declarations before and after the edit are spliced into the
+    new tree as they are, the ones after it with their lines and columns moved by the
+    edit, and the nodes are numbered as the FastParser numbers them, so the tree is the
+    same as the one of a full parse.
+
+    The nodes of the reused declarations are shared with the previous tree (their
+    positions and indexes are updated in place). A syntax error leaves the parser at
+    the last version that was parsed.
+
+    Attr:
+        source (str): The source of the last parse.
+        program (Program): The syntax tree of the last parse.
+        starts (list[int]): The offset of the first token of each declaration.
+        ends (list[int]): The offset after the last token of each declaration.
+        lines (list[int]): The line of the first token of each declaration.
+        columns (list[int]): The column of the first token of each declaration.
+        stats (dict): Counters of the parses and the declarations parsed and reused.
+    """
+
+    def __init__(self):
+        self.source = None
+        self.program = None
+        self.starts = []
+        self.ends = []
+        self.lines = []
+        self.columns = []
+        self.stats = {"parses": 0, "full_parses": 0, "parsed": 0, "reused": 0}
+
+
+    def parse(self, source):
+        """
+        Returns the syntax tree of the new version of the source
+
+        Args:
+            source (str): The whole source
+        """
+        if self.program is None:
+            return self.parse_all(source)
+        if source == self.source:
+            self.stats["parses"] += 1
+            self.stats["reused"] += len(self.program.declarations)
+            return self.program
+
+        prefix = common_prefix(self.source, source)
+        suffix = common_suffix(self.source, source, min(len(self.source), len(source)) - prefix)
+        return self.reparse(source, prefix, suffix)
+
+
+    def edit(self, start, end, text):
+        """
+        Replaces the text between two offsets of the last source and returns the new
+        syntax tree (the edit of an editor, the sources are not compared)
+
+        Args:
+            start (int): The offset of the first replaced character
+            end (int): The offset after the last replaced character
+            text (str): The text inserted
+        """
+        source = self.source[:start] + text + self.source[end:]
+        return self.reparse(source, start, len(self.source) - end)
+
+
+    def parse_all(self, source):
+        """
+        Parses the whole source, a declaration at a time to record where each one is
+        """
+        lexer = FastLexer(SourceStream(source))
+        lexer.removeErrorListeners()
+        lexer.addErrorListener(ThrowingErrorListener.INSTANCE)
+        parser = FastParser(CommonTokenStream(lexer))
+        parser.removeErrorListeners()
+        parser.addErrorListener(ThrowingErrorListener.INSTANCE)
+
+        tokens = parser.tokens
+        declarations, starts, ends, lines, columns = [], [], [], [], []
+        while tokens[parser.current].type != Token.EOF:
+            start = tokens[parser.current]
+            declarations.append(parser.declaration())
+            starts.append(start.start)
+            ends.append(tokens[parser.current - 1].stop + 1)
+            lines.append(start.line)
+            columns.append(start.column)
+
+        program = parser.position(Program(declarations), tokens[0])
+        parser.number(program)
+
+        self.source, self.program = source, program
+        self.starts, self.ends, self.lines, self.columns = starts, ends, lines, columns
+        self.stats["parses"] += 1
+        self.stats["full_parses"] += 1
+        self.stats["parsed"] += len(declarations)
+        return program
+
+
+    def reparse(self, source, prefix, suffix):
+        """
+        Parses the declarations of the changed text and splices them between the
+        unchanged ones
+
+        Args:
+            source (str): The new source
+            prefix (int): The length of the text unchanged at the start
+            suffix (int): The length of the text unchanged at the end
+        """
+        old = self.program.declarations
+        delta = len(source) - len(self.source)
+        edit_end = len(source) - suffix     # Where the unchanged suffix starts in the new source
+
+        # The last declaration that ends before the edit is parsed again too
+        first = max(bisect_left(self.ends, prefix) - 1, 0)
+        if first < len(old) and self.starts[first] < prefix:
+            lexer = FastLexer(SourceStream(source), self.starts[first], self.lines[first], self.starts[first] - self.columns[first])
+        else:
+            # The edit is before the first token (or there is no declaration)
+            lexer = FastLexer(SourceStream(source))
+        lexer.removeErrorListeners()
+        lexer.addErrorListener(ThrowingErrorListener.INSTANCE)
+        tokens = LazyTokens(lexer)
+        parser = FastParser(CommonTokenStream(lexer), tokens)
+        parser.removeErrorListeners()
+        parser.addErrorListener(ThrowingErrorListener.INSTANCE)
+
+        # Parse until the next token starts a declaration of the unchanged suffix
+        parsed, starts, ends, lines, columns = [], [], [], [], []
+        resume = len(old)
+        try:
+            while True:
+                start = tokens[parser.current]
+                if start.type == Token.EOF:
+                    break
+                if start.start >= edit_end:
+                    resume = bisect_left(self.starts, start.start - delta)
+                    if resume < len(old) and self.starts[resume] == start.start - delta:
+                        break
+                    resume = len(old)
+                parsed.append(parser.declaration())
+                starts.append(start.start)
+                ends.append(tokens[parser.current - 1].stop + 1)
+                lines.append(start.line)
+                columns.append(start.column)
+        except ParseCancellationException:
+            # The full parse reports the first error of the file (the lexer errors after
+            # the edit come before the syntax errors), that is the error reported
+            return self.parse_all(source)
+
+        declarations = old[:first] + parsed + old[resume:]
+        if not declarations:
+            # Nothing left to splice, the position of the program is the end of the file
+            return self.parse_all(source)
+
+        # The nodes of the suffix keep their indexes (the FastParser numbers the last
+        # declaration first), the parsed declarations are numbered after them
+        if resume == len(old):
+            index = 1
+        elif resume > 0:
+            index = old[resume - 1].index
+        else:
+            index = self.program.size
+        for declaration in reversed(parsed):
+            for node in nodes(declaration):
+                node.index = index
+                index += 1
+
+        # The nodes of the prefix are moved after them
+        size = index
+        if first > 0:
+            shift = index - old[first - 1].index
+            size = self.program.size + shift
+            if shift:
+                for declaration in old[:first]:
+                    for node in nodes(declaration):
+                        node.index += shift
+
+        # The declarations of the suffix are moved by the lines of the edit, and the nodes
+        # on the line where the edit ends by its columns
+        if resume < len(old):
+            line_shift = start.line - self.lines[resume]
+            edited_line = self.lines[resume]
+            column_shift = start.column - self.columns[resume]
+            for k in range(resume, len(old)):
+                if line_shift == 0 and (column_shift == 0 or self.lines[k] != edited_line):
+                    break
+                for node in nodes(old[k]):
+                    if node.line == edited_line:
+                        node.column += column_shift
+                    node.line += line_shift
+
+            starts += [offset + delta for offset in self.starts[resume:]]
+            ends += [offset + delta for offset in self.ends[resume:]]
+            lines += [line + line_shift for line in self.lines[resume:]]
+            columns += [column + column_shift if line == edited_line else column
+                        for line, column in zip(self.lines[resume:], self.columns[resume:])]
+
+        program = Program(declarations, self.lines[0] if first > 0 else lines[0], self.columns[0] if first > 0 else columns[0])
+        program.index = 0
+        program.size = size
+
+        self.source, self.program = source, program
+        self.starts = self.starts[:first] + starts
+        self.ends = self.ends[:first] + ends
+        self.lines = self.lines[:first] + lines
+        self.columns = self.columns[:first] + columns
+        self.stats["parses"] += 1
+        self.stats["parsed"] += len(parsed)
+        self.stats["reused"] += len(declarations) - len(parsed)
+        return program
@@ -0,0 +1,111 @@
+import io
+import sys
+import glob
+import time
+import contextlib
+from antlr4 import FileStream, CommonTokenStream
+from Lexer.fast_lexer import FastLexer
+from Parser.fast_parser import FastParser
+from SemanticAnalyzer.semantic_analyzer import SemanticAnalyzer
+from IntermediateCode.ci_generator import IntermediateCodeGenerator
+from Runtime.program import Program, ExecutionError
+from Runtime.interpreter import TextInterpreter
+from Runtime.threaded_code import ThreadedCode
+from Runtime.values import ScriptError
+from Runtime.tree_interpreter import TreeInterpreter
+
+
+def execute(engine):
+    """
+    Runs a program, returns what it printed, the error that stopped it (None if it
+    ended) and the time it took
+    """
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        engine.run(output)
+        error = None
+    except (ScriptError, ExecutionError) as e:
+        error = e
+    return output.getvalue(), error, time.perf_counter() - start
+
+
+def difference(expected, expected_error, got, error):
+    """
+    Returns how the output of the intermediate code differs from the one of the tree
+    interpreter (None if it prints the same lines and ends, or stops, the same way)
+    """
+    if got == expected and (error is None) == (expected_error is None):
+        return None
+    expected_lines, got_lines = expected.splitlines(), got.splitlines()
+    for number, (expected_line, got_line) in enumerate(zip(expected_lines, got_lines), 1):
+        if expected_line != got_line:
+            return f"prints {got_line!r} instead of {expected_line!r} (line {number} of the output)"
+    if error is not None:
+        return f"stops on {error.message!r} after {len(got_lines)} of {len(expected_lines)} lines"
+    return f"prints {len(got_lines)} of {len(expected_lines)} lines"
+
+
+def main():
+    # Check every source file under the input directory (src/Input by default)
+    directory = sys.argv[1] if len(sys.argv) > 1 else "src/Input"
+    paths = sorted(glob.glob(f"{directory}/**/*.cspt", recursive=True))
+
+    failures = checks = programs = matches = 0
+    for path in paths:
+        try:
+            tree = FastParser(CommonTokenStream(FastLexer(FileStream(path)))).program()
+            with contextlib.redirect_stdout(io.StringIO()):
+                semantic_analyzer = SemanticAnalyzer()
+                semantic_analyzer.visit(tree)
+        except Exception as e:
+            print(f"SKIP {path} -> {e}")
+            continue
+
+        # The console output of the source program is the one of the tree interpreter
+        # (see check_tree_interpreter.py). Most programs don't print it yet: the
+        # intermediate code generator refers to undefined symbols and labels and saves
+        # through registers that don't hold the address of a variable, so both engines
+        # stop on the same line. Those are bugs of the generator, not of the engines,
+        # the count is reported and doesn't fail the check.
+        programs += 1
+        interpreter = TreeInterpreter(semantic_analyzer.symbol_table, semantic_analyzer.annotations)
+        interpreter.visit(tree)
+        reference, reference_error, _ = execute(interpreter)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                ci_generator = IntermediateCodeGenerator(semantic_analyzer.symbol_table, semantic_analyzer.annotations)
+                ci_generator.visit(tree)
+        except Exception as e:
+            print(f"SKIP {path} -> the intermediate code isn't generated ({e})")
+            continue
+
+        # The threaded code prints the same lines (and stops with the same error) as the
+        # interpreter of the text
+        checks += 1
+        program = Program.from_generator(ci_generator.instruction_generator, semantic_analyzer.symbol_table)
+        expected, expected_error, interpreter_time = execute(TextInterpreter(program))
+        start = time.perf_counter()
+        threaded_code = ThreadedCode(program)
+        compile_time = time.perf_counter() - start
+        got, error, threaded_time = execute(threaded_code)
+        if (got, str(error)) != (expected, str(expected_error)):
+            failures += 1
+            print(f"FAIL {path} -> the threaded code runs differently")
+            continue
+        different = difference(reference, reference_error, got, error)
+        matches += different is None
+        result = "runs" if expected_error is None else f"stops at line {expected_error.line}"
+        print(f"DONE {path} ({result}, {expected.count(chr(10))} lines printed, interpreter {interpreter_time * 1000:.2f} ms, "
+              f"threaded code {threaded_time * 1000:.2f} ms + {compile_time * 1000:.2f} ms to compile, "
+              f"against the tree interpreter {different or 'prints the same'})")
+
+    print(f"{checks - failures}/{checks} programs run the same with the threaded code and the interpreter")
+    print(f"{matches}/{programs} programs print the same as with the tree interpreter")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m Runtime.check_runtime [directory]
+    main()
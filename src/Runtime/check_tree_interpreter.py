@@ -0,0 +1,108 @@
+import io
+import sys
+import glob
+import time
+import contextlib
+from antlr4 import FileStream, CommonTokenStream
+from Lexer.fast_lexer import FastLexer
+from Parser.fast_parser import FastParser
+from SemanticAnalyzer.semantic_analyzer import SemanticAnalyzer
+from IntermediateCode.ci_generator import IntermediateCodeGenerator
+from Runtime.program import Program, ExecutionError
+from Runtime.threaded_code import ThreadedCode
+from Runtime.values import ScriptError
+from Runtime.tree_interpreter import TreeInterpreter
+from Bytecode.bytecode_generator import BytecodeGenerator
+from Bytecode.vm import VirtualMachine
+
+
+def execute(engine):
+    """
+    Runs a program, returns what it printed, the error that stopped it (None if it
+    ended) and the time it took
+    """
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        engine.run(output)
+        error = None
+    except (ScriptError, ExecutionError) as e:
+        error = e
+    return output.getvalue(), error, time.perf_counter() - start
+
+
+def intermediate_code(tree, semantic_analyzer, expected):
+    """
+    Runs the intermediate code of the program and returns how its output differs from
+    the expected one
+    """
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            ci_generator = IntermediateCodeGenerator(semantic_analyzer.symbol_table, semantic_analyzer.annotations)
+            ci_generator.visit(tree)
+    except Exception as e:
+        return f"isn't generated ({e})"
+    got, error, _ = execute(ThreadedCode(Program.from_generator(ci_generator.instruction_generator, semantic_analyzer.symbol_table)))
+    if got == expected and error is None:
+        return None
+    expected_lines, got_lines = expected.splitlines(), got.splitlines()
+    for number, (expected_line, got_line) in enumerate(zip(expected_lines, got_lines), 1):
+        if expected_line != got_line:
+            return f"prints {got_line!r} instead of {expected_line!r} (line {number} of the output)"
+    if error is not None:
+        return f"stops at line {error.line} of the intermediate code after {len(got_lines)} of {len(expected_lines)} lines"
+    return f"prints {len(got_lines)} of {len(expected_lines)} lines"
+
+
+def main():
+    # Check every source file under the input directory (src/Input by default)
+    directory = sys.argv[1] if len(sys.argv) > 1 else "src/Input"
+    paths = sorted(glob.glob(f"{directory}/**/*.cspt", recursive=True))
+
+    failures = checks = matches = 0
+    for path in paths:
+        try:
+            tree = FastParser(CommonTokenStream(FastLexer(FileStream(path)))).program()
+            with contextlib.redirect_stdout(io.StringIO()):
+                semantic_analyzer = SemanticAnalyzer()
+                semantic_analyzer.visit(tree)
+        except Exception as e:
+            print(f"SKIP {path} -> {e}")
+            continue
+
+        # The tree interpreter is the reference, the bytecode prints the same lines
+        # (and stops with the same error)
+        checks += 1
+        start = time.perf_counter()
+        interpreter = TreeInterpreter(semantic_analyzer.symbol_table, semantic_analyzer.annotations)
+        interpreter.visit(tree)
+        compile_time = time.perf_counter() - start
+        expected, expected_error, tree_time = execute(interpreter)
+
+        start = time.perf_counter()
+        generator = BytecodeGenerator(semantic_analyzer.symbol_table, semantic_analyzer.annotations)
+        generator.visit(tree)
+        generate_time = time.perf_counter() - start
+        got, error, bytecode_time = execute(VirtualMachine(generator.program))
+        if (got, str(error)) != (expected, str(expected_error)):
+            failures += 1
+            print(f"FAIL {path} -> the bytecode runs differently")
+            continue
+
+        # The output of the intermediate code against the reference
+        difference = intermediate_code(tree, semantic_analyzer, expected)
+        matches += difference is None
+        # Both times count the compile of the syntax tree
+        result = "runs" if expected_error is None else f"stops at line {expected_error.line}"
+        print(f"DONE {path} ({result}, {expected.count(chr(10))} lines printed, tree {(compile_time + tree_time) * 1000:.2f} ms, "
+              f"bytecode {(generate_time + bytecode_time) * 1000:.2f} ms, intermediate code {difference or 'prints the same'})")
+
+    print(f"{checks - failures}/{checks} programs run the same with the tree interpreter and the bytecode")
+    print(f"{matches}/{checks} programs print the same with the intermediate code")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m Runtime.check_tree_interpreter [directory]
+    main()
@@ -0,0 +1,166 @@
+import sys
+from Runtime.program import (
+    Program, ExecutionError, Fault, fault, parse_line, divide, system_call,
+    ZERO, REGISTER_OPERAND, IMMEDIATE, PARAMETER, ATTRIBUTE,
+    REGISTER_FP, REGISTER_LO, REGISTER_HI, REGISTER_V0, REGISTER_A0, BUFFER, MAX_CALL_DEPTH, EXIT,
+    OPERATIONS, FUNCTIONS, BRANCHES, ZERO_BRANCHES,
+)
+
+
+# Comparisons of the branches
+COMPARISONS = {
+    "==": lambda a, b: a == b, "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b, "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b, ">=": lambda a, b: a >= b,
+}
+
+
+class TextInterpreter():
+    """
+    Runs a program line by line over its text: every time a line runs it is parsed
+    again and its operands are looked up by their name.
+
+    It is the reference of the semantics of the code (see Program) and the baseline of
+    the backends that compile the program first (see threaded_code.py).
+
+    Attr:
+        program (Program): The program to run
+    """
+
+    def __init__(self, program:Program):
+        self.program = program
+
+
+    def run(self, output=None):
+        """
+        Runs the program, the lines it prints are written to output (stdout by default)
+        """
+        program = self.program
+        write = (output or sys.stdout).write
+        registers = [0] * len(program.registers)
+        addresses = [None] * len(program.registers)
+        memory = list(program.memory)
+        calls = []
+        self_register = program.registers["SELF"]
+
+        def value(operand):
+            kind, value = operand
+            if kind == ZERO:
+                return 0
+            if kind == REGISTER_OPERAND:
+                return registers[value]
+            if kind == IMMEDIATE:
+                return value
+            return memory[address(operand)]
+
+        def address(operand):
+            kind, value = operand
+            if kind == REGISTER_OPERAND:
+                return addresses[value]
+            if kind == PARAMETER:
+                return registers[REGISTER_FP] + value
+            if kind == ATTRIBUTE:
+                return registers[self_register] + value
+            if kind == ZERO or kind == IMMEDIATE:
+                return None
+            return value
+
+        def target(label):
+            if label not in program.labels:
+                fault(f"Undefined label {label}")
+            return program.labels[label]
+
+        index = program.start
+        while index < len(program.lines):
+            instruction = parse_line(program.lines[index])
+            if instruction is None or instruction[0] == "label":
+                index += 1
+                continue
+            try:
+                opcode, operands = program.instruction(index)
+                following = index + 1
+
+                if opcode in ("load", "li", "move"):
+                    (kind, destination), source = operands
+                    if kind != ZERO:
+                        if source[0] in (ZERO, IMMEDIATE):
+                            registers[destination] = value(source)
+                            addresses[destination] = None
+                        elif source[0] == REGISTER_OPERAND:
+                            addresses[destination] = addresses[source[1]]
+                            registers[destination] = registers[source[1]]
+                        else:
+                            cell = address(source)
+                            registers[destination] = memory[cell]
+                            addresses[destination] = cell
+
+                elif opcode == "save":
+                    (_, destination), source = operands
+                    cell = addresses[destination]
+                    if cell is None:
+                        fault(f"{parse_line(program.lines[index])[1][0]} doesn't hold the address of a variable")
+                    memory[cell] = value(source)
+
+                elif opcode in OPERATIONS:
+                    (kind, destination), left, right = operands
+                    result = FUNCTIONS[opcode](value(left), value(right))
+                    if kind != ZERO:
+                        registers[destination] = result
+                        addresses[destination] = None
+
+                elif opcode == "div":
+                    registers[REGISTER_LO], registers[REGISTER_HI] = divide(value(operands[0]), value(operands[1]))
+
+                elif opcode in ("mflo", "mfhi"):
+                    kind, destination = operands[0]
+                    if kind != ZERO:
+                        registers[destination] = registers[REGISTER_LO if opcode == "mflo" else REGISTER_HI]
+                        addresses[destination] = None
+
+                elif opcode == "concat":
+                    (kind, destination), left, right = operands
+                    result = str(value(left)) + str(value(right))
+                    buffer = program.symbols.get(BUFFER)
+                    if buffer is not None:
+                        memory[buffer] = result
+                    if kind != ZERO:
+                        registers[destination] = result
+                        addresses[destination] = buffer
+
+                elif opcode in BRANCHES:
+                    if COMPARISONS[BRANCHES[opcode]](value(operands[0]), value(operands[1])):
+                        following = target(operands[2])
+
+                elif opcode in ZERO_BRANCHES:
+                    if COMPARISONS[ZERO_BRANCHES[opcode]](value(operands[0]), 0):
+                        following = target(operands[1])
+
+                elif opcode == "j":
+                    following = target(operands[0])
+
+                elif opcode == "jal":
+                    following = target(operands[0])
+                    if len(calls) >= MAX_CALL_DEPTH:
+                        fault("Call stack overflow")
+                    calls.append((index + 1, registers[REGISTER_FP]))
+                    registers[REGISTER_FP] = len(memory)
+                    memory += [registers[program.registers["PARAM::" + name]] for name in program.functions[operands[0]]]
+
+                elif opcode == "jr":
+                    if not calls:
+                        fault("jr outside of a function")
+                    following, frame = calls.pop()
+                    del memory[registers[REGISTER_FP]:]
+                    registers[REGISTER_FP] = frame
+
+                elif opcode == "syscall":
+                    mode = registers[program.registers[REGISTER_V0]]
+                    if mode == EXIT:
+                        return
+                    system_call(mode, registers[program.registers[REGISTER_A0]], write)
+
+            except Fault as e:
+                raise ExecutionError(index + 1, program.lines[index], str(e)) from None
+            except (ArithmeticError, LookupError, TypeError, ValueError) as e:
+                raise ExecutionError(index + 1, program.lines[index], str(e)) from None
+            index = following
@@ -0,0 +1,388 @@
+import re
+from SemanticAnalyzer.symbols import Class
+from SemanticAnalyzer.types import NumberType, StringType, BooleanType
+
+
+# Registers of the machine that the code doesn't name (the frame pointer of the
+# parameters and the LO and HI registers of div), they take the first indexes
+REGISTER_FP, REGISTER_LO, REGISTER_HI = 0, 1, 2
+RESERVED_REGISTERS = ("$fp", "$lo", "$hi")
+
+# Registers read by syscall
+REGISTER_V0, REGISTER_A0 = "$v0", "$a0"
+
+# Name of the string buffer written by concat (see InstructionGenerator.concatenate)
+BUFFER = "BUFFER"
+
+# Maximum number of nested calls (jal without its jr $ra)
+MAX_CALL_DEPTH = 10000
+
+# Syscall modes (see InstructionGenerator.print_directive)
+PRINT_INTEGER, PRINT_STRING, EXIT = 1, 4, 10
+
+# Operands: registers ($t0, $a0, PARAM::<name>, SELF, <offset>($sp), ...), numbers
+# and string constants
+REGISTER = re.compile(r"\$\w+|PARAM::\w+|SELF|-?\d+\(\$sp\)")
+NUMBER = re.compile(r"-?\d+(\.\d+)?")
+STRING = re.compile(r'"[^"]*"')
+OPERANDS = re.compile(r'(?:"[^"]*"|[^,"])+')
+
+# Data lines: label, directive and value (the label alone for the class instances)
+DATA = re.compile(r"\s*(?:([\w.]+):)?\s*(\.\w+)?\s*(\"[^\"]*\"|[^#]*?)\s*(#.*)?")
+
+# Kinds of the resolved operands (see Program.resolve)
+ZERO, REGISTER_OPERAND, IMMEDIATE, MEMORY, PARAMETER, ATTRIBUTE, UNDEFINED = range(7)
+
+# Control transfers (a basic block ends after them)
+BRANCHES = {
+    "beq": "==", "bne": "!=", "blt": "<", "ble": "<=", "bgt": ">", "bge": ">=",
+}
+ZERO_BRANCHES = {
+    "beqz": "==", "bnez": "!=", "bltz": "<", "blez": "<=", "bgtz": ">", "bgez": ">=",
+}
+JUMPS = {"j", "jal", "jr"}
+
+# Integers are signed 32 bit words, as in MIPS: add, addi, sub and subi raise a fault
+# on overflow, the other operations wrap their result to a word (mult keeps the lower
+# word of the product, mulh the upper one). Floats are left as they are.
+WORD_MIN, WORD_MAX = -(1 << 31), (1 << 31) - 1
+
+# Operations with a destination register and two operands (registers or immediates),
+# as Python expressions of the operands {0} and {1} (see checked and wrapped)
+OPERATIONS = {
+    "add": "checked({0} + {1})",
+    "addi": "checked({0} + {1})",
+    "addu": "wrapped({0} + {1})",
+    "sub": "checked({0} - {1})",
+    "subu": "wrapped({0} - {1})",
+    "subi": "checked({0} - {1})",
+    "mult": "wrapped({0} * {1})",
+    "mulh": "({0} * {1}) >> 32",
+    "andi": "{0} & {1}",
+    "xor": "{0} ^ {1}",
+    "xori": "{0} ^ {1}",
+    "sll": "wrapped({0} << {1})",
+    "sra": "{0} >> {1}",
+    "srl": "wrapped(({0} & 0xFFFFFFFF) >> {1})",
+    "slt": "int({0} < {1})",
+    "slti": "int({0} < {1})",
+    "sltu": "int(({0} & 0xFFFFFFFF) < ({1} & 0xFFFFFFFF))",
+    "sltiu": "int(({0} & 0xFFFFFFFF) < ({1} & 0xFFFFFFFF))",
+}
+
+# The operations as functions (for the interpreters that don't generate code)
+FUNCTIONS = {name: eval(f"lambda a, b: {expression.format('a', 'b')}") for name, expression in OPERATIONS.items()}
+
+# Operands of each instruction: d destination register, r register, v value and l label
+SIGNATURES = {
+    "load": "dv", "li": "dv", "move": "dv", "save": "rv",
+    "div": "vv", "mflo": "d", "mfhi": "d", "concat": "dvv",
+    "j": "l", "jal": "l", "jr": "v", "syscall": "",
+    **{name: "dvv" for name in OPERATIONS},
+    **{name: "vvl" for name in BRANCHES},
+    **{name: "vl" for name in ZERO_BRANCHES},
+}
+
+
+class ExecutionError(Exception):
+    """
+    Error raised while a program runs, with the line of the code that raised it
+
+    Attr:
+        line (int): The number of the line in the intermediate code (from 1)
+        text (str): The line
+        message (str): What went wrong
+    """
+
+    def __init__(self, line, text, message):
+        super().__init__(f"RUNTIME ERROR -> Line {line} ({text.strip()}): {message}")
+        self.line = line
+        self.text = text
+        self.message = message
+
+
+class Fault(Exception):
+    """
+    Error of an instruction (the interpreters add the line to it, see ExecutionError)
+    """
+
+
+def fault(message):
+    raise Fault(message)
+
+
+def parse_line(text):
+    """
+    Returns the opcode and the operands of a line of code, ("label", [name]) for the
+    labels and None for the lines that don't run (blank lines, comments and directives)
+    """
+    if '"' in text:
+        text = re.sub(r'("[^"]*")|#.*', lambda match: match.group(1) or "", text)
+    else:
+        text = text.split("#", 1)[0]
+    text = text.strip()
+    if not text or text.startswith("."):
+        return None
+    if text.endswith(":"):
+        return "label", [text[:-1]]
+    parts = text.split(None, 1)
+    operands = [operand.strip() for operand in OPERANDS.findall(parts[1])] if len(parts) > 1 else []
+    return parts[0], [operand for operand in operands if operand]
+
+
+def checked(value):
+    """
+    Returns the result of a signed operation, raises a Fault if it doesn't fit in a word
+    """
+    if type(value) is int and not WORD_MIN <= value <= WORD_MAX:
+        fault("Arithmetic overflow")
+    return value
+
+
+def wrapped(value):
+    """
+    Returns the result of an operation that wraps, reduced to a word
+    """
+    if type(value) is int:
+        return ((value - WORD_MIN) & 0xFFFFFFFF) + WORD_MIN
+    return value
+
+
+def number(text):
+    """
+    Returns the value of a number of the code (int or float)
+    """
+    return float(text) if "." in text else int(text)
+
+
+def divide(left, right):
+    """
+    Returns the quotient and the remainder of a division as div does (the quotient
+    is truncated towards zero, the remainder has the sign of the dividend)
+    """
+    if right == 0:
+        fault("Division by zero")
+    quotient = abs(left) // abs(right)
+    if (left < 0) != (right < 0):
+        quotient = -quotient
+    # The smallest word divided by -1 wraps to itself (the remainder is 0)
+    return wrapped(quotient), left - quotient * right
+
+
+def system_call(mode, argument, write):
+    """
+    Runs a syscall other than exit: prints the integer or the string of $a0 on a line
+    """
+    if mode == PRINT_INTEGER or mode == PRINT_STRING:
+        write(f"{argument}\n")
+    else:
+        fault(f"Unsupported syscall mode {mode}")
+
+
+class Program():
+    """
+    The intermediate code of a program, ready to run: the initial memory (a cell for each
+    word, string or attribute of the data section), the labels of the code, the functions
+    with their parameters and the registers, each one with an index.
+
+    The semantics of the 'semi' MIPS instructions (see InstructionGenerator):
+        - load copies into a register the value of a register, an immediate or a variable
+          (the register keeps the address of the variable, save writes into it)
+        - a variable of a class instance holds its address, the attributes of SELF::<name>
+          are the cells after it (in the order of the attributes of the class of the method)
+        - jal copies the PARAM::<name> registers of the parameters of the function into a
+          new frame, the name of a parameter reads its frame while the function runs
+          (jr $ra drops it)
+        - concat writes the concatenation of the values into BUFFER and the register
+        - syscall prints the value of $a0 on a line (1 integer, 4 string) or exits (10)
+    The symbols the code refers to that are none of these fail when they are read.
+
+    Attr:
+        lines (list[str]): The lines of the code
+        memory (list): The initial values of the data cells
+        symbols (dict): The address of each variable of the data section
+        instances (set): The variables that are class instances
+        start (int): The index of the first line of the text section
+        labels (dict): The index of the line of each label of the code
+        functions (dict): The names of the parameters of each function (by its label)
+        function_of (list): The function each line belongs to (None for the main code)
+        registers (dict): The index of each register
+        attributes (dict): The cell of each attribute of SELF, by the method label
+    """
+
+    def __init__(self, lines, symbol_table=None):
+        self.lines = lines
+        self.memory = []
+        self.symbols = {}
+        self.instances = set()
+        self.start = len(lines)
+        self.labels = {}
+        self.functions = {}
+        self.function_of = [None] * len(lines)
+        self.registers = {name: index for index, name in enumerate(RESERVED_REGISTERS)}
+        self.attributes = {}
+        self.load_data()
+        self.load_code()
+        if symbol_table is not None:
+            self.load_classes(symbol_table)
+
+
+    @classmethod
+    def from_generator(cls, instruction_generator, symbol_table=None):
+        """
+        Returns the program of an InstructionGenerator (its lines as the ones of the
+        intermediate code file, so the line numbers of the errors are the same)
+        """
+        return cls("\n".join(instruction_generator.iter_instruction_set()).split("\n"), symbol_table)
+
+
+    def load_data(self):
+        """
+        Adds a cell for each value of the data section (up to .text)
+        """
+        for index, text in enumerate(self.lines):
+            stripped = text.strip()
+            if stripped == ".text":
+                self.start = index + 1
+                return
+            if not stripped or stripped == ".data" or stripped.startswith("#"):
+                continue
+            label, directive, value, comment = DATA.fullmatch(text).groups()
+            if label is not None:
+                self.symbols[label] = len(self.memory)
+                if directive is None and comment and "Class Instance" in comment:
+                    self.instances.add(label)
+            if directive == ".word":
+                self.memory.append(number(value) if NUMBER.fullmatch(value) else 0)
+            elif directive == ".asciiz":
+                self.memory.append(value[1:-1] if STRING.fullmatch(value) else value)
+            elif directive == ".space":
+                self.memory.append("")
+
+
+    def load_code(self):
+        """
+        Finds the labels, the functions (the labels called with jal) with their parameters
+        (the PARAM::<name> registers loaded before the calls) and the registers
+        """
+        register = lambda name: self.registers.setdefault(name, len(self.registers))
+        register(REGISTER_V0)
+        register(REGISTER_A0)
+        register("SELF")
+
+        calls = []
+        for index in range(self.start, len(self.lines)):
+            instruction = parse_line(self.lines[index])
+            if instruction is None:
+                continue
+            opcode, operands = instruction
+            if opcode == "label":
+                self.labels.setdefault(operands[0], index)
+                continue
+            for operand in operands:
+                if REGISTER.fullmatch(operand) and operand != "$zero":
+                    register(operand)
+            if opcode == "jal" and operands:
+                calls.append((index, operands[0]))
+
+        for index, function in calls:
+            parameters = self.functions.setdefault(function, [])
+            line = index - 1
+            while line >= self.start:
+                instruction = parse_line(self.lines[line])
+                if instruction is not None:
+                    opcode, operands = instruction
+                    if opcode != "load" or not operands or not operands[0].startswith("PARAM::"):
+                        break
+                    name = operands[0][len("PARAM::"):]
+                    if name not in parameters:
+                        parameters.insert(0, name)
+                line -= 1
+
+        # The lines of each function go from its label to the label of the next one
+        function = None
+        for index in range(self.start, len(self.lines)):
+            instruction = parse_line(self.lines[index])
+            if instruction is not None and instruction[0] == "label" and instruction[1][0] in self.functions:
+                function = instruction[1][0]
+            self.function_of[index] = function
+
+
+    def load_classes(self, symbol_table):
+        """
+        Finds the cells of the attributes of the classes for the methods (only the numbers,
+        strings and booleans have a cell, see InstructionGenerator.add_to_data)
+        """
+        for symbol in symbol_table:
+            if not isinstance(symbol, Class):
+                continue
+            cells = {}
+            for attribute in symbol.attributes:
+                if isinstance(attribute.data_type, (NumberType, StringType, BooleanType)):
+                    cells.setdefault(attribute.id, len(cells))
+            for method in symbol.methods:
+                self.attributes.setdefault(f"{method.id.lower()}_{symbol.id.lower()}", cells)
+
+
+    def resolve(self, operand, index):
+        """
+        Returns the kind of an operand of a line and its value: the index of a register,
+        an immediate value, the address of a variable, the slot of a parameter in the frame,
+        the cell of an attribute of SELF or the name of an undefined symbol
+
+        Args:
+            operand (str): The operand
+            index (int): The index of the line
+        """
+        if operand == "$zero":
+            return ZERO, 0
+        if REGISTER.fullmatch(operand):
+            return REGISTER_OPERAND, self.registers[operand]
+        if NUMBER.fullmatch(operand):
+            return IMMEDIATE, number(operand)
+        if STRING.fullmatch(operand):
+            return IMMEDIATE, operand[1:-1]
+
+        function = self.function_of[index]
+        if function is not None and operand in self.functions[function]:
+            return PARAMETER, self.functions[function].index(operand)
+        if operand.startswith("SELF::"):
+            cells = self.attributes.get(function, {})
+            if operand[len("SELF::"):] in cells:
+                return ATTRIBUTE, cells[operand[len("SELF::"):]]
+            return UNDEFINED, operand
+        if operand in self.instances:
+            # The value of an instance is its address
+            return IMMEDIATE, self.symbols[operand]
+        if operand in self.symbols:
+            return MEMORY, self.symbols[operand]
+        return UNDEFINED, operand
+
+
+    def instruction(self, index):
+        """
+        Returns the opcode of a line and its operands (resolved, the labels by their name),
+        raises a Fault if the instruction can't run
+
+        Args:
+            index (int): The index of the line (an instruction, not a label)
+        """
+        opcode, operands = parse_line(self.lines[index])
+        signature = SIGNATURES.get(opcode)
+        if signature is None:
+            fault(f"Unknown instruction {opcode}")
+        if len(operands) != len(signature):
+            fault(f"{opcode} takes {len(signature)} operands, not {len(operands)}")
+
+        resolved = []
+        for kind, operand in zip(signature, operands):
+            if kind == "l":
+                resolved.append(operand)
+                continue
+            operand_kind, value = self.resolve(operand, index)
+            if operand_kind == UNDEFINED:
+                fault(f"Undefined symbol {value}")
+            if (kind == "d" and operand_kind not in (REGISTER_OPERAND, ZERO)) or (kind == "r" and operand_kind != REGISTER_OPERAND):
+                fault(f"{operand} is not a register")
+            resolved.append((operand_kind, value))
+        return opcode, resolved
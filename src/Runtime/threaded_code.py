@@ -0,0 +1,280 @@
+import sys
+from Runtime.program import (
+    Program, ExecutionError, Fault, fault, parse_line, divide, system_call, checked, wrapped,
+    ZERO, REGISTER_OPERAND, IMMEDIATE, MEMORY, PARAMETER,
+    REGISTER_FP, REGISTER_LO, REGISTER_HI, REGISTER_V0, REGISTER_A0, BUFFER, MAX_CALL_DEPTH, EXIT,
+    OPERATIONS, BRANCHES, ZERO_BRANCHES, JUMPS,
+)
+
+
+# File name of the generated code (the errors are found by the lines of its frames)
+FILENAME = "<threaded code>"
+
+# Names the blocks use, bound as default arguments (local variables are the fastest)
+BLOCK_ARGUMENTS = "R=R, M=M, A=A, C=C, divide=divide, system_call=system_call, write=write, fault=fault, checked=checked, wrapped=wrapped"
+
+
+class ThreadedCode():
+    """
+    Compiles a program into a Python function for each basic block, the functions
+    return the block that runs next (threaded code):
+
+        block = entry
+        while block is not None:
+            block = block()
+
+    The registers, their addresses (see Program) and the memory are flat lists, every
+    operand is resolved when the program is compiled (a register or a cell of the
+    memory is an index, the parameters and attributes an offset from $fp and SELF).
+    The blocks are generated as Python source and compiled once with compile(), each
+    run only binds them to a new machine state.
+
+    The output and the errors are the same as the ones of the TextInterpreter.
+
+    Attr:
+        program (Program): The program
+        source (list[str]): The lines of the generated Python source
+        lines (list[int]): The line of the program of each line of the source
+        entry (str): The name of the first block (None if there is no code)
+        code: The compiled source
+    """
+
+    def __init__(self, program:Program):
+        self.program = program
+        self.source = []
+        self.lines = []
+        self.entry = None
+        self.generate()
+        self.code = compile("\n".join(self.source), FILENAME, "exec")
+
+
+    def emit(self, text, index):
+        """
+        Adds a line to the source for the line of the program with that index
+        """
+        self.source.append(text)
+        self.lines.append(index)
+
+
+    def leaders(self):
+        """
+        Returns the indexes of the lines that start a basic block: the first line of the
+        text section, the labels and the lines after the branches and jumps
+        """
+        program = self.program
+        leaders = {program.start}
+        for index in range(program.start, len(program.lines)):
+            instruction = parse_line(program.lines[index])
+            if instruction is None:
+                continue
+            opcode = instruction[0]
+            if opcode == "label":
+                leaders.add(index)
+            elif opcode in BRANCHES or opcode in ZERO_BRANCHES or opcode in JUMPS:
+                leaders.add(index + 1)
+        return sorted(leader for leader in leaders if leader < len(program.lines))
+
+
+    def generate(self):
+        """
+        Generates the source of the blocks
+        """
+        program = self.program
+        leaders = self.leaders()
+        self.blocks = {leader: f"block_{leader}" for leader in leaders}
+        if leaders:
+            self.entry = self.blocks[leaders[0]]
+
+        for position, leader in enumerate(leaders):
+            end = leaders[position + 1] if position + 1 < len(leaders) else len(program.lines)
+            following = self.blocks[end] if end in self.blocks else "None"
+            self.emit(f"def {self.blocks[leader]}({BLOCK_ARGUMENTS}):", leader)
+            transfers = False
+            for index in range(leader, end):
+                instruction = parse_line(program.lines[index])
+                if instruction is None or instruction[0] == "label":
+                    continue
+                try:
+                    opcode, operands = program.instruction(index)
+                except Fault as e:
+                    self.emit(f"    fault({str(e)!r})", index)
+                    continue
+                transfers = self.generate_instruction(opcode, operands, index, following) or transfers
+            if not transfers:
+                self.emit(f"    return {following}", end - 1)
+
+
+    def value(self, operand):
+        """
+        Returns the Python expression of the value of an operand
+        """
+        kind, value = operand
+        if kind == ZERO:
+            return "0"
+        if kind == REGISTER_OPERAND:
+            return f"R[{value}]"
+        if kind == IMMEDIATE:
+            return repr(value)
+        return f"M[{self.address(operand)}]"
+
+
+    def address(self, operand):
+        """
+        Returns the Python expression of the address of a variable, a parameter or an attribute
+        """
+        kind, value = operand
+        if kind == MEMORY:
+            return str(value)
+        if kind == PARAMETER:
+            return f"R[{REGISTER_FP}] + {value}"
+        return f"R[{self.program.registers['SELF']}] + {value}"
+
+
+    def target(self, label):
+        """
+        Returns the name of the block of a label (None if it is undefined)
+        """
+        if label not in self.program.labels:
+            return None
+        return self.blocks[self.program.labels[label]]
+
+
+    def generate_instruction(self, opcode, operands, index, following):
+        """
+        Generates the statements of an instruction, returns True if it ends the block
+
+        Args:
+            opcode (str): The opcode of the instruction
+            operands (list): Its resolved operands (see Program.instruction)
+            index (int): The index of its line
+            following (str): The name of the block after the one of the instruction
+        """
+        emit = lambda text: self.emit("    " + text, index)
+        program = self.program
+
+        if opcode in ("load", "li", "move"):
+            (kind, destination), source = operands
+            if kind == ZERO:
+                return False
+            if source[0] in (ZERO, IMMEDIATE):
+                emit(f"R[{destination}] = {self.value(source)}; A[{destination}] = None")
+            elif source[0] == REGISTER_OPERAND:
+                emit(f"A[{destination}] = A[{source[1]}]; R[{destination}] = R[{source[1]}]")
+            else:
+                emit(f"a = {self.address(source)}; R[{destination}] = M[a]; A[{destination}] = a")
+
+        elif opcode == "save":
+            (_, destination), source = operands
+            message = f"{parse_line(program.lines[index])[1][0]} doesn't hold the address of a variable"
+            emit(f"a = A[{destination}]")
+            emit(f"if a is None: fault({message!r})")
+            emit(f"M[a] = {self.value(source)}")
+
+        elif opcode in OPERATIONS:
+            (kind, destination), left, right = operands
+            expression = OPERATIONS[opcode].format(self.value(left), self.value(right))
+            emit(f"R[{destination}] = {expression}; A[{destination}] = None" if kind != ZERO else expression)
+
+        elif opcode == "div":
+            emit(f"R[{REGISTER_LO}], R[{REGISTER_HI}] = divide({self.value(operands[0])}, {self.value(operands[1])})")
+
+        elif opcode in ("mflo", "mfhi"):
+            kind, destination = operands[0]
+            if kind != ZERO:
+                emit(f"R[{destination}] = R[{REGISTER_LO if opcode == 'mflo' else REGISTER_HI}]; A[{destination}] = None")
+
+        elif opcode == "concat":
+            (kind, destination), left, right = operands
+            buffer = program.symbols.get(BUFFER)
+            targets = ([f"M[{buffer}]"] if buffer is not None else []) + ([f"R[{destination}]"] if kind != ZERO else [])
+            emit(f"{' = '.join(targets + [''])}str({self.value(left)}) + str({self.value(right)})")
+            if kind != ZERO:
+                emit(f"A[{destination}] = {buffer}")
+
+        elif opcode in BRANCHES or opcode in ZERO_BRANCHES:
+            if opcode in BRANCHES:
+                condition = f"{self.value(operands[0])} {BRANCHES[opcode]} {self.value(operands[1])}"
+            else:
+                condition = f"{self.value(operands[0])} {ZERO_BRANCHES[opcode]} 0"
+            block = self.target(operands[-1])
+            emit(f"if {condition}: return {block}" if block else f"if {condition}: fault({'Undefined label ' + operands[-1]!r})")
+            emit(f"return {following}")
+            return True
+
+        elif opcode == "j":
+            block = self.target(operands[0])
+            emit(f"return {block}" if block else f"fault({'Undefined label ' + operands[0]!r})")
+            return True
+
+        elif opcode == "jal":
+            block = self.target(operands[0])
+            if block is None:
+                emit(f"fault({'Undefined label ' + operands[0]!r})")
+                return True
+            parameters = ", ".join(f"R[{program.registers['PARAM::' + name]}]" for name in program.functions[operands[0]])
+            emit(f"if len(C) >= {MAX_CALL_DEPTH}: fault('Call stack overflow')")
+            emit(f"C.append(({following}, R[{REGISTER_FP}]))")
+            emit(f"R[{REGISTER_FP}] = len(M)")
+            if parameters:
+                emit(f"M += ({parameters},)")
+            emit(f"return {block}")
+            return True
+
+        elif opcode == "jr":
+            emit("if not C: fault('jr outside of a function')")
+            emit(f"following, frame = C.pop(); del M[R[{REGISTER_FP}]:]; R[{REGISTER_FP}] = frame")
+            emit("return following")
+            return True
+
+        elif opcode == "syscall":
+            mode = f"R[{program.registers[REGISTER_V0]}]"
+            emit(f"if {mode} == {EXIT}: return None")
+            emit(f"system_call({mode}, R[{program.registers[REGISTER_A0]}], write)")
+        return False
+
+
+    def run(self, output=None):
+        """
+        Runs the program, the lines it prints are written to output (stdout by default)
+        """
+        program = self.program
+        namespace = {
+            "R": [0] * len(program.registers),
+            "A": [None] * len(program.registers),
+            "M": list(program.memory),
+            "C": [],
+            "divide": divide,
+            "system_call": system_call,
+            "write": (output or sys.stdout).write,
+            "fault": fault,
+            "checked": checked,
+            "wrapped": wrapped,
+        }
+        exec(self.code, namespace)
+        block = namespace[self.entry] if self.entry else None
+        try:
+            while block is not None:
+                block = block()
+        except (Fault, ArithmeticError, LookupError, TypeError, ValueError) as e:
+            # The line of the program is the one of the innermost frame of the blocks
+            line = None
+            traceback = e.__traceback__
+            while traceback is not None:
+                if traceback.tb_frame.f_code.co_filename == FILENAME:
+                    line = self.lines[traceback.tb_lineno - 1]
+                traceback = traceback.tb_next
+            if line is None:
+                raise
+            raise ExecutionError(line + 1, program.lines[line], str(e)) from None
+
+
+def run_program(instruction_generator, symbol_table=None, output=None):
+    """
+    Compiles the code of an InstructionGenerator and runs it (see ThreadedCode)
+
+    Args:
+        instruction_generator (InstructionGenerator): The code of the program
+        symbol_table (list): The symbols of the semantic analyzer (the layout of the classes)
+        output: The sink of the lines the program prints (stdout by default)
+    """
+    ThreadedCode(Program.from_generator(instruction_generator, symbol_table)).run(output)
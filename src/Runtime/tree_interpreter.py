@@ -0,0 +1,700 @@
+import sys
+import operator
+from SyntaxTree.visitor import ASTVisitor
+from SyntaxTree.nodes import *
+from SyntaxTree import tokens
+from SyntaxTree.tokens import NUMBER, LEFT_PAREN, DOT, LEFT_BRACKET, BANG
+from Runtime.values import (
+    ScriptError, Function, BoundMethod, RuntimeClass, Instance, MAX_CALL_DEPTH,
+    literal, display, truthy, add, subtract, multiply, divide, modulo, negate, equal, compare,
+    index, get_attribute, set_attribute, find_method, check_arity,
+)
+
+
+# Python frames of a call of the program, the recursion limit is raised to fit
+# MAX_CALL_DEPTH calls while the program runs
+FRAMES_PER_CALL = 8
+
+# The value semantics of each binary operator and its Python operator for two integers
+# (None if the integers go through the semantics too)
+OPERATIONS = {
+    tokens.PLUS: (add, operator.add),
+    tokens.MINUS: (subtract, operator.sub),
+    tokens.STAR: (multiply, operator.mul),
+    tokens.SLASH: (divide, None),
+    tokens.PERCENT: (modulo, None),
+    tokens.EQUAL_EQUAL: (equal, operator.eq),
+    tokens.BANG_EQUAL: (lambda left, right: not equal(left, right), operator.ne),
+    tokens.LESS: (lambda left, right: compare("<", left, right), operator.lt),
+    tokens.LESS_EQUAL: (lambda left, right: compare("<=", left, right), operator.le),
+    tokens.GREATER: (lambda left, right: compare(">", left, right), operator.gt),
+    tokens.GREATER_EQUAL: (lambda left, right: compare(">=", left, right), operator.ge),
+}
+
+
+def located(error:ScriptError, line):
+    """
+    Returns the error with the line of the node that raised it (the errors raised in a
+    called function already have the line of theirs)
+    """
+    return error if error.line is not None else ScriptError(error.message, line)
+
+
+class FrameState():
+    """
+    The slots of the function being compiled
+
+    Attr:
+        name (str): The name of the function
+        function (Function): The function (None for the top level)
+        method (bool): The function is a method (this is its slot 0)
+        size (int): The number of slots handed out
+        names (dict): The last symbol declared with each name
+    """
+
+    def __init__(self, name, function=None, method=False):
+        self.name = name
+        self.function = function
+        self.method = method
+        self.size = 1 if method else 0
+        self.names = {}
+
+
+class TreeInterpreter(ASTVisitor):
+    """
+    Runs a program right after the semantic analysis, without generating its code.
+
+    The syntax tree is compiled once into Python closures: every expression becomes a
+    function of the slots of its frame that returns its value, every statement one that
+    runs it and returns None (or the tuple (value,) if it returned). The variables are
+    resolved with the symbols of the semantic analyzer (see Annotations.symbols), each
+    symbol gets a slot of its function when it is declared, so running the program
+    never looks a name up: the locals are an index of the list of slots of the call and
+    the variables of the top level an index of the globals.
+
+    The values are the ones of the bytecode VM (see Runtime/values.py), so both print
+    the same lines and stop with the same errors, the interpreter is the reference of
+    the code generators.
+
+    Attr:
+        symbol_table (list): The symbols of the semantic analyzer
+        annotations (Annotations): The symbols of the nodes
+        slots (dict): The frame and the slot of each declared symbol
+        classes (dict): The frame and the slot of each declared class by its name
+        globals (list): The slots of the top level (shared by the closures, reset on each run)
+        frame (FrameState): The function being compiled
+        script (FrameState): The top level of the program
+        program: The closure of the program (after visiting the Program)
+        depth (int): The number of calls running
+        write: Writes the lines the program prints
+    """
+
+    def __init__(self, symbol_table, annotations):
+        self.symbol_table = symbol_table
+        self.annotations = annotations
+        self.slots = {}
+        self.classes = {}
+        self.globals = []
+        self.frame = None
+        self.script = None
+        self.program = None
+        self.depth = 0
+        self.write = None
+
+
+    def run(self, output=None):
+        """
+        Runs the program, the lines it prints are written to output (stdout by default)
+        """
+        self.globals[:] = [None] * self.script.size
+        self.depth = 0
+        self.write = (output or sys.stdout).write
+        limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(limit, MAX_CALL_DEPTH * FRAMES_PER_CALL))
+        try:
+            self.program(self.globals)
+        except RecursionError:
+            raise ScriptError("Call stack overflow") from None
+        finally:
+            sys.setrecursionlimit(limit)
+
+
+    def declare(self, name, symbol, node):
+        """
+        Gives a symbol the next slot of the function being compiled and returns it
+        (the node that declares it is the key if the analyzer didn't annotate it)
+        """
+        key = symbol if symbol is not None else node
+        slot = self.frame.size
+        self.frame.size += 1
+        self.slots[key] = (self.frame, slot)
+        self.frame.names[name] = key
+        return slot
+
+
+    def symbol(self, node):
+        """
+        Returns the symbol a node refers to. The analyzer doesn't visit every expression
+        (the value assigned to an attribute outside of a class), the names it didn't
+        annotate are looked up in the function being compiled and then in the top level
+        """
+        symbol = self.annotations.symbol(node)
+        if symbol is not None:
+            return symbol
+        symbol = self.frame.names.get(node.name, self.script.names.get(node.name))
+        if symbol is None:
+            raise Exception(f"Line {node.line}: Variable {node.name} not found")
+        return symbol
+
+
+    def store(self, symbol, node):
+        """
+        Returns the function that stores a value in the slot of a symbol (or of the node
+        that declares it, if the analyzer didn't annotate it)
+        """
+        is_global, slot = self.resolve(symbol, node)
+        G = self.globals
+        if is_global:
+            def assign(L, value):
+                G[slot] = value
+        else:
+            def assign(L, value):
+                L[slot] = value
+        return assign
+
+
+    def resolve(self, symbol, node):
+        """
+        Returns if the slot of a symbol is a global and the slot
+        """
+        if symbol not in self.slots:
+            raise Exception(f"Line {node.line}: {getattr(symbol, 'id', None)} wasn't resolved by the semantic analysis")
+        frame, slot = self.slots[symbol]
+        if frame is self.frame:
+            return False, slot
+        if frame is self.script:
+            return True, slot
+        raise Exception(f"Line {node.line}: {self.frame.name} uses {symbol.id} of {frame.name}, the functions can't capture the variables of other functions")
+
+
+    def load(self, is_global, slot):
+        G = self.globals
+        if is_global:
+            return lambda L: G[slot]
+        return lambda L: L[slot]
+
+
+    def call(self, callee, arguments, receiver=None):
+        """
+        Calls a function, a method (with the receiver as this) or a class
+        """
+        if type(callee) is BoundMethod:
+            receiver, callee = callee.receiver, callee.method
+        if type(callee) is Function:
+            check_arity(callee, len(arguments))
+            return self.invoke(callee, arguments if receiver is None else [receiver] + arguments)
+        if type(callee) is RuntimeClass:
+            # A class creates an instance and runs its init on it
+            instance = Instance(callee)
+            initializer = callee.methods.get("init")
+            if initializer is None:
+                if arguments:
+                    raise ScriptError(f"{callee.name} has no init, it takes 0 arguments, got {len(arguments)}")
+                return instance
+            check_arity(initializer, len(arguments))
+            self.invoke(initializer, [instance] + arguments)
+            return instance
+        raise ScriptError(f"Only the functions and the classes can be called, got {display(callee)}")
+
+
+    def invoke(self, function:Function, L):
+        """
+        Runs the body of a function with its slots (this and the arguments first)
+        """
+        if self.depth >= MAX_CALL_DEPTH:
+            raise ScriptError("Call stack overflow")
+        execute, size = function.code
+        if len(L) < size:
+            L.extend([None] * (size - len(L)))
+        self.depth += 1
+        try:
+            result = execute(L)
+        finally:
+            self.depth -= 1
+        return result[0] if result is not None else None
+
+
+    def function_value(self, name, parameters, body, symbol, method=False):
+        """
+        Compiles a function and returns it
+
+        Args:
+            symbol (Function): Its symbol (the symbols of its parameters get the first slots)
+            method (bool): The function is a method (this is its slot 0)
+        """
+        names = parameters.names if parameters is not None else []
+        function = Function(name, len(names), None)
+        enclosing = self.frame
+        self.frame = FrameState(name, function, method)
+        if symbol is not None and len(symbol.parameters) == len(names):
+            for parameter in symbol.parameters:
+                self.declare(parameter.id, parameter, None)
+        else:
+            # The anonymous functions aren't analyzed, their parameters are keyed by themselves
+            for parameter in names:
+                self.declare(parameter, None, object())
+        execute = yield body
+        function.code = (execute, self.frame.size)
+        self.frame = enclosing
+        return function
+
+
+    def visitProgram(self, node:Program):
+        self.script = self.frame = FrameState("<script>")
+        statements = []
+        for declaration in node.declarations:
+            statements.append((yield declaration))
+        self.frame = None
+
+        def program(L):
+            for statement in statements:
+                if statement(L) is not None:
+                    return
+        self.program = program
+        return program
+
+
+    def visitClassDecl(self, node:ClassDecl):
+        # The class is declared before its methods, so they can refer to it
+        symbol = self.annotations.symbol(node)
+        self.declare(node.name, symbol, node)
+        self.classes[node.name] = self.slots[symbol if symbol is not None else node]
+        assign = self.store(symbol if symbol is not None else node, node)
+
+        methods = []
+        for method in node.methods:
+            methods.append((yield from self.function_value(method.name, method.parameters, method.body, self.annotations.symbol(method), method=True)))
+        attributes = [attribute.id for attribute in symbol.attributes] if symbol is not None else []
+
+        name, line = node.name, node.line
+        if node.parent is not None:
+            if node.parent not in self.classes:
+                raise Exception(f"Line {line}: Class {node.parent} not found")
+            parent = self.load(*self.class_slot(node.parent, node))
+        else:
+            parent = lambda L: None
+
+        def execute(L):
+            superclass = parent(L)
+            if superclass is not None and type(superclass) is not RuntimeClass:
+                raise ScriptError(f"{name} can only extend a class, got {display(superclass)}", line)
+            assign(L, RuntimeClass(name, superclass, methods, attributes))
+        return execute
+
+
+    def class_slot(self, name, node):
+        """
+        Returns if the slot of a class is a global and the slot
+        """
+        frame, slot = self.classes[name]
+        if frame is self.frame:
+            return False, slot
+        if frame is self.script:
+            return True, slot
+        raise Exception(f"Line {node.line}: {self.frame.name} uses the class {name} of {frame.name}, the functions can't capture the variables of other functions")
+
+
+    def visitFunDecl(self, node:FunDecl):
+        # The function is declared before its body, so it can call itself
+        symbol = self.annotations.symbol(node)
+        self.declare(node.name, symbol, node)
+        assign = self.store(symbol if symbol is not None else node, node)
+        function = yield from self.function_value(node.name, node.parameters, node.body, symbol)
+
+        def execute(L):
+            assign(L, function)
+        return execute
+
+
+    def visitFunAnon(self, node:FunAnon):
+        function = yield from self.function_value("anonymous", node.parameters, node.body, None)
+        return lambda L: function
+
+
+    def visitVarDecl(self, node:VarDecl):
+        # The initializer is compiled before the variable is declared
+        value = (yield node.value) if node.value is not None else (lambda L: None)
+        symbol = self.annotations.symbol(node)
+        self.declare(node.name, symbol, node)
+        is_global, slot = self.resolve(symbol if symbol is not None else node, node)
+        G = self.globals
+        if is_global:
+            def execute(L):
+                G[slot] = value(L)
+        else:
+            def execute(L):
+                L[slot] = value(L)
+        return execute
+
+
+    def visitBlock(self, node:Block):
+        statements = []
+        for declaration in node.declarations:
+            statements.append((yield declaration))
+        statements = tuple(statements)
+
+        def execute(L):
+            for statement in statements:
+                result = statement(L)
+                if result is not None:
+                    return result
+        return execute
+
+
+    def visitExprStmt(self, node:ExprStmt):
+        expression = yield node.expression
+
+        def execute(L):
+            expression(L)
+        return execute
+
+
+    def visitIfStmt(self, node:IfStmt):
+        condition = yield node.condition
+        then_branch = yield node.then_branch
+        else_branch = (yield node.else_branch) if node.else_branch is not None else None
+
+        if else_branch is None:
+            def execute(L):
+                value = condition(L)
+                if value is not None and value is not False:
+                    return then_branch(L)
+        else:
+            def execute(L):
+                value = condition(L)
+                if value is not None and value is not False:
+                    return then_branch(L)
+                return else_branch(L)
+        return execute
+
+
+    def visitWhileStmt(self, node:WhileStmt):
+        condition = yield node.condition
+        body = yield node.body
+
+        def execute(L):
+            while True:
+                value = condition(L)
+                if value is None or value is False:
+                    return
+                result = body(L)
+                if result is not None:
+                    return result
+        return execute
+
+
+    def visitForStmt(self, node:ForStmt):
+        initializer = (yield node.initializer) if node.initializer is not None else (lambda L: None)
+        condition = (yield node.condition) if node.condition is not None else (lambda L: True)
+        increment = (yield node.increment) if node.increment is not None else (lambda L: None)
+        body = yield node.body
+
+        def execute(L):
+            initializer(L)
+            while True:
+                value = condition(L)
+                if value is None or value is False:
+                    return
+                result = body(L)
+                if result is not None:
+                    return result
+                increment(L)
+        return execute
+
+
+    def visitReturnStmt(self, node:ReturnStmt):
+        if node.value is None:
+            return lambda L: (None,)
+        value = yield node.value
+        return lambda L: (value(L),)
+
+
+    def visitPrintStmt(self, node:PrintStmt):
+        expression = yield node.expression
+        interpreter = self
+
+        def execute(L):
+            interpreter.write(display(expression(L)) + "\n")
+        return execute
+
+
+    def visitAssignment(self, node:Assignment):
+        if node.target is None:
+            value = yield node.value
+            is_global, slot = self.resolve(self.symbol(node), node)
+            G = self.globals
+            if is_global:
+                def evaluate(L):
+                    result = G[slot] = value(L)
+                    return result
+            else:
+                def evaluate(L):
+                    result = L[slot] = value(L)
+                    return result
+            return evaluate
+
+        target = yield node.target
+        value = yield node.value
+        name, line = node.name, node.line
+
+        def evaluate(L):
+            instance = target(L)
+            result = value(L)
+            try:
+                set_attribute(instance, name, result)
+            except ScriptError as e:
+                raise located(e, line) from None
+            return result
+        return evaluate
+
+
+    def visitLogicOr(self, node:LogicOr):
+        operands = []
+        for operand in node.operands:
+            operands.append((yield operand))
+
+        # The first true operand is the result, the rest aren't evaluated
+        def evaluate(L):
+            for operand in operands:
+                value = operand(L)
+                if value is not None and value is not False:
+                    return value
+            return value
+        return evaluate
+
+
+    def visitLogicAnd(self, node:LogicAnd):
+        operands = []
+        for operand in node.operands:
+            operands.append((yield operand))
+
+        # The first false operand is the result, the rest aren't evaluated
+        def evaluate(L):
+            for operand in operands:
+                value = operand(L)
+                if value is None or value is False:
+                    return value
+            return value
+        return evaluate
+
+
+    def visitBinary(self, node:Binary):
+        evaluate = yield node.operands[0]
+        for operator, operand in zip(node.operators, node.operands[1:]):
+            # The chain is left associative, each operation takes the previous one
+            right = yield operand
+            evaluate = self.operation(operator, evaluate, right, operand, node.line)
+        return evaluate
+
+
+    def operation(self, operator, left, right, right_node, line):
+        """
+        Returns the closure of a binary operation, with the integers computed directly
+        (and a number literal on the right folded into it)
+        """
+        semantics, fast = OPERATIONS[operator]
+        if fast is not None and type(right_node) is Literal and right_node.kind == NUMBER and type(literal(NUMBER, right_node.value)) is int:
+            constant = literal(NUMBER, right_node.value)
+
+            def evaluate(L):
+                value = left(L)
+                if type(value) is int:
+                    return fast(value, constant)
+                try:
+                    return semantics(value, constant)
+                except ScriptError as e:
+                    raise located(e, line) from None
+            return evaluate
+
+        if fast is not None:
+            def evaluate(L):
+                a = left(L)
+                b = right(L)
+                if type(a) is int and type(b) is int:
+                    return fast(a, b)
+                try:
+                    return semantics(a, b)
+                except ScriptError as e:
+                    raise located(e, line) from None
+            return evaluate
+
+        def evaluate(L):
+            a = left(L)
+            b = right(L)
+            try:
+                return semantics(a, b)
+            except ScriptError as e:
+                raise located(e, line) from None
+        return evaluate
+
+
+    def visitEquality(self, node:Equality):
+        return self.visitBinary(node)
+
+    def visitComparison(self, node:Comparison):
+        return self.visitBinary(node)
+
+    def visitTerm(self, node:Term):
+        return self.visitBinary(node)
+
+    def visitFactor(self, node:Factor):
+        return self.visitBinary(node)
+
+
+    def visitUnary(self, node:Unary):
+        operand = yield node.operand
+        line = node.line
+        if node.operator == BANG:
+            return lambda L: not truthy(operand(L))
+
+        def evaluate(L):
+            try:
+                return negate(operand(L))
+            except ScriptError as e:
+                raise located(e, line) from None
+        return evaluate
+
+
+    def visitCall(self, node:Call):
+        evaluate = yield node.callee
+        suffixes = node.suffixes
+        position = 0
+        while position < len(suffixes):
+            operator, operand = suffixes[position]
+            if operator == DOT and position + 1 < len(suffixes) and suffixes[position + 1][0] == LEFT_PAREN:
+                arguments = suffixes[position + 1][1]
+                arguments = (yield arguments) if arguments is not None else ()
+                evaluate = self.method_call(evaluate, operand, arguments, node.line)
+                position += 2
+                continue
+            if operator == DOT:
+                evaluate = self.attribute(evaluate, operand, node.line)
+            elif operator == LEFT_PAREN:
+                arguments = (yield operand) if operand is not None else ()
+                evaluate = self.function_call(evaluate, arguments, node.line)
+            elif operator == LEFT_BRACKET:
+                evaluate = self.indexing(evaluate, (yield operand), node.line)
+            position += 1
+        return evaluate
+
+
+    def method_call(self, receiver, name, arguments, line):
+        """
+        Returns the closure of receiver.name(...): a method of the class of the receiver
+        is called with it as this, a function in its attribute without it
+        """
+        interpreter = self
+
+        def evaluate(L):
+            instance = receiver(L)
+            values = [argument(L) for argument in arguments]
+            try:
+                callee = find_method(instance, name)
+                if type(callee) is Function and callee.owner is not None:
+                    return interpreter.call(callee, values, instance)
+                return interpreter.call(callee, values)
+            except ScriptError as e:
+                raise located(e, line) from None
+        return evaluate
+
+
+    def function_call(self, callee, arguments, line):
+        interpreter = self
+
+        def evaluate(L):
+            function = callee(L)
+            values = [argument(L) for argument in arguments]
+            try:
+                return interpreter.call(function, values)
+            except ScriptError as e:
+                raise located(e, line) from None
+        return evaluate
+
+
+    def attribute(self, instance, name, line):
+        def evaluate(L):
+            try:
+                return get_attribute(instance(L), name)
+            except ScriptError as e:
+                raise located(e, line) from None
+        return evaluate
+
+
+    def indexing(self, value, position, line):
+        def evaluate(L):
+            string = value(L)
+            try:
+                return index(string, position(L))
+            except ScriptError as e:
+                raise located(e, line) from None
+        return evaluate
+
+
+    def visitArguments(self, node:Arguments):
+        arguments = []
+        for expression in node.expressions:
+            arguments.append((yield expression))
+        return tuple(arguments)
+
+
+    def visitLiteral(self, node:Literal):
+        value = literal(node.kind, node.value)
+        return lambda L: value
+
+
+    def visitIdentifier(self, node:Identifier):
+        return self.load(*self.resolve(self.symbol(node), node))
+
+
+    def visitThis(self, node:This):
+        if not self.frame.method:
+            raise Exception(f"Line {node.line}: this used outside of a method")
+        return lambda L: L[0]
+
+
+    def visitSuper(self, node:Super):
+        # The method of the parent of the class that declares the method being compiled
+        if not self.frame.method:
+            raise Exception(f"Line {node.line}: super used outside of a method")
+        function, name, line = self.frame.function, node.name, node.line
+
+        def evaluate(L):
+            parent = function.owner.parent if function.owner is not None else None
+            method = parent.methods.get(name) if parent is not None else None
+            if method is None:
+                raise ScriptError(f"Undefined method {name} of the parent class", line)
+            return BoundMethod(L[0], method)
+        return evaluate
+
+
+    def visitInstantiation(self, node:Instantiation):
+        if node.name not in self.classes:
+            raise Exception(f"Line {node.line}: Class {node.name} not found")
+        cls = self.load(*self.class_slot(node.name, node))
+        arguments = (yield node.arguments) if node.arguments is not None else ()
+        return self.function_call(cls, arguments, node.line)
+
+
+def run_program(syntax_tree, symbol_table, annotations, output=None):
+    """
+    Compiles an analyzed syntax tree to closures and runs it (see TreeInterpreter)
+
+    Args:
+        syntax_tree (Program): The syntax tree of the program
+        symbol_table (list): The symbols of the semantic analyzer
+        annotations (Annotations): The symbols of the nodes
+        output: The sink of the lines the program prints (stdout by default)
+    """
+    interpreter = TreeInterpreter(symbol_table, annotations)
+    interpreter.visit(syntax_tree)
+    interpreter.run(output)
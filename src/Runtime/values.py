@@ -0,0 +1,305 @@
+import math
+
+
+# Maximum number of nested calls of a running program
+MAX_CALL_DEPTH = 100000
+
+
+class ScriptError(Exception):
+    """
+    Error raised while a CompiScript program runs, with the line of the source that raised it
+
+    Attr:
+        line (int): The line of the source (None if it isn't known)
+        message (str): What went wrong
+    """
+
+    def __init__(self, message, line=None):
+        super().__init__(f"RUNTIME ERROR -> Line {line}: {message}" if line is not None else f"RUNTIME ERROR -> {message}")
+        self.line = line
+        self.message = message
+
+
+class Function():
+    """
+    A function of a running program (a function, a method or an anonymous function)
+
+    Attr:
+        name (str): The name of the function ("anonymous" for the anonymous ones)
+        arity (int): The number of parameters
+        code: What the backend runs (a CodeObject of the VM, a closure of the tree interpreter)
+        owner (RuntimeClass): The class of a method (None for the functions)
+    """
+    __slots__ = ("name", "arity", "code", "owner")
+
+    def __init__(self, name, arity, code, owner=None):
+        self.name = name
+        self.arity = arity
+        self.code = code
+        self.owner = owner
+
+
+class BoundMethod():
+    """
+    A method read from an instance (calling it passes the instance as this)
+    """
+    __slots__ = ("receiver", "method")
+
+    def __init__(self, receiver, method):
+        self.receiver = receiver
+        self.method = method
+
+
+class RuntimeClass():
+    """
+    A class of a running program.
+
+    The attributes of its instances are kept in a list, the position of each one is in
+    the layout of the class: it starts with the attributes the semantic analyzer found
+    (inherited first, see Class.attributes) and grows when an instance is given a new
+    one. As every instance of the class has the same layout, the position of an
+    attribute can be cached for the class (see the inline caches of the VM).
+
+    Attr:
+        name (str): The name of the class
+        parent (RuntimeClass): The class it extends (None if there is none)
+        methods (dict): Its methods by their name, with the inherited ones
+        layout (dict): The position of each attribute in the instances
+    """
+    __slots__ = ("name", "parent", "methods", "layout")
+
+    def __init__(self, name, parent, methods, attributes=()):
+        self.name = name
+        self.parent = parent
+        self.methods = dict(parent.methods) if parent is not None else {}
+        self.layout = dict(parent.layout) if parent is not None else {}
+        for method in methods:
+            method.owner = self
+            self.methods[method.name] = method
+        for attribute in attributes:
+            self.layout.setdefault(attribute, len(self.layout))
+
+
+    def slot(self, name):
+        """
+        Returns the position of an attribute, adding it to the layout if it is new
+        """
+        position = self.layout.get(name)
+        if position is None:
+            position = self.layout[name] = len(self.layout)
+        return position
+
+
+class Instance():
+    """
+    An instance of a class, its attributes in the positions of the layout of the class
+    (the ones never assigned are nil)
+    """
+    __slots__ = ("cls", "values")
+
+    def __init__(self, cls:RuntimeClass):
+        self.cls = cls
+        self.values = [None] * len(cls.layout)
+
+
+    def get(self, position):
+        values = self.values
+        return values[position] if position < len(values) else None
+
+
+    def set(self, position, value):
+        values = self.values
+        if position >= len(values):
+            values.extend([None] * (position + 1 - len(values)))
+        values[position] = value
+
+
+def literal(kind, text):
+    """
+    Returns the value of a literal (see SyntaxTree.nodes.Literal)
+    """
+    from SyntaxTree.tokens import NUMBER, STRING, TRUE, FALSE
+    if kind == NUMBER:
+        return float(text) if "." in text else int(text)
+    if kind == STRING:
+        return text[1:-1]
+    if kind == TRUE:
+        return True
+    if kind == FALSE:
+        return False
+    return None
+
+
+def display(value):
+    """
+    Returns the text of a value as print writes it
+    """
+    if value is None:
+        return "nil"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if type(value) is float:
+        return str(int(value)) if value.is_integer() else repr(value)
+    if type(value) is Function:
+        return f"<fn {value.name}>"
+    if type(value) is BoundMethod:
+        return f"<fn {value.method.name}>"
+    if type(value) is RuntimeClass:
+        return value.name
+    if type(value) is Instance:
+        return f"{value.cls.name} instance"
+    return str(value)
+
+
+def is_number(value):
+    return type(value) is int or type(value) is float
+
+
+def truthy(value):
+    """
+    nil and false are false, every other value is true
+    """
+    return value is not None and value is not False
+
+
+def add(left, right):
+    """
+    Adds two numbers or concatenates two values if one of them is a string
+    """
+    if type(left) is str or type(right) is str:
+        return display(left) + display(right)
+    if is_number(left) and is_number(right):
+        return left + right
+    raise ScriptError("Operands of + must be numbers or strings")
+
+
+def subtract(left, right):
+    if is_number(left) and is_number(right):
+        return left - right
+    raise ScriptError("Operands of - must be numbers")
+
+
+def multiply(left, right):
+    if is_number(left) and is_number(right):
+        return left * right
+    raise ScriptError("Operands of * must be numbers")
+
+
+def divide(left, right):
+    """
+    Divides two numbers, the quotient of two integers is truncated towards zero (as the
+    div of the intermediate code)
+    """
+    if not (is_number(left) and is_number(right)):
+        raise ScriptError("Operands of / must be numbers")
+    if right == 0:
+        raise ScriptError("Division by zero")
+    if type(left) is int and type(right) is int:
+        quotient = abs(left) // abs(right)
+        return -quotient if (left < 0) != (right < 0) else quotient
+    return left / right
+
+
+def modulo(left, right):
+    """
+    Returns the remainder of a division, with the sign of the dividend
+    """
+    if not (is_number(left) and is_number(right)):
+        raise ScriptError("Operands of % must be numbers")
+    if right == 0:
+        raise ScriptError("Division by zero")
+    if type(left) is int and type(right) is int:
+        return left - divide(left, right) * right
+    return math.fmod(left, right)
+
+
+def negate(value):
+    if is_number(value):
+        return -value
+    raise ScriptError("Operand of - must be a number")
+
+
+def equal(left, right):
+    """
+    Values are equal if they have the same type (an integer and a float can be equal)
+    and value, the instances and functions only to themselves
+    """
+    if is_number(left) and is_number(right):
+        return left == right
+    if type(left) is not type(right):
+        return False
+    if type(left) in (Instance, Function, RuntimeClass):
+        return left is right
+    if type(left) is BoundMethod:
+        return left.receiver is right.receiver and left.method is right.method
+    return left == right
+
+
+def compare(operator, left, right):
+    """
+    Compares two numbers (or two strings) with <, <=, > or >= (given as its text)
+    """
+    if not ((is_number(left) and is_number(right)) or (type(left) is str and type(right) is str)):
+        raise ScriptError(f"Operands of {operator} must be numbers")
+    if operator == "<":
+        return left < right
+    if operator == "<=":
+        return left <= right
+    if operator == ">":
+        return left > right
+    return left >= right
+
+
+def index(value, position):
+    """
+    Returns the character of a string at a position (the [] suffix)
+    """
+    if type(value) is not str:
+        raise ScriptError("Only strings can be indexed")
+    if type(position) is not int or not 0 <= position < len(value):
+        raise ScriptError(f"Index {display(position)} out of range")
+    return value[position]
+
+
+def get_attribute(value, name):
+    """
+    Returns an attribute of an instance or its method bound to it
+    """
+    if type(value) is not Instance:
+        raise ScriptError(f"Only instances have attributes, got {display(value)}.{name}")
+    position = value.cls.layout.get(name)
+    if position is not None:
+        return value.get(position)
+    method = value.cls.methods.get(name)
+    if method is None:
+        raise ScriptError(f"Undefined attribute {name} of {value.cls.name}")
+    return BoundMethod(value, method)
+
+
+def set_attribute(value, name, attribute):
+    if type(value) is not Instance:
+        raise ScriptError(f"Only instances have attributes, got {display(value)}.{name}")
+    value.set(value.cls.slot(name), attribute)
+
+
+def find_method(value, name):
+    """
+    Returns the method called by receiver.name(...): the method of the class of the
+    instance or the function in its attribute (the methods first)
+    """
+    if type(value) is not Instance:
+        raise ScriptError(f"Only instances have methods, got {display(value)}.{name}")
+    method = value.cls.methods.get(name)
+    if method is not None:
+        return method
+    position = value.cls.layout.get(name)
+    if position is None:
+        raise ScriptError(f"Undefined method {name} of {value.cls.name}")
+    return value.get(position)
+
+
+def check_arity(function:Function, count):
+    if count != function.arity:
+        raise ScriptError(f"{function.name} takes {function.arity} arguments, got {count}")
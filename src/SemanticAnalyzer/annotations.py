@@ -0,0 +1,38 @@
+from SemanticAnalyzer.symbols import Symbol, Scope
+from SemanticAnalyzer.types import DataType
+
+
+class Annotations():
+    """
+    Side table with the results of the semantic analysis for each node of the syntax tree.
+    The entries are stored in lists indexed by the index of the node, so the later phases
+    read what the analyzer resolved instead of searching the symbol table again.
+
+    Attr:
+        symbols (list[Symbol]): The symbol declared or referenced by each node.
+            (the variable of a VarDecl, the function called by a Call, etc.)
+        types (list[DataType]): The data type inferred for each node.
+        scopes (list[Scope]): The scope each node is analyzed in.
+    """
+    def __init__(self, size):
+        self.symbols: list[Symbol] = [None] * size
+        self.types: list[DataType] = [None] * size
+        self.scopes: list[Scope] = [None] * size
+
+    def symbol(self, node):
+        """
+        Returns the symbol declared or referenced by the node
+        """
+        return self.symbols[node.index]
+
+    def type(self, node):
+        """
+        Returns the data type inferred for the node
+        """
+        return self.types[node.index]
+
+    def scope(self, node):
+        """
+        Returns the scope the node is analyzed in
+        """
+        return self.scopes[node.index]
@@ -1,10 +1,12 @@
-from CompiScript.compiscriptVisitor import compiscriptVisitor
-from CompiScript.compiscriptParser import compiscriptParser
+from SyntaxTree.visitor import ASTVisitor
+from SyntaxTree.nodes import *
+from SyntaxTree.tokens import text, LEFT_PAREN, DOT, MINUS, BANG, NUMBER, STRING, NIL
 from SemanticAnalyzer.symbols import Symbol, Variable, Function, Class, Scope
 from SemanticAnalyzer.types import StringType, BooleanType, NumberType, NilType, AnyType, InstanceType
-from tabulate import tabulate
+from SemanticAnalyzer.annotations import Annotations
+from SemanticAnalyzer.symbol_export import export_symbols, default_path
 
-class SemanticAnalyzer(compiscriptVisitor):
+class SemanticAnalyzer(ASTVisitor):
     def __init__(self, logging=False):
         self.logging = logging # Flag to enable logging
         print("Starting Semantic Analysis...")
@@ -13,6 +15,7 @@ class SemanticAnalyzer(compiscriptVisitor):
         self.current_scope: Scope = None        # The current scope
         self.scope_stack: list[Scope] = []      # The scope stack
         self.symbol_table: list[Symbol] = []    # The symbol table
+        self.annotations: Annotations = None    # The results of the analysis for each node
 
         # Symbol helpers
         self.current_variable: Variable = None  # The current variable
@@ -37,36 +40,23 @@ class SemanticAnalyzer(compiscriptVisitor):
         if self.logging:
             print(f"    {message}")
 
-    def display_table(self):
-        print("Generating symbol table...")
-        formatted_symbols = []
-
-        # Table headers
-        headers = ["ID", "Type", "Scope", "Scope Index", "Data Type", "Size", "Offset"]
+    def display_table(self, table_format="fancy_grid", path=None):
+        """
+        Writes the symbol table to a file, one symbol at a time (see SemanticAnalyzer/symbol_export.py)
 
-        # format the symbols for display
-        self.log("INFO -> Formatting symbols for display")
-        for symbol in self.symbol_table:
-            symbol_data = [
-                symbol.id,
-                symbol.type,
-                symbol.scope.id,
-                symbol.scope.index,
-                symbol.data_type.name if symbol.data_type is not None else "-",
-                symbol.size if symbol.size is not None else "-",
-                symbol.offset if symbol.offset is not None else "-"
-            ]
-            # Append the formatted symbol to the list
-            formatted_symbols.append(symbol_data)
-
-        # Create a table with the formatted symbols and headers
-        # using the tabulate library
-        display_table = tabulate(formatted_symbols, headers, tablefmt="fancy_grid")
+        Args:
+            table_format (str): jsonl, csv, binary, plain (aligned text columns) or a table
+                format of the tabulate library (imported only then) for a pretty printed table
+            path (str): The path of the file (src/SemanticAnalyzer/symbol_table.<extension> by default)
+        """
+        print("Generating symbol table...")
+        if path is None:
+            path = default_path(table_format)
 
-        with open("src/SemanticAnalyzer/symbol_table.txt", "w", encoding="utf8") as f:
-            f.write(display_table)
+        self.log(f"INFO -> Exporting {len(self.symbol_table)} symbols as {table_format}")
+        export_symbols(self.symbol_table, path, table_format)
 
-        print("SUCCESS -> Symbol table has been written to src/SymbolTable/symbol_table.txt\n")
+        print(f"SUCCESS -> Symbol table has been written to {path}\n")
 
 
     def enter_scope(self, id):
@@ -137,55 +127,45 @@ class SemanticAnalyzer(compiscriptVisitor):
             
         # If the symbol is not found return None
         return None
+
+
+    def annotate(self, node:Node, symbol:Symbol):
+        # Record the symbol declared or referenced by the node
+        # so the code generator doesn't need to search for it again
+        self.annotations.symbols[node.index] = symbol
+
+
+    def leave(self, node:Node, type):
+        # Record the type inferred for the node and the scope it is analyzed in
+        self.annotations.types[node.index] = type
+        self.annotations.scopes[node.index] = self.current_scope
     
 
-    def visitProgram(self, ctx:compiscriptParser.ProgramContext):
+    def visitProgram(self, node:Program):
         self.log("VISIT -> Program node")
+        # Create the annotations for the nodes of the tree
+        self.annotations = Annotations(node.size)
         # Enter the global scope
         self.enter_scope("global")
-        # visit the children of the program node
-        self.visitChildren(ctx)
+        # visit the declarations of the program node
+        for declaration in node.declarations:
+            yield declaration
         print("SUCCESS -> Semantic Analysis completed\n")
 
 
-    def visitDeclaration(self, ctx:compiscriptParser.DeclarationContext):
-        self.log("VISIT -> Declaration node")
-
-        # Search for the declaration type
-        # Check if the declaration is a class declaration
-        if ctx.classDecl():
-            self.visitClassDecl(ctx.classDecl())
-
-        # Check if the declaration is a function declaration
-        elif ctx.funDecl():
-            self.visitFunDecl(ctx.funDecl())
-
-        # Check if the declaration is a variable declaration
-        elif ctx.varDecl():
-            self.visitVarDecl(ctx.varDecl())
-
-        # Check if the declaration is a statement
-        elif ctx.statement():
-            self.visitStatement(ctx.statement())
-
-        else:
-            # The declaration is not a valid declaration
-            raise Exception(f"Invalid declaration: {ctx.getText()}")
-        
-
-    def visitClassDecl(self, ctx:compiscriptParser.ClassDeclContext):
+    def visitClassDecl(self, node:ClassDecl):
         self.log("VISIT -> ClassDecl node")
         # Get the class identifier
-        class_id = ctx.IDENTIFIER(0).getText()
+        class_id = node.name
         parent_class = None # The parent class if exists
         self.in_class_assignment = True
 
         self.log(f"INFO -> Class declaration for: {class_id}")
 
         # Check if the class inherits from another class
-        if ctx.IDENTIFIER(1):
+        if node.parent is not None:
             # Get the parent class identifier
-            parent_id = ctx.IDENTIFIER(1).getText()
+            parent_id = node.parent
             self.log(f"INFO -> Inherits from class: {parent_id}")
             parent_class = self.search_symbol(parent_id, Class)
 
@@ -206,10 +186,10 @@ class SemanticAnalyzer(compiscriptVisitor):
         self.enter_scope(class_id)
 
         # Visit the class body
-        for function in ctx.function():
+        for function in node.methods:
             # Visit each function in the class body
             self.log(f"INFO -> Visiting function in class body")
-            self.visitFunction(function)
+            yield from self.visitFunDecl(function)
 
         # Set the size of the class based on the size of its attributes
         self.current_class.set_size()
@@ -226,22 +206,17 @@ class SemanticAnalyzer(compiscriptVisitor):
         # If the class is not already declared
         # Add the class symbol to the symbol table
         self.add_symbol(self.current_class)
+        self.annotate(node, self.current_class)
 
         # Reset the current class
         self.current_class = None
         self.in_class_assignment = False
 
 
-    def visitFunDecl(self, ctx:compiscriptParser.FunDeclContext):
+    def visitFunDecl(self, node:FunDecl):
         self.log("VISIT -> FunDecl node")
-        # Visit the function node
-        self.visitFunction(ctx.function())
-
-
-    def visitFunction(self, ctx:compiscriptParser.FunctionContext):
-        self.log("VISIT -> Function node")
         # Get the function identifier
-        fun_id = ctx.IDENTIFIER().getText()
+        fun_id = node.name
         self.log(f"INFO -> Creating function: {fun_id}")
 
         # Check if the function is a constructor
@@ -263,12 +238,12 @@ class SemanticAnalyzer(compiscriptVisitor):
         self.enter_scope(fun_id)
 
         # Check if the function has parameters
-        if ctx.parameters():
+        if node.parameters is not None:
             # Visit the parameters node
-            self.visitParameters(ctx.parameters())
+            self.visitParameters(node.parameters)
 
         # Visit the block node
-        self.visitBlock(ctx.block())
+        yield from self.visitBlock(node.body)
 
         # Exit the function scope
         self.exit_scope()
@@ -286,33 +261,35 @@ class SemanticAnalyzer(compiscriptVisitor):
 
         # Add the function symbol to the symbol table
         self.add_symbol(self.current_function)
+        self.annotate(node, self.current_function)
 
         # Reset the current function
         self.current_function = None
         self.in_init = False
 
 
-    def visitBlock(self, ctx:compiscriptParser.BlockContext):
+    def visitBlock(self, node:Block):
         self.log("VISIT -> Block node")
         # We don't need to enter a new scope for the block
         # because the block is not a scope by itself
-        # we just need to visit the children of the block node
-        self.visitChildren(ctx)
+        # we just need to visit the declarations of the block node
+        for declaration in node.declarations:
+            yield declaration
 
     
-    def visitVarDecl(self, ctx:compiscriptParser.VarDeclContext):
+    def visitVarDecl(self, node:VarDecl):
         self.log("VISIT -> VarDecl node")
         # Get the variable identifier
-        var_id = ctx.IDENTIFIER().getText()
+        var_id = node.name
         self.log(f"INFO -> Variable declaration for: {var_id}")
 
         # Create a new variable symbol
         self.current_variable = Variable(var_id)
 
         # Check if the variable has an assignment
-        if ctx.expression():
+        if node.value is not None:
             # Visit the expression node
-            type = self.visitExpression(ctx.expression())
+            type = yield node.value
             # Set the type of the variable
             self.current_variable.set_type(type)
             self.log(f"INFO -> Variable type set to: {type}")
@@ -331,531 +308,426 @@ class SemanticAnalyzer(compiscriptVisitor):
 
         # Add the variable symbol to the symbol table
         self.add_symbol(self.current_variable)
+        self.annotate(node, self.current_variable)
 
 
-    def visitExpression(self, ctx:compiscriptParser.ExpressionContext):
-        self.log("VISIT -> Expression node")
-        self.log(f"INFO -> Expression: {ctx.getText()}")
-
-        # Check if the expression is an assignment
-        if ctx.assignment():
-            return self.visitAssignment(ctx.assignment())
-        # Check if the expression is a anonymous function
-        elif ctx.funAnon():
-            return self.visitFunAnon(ctx.funAnon())
-        else:
-            # The expression is not a valid expression
-            raise Exception(f"Invalid expression: {ctx.getText()}")
-        
-
-    def visitAssignment(self, ctx:compiscriptParser.AssignmentContext):
+    def visitAssignment(self, node:Assignment):
         self.log("VISIT -> Assignment node")
 
-        # Check if the assignment isn't a wrapper node
-        if ctx.getChildCount() > 1:
-            # Get the variable id
-            var_id = ctx.IDENTIFIER().getText()
-            # Check if we are inside a class
-            if self.in_init and self.current_class is not None and ctx.call():
-                # We are initializing a class attribute
-                self.log(f"INFO -> This is a initialization for class attr {var_id}")
-                # Create a new variable symbol for the attribute
-                attribute = Variable(var_id, type="attr")
-                # Visit the assignment node
-                data_type = self.visitAssignment(ctx.assignment())
-                # Set the type of the attribute
-                attribute.set_type(data_type)
-                # Add the attribute to the current class
-                self.current_class.attributes.append(attribute)
-                # Add the attribute to the symbol table
-                self.add_symbol(attribute)
+        # Get the variable id
+        var_id = node.name
+        # Check if we are inside a class
+        if self.in_init and self.current_class is not None and node.target is not None:
+            # We are initializing a class attribute
+            self.log(f"INFO -> This is a initialization for class attr {var_id}")
+            # Create a new variable symbol for the attribute
+            attribute = Variable(var_id, type="attr")
+            # Visit the assigned expression
+            data_type = yield node.value
+            # Set the type of the attribute
+            attribute.set_type(data_type)
+            # Add the attribute to the current class
+            self.current_class.attributes.append(attribute)
+            # Add the attribute to the symbol table
+            self.add_symbol(attribute)
+            # The assignment refers to the first attribute with the id
+            # (inherited attributes come first)
+            self.annotate(node, self.current_class.search_attribute(var_id))
+        
+        # Check if the assignment is for a class attribute
+        elif node.target is not None and self.current_class is not None:
+            self.log(f"INFO -> Assignment for a class attr {var_id}")
+            # Visit the call node to validate the attribute
+            yield node.target
+            self.annotate(node, self.current_class.search_attribute(var_id))
+            return (yield node.value)
             
-            # Check if the assignment is for a class attribute
-            elif ctx.call() and self.current_class is not None:
-                self.log(f"INFO -> Assignment for a class attr {var_id}")
-                # Visit the call node to validate the attribute
-                self.visitCall(ctx.call())
-                return self.visitAssignment(ctx.assignment())
-                
-            elif ctx.call():
-                # We are calling a function or a class attribute
-                self.log(f"INFO -> Call for function or class attribute {var_id}")
-                # Get the type of the function or class attribute
-                type = self.visitCall(ctx.call())
+        elif node.target is not None:
+            # We are calling a function or a class attribute
+            self.log(f"INFO -> Call for function or class attribute {var_id}")
+            # Get the type of the function or class attribute
+            type = yield node.target
 
         else:
-            # The assignment is a wrapper node, skip it
-            # and visit the logic_or node
-            self.log("INFO -> Wrapper node, skipping...")
-            return self.visitLogic_or(ctx.logic_or())
+            # We are assigning a value to a variable
+            self.log(f"INFO -> Assignment for variable {var_id}")
+            # Visit the assigned expression
+            yield node.value
+            # Search for the variable in the symbol table
+            variable = self.search_symbol(var_id, Variable)
+            if variable is None:
+                raise Exception(f"Variable {var_id} not found in symbol table")
+            self.annotate(node, variable)
 
     
-    def visitLogic_or(self, ctx:compiscriptParser.Logic_orContext):
-        self.log("VISIT -> Logic_or node")
-
-        # Check if the logic_or isn't a wrapper node
-        if ctx.getChildCount() > 1:
-            logic_ands = []
-            for logic_and in ctx.logic_and():
-                self.log(f"INFO -> logic_and node: {logic_and.getText()}")
-                logic_ands.append(self.visitLogic_and(logic_and))
-            
-            # Check if all the logic_and nodes are boolean type
-            for logic_and in logic_ands:
-                if not isinstance(logic_and, BooleanType) and not isinstance(logic_and, AnyType):
-                    raise Exception(f"Invalid type for logic_or node got: {logic_and}, expected: bool")
+    def visitLogicOr(self, node:LogicOr):
+        self.log("VISIT -> LogicOr node")
 
-            # The logic_or is a boolean type
-            return BooleanType()
-        
-        else:
-            # The logic_or is a wrapper node, skip it
-            # and visit the logic_and node
-            self.log("INFO -> Wrapper node, skipping...")
-            return self.visitLogic_and(ctx.logic_and(0))
-
-
-    def visitLogic_and(self, ctx:compiscriptParser.Logic_andContext):
-        self.log("VISIT -> Logic_and node")
-
-        # Check if the logic_and isn't a wrapper node
-        if ctx.getChildCount() > 1:
-            equalities = []
-            for equality in ctx.equality():
-                self.log(f"INFO -> equality node: {equality.getText()}")
-                equalities.append(self.visitEquality(equality))
-            # check if all the equality nodes are boolean type
-            for equality in equalities:
-                if not isinstance(equality, BooleanType) and not isinstance(equality, AnyType):
-                    raise Exception(f"Invalid type for logic_and node got: {equality}, expected: bool")
-
-            # The logic_and is a boolean type
-            return BooleanType()
+        logic_ands = []
+        for logic_and in node.operands:
+            logic_ands.append((yield logic_and))
         
-        else:
-            # The logic_and is a wrapper node, skip it
-            # and visit the equality node
-            self.log("INFO -> Wrapper node, skipping...")
-            return self.visitEquality(ctx.equality(0))
+        # Check if all the logic_and nodes are boolean type
+        for logic_and in logic_ands:
+            if not isinstance(logic_and, BooleanType) and not isinstance(logic_and, AnyType):
+                raise Exception(f"Invalid type for logic_or node got: {logic_and}, expected: bool")
 
+        # The logic_or is a boolean type
+        return BooleanType()
 
-    def visitEquality(self, ctx:compiscriptParser.EqualityContext):
-        self.log("VISIT -> Equality node")
 
-        # Check if the equality isn't a wrapper node
-        if ctx.getChildCount() > 1:
-            comparisons = []
-            for comparison in ctx.comparison():
-                self.log(f"INFO -> Comparison node: {comparison.getText()}")
-                comparisons.append(self.visitComparison(comparison))
-            # Check if all the comparison nodes are of the same type
-            # all comparisons must be of the same type
-            type_set = {}
-            for comparison in comparisons:
-                if not isinstance(comparison, AnyType):
-                    type_set[type(comparison)] = comparison
-                    
-            if len(type_set) > 1:
-                multi_message = " | ".join([f"{value}" for _ , value in type_set.items()])
-                raise Exception(f"Invalid type for equality node, got multiple types: {multi_message}")
-            
-            # The equality is a boolean type
-            return BooleanType()
+    def visitLogicAnd(self, node:LogicAnd):
+        self.log("VISIT -> LogicAnd node")
 
-        else:
-            # The equality is a wrapper node, skip it
-            # and visit the comparison node
-            self.log("INFO -> Wrapper node, skipping...")
-            return self.visitComparison(ctx.comparison(0))
+        equalities = []
+        for equality in node.operands:
+            equalities.append((yield equality))
+        # check if all the equality nodes are boolean type
+        for equality in equalities:
+            if not isinstance(equality, BooleanType) and not isinstance(equality, AnyType):
+                raise Exception(f"Invalid type for logic_and node got: {equality}, expected: bool")
 
+        # The logic_and is a boolean type
+        return BooleanType()
 
-    def visitComparison(self, ctx:compiscriptParser.ComparisonContext):
-        self.log("VISIT -> Comparison node")
 
-        # Check if the comparison isn't a wrapper node
-        if ctx.getChildCount() > 1:
-            terms = []
-            # Get the term nodes
-            for term in ctx.term():
-                self.log(f"INFO -> Term node: {term.getText()}")
-                terms.append(self.visitTerm(term))
+    def visitEquality(self, node:Equality):
+        self.log("VISIT -> Equality node")
 
-            # Check if all the term nodes are of number type
-            for term in terms:
-                if not isinstance(term, NumberType) and not isinstance(term, AnyType):
-                    raise Exception(f"Invalid type for comparison node got: {term}, expected: num")
+        comparisons = []
+        for comparison in node.operands:
+            comparisons.append((yield comparison))
+        # Check if all the comparison nodes are of the same type
+        # all comparisons must be of the same type
+        type_set = {}
+        for comparison in comparisons:
+            if not isinstance(comparison, AnyType):
+                type_set[type(comparison)] = comparison
+                
+        if len(type_set) > 1:
+            multi_message = " | ".join([f"{value}" for _ , value in type_set.items()])
+            raise Exception(f"Invalid type for equality node, got multiple types: {multi_message}")
+        
+        # The equality is a boolean type
+        return BooleanType()
 
-            # The comparison is a boolean type
-            return BooleanType()
 
-        else:
-            # The comparison is a wrapper node, skip it
-            # and visit the term node
-            self.log("INFO -> Wrapper node, skipping...")
-            return self.visitTerm(ctx.term(0))
+    def visitComparison(self, node:Comparison):
+        self.log("VISIT -> Comparison node")
+
+        terms = []
+        # Get the term nodes
+        for term in node.operands:
+            terms.append((yield term))
+
+        # Check if all the term nodes are of number type
+        for term in terms:
+            if not isinstance(term, NumberType) and not isinstance(term, AnyType):
+                raise Exception(f"Invalid type for comparison node got: {term}, expected: num")
+
+        # The comparison is a boolean type
+        return BooleanType()
 
     
-    def visitTerm(self, ctx:compiscriptParser.TermContext):
+    def visitTerm(self, node:Term):
         self.log("VISIT -> Term node")
 
-        # Check if the term isn't a wrapper node
-        if ctx.getChildCount() > 1:
-            # Get the operators
-            term_operators = []
-            minus = False
-
-            # get the + - operators from the term
-            for i in range(1, len(ctx.children), 2):
-                term_operators.append(ctx.children[i].getText())
-
-            # Check if there are - operators
-            # This means the term is a subtraction and must be of number type
-            if "-" in term_operators:
-                minus = True
-
-            factors = []
-            # Get the factor nodes
-            for factor in ctx.factor():
-                self.log(f"INFO -> Factor node: {factor.getText()}")
-                factors.append(self.visitFactor(factor))
-
-            # Check if all the factor nodes are of number type if there are - operators
-            if minus:
-                # Check if we are in a print statement
-                # The operator - is not valid in a print statement
-                if self.in_print:
-                    raise Exception(f"Invalid operator - in print statement")
-
-                for factor in factors:
-                    if not isinstance(factor, NumberType) and not isinstance(factor, AnyType):
-                        raise Exception(f"Invalid type for term node got: {factor}, expected: num")
-                    
-                # The term is a number type
-                return NumberType()
+        # Check if there are - operators
+        # This means the term is a subtraction and must be of number type
+        minus = MINUS in node.operators
+
+        factors = []
+        # Get the factor nodes
+        for factor in node.operands:
+            factors.append((yield factor))
+
+        # Check if all the factor nodes are of number type if there are - operators
+        if minus:
+            # Check if we are in a print statement
+            # The operator - is not valid in a print statement
+            if self.in_print:
+                raise Exception(f"Invalid operator - in print statement")
+
+            for factor in factors:
+                if not isinstance(factor, NumberType) and not isinstance(factor, AnyType):
+                    raise Exception(f"Invalid type for term node got: {factor}, expected: num")
                 
-            else:
-                # If there are no - operators, the term may be of number or string type
-                # Check if theres a string in the factors
-                if any(isinstance(factor, StringType) for factor in factors):
-                    # If there's a string, the term is a string type
-                    return StringType()
-                else:
-                    # If there's no string, the term is a number type
-                    return NumberType()
+            # The term is a number type
+            return NumberType()
+            
         else:
-            # The term is a wrapper node, skip it
-            # and visit the factor node
-            self.log("INFO -> Wrapper node, skipping...")
-            return self.visitFactor(ctx.factor(0))
+            # If there are no - operators, the term may be of number or string type
+            # Check if theres a string in the factors
+            if any(isinstance(factor, StringType) for factor in factors):
+                # If there's a string, the term is a string type
+                return StringType()
+            else:
+                # If there's no string, the term is a number type
+                return NumberType()
 
 
-    def visitFactor(self, ctx:compiscriptParser.FactorContext):
+    def visitFactor(self, node:Factor):
         self.log("VISIT -> Factor node")
 
-        # Check if the factor isn't a wrapper node
-        if ctx.getChildCount() > 1:
-            # Get the unary nodes
-            unaries = []
-            for unary in ctx.unary():
-                self.log(f"INFO -> Unary node: {unary.getText()}")
-                unaries.append(self.visitUnary(unary))
-
-            # Check if all the unary nodes are of number type
-            for unary in unaries:
-                if not isinstance(unary, NumberType) and not isinstance(unary, AnyType):
-                    raise Exception(f"Invalid type for factor node got: {unary}, expected: num")
-                
-            # The factor is a number type
-            return NumberType()
+        # Get the unary nodes
+        unaries = []
+        for unary in node.operands:
+            unaries.append((yield unary))
 
-        else:
-            # The factor is a wrapper node, skip it
-            # and visit the unary node
-            self.log("INFO -> Wrapper node, skipping...")
-            return self.visitUnary(ctx.unary(0))
+        # Check if all the unary nodes are of number type
+        for unary in unaries:
+            if not isinstance(unary, NumberType) and not isinstance(unary, AnyType):
+                raise Exception(f"Invalid type for factor node got: {unary}, expected: num")
+            
+        # The factor is a number type
+        return NumberType()
 
 
-    def visitUnary(self, ctx:compiscriptParser.UnaryContext):
+    def visitUnary(self, node:Unary):
         self.log("VISIT -> Unary node")
 
-        # Check if the unary isn't a wrapper node
-        if ctx.getChildCount() > 1:
-            # Check if the unary is a negation operator
-            if ctx.getChild(0).getText() in ["!", "-"]:
-                # Get the negation operator
-                negation = ctx.getChild(0).getText()
-                # Visit the unary node
-                unray_type = self.visitUnary(ctx.unary())
-                # Check if the negation operator is valid for the unary type
-                if negation == "!":
-                    self.log(f"INFO -> Negation operator: {negation}")
-                    # Check if the unary type is a boolean
-                    if not isinstance(unray_type, BooleanType) and not isinstance(unray_type, AnyType):
-                        raise Exception(f"Invalid type for negation operator: {negation}, got: {unray_type}, expected: bool")
-                    
-                    # The unary is a boolean type
-                    return BooleanType()
-                
-                elif negation == "-":
-                    self.log(f"INFO -> Negation operator: {negation}")
-                    # Check if the unary type is a number
-                    if not isinstance(unray_type, NumberType) and not isinstance(unray_type, AnyType):
-                        raise Exception(f"Invalid type for negation operator: {negation}, got: {unray_type}, expected: num")
-                    
-                    # The unary is a number type
-                    return NumberType()
-
-            else:
-                # If isnt a negation operator, its not a valid unary operator
-                raise Exception(f"Invalid unary operator: {ctx.getChild(0).getText()}")
+        # Get the negation operator
+        negation = node.operator
+        # Visit the operand node
+        unray_type = yield node.operand
+        # Check if the negation operator is valid for the unary type
+        if negation == BANG:
+            self.log("INFO -> Negation operator: !")
+            # Check if the unary type is a boolean
+            if not isinstance(unray_type, BooleanType) and not isinstance(unray_type, AnyType):
+                raise Exception(f"Invalid type for negation operator: !, got: {unray_type}, expected: bool")
+            
+            # The unary is a boolean type
+            return BooleanType()
+        
+        elif negation == MINUS:
+            self.log("INFO -> Negation operator: -")
+            # Check if the unary type is a number
+            if not isinstance(unray_type, NumberType) and not isinstance(unray_type, AnyType):
+                raise Exception(f"Invalid type for negation operator: -, got: {unray_type}, expected: num")
+            
+            # The unary is a number type
+            return NumberType()
 
         else:
-            # The unary is a wrapper node, skip it
-            # and visit the primary node
-            self.log("INFO -> Wrapper node, skipping...")
-            return self.visitCall(ctx.call())
-
+            # If isnt a negation operator, its not a valid unary operator
+            raise Exception(f"Invalid unary operator: {text(negation)}")
 
     
-    def visitCall(self, ctx:compiscriptParser.CallContext):
+    def visitCall(self, node:Call):
         self.log("VISIT -> Call node")
 
-        # Check if the call isn't a wrapper node
-        if ctx.getChildCount() > 1:
-            
-            call_type = self.visitPrimary(ctx.primary())
+        call_type = yield node.callee
+        # Get the first suffix of the call
+        operator, operand = node.suffixes[0]
 
-            # Check if the call is a plain function call
-            if ctx.getChild(1).getText() == "(":
-                
-                # Check if the function call has arguments
-                if ctx.arguments():
-                    args = self.visitArguments(ctx.arguments(0))
-
-                    # Get the function identifier
-                    if ctx.primary().IDENTIFIER():
-                        # Get the function reference
-                        function_id = ctx.primary().IDENTIFIER().getText()
-                        for symbol in self.symbol_table:
-                            # Check if the symbol exists in the symbol table
-                            if symbol.id == function_id and isinstance(symbol, Function):
-                                # Check if the arguments match the function parameters
-                                if len(args) != len(symbol.parameters):
-                                    raise Exception(f"Invalid number of arguments for function {function_id}, got: {len(args)}, expected: {len(symbol.parameters)}")
-                                break
-
-                return call_type
-       
-            # Check if the call is a class attribute call
-            elif ctx.getChild(1).getText() == ".":
-                # Get the attribute identifier
-                attribute = ctx.IDENTIFIER(0).getText()
-                self.log(f"INFO -> Attribute: {attribute}")
-
-                # Check if the call is inside a class
-                if self.in_class_assignment:
-                    # Search for the attribute in the current class
-                    symbol = self.current_class.search_attribute(attribute)
-                    
-                    if symbol is None:
-                        self.log("INFO -> Attribute not found in current class")
-                        self.log("         Searching for method...")
-                        # If the attribute is not found in the current class
-                        # Try searching for a method
-                        symbol = self.current_class.search_method(attribute)
-                        
-                        if symbol is None:
-                            # Before raising an exception, check if its a recursive call
-                            # If it is, we assume the return type is any
-                            if attribute == self.current_function.id:
-                                return AnyType()
-                            
-                            # At this point the method is not found in the class and is not recursive
-                            raise Exception(f"Method {attribute} not found in class {self.current_class.id}")
-                        
-                        self.log(f"INFO -> Method found: {symbol}")
-                        return symbol.return_type
-                    
-                    else:
-                        return symbol.data_type
-
-                # Check if the call is a class method call and outside a class
-                elif ctx.getChild(3):
-                    # Get the method identifier
-                    method_id = ctx.IDENTIFIER(0).getText()
-                    self.log(f"INFO -> Method: {method_id}")
-
-                    # Search if the method is part of the instance
-                    if ctx.primary().IDENTIFIER():
-                        # Get the class instance
-                        class_id = ctx.primary().IDENTIFIER().getText()
-                        class_instance = self.search_symbol(class_id, Variable)
-                        # Search for the class in the symbol table
-                        class_symbol = self.search_symbol(class_instance.data_type.class_ref.id, Class)
-
-                        if class_symbol is not None:
-                            method = class_symbol.search_method(method_id)
-                            if method is not None:
-                                return method.return_type
-                            else:
-                                raise Exception(f"Method '{method_id}' not found in instance '{class_id}' of class {class_symbol.id}")
-                        else:
-                            raise Exception(f"Instance '{class_id}' not found in symbol table")
-
-                    # Search for the method in the symbol table
-                    for symbol in self.symbol_table:
-                        # Check if the symbol exists in the symbol table
-                        if symbol.id == method and isinstance(symbol, Function):
-                            return symbol.return_type
-                        
-                    # At this point the method is not found in the symbol table
-                    raise Exception(f"Method {method} not found in symbol table")
+        # Check if the call is a plain function call
+        if operator == LEFT_PAREN:
             
-                else:
-                    # We are outside of a class, search for the attribute in the symbol table
+            # Check if the function call has arguments
+            arguments = node.arguments()
+            if arguments:
+                args = yield from self.visitArguments(arguments[0])
+
+                # Get the function identifier
+                if isinstance(node.callee, (Identifier, Super)):
+                    # Get the function reference
+                    function_id = node.callee.name
+                    function = None
                     for symbol in self.symbol_table:
                         # Check if the symbol exists in the symbol table
-                        if symbol.id == attribute and isinstance(symbol, Variable):
-                            return symbol.data_type
-                        
-                    # At this point the attribute is not found in the symbol table
-                    raise Exception(f"Attribute {attribute} not found in symbol table")
+                        if symbol.id == function_id and isinstance(symbol, Function):
+                            function = symbol
+                            break
+
+                    # A recursive function is not in the symbol table yet
+                    if function is None and self.current_function is not None and function_id == self.current_function.id:
+                        function = self.current_function
+
+                    if function is not None:
+                        # Check if the arguments match the function parameters
+                        if len(args) != len(function.parameters):
+                            raise Exception(f"Invalid number of arguments for function {function_id}, got: {len(args)}, expected: {len(function.parameters)}")
+                        self.annotate(node, function)
+
+            return call_type
+   
+        # Check if the call is a class attribute call
+        elif operator == DOT:
+            # Get the attribute identifier
+            attribute = operand
+            self.log(f"INFO -> Attribute: {attribute}")
+
+            # Visit the arguments if its a method call
+            arguments = node.arguments()
+            if arguments:
+                yield from self.visitArguments(arguments[0])
+
+            # Check if the call is inside a class
+            if self.in_class_assignment:
+                # Search for the attribute in the current class
+                symbol = self.current_class.search_attribute(attribute)
                 
-        else:
-            # The call is a wrapper node, skip it
-            # and visit the primary node
-            self.log("INFO -> Wrapper node, skipping...")
-            return self.visitPrimary(ctx.primary())
-
-
-    def visitPrimary(self, ctx:compiscriptParser.PrimaryContext):
-        self.log("VISIT -> Primary node")
-
-        # Check if the primary is a terminal node
-        if ctx.getChildCount() == 1:
-            primary_str = ctx.getText()
+                if symbol is None:
+                    self.log("INFO -> Attribute not found in current class")
+                    self.log("         Searching for method...")
+                    # If the attribute is not found in the current class
+                    # Try searching for a method
+                    symbol = self.current_class.search_method(attribute)
                     
-            # Check if the primary is a number
-            if ctx.NUMBER():
-                # Get the number
-                number = ctx.NUMBER().getText()
-                self.log(f"INFO -> Number: {number}")
-                return NumberType(value=number)
-
-            # Check if the primary is a string
-            elif ctx.STRING():
-                # Get the string
-                string = ctx.STRING().getText()
-                self.log(f"INFO -> String: {string}")
-                return StringType(value=string)
-
-            # Check if the primary is a boolean
-            elif primary_str in ["true", "false"]:
-                # Get the boolean
-                boolean = primary_str
-                self.log(f"INFO -> Boolean: {boolean}")
-                return BooleanType(value=boolean)
-
-            # Check if the primary is a nil
-            elif primary_str == "nil":
-                # Get the nil
-                nil = primary_str
-                self.log(f"INFO -> Nil: {nil}")
-                return NilType()
-
-            # Check if the primary is an identifier
-            elif ctx.IDENTIFIER():
-                # Get the identifier
-                identifier = ctx.IDENTIFIER().getText()
-                self.log(f"INFO -> Identifier: {identifier}")
-
-                # First check if the identifier is called inside a function
-                # This means the call is recursive
-                if self.current_function is not None:
-                    if identifier == self.current_function.id:
-                        # If it is recursive, we assume the type of return is any
-                        # because we can't infer the type of the return
-                        return AnyType()
-                    
-                    else: 
-                        # Search for the identifier in the symbol table
-                        symbol = self.search_symbol(identifier, Variable)
-                        # Check if the symbol is found
-                        if symbol is None:
-                            # If the symbol is not found, search for the identifier AS a function
-                            symbol = self.search_symbol(identifier, Function)
-                            # Check if the symbol is found
-                            if symbol is None:
-                                raise Exception(f"Identifier {identifier} not found in symbol table")
-
-                            # The primary is a function, return the return type of the function
-                            return symbol.return_type
-
-                        # The primary is a variable, return the data type of the variable
-                        return symbol.data_type
+                    if symbol is None:
+                        # Before raising an exception, check if its a recursive call
+                        # If it is, we assume the return type is any
+                        if attribute == self.current_function.id:
+                            self.annotate(node, self.current_function)
+                            return AnyType()
                         
+                        # At this point the method is not found in the class and is not recursive
+                        raise Exception(f"Method {attribute} not found in class {self.current_class.id}")
                     
+                    self.log(f"INFO -> Method found: {symbol}")
+                    self.annotate(node, symbol)
+                    return symbol.return_type
+                
                 else:
-                    # If it isnt a recursive call
-                    # Search for the identifier in the symbol table
-                    symbol = self.search_symbol(identifier, Variable)
-                    # Check if the symbol is found
-                    if symbol is None:
-                        # If the symbol is not found, search for the identifier AS a function
-                        symbol = self.search_symbol(identifier, Function)
-                        # Check if the symbol is found
-                        if symbol is None:
-                            raise Exception(f"Identifier {identifier} not found in symbol table")
-
-                        # The primary is a function, return the return type of the function
-                        return symbol.return_type
-
-                    # The primary is a variable, return the data type of the variable
+                    self.annotate(node, symbol)
                     return symbol.data_type
 
-            # Check if the primary is a this keyword
-            elif primary_str == "this":
-                self.log(f"INFO -> 'this' keyword found")
-                # If we are not inside a class, the this keyword is invalid
-                if self.current_class is None:
-                    raise Exception(f"Invalid this keyword outside a class")
-
-            # Check if the primary is a instantiation
-            elif ctx.instantiation():
-                return self.visitInstantiation(ctx.instantiation())
+            # Check if the call is a class method call and outside a class
+            elif len(node.suffixes) > 1:
+                # Get the method identifier
+                method_id = operand
+                self.log(f"INFO -> Method: {method_id}")
+
+                # Search if the method is part of the instance
+                if isinstance(node.callee, (Identifier, Super)):
+                    # Get the class instance
+                    class_id = node.callee.name
+                    class_instance = self.search_symbol(class_id, Variable)
+                    # Search for the class in the symbol table
+                    class_symbol = self.search_symbol(class_instance.data_type.class_ref.id, Class)
+
+                    if class_symbol is not None:
+                        method = class_symbol.search_method(method_id)
+                        if method is not None:
+                            self.annotate(node, method)
+                            return method.return_type
+                        else:
+                            raise Exception(f"Method '{method_id}' not found in instance '{class_id}' of class {class_symbol.id}")
+                    else:
+                        raise Exception(f"Instance '{class_id}' not found in symbol table")
 
-        else:
-            # The primary has children, is a expression or a super call
-            # Check if the primary is a expression
-            if ctx.expression():
-                return self.visitExpression(ctx.expression())
-
-            # Check if the primary is a super call
-            if ctx.getChild(0).getText() == "super":
-                identifier = ctx.IDENTIFIER().getText()
-                self.log(f"INFO -> Super call: {identifier}")
-                self.super_call = True
-
-                # Search for the function in the parent class
-                if self.current_class is not None:
-                    if self.current_class.parent is not None:
-                        symbol = self.current_class.parent.search_method(identifier)
-                        if symbol is None:
-                            raise Exception(f"Method {identifier} not found in parent class {self.current_class.parent.id}")
-                        
+                # Search for the method in the symbol table
+                for symbol in self.symbol_table:
+                    # Check if the symbol exists in the symbol table
+                    if symbol.id == method and isinstance(symbol, Function):
                         return symbol.return_type
                     
-                    else:
-                        raise Exception(f"Parent class not found for class {self.current_class.id}")
+                # At this point the method is not found in the symbol table
+                raise Exception(f"Method {method} not found in symbol table")
+        
+            else:
+                # We are outside of a class, search for the attribute in the symbol table
+                for symbol in self.symbol_table:
+                    # Check if the symbol exists in the symbol table
+                    if symbol.id == attribute and isinstance(symbol, Variable):
+                        self.annotate(node, symbol)
+                        return symbol.data_type
+                    
+                # At this point the attribute is not found in the symbol table
+                raise Exception(f"Attribute {attribute} not found in symbol table")
+
+
+    def visitLiteral(self, node:Literal):
+        self.log("VISIT -> Literal node")
+
+        # Check if the literal is a number
+        if node.kind == NUMBER:
+            self.log(f"INFO -> Number: {node.value}")
+            return NumberType(value=node.value)
+
+        # Check if the literal is a string
+        elif node.kind == STRING:
+            self.log(f"INFO -> String: {node.value}")
+            return StringType(value=node.value)
+
+        # Check if the literal is a nil
+        elif node.kind == NIL:
+            self.log(f"INFO -> Nil: {node.value}")
+            return NilType()
+
+        # At this point the literal is a boolean (true or false)
+        self.log(f"INFO -> Boolean: {node.value}")
+        return BooleanType(value=node.value)
+
+
+    def visitIdentifier(self, node:Identifier):
+        self.log("VISIT -> Identifier node")
+        # Get the identifier
+        identifier = node.name
+        self.log(f"INFO -> Identifier: {identifier}")
+
+        # First check if the identifier is called inside a function
+        # This means the call is recursive
+        if self.current_function is not None and identifier == self.current_function.id:
+            # If it is recursive, we assume the type of return is any
+            # because we can't infer the type of the return
+            self.annotate(node, self.current_function)
+            return AnyType()
+
+        # If it isnt a recursive call
+        # Search for the identifier in the symbol table
+        symbol = self.search_symbol(identifier, Variable)
+        # Check if the symbol is found
+        if symbol is None:
+            # If the symbol is not found, search for the identifier AS a function
+            symbol = self.search_symbol(identifier, Function)
+            # Check if the symbol is found
+            if symbol is None:
+                raise Exception(f"Identifier {identifier} not found in symbol table")
+
+            # The primary is a function, return the return type of the function
+            self.annotate(node, symbol)
+            return symbol.return_type
+
+        # The primary is a variable, return the data type of the variable
+        self.annotate(node, symbol)
+        return symbol.data_type
+
+
+    def visitThis(self, node:This):
+        self.log(f"INFO -> 'this' keyword found")
+        # If we are not inside a class, the this keyword is invalid
+        if self.current_class is None:
+            raise Exception(f"Invalid this keyword outside a class")
+
+
+    def visitSuper(self, node:Super):
+        identifier = node.name
+        self.log(f"INFO -> Super call: {identifier}")
+        self.super_call = True
+
+        # Search for the function in the parent class
+        if self.current_class is not None:
+            if self.current_class.parent is not None:
+                symbol = self.current_class.parent.search_method(identifier)
+                if symbol is None:
+                    raise Exception(f"Method {identifier} not found in parent class {self.current_class.parent.id}")
                 
-                else:
-                    raise Exception(f"Super call outside of class")
+                self.annotate(node, symbol)
+                return symbol.return_type
+            
+            else:
+                raise Exception(f"Parent class not found for class {self.current_class.id}")
+        
+        else:
+            raise Exception(f"Super call outside of class")
 
 
-    def visitInstantiation(self, ctx:compiscriptParser.InstantiationContext):
+    def visitInstantiation(self, node:Instantiation):
         self.log("VISIT -> Instantiation node")
         # Get the class identifier
-        class_id = ctx.IDENTIFIER().getText()
+        class_id = node.name
         # Search for the class in the symbol table
         class_symbol = self.search_symbol(class_id, Class)
         # Check if the class is found
@@ -867,12 +739,13 @@ class SemanticAnalyzer(compiscriptVisitor):
         args = []   # List to store the arguments
 
         # Check if the instantiation has arguments
-        if ctx.arguments():
+        if node.arguments is not None:
             # Get the arguments
-            args = self.visitArguments(ctx.arguments())
+            args = yield from self.visitArguments(node.arguments)
 
         # Search for the initializer method in the class
         initializer = class_symbol.search_method(f"init")
+        self.annotate(node, initializer)
             
         # Check if the instantiation has proper amount of arguments
         if len(args) != len(initializer.parameters):
@@ -904,24 +777,21 @@ class SemanticAnalyzer(compiscriptVisitor):
         return InstanceType(size=class_symbol.size, class_ref=class_symbol)
 
 
-    def visitArguments(self, ctx:compiscriptParser.ArgumentsContext):
+    def visitArguments(self, node:Arguments):
         self.log("VISIT -> Arguments node")
         # Get the expression nodes
         args = []
-        for expression in ctx.expression():
+        for expression in node.expressions:
             # Visit the expression node
-            self.log(f"INFO -> Expression in arguments: {expression.getText()}")
-            args.append(self.visitExpression(expression))
+            args.append((yield expression))
         
         return args
 
 
-    def visitParameters(self, ctx:compiscriptParser.ParametersContext):
+    def visitParameters(self, node:Parameters):
         self.log("VISIT -> Parameters node")
         # Get the parameters identifiers
-        for param in ctx.IDENTIFIER():
-            # Get the parameter identifier
-            param_id = param.getText()
+        for param_id in node.names:
             self.log(f"INFO -> Parameter: {param_id}")
 
             # Create a new variable symbol for the parameter
@@ -937,84 +807,43 @@ class SemanticAnalyzer(compiscriptVisitor):
             self.add_symbol(parameter)
 
 
-
-    def visitStatement(self, ctx:compiscriptParser.StatementContext):
-        self.log("VISIT -> Statement node")
-
-        # Check for the statement type
-        # Check if the statement is expression statement
-        if ctx.exprStmt():
-            self.log("INFO -> Expression statement")
-            self.visitExprStmt(ctx.exprStmt())
-
-        # Check if the statement is a if statement
-        elif ctx.ifStmt():
-            self.log("INFO -> If statement")
-            self.visitIfStmt(ctx.ifStmt())
-
-        # Check if the statement is a while statement
-        elif ctx.whileStmt():
-            self.log("INFO -> While statement")
-            self.visitWhileStmt(ctx.whileStmt())
-
-        # Check if the statement is a for statement
-        elif ctx.forStmt():
-            self.log("INFO -> For statement")
-            self.visitForStmt(ctx.forStmt())
-
-        # Check if the statement is a return statement
-        elif ctx.returnStmt():
-            self.log("INFO -> Return statement")
-            self.visitReturnStmt(ctx.returnStmt())
-
-        # Check if the statement is a print statement
-        elif ctx.printStmt():
-            self.log("INFO -> Print statement")
-            self.visitPrintStmt(ctx.printStmt())
-
-        # Check if the statement is a block statement
-        elif ctx.block():
-            self.log("INFO -> Block statement")
-            self.visitBlock(ctx.block())
-
-
-    def visitExprStmt(self, ctx:compiscriptParser.ExprStmtContext):
+    def visitExprStmt(self, node:ExprStmt):
         self.log("VISIT -> ExprStmt node")
         # Visit the expression node
-        self.visitExpression(ctx.expression())
+        yield node.expression
 
 
-    def visitIfStmt(self, ctx:compiscriptParser.IfStmtContext):
+    def visitIfStmt(self, node:IfStmt):
         self.log("VISIT -> IfStmt node")
         # Enter the if scope
         self.enter_scope(f"if_{self.if_qty}")
         self.if_qty += 1    # Increment the if quantity
 
         # Visit the expression node
-        type = self.visitExpression(ctx.expression())
+        type = yield node.condition
         # Check if the expression is a boolean type
         if not isinstance(type, BooleanType) and not isinstance(type, AnyType):
             raise Exception(f"Invalid type for if statement condition got: {type}, expected: bool")
                             
         # Visit the statement node
-        self.visitStatement(ctx.statement(0))
+        yield node.then_branch
 
         # Exit the if scope
         self.exit_scope()
 
         # Check if the if statement has an else statement
-        if ctx.statement(1):
+        if node.else_branch is not None:
             self.log("INFO -> If statement has an else statement")
             # Enter the else scope
             self.enter_scope(f"else_{self.else_qty}")
             self.else_qty += 1  # Increment the else quantity
             # Visit the else statement node
-            self.visitStatement(ctx.statement(1))
+            yield node.else_branch
             # Exit the else scope
             self.exit_scope()
 
 
-    def visitForStmt(self, ctx:compiscriptParser.ForStmtContext):
+    def visitForStmt(self, node:ForStmt):
         self.log("VISIT -> ForStmt node")
         # Enter the for scope
         self.enter_scope(f"for_{self.for_qty}")
@@ -1022,56 +851,53 @@ class SemanticAnalyzer(compiscriptVisitor):
 
         # Check if the for has the correct definition
         # First check for the variable declaration or expression statement
-        if ctx.varDecl():
-            self.log("INFO -> For statement with variable declaration")
-            self.visitVarDecl(ctx.varDecl())
-        elif ctx.exprStmt():
-            self.log("INFO -> For statement with expression statement")
-            self.visitExprStmt(ctx.exprStmt())
+        if node.initializer is not None:
+            self.log("INFO -> For statement initializer")
+            yield node.initializer
         else:
-            raise Exception(f"Invalid for statement: {ctx.getText()}, missing variable declaration or expression statement")
+            raise Exception(f"Invalid for statement at line {node.line}, missing variable declaration or expression statement")
         
         # Visit the expression node (condition)
-        if ctx.expression(0):
+        if node.condition is not None:
             self.log("INFO -> For statement condition")
-            self.visitExpression(ctx.expression(0))
+            yield node.condition
         else:
-            raise Exception(f"Invalid for statement: {ctx.getText()}, missing condition expression")
+            raise Exception(f"Invalid for statement at line {node.line}, missing condition expression")
         
         # Visit the expression node (increment)
-        if ctx.expression(1):
+        if node.increment is not None:
             self.log("INFO -> For statement increment")
-            self.visitExpression(ctx.expression(1))
+            yield node.increment
         else:
-            raise Exception(f"Invalid for statement: {ctx.getText()}, missing increment expression")
+            raise Exception(f"Invalid for statement at line {node.line}, missing increment expression")
         
         # Visit the statement node
-        self.visitStatement(ctx.statement())
+        yield node.body
 
         # Exit the for scope
         self.exit_scope()
 
 
-    def visitWhileStmt(self, ctx:compiscriptParser.WhileStmtContext):
+    def visitWhileStmt(self, node:WhileStmt):
         self.log("VISIT -> WhileStmt node")
         # Enter the while scope
         self.enter_scope(f"while_{self.while_qty}")
         self.while_qty += 1 # Increment the while quantity
 
         # Visit the expression node
-        type = self.visitExpression(ctx.expression())
+        type = yield node.condition
         # Check if the expression is a boolean type
         if not isinstance(type, BooleanType) and not isinstance(type, AnyType):
             raise Exception(f"Invalid type for while statement condition got: {type}, expected: bool")
         
         # Visit the statement node
-        self.visitStatement(ctx.statement())
+        yield node.body
 
         # Exit the while scope
         self.exit_scope()
 
 
-    def visitReturnStmt(self, ctx:compiscriptParser.ReturnStmtContext):
+    def visitReturnStmt(self, node:ReturnStmt):
         self.log("VISIT -> ReturnStmt node")
 
         # Check if the function is not a constructor
@@ -1083,14 +909,15 @@ class SemanticAnalyzer(compiscriptVisitor):
             raise Exception("Return statement outside a function")
 
         # Check if theres a return expression
-        if ctx.expression():
+        if node.value is not None:
+            # Visit the expression node
+            return_type = yield node.value
             # Check if the function has multiple return statements
+            # only the first one sets the return type of the function
             if self.current_function.return_count == 0:
-                # Visit the expression node and set the return type of the function
-                return_type = self.visitExpression(ctx.expression())
                 self.current_function.set_return_type(return_type)
                 self.current_function.return_count += 1
-                return return_type
+            return return_type
 
         else:
             self.log("INFO -> Return statement without expression")
@@ -1098,10 +925,10 @@ class SemanticAnalyzer(compiscriptVisitor):
             
 
 
-    def visitPrintStmt(self, ctx:compiscriptParser.PrintStmtContext):
+    def visitPrintStmt(self, node:PrintStmt):
         self.log("VISIT -> PrintStmt node")
         self.in_print = True    # Set the print flag to true
         # Visit the expression node
-        self.visitExpression(ctx.expression())
+        yield node.expression
         # Check if the print type is a string
         self.in_print = False   # Reset the print flag
\ No newline at end of file
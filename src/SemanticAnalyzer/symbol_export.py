@@ -0,0 +1,227 @@
+import csv
+import json
+import struct
+
+
+# Columns of the exported symbol table
+HEADERS = ["ID", "Type", "Scope", "Scope Index", "Data Type", "Size", "Offset"]
+
+# Keys of the JSON Lines records (one per column)
+KEYS = ["id", "type", "scope", "scope_index", "data_type", "size", "offset"]
+
+# Header of the binary format: magic bytes and version
+BINARY_MAGIC = b"CSYM"
+BINARY_VERSION = 1
+
+# Flags of the optional fields of a binary record
+HAS_DATA_TYPE, HAS_SIZE, HAS_OFFSET = 1, 2, 4
+
+
+def symbol_rows(symbol_table):
+    """
+    Yields the columns of each symbol (None for the fields the symbol doesn't have),
+    one symbol at a time so no exporter keeps a copy of the whole table
+
+    Args:
+        symbol_table (list): The symbols of the semantic analyzer
+    """
+    for symbol in symbol_table:
+        yield (
+            symbol.id,
+            symbol.type,
+            symbol.scope.id,
+            symbol.scope.index,
+            symbol.data_type.name if symbol.data_type is not None else None,
+            symbol.size,
+            symbol.offset,
+        )
+
+
+def display_rows(symbol_table):
+    """
+    Yields the columns of each symbol as they are displayed ("-" for the missing fields)
+    """
+    for row in symbol_rows(symbol_table):
+        yield [value if value is not None else "-" for value in row]
+
+
+def export_jsonl(symbol_table, file):
+    """
+    Writes a JSON object per symbol and line
+    """
+    for row in symbol_rows(symbol_table):
+        file.write(json.dumps(dict(zip(KEYS, row))) + "\n")
+
+
+def export_csv(symbol_table, file):
+    """
+    Writes the symbols as CSV with a header row (the missing fields are empty)
+    """
+    writer = csv.writer(file)
+    writer.writerow(KEYS)
+    for row in symbol_rows(symbol_table):
+        writer.writerow(["" if value is None else value for value in row])
+
+
+def export_plain(symbol_table, file):
+    """
+    Writes the symbols as text columns aligned to the left. The table is read twice,
+    once for the width of the columns and once to write the rows.
+    """
+    widths = [len(header) for header in HEADERS]
+    for row in display_rows(symbol_table):
+        widths = [max(width, len(str(value))) for width, value in zip(widths, row)]
+
+    def line(values):
+        return "  ".join(str(value).ljust(width) for value, width in zip(values, widths)).rstrip() + "\n"
+
+    file.write(line(HEADERS))
+    file.write(line("-" * width for width in widths))
+    for row in display_rows(symbol_table):
+        file.write(line(row))
+
+
+def export_pretty(symbol_table, file, table_format="fancy_grid"):
+    """
+    Writes the symbols as a table of the tabulate library. The table is built in memory
+    (tabulate needs every row to size the columns), it is meant for reading small tables.
+    """
+    # Loaded on demand, it is only needed for the pretty report
+    from tabulate import tabulate
+    file.write(tabulate(list(display_rows(symbol_table)), HEADERS, tablefmt=table_format))
+
+
+def write_varint(file, value):
+    """
+    Writes an integer as a zigzag varint (7 bits per byte, small values take a byte)
+    """
+    value = value * 2 if value >= 0 else -value * 2 - 1
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append(value & 0x7F | 0x80)
+        value >>= 7
+    encoded.append(value)
+    file.write(encoded)
+
+
+def read_varint(file):
+    """
+    Reads an integer written by write_varint (None at the end of the file)
+    """
+    value = shift = 0
+    while True:
+        byte = file.read(1)
+        if not byte:
+            return None
+        value |= (byte[0] & 0x7F) << shift
+        if byte[0] < 0x80:
+            break
+        shift += 7
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+def export_binary(symbol_table, file):
+    """
+    Writes the symbols in a compact binary format:
+        header: b"CSYM", version (1 byte)
+        record: flags (1 byte), id, type, scope, [data type], scope index, [size], [offset]
+    The strings are interned: a string is written as its index in the strings seen so
+    far, and a new string as the next index followed by its length and UTF-8 bytes.
+    The integers are zigzag varints and the fields in brackets are only written if the
+    flag of the field is set (see HAS_DATA_TYPE, HAS_SIZE and HAS_OFFSET).
+    """
+    strings = {}
+
+    def write_string(value):
+        index = strings.get(value)
+        if index is not None:
+            write_varint(file, index)
+            return
+        index = strings[value] = len(strings)
+        encoded = value.encode("utf8")
+        write_varint(file, index)
+        write_varint(file, len(encoded))
+        file.write(encoded)
+
+    file.write(BINARY_MAGIC + struct.pack("<B", BINARY_VERSION))
+    for id, type, scope, scope_index, data_type, size, offset in symbol_rows(symbol_table):
+        flags = (HAS_DATA_TYPE if data_type is not None else 0) | (HAS_SIZE if size is not None else 0) | (HAS_OFFSET if offset is not None else 0)
+        file.write(struct.pack("<B", flags))
+        write_string(id)
+        write_string(type)
+        write_string(scope)
+        if flags & HAS_DATA_TYPE:
+            write_string(data_type)
+        write_varint(file, scope_index)
+        if flags & HAS_SIZE:
+            write_varint(file, size)
+        if flags & HAS_OFFSET:
+            write_varint(file, offset)
+
+
+def read_binary(file):
+    """
+    Yields the rows (as symbol_rows) of a symbol table written by export_binary
+
+    Args:
+        file (file): The file opened in binary mode
+    """
+    header = file.read(len(BINARY_MAGIC) + 1)
+    if header[:len(BINARY_MAGIC)] != BINARY_MAGIC or header[-1] != BINARY_VERSION:
+        raise ValueError("Not a CompiScript symbol table (or an unsupported version)")
+
+    strings = []
+
+    def read_string():
+        index = read_varint(file)
+        if index == len(strings):
+            strings.append(file.read(read_varint(file)).decode("utf8"))
+        return strings[index]
+
+    while True:
+        flags = file.read(1)
+        if not flags:
+            return
+        flags = flags[0]
+        id, type, scope = read_string(), read_string(), read_string()
+        data_type = read_string() if flags & HAS_DATA_TYPE else None
+        scope_index = read_varint(file)
+        size = read_varint(file) if flags & HAS_SIZE else None
+        offset = read_varint(file) if flags & HAS_OFFSET else None
+        yield id, type, scope, scope_index, data_type, size, offset
+
+
+# Exporters of the formats that are not tables of the tabulate library, with the mode
+# the file is opened in and the extension of their default path
+EXPORTERS = {
+    "jsonl": (export_jsonl, "w", ".jsonl"),
+    "csv": (export_csv, "w", ".csv"),
+    "binary": (export_binary, "wb", ".bin"),
+    "plain": (export_plain, "w", ".txt"),
+}
+
+
+def default_path(table_format, base="src/SemanticAnalyzer/symbol_table"):
+    """
+    Returns the path the symbol table is written to if none is given
+    """
+    return base + EXPORTERS.get(table_format, (None, None, ".txt"))[2]
+
+
+def export_symbols(symbol_table, path, table_format="fancy_grid"):
+    """
+    Writes the symbol table to a file
+
+    Args:
+        symbol_table (list): The symbols of the semantic analyzer
+        path (str): The path of the file
+        table_format (str): jsonl, csv, binary, plain or a table format of the tabulate
+            library (the pretty printed table, the only one that isn't streamed)
+    """
+    exporter, mode, _ = EXPORTERS.get(table_format, (None, "w", None))
+    # The CSV module handles the line endings itself
+    with open(path, mode, **({} if mode == "wb" else {"encoding": "utf8", "newline": ""})) as file:
+        if exporter is None:
+            export_pretty(symbol_table, file, table_format)
+        else:
+            exporter(symbol_table, file)
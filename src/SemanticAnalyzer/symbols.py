@@ -117,12 +117,14 @@ class Class(Symbol):
         """
         Search for an attribute in the class and its parents
         """
-        for attr in self.attributes:
-            if attr.id == id:
-                return attr
-        if self.parent:
-            return self.parent.search_attribute(id)
-        
+        # Walk up the inheritance chain instead of recursing on the parent
+        current = self
+        while current:
+            for attr in current.attributes:
+                if attr.id == id:
+                    return attr
+            current = current.parent
+
         return None
     
 
@@ -130,13 +132,14 @@ class Class(Symbol):
         """
         Search for a method in the class and its parents
         """
-        for method in self.methods:
-            if method.id == id:
-                return method
-        
-        if self.parent:
-            return self.parent.search_method(id)
-        
+        # Walk up the inheritance chain instead of recursing on the parent
+        current = self
+        while current:
+            for method in current.methods:
+                if method.id == id:
+                    return method
+            current = current.parent
+
         return None
 
     def __str__(self):
@@ -0,0 +1,139 @@
+import io
+import os
+import sys
+import glob
+import json
+import tempfile
+import contextlib
+from main import compile_file
+from Server.compile_server import CompileServer
+
+
+# Declaration added at the end of each file to edit it (the declarations before it are reused)
+EDIT = "\nvar serverCheckEdit = 1;\n"
+
+
+def session(server, requests):
+    """
+    Sends the requests to the server through serve_stdio and returns its responses
+
+    Args:
+        server (CompileServer): The server
+        requests (list): The requests (dicts), raw lines (str) or functions run between
+            two requests (to edit the files)
+    """
+    def lines():
+        for request in requests:
+            if callable(request):
+                request()
+            else:
+                yield (request if isinstance(request, str) else json.dumps(request)) + "\n"
+
+    output = io.StringIO()
+    server.serve_stdio(lines(), output)
+    return [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def write(path, source):
+    with open(path, "w", encoding="ascii", newline="") as file:
+        file.write(source)
+
+
+def full_compile(path):
+    """
+    Compiles a file from scratch, returns the status and the intermediate code (or the
+    error message) the server should answer
+    """
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, ci_generator = compile_file(path, "fast", "fast")
+        code = io.StringIO()
+        ci_generator.generate_intermediate_code(code)
+        return "ok", code.getvalue()
+    except Exception as e:
+        return "error", str(e)
+
+
+def outcome(response):
+    return response.get("status"), response.get("intermediate_code", response.get("error"))
+
+
+def main():
+    # Check every source file under the input directory (src/Input by default)
+    directory = sys.argv[1] if len(sys.argv) > 1 else "src/Input"
+    paths = sorted(glob.glob(f"{directory}/**/*.cspt", recursive=True))
+
+    failures = checks = 0
+
+    def check(condition, message):
+        nonlocal failures, checks
+        checks += 1
+        if not condition:
+            failures += 1
+            print(f"FAIL {message}")
+
+    server = CompileServer(compile_file, "fast", "fast", incremental=True)
+    answered = []
+    sources = set()     # The results are cached by the source (a copy of a file is a hit too)
+    with tempfile.TemporaryDirectory() as temporary:
+        for number, path in enumerate(paths):
+            with open(path, encoding="ascii", newline="") as file:
+                source = file.read()
+            copy = os.path.join(temporary, f"{number}_{os.path.basename(path)}")
+            edited = os.path.join(temporary, f"{number}_edited_{os.path.basename(path)}")
+            write(copy, source)
+            write(edited, source + EDIT)
+            expected, expected_edit = full_compile(copy), full_compile(edited)
+
+            # A compile, the same source again (answered from the cache) and the source
+            # after an edit (compiled again, reusing the declarations before the edit)
+            responses = session(server, [
+                {"file": copy, "id": 1},
+                {"file": copy, "id": 2},
+                lambda: write(copy, source + EDIT),
+                {"file": copy, "id": 3},
+            ])
+            answered += responses
+            if len(responses) != 3:
+                check(False, f"{path} -> {len(responses)} responses to 3 requests")
+                continue
+            first, cached, edit = responses
+            check([response.get("id") for response in responses] == [1, 2, 3], f"{path} -> the ids aren't echoed")
+            check(outcome(first) == expected and first.get("cached") is (source in sources), f"{path} -> the compile is different")
+            check(outcome(cached) == expected and cached.get("cached") is True, f"{path} -> the same source isn't answered from the cache")
+            check(outcome(edit) == expected_edit and edit.get("cached") is (source + EDIT in sources), f"{path} -> the compile after the edit is different")
+            sources.update({source, source + EDIT})
+            print(f"DONE {path} ({first['status']}, compile {first['time_ms']:.2f} ms, cached {cached['time_ms']:.2f} ms, "
+                  f"after the edit {edit['time_ms']:.2f} ms)")
+
+        # The errors of the requests, the counters and the end of the session (the
+        # requests after the shutdown aren't answered)
+        responses = session(server, [
+            {"file": os.path.join(temporary, "missing.cspt"), "id": "missing"},
+            "not a request",
+            {"command": "stats", "id": "stats"},
+            {"command": "shutdown", "id": "shutdown"},
+            {"command": "stats", "id": "after"},
+        ])
+
+    check(len(responses) == 4, f"{len(responses)} responses to the 4 requests before the shutdown")
+    missing, malformed, stats, shutdown = (responses + [{}] * 4)[:4]
+    check(missing.get("status") == "error" and "FileNotFoundError" in missing.get("error", ""), "a missing file isn't an error")
+    check(malformed.get("status") == "error" and "id" not in malformed, "a malformed request isn't an error")
+
+    compiles = [response for response in answered if "cached" in response]
+    check(stats.get("requests") == len(answered) + 3, f"{stats.get('requests')} requests counted instead of {len(answered) + 3}")
+    check(stats.get("compiles") == sum(not response["cached"] for response in compiles), "the compiles aren't counted")
+    check(stats.get("hits") == sum(response["cached"] for response in compiles), "the cache hits aren't counted")
+    check(stats.get("errors") == sum(not response["cached"] and response["status"] == "error" for response in compiles), "the errors aren't counted")
+    check(stats.get("incremental", {}).get("analyses_reused", 0) > 0, "no analysis is reused by the compiles after the edits")
+    check(shutdown == {"status": "ok", "id": "shutdown", "time_ms": shutdown.get("time_ms")} and not server.running, "the server doesn't shut down")
+
+    print(f"{checks - failures}/{checks} server responses are right")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    # Run from the repository root with src in the path:
+    # PYTHONPATH=src python -m Server.check_compile_server [directory]
+    main()
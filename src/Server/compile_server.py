@@ -0,0 +1,249 @@
+import io
+import os
+import sys
+import json
+import time
+import socket
+import hashlib
+import contextlib
+import socketserver
+from collections import OrderedDict
+from Incremental.incremental_compiler import IncrementalCompiler
+from Parser.incremental_parser import IncrementalParser
+
+
+# Number of compile results kept in memory (the least recently used are dropped first)
+CACHE_SIZE = 256
+
+
+class CompileServer():
+    """
+    Compiles CompiScript files on request in a single long running process, so the
+    imports, the deserialized ATN and the DFA of the ANTLR recognizers (class level
+    caches that are warm after the first compile) are paid once instead of on each file.
+
+    A request is a JSON object per line:
+        {"file": "src/Input/fibonacci.cspt", "output": "fibonacci.txt", "id": 1}
+    "output" (write the intermediate code to that path) and "id" (echoed back) are
+    optional, {"command": "stats"} returns the counters and {"command": "shutdown"}
+    stops the server. Each request gets a JSON object per line:
+        {"id": 1, "file": "...", "status": "ok", "intermediate_code": "...", "cached": false, "time_ms": 12.3}
+    with "status": "error" and the "error" message if the file doesn't compile.
+
+    The results are cached by the content of the file, an unchanged file (or a copy
+    of it) is answered without compiling it again. In incremental mode each file keeps
+    the work of its last compile, a new version of the file only analyzes and generates
+    the declarations that changed (see Incremental/incremental_compiler.py), and with the
+    fast parser only the declarations around the edits are parsed again (see
+    Parser/incremental_parser.py).
+
+    Attr:
+        compile_file (function): Runs the compiler over a file (see compile_file in main.py)
+        lexer_name (str): The lexer used by the compiles
+        parser_name (str): The parser used by the compiles
+        incremental (bool): Whether the compiles of each file reuse the work of the previous one
+        sessions (dict): The incremental compiler of each file by its path
+        parse_sessions (dict): The incremental parser of each file by its path (fast parser only)
+        cache (OrderedDict): Compile results by the digest of the source
+        stats (dict): Counters of the requests, compiles and cache hits
+        running (bool): False once a shutdown request is received
+    """
+
+    def __init__(self, compile_file, lexer_name="antlr", parser_name="antlr", incremental=False):
+        self.compile_file = compile_file
+        self.lexer_name = lexer_name
+        self.parser_name = parser_name
+        self.incremental = incremental
+        self.sessions = {}
+        self.parse_sessions = {}
+        self.cache = OrderedDict()
+        self.stats = {"requests": 0, "compiles": 0, "hits": 0, "errors": 0}
+        self.running = True
+
+
+    def compile(self, path):
+        """
+        Returns the result of compiling a file (from the cache if the same source was
+        already compiled), the messages the phases print are left out of the result
+
+        Args:
+            path (str): The path of the source file
+        """
+        with open(path, "rb") as file:
+            digest = hashlib.sha256(file.read()).hexdigest()
+
+        result = self.cache.get(digest)
+        if result is not None:
+            self.cache.move_to_end(digest)
+            self.stats["hits"] += 1
+            return dict(result, cached=True)
+
+        self.stats["compiles"] += 1
+        session = parse_session = None
+        if self.incremental:
+            session = self.sessions.setdefault(os.path.abspath(path), IncrementalCompiler())
+            if self.parser_name == "fast":
+                parse_session = self.parse_sessions.setdefault(os.path.abspath(path), IncrementalParser())
+        try:
+            # The phases report their progress on stdout, that is the channel of the responses
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, ci_generator = self.compile_file(path, self.lexer_name, self.parser_name, session, parse_session)
+            code = io.StringIO()
+            ci_generator.generate_intermediate_code(code)
+            result = {"status": "ok", "intermediate_code": code.getvalue()}
+        except Exception as e:
+            self.stats["errors"] += 1
+            result = {"status": "error", "error": str(e)}
+
+        self.cache[digest] = result
+        if len(self.cache) > CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return dict(result, cached=False)
+
+
+    def handle(self, line):
+        """
+        Answers a request (a line of JSON) and returns the response as a line of JSON
+        """
+        start = time.perf_counter()
+        self.stats["requests"] += 1
+        request = None
+        try:
+            request = json.loads(line)
+            command = request.get("command", "compile")
+            if command == "stats":
+                response = dict(self.stats, cached_files=len(self.cache))
+                if self.incremental:
+                    # Declarations analyzed, generated and reused over every file
+                    response["incremental"] = {name: sum(session.stats[name] for session in self.sessions.values())
+                                               for name in IncrementalCompiler().stats}
+                    response["incremental_parsing"] = {name: sum(session.stats[name] for session in self.parse_sessions.values())
+                                                       for name in IncrementalParser().stats}
+            elif command == "shutdown":
+                self.running = False
+                response = {"status": "ok"}
+            else:
+                response = {"file": request["file"]}
+                response.update(self.compile(request["file"]))
+                if "output" in request and response["status"] == "ok":
+                    with open(request["output"], "w") as file:
+                        file.write(response["intermediate_code"])
+        except Exception as e:
+            # Malformed requests and missing files are reported, the server keeps running
+            response = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        response["time_ms"] = round((time.perf_counter() - start) * 1000, 3)
+        return json.dumps(response)
+
+
+    def serve_stdio(self, input=sys.stdin, output=sys.stdout):
+        """
+        Answers the requests read from stdin, one response per line on stdout
+        """
+        for line in input:
+            if not line.strip():
+                continue
+            output.write(self.handle(line) + "\n")
+            output.flush()
+            if not self.running:
+                break
+
+
+    def serve_socket(self, path):
+        """
+        Answers the requests of the clients of a Unix socket (one at a time, the
+        compiles share the caches of the recognizers). A client sends request lines
+        and reads a response line for each of them.
+        """
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    self.wfile.write((server.handle(line) + "\n").encode())
+                    self.wfile.flush()
+                    if not server.running:
+                        break
+
+        # Remove the socket of a previous server
+        if os.path.exists(path):
+            os.unlink(path)
+
+        with socketserver.UnixStreamServer(path, Handler) as unix_server:
+            print(f"SUCCESS -> Compile server listening on {path}", file=sys.stderr)
+            try:
+                while self.running:
+                    unix_server.handle_request()
+            finally:
+                os.unlink(path)
+
+
+    def watch(self, directories, interval=0.5, output_dir=None, output=sys.stdout):
+        """
+        Polls the directories and compiles the .cspt files that changed since the last
+        poll (all of them on the first one), a response line is written for each compile
+
+        Args:
+            directories (list): The directories to watch (with their subdirectories)
+            interval (float): The seconds between polls
+            output_dir (str): Where the intermediate code of each file is written (as
+                <name>.txt, under the path of the file from the directories), None to
+                only report the results
+        """
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+
+        # The outputs mirror the files from the directory that holds every watched one,
+        # so the files with the same name in different directories don't overwrite each other
+        base = os.path.commonpath([os.path.abspath(directory) for directory in directories])
+
+        seen = {}   # Modification time and size of each file by its path
+        while self.running:
+            current = {}
+            for directory in directories:
+                for root, _, files in os.walk(directory):
+                    for name in files:
+                        if name.endswith(".cspt"):
+                            path = os.path.join(root, name)
+                            # The file may be gone since it was listed (editors save by
+                            # renaming a new file over it), the next poll finds it again
+                            try:
+                                stat = os.stat(path)
+                            except FileNotFoundError:
+                                continue
+                            current[path] = (stat.st_mtime_ns, stat.st_size)
+
+            for path in sorted(current):
+                if seen.get(path) == current[path]:
+                    continue
+                request = {"file": path}
+                if output_dir is not None:
+                    relative = os.path.relpath(os.path.abspath(path), base)
+                    request["output"] = os.path.join(output_dir, os.path.splitext(relative)[0] + ".txt")
+                    os.makedirs(os.path.dirname(request["output"]), exist_ok=True)
+                response = json.loads(self.handle(json.dumps(request)))
+                response.pop("intermediate_code", None)   # Only the outcome is reported
+                output.write(json.dumps(response) + "\n")
+                output.flush()
+
+            seen = current
+            time.sleep(interval)
+
+
+def send(path, message):
+    """
+    Sends a request to a server on a Unix socket and returns its response
+
+    Args:
+        path (str): The path of the socket
+        message (dict): The request
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(path)
+        client.sendall((json.dumps(message) + "\n").encode())
+        with client.makefile("r") as responses:
+            return json.loads(responses.readline())
@@ -0,0 +1,316 @@
+from CompiScript.compiscriptParser import compiscriptParser
+from CompiScript.compiscriptVisitor import compiscriptVisitor
+from antlr4.tree.Tree import TerminalNode
+from SyntaxTree.nodes import *
+from SyntaxTree.visitor import traverse, dispatch_table
+from SyntaxTree.tokens import DOT, IDENTIFIER, THIS
+
+
+class ASTBuilder(compiscriptVisitor):
+    """
+    Lowers the ANTLR parse tree into the abstract syntax tree (see nodes.py).
+
+    The rules that only wrap a single child (declaration, statement, expression,
+    funDecl and the expression chain assignment -> logic_or -> ... -> primary)
+    don't get a node of their own, the visit returns the node of their child.
+    Once built, the tree doesn't keep any reference to the parse tree, so the
+    parse tree can be freed.
+
+    The visit methods yield the child contexts they need lowered and are run by
+    traverse() (see visitor.py), so deeply nested programs don't overflow the Python stack.
+    """
+
+    dispatch = None     # Maps each context type to its bound visit method, built on the first visit
+
+    def build(self, ctx:compiscriptParser.ProgramContext):
+        """
+        Builds the abstract syntax tree of a program
+
+        Args:
+            ctx (ProgramContext): The root of the parse tree
+        """
+        self.size = 0   # The number of nodes built
+        program = self.visit(ctx)
+        program.size = self.size
+        return program
+
+
+    def visit(self, tree):
+        if self.dispatch is None:
+            # Map the context type of each rule (in rule index order) to its visit method
+            contexts = [getattr(compiscriptParser, name[0].upper() + name[1:] + "Context") for name in compiscriptParser.ruleNames]
+            self.dispatch = dispatch_table(self, contexts, lambda context: "visit" + context.__name__[:-len("Context")])
+        return traverse(self.dispatch, tree)
+
+
+    def position(self, node:Node, ctx):
+        # Number the nodes in the order they are built
+        node.index = self.size
+        self.size += 1
+        # Keep the position of the first token of the rule
+        node.line = ctx.start.line
+        node.column = ctx.start.column
+        return node
+
+
+    def visitProgram(self, ctx:compiscriptParser.ProgramContext):
+        declarations = []
+        for declaration in ctx.declaration():
+            declarations.append((yield declaration))
+        return self.position(Program(declarations), ctx)
+
+
+    def visitDeclaration(self, ctx:compiscriptParser.DeclarationContext):
+        # Wrapper rule, return the node of the child
+        return (yield ctx.getChild(0))
+
+
+    def visitClassDecl(self, ctx:compiscriptParser.ClassDeclContext):
+        # Get the class identifier and the parent class (if it extends one)
+        name = ctx.IDENTIFIER(0).getText()
+        parent = ctx.IDENTIFIER(1).getText() if ctx.IDENTIFIER(1) else None
+        methods = []
+        for function in ctx.function():
+            methods.append((yield function))
+        return self.position(ClassDecl(name, parent, methods), ctx)
+
+
+    def visitFunDecl(self, ctx:compiscriptParser.FunDeclContext):
+        # Wrapper rule, return the function node
+        return (yield ctx.function())
+
+
+    def visitFunction(self, ctx:compiscriptParser.FunctionContext):
+        parameters = (yield ctx.parameters()) if ctx.parameters() else None
+        body = yield ctx.block()
+        return self.position(FunDecl(ctx.IDENTIFIER().getText(), parameters, body), ctx)
+
+
+    def visitFunAnon(self, ctx:compiscriptParser.FunAnonContext):
+        parameters = (yield ctx.parameters()) if ctx.parameters() else None
+        body = yield ctx.block()
+        return self.position(FunAnon(parameters, body), ctx)
+
+
+    def visitParameters(self, ctx:compiscriptParser.ParametersContext):
+        names = [parameter.getText() for parameter in ctx.IDENTIFIER()]
+        return self.position(Parameters(names), ctx)
+
+
+    def visitVarDecl(self, ctx:compiscriptParser.VarDeclContext):
+        value = (yield ctx.expression()) if ctx.expression() else None
+        return self.position(VarDecl(ctx.IDENTIFIER().getText(), value), ctx)
+
+
+    def visitStatement(self, ctx:compiscriptParser.StatementContext):
+        # Wrapper rule, return the node of the child
+        return (yield ctx.getChild(0))
+
+
+    def visitExprStmt(self, ctx:compiscriptParser.ExprStmtContext):
+        expression = yield ctx.expression()
+        return self.position(ExprStmt(expression), ctx)
+
+
+    def visitForStmt(self, ctx:compiscriptParser.ForStmtContext):
+        # The children are: 'for' '(' (varDecl | exprStmt | ';') expression? ';' expression? ')' statement
+        # the expressions are optional, so take them by position instead of by index
+        initializer = None
+        if not isinstance(ctx.getChild(2), TerminalNode):
+            initializer = yield ctx.getChild(2)
+
+        clauses = [None, None]  # The condition and increment
+        clause = 0
+        for i in range(3, ctx.getChildCount() - 2):
+            child = ctx.getChild(i)
+            # The ';' separates the condition from the increment
+            if isinstance(child, TerminalNode):
+                clause += 1
+            else:
+                clauses[clause] = yield child
+
+        body = yield ctx.statement()
+        return self.position(ForStmt(initializer, clauses[0], clauses[1], body), ctx)
+
+
+    def visitIfStmt(self, ctx:compiscriptParser.IfStmtContext):
+        condition = yield ctx.expression()
+        then_branch = yield ctx.statement(0)
+        else_branch = (yield ctx.statement(1)) if ctx.statement(1) else None
+        return self.position(IfStmt(condition, then_branch, else_branch), ctx)
+
+
+    def visitPrintStmt(self, ctx:compiscriptParser.PrintStmtContext):
+        expression = yield ctx.expression()
+        return self.position(PrintStmt(expression), ctx)
+
+
+    def visitReturnStmt(self, ctx:compiscriptParser.ReturnStmtContext):
+        value = (yield ctx.expression()) if ctx.expression() else None
+        return self.position(ReturnStmt(value), ctx)
+
+
+    def visitWhileStmt(self, ctx:compiscriptParser.WhileStmtContext):
+        condition = yield ctx.expression()
+        body = yield ctx.statement()
+        return self.position(WhileStmt(condition, body), ctx)
+
+
+    def visitBlock(self, ctx:compiscriptParser.BlockContext):
+        declarations = []
+        for declaration in ctx.declaration():
+            declarations.append((yield declaration))
+        return self.position(Block(declarations), ctx)
+
+
+    def visitExpression(self, ctx:compiscriptParser.ExpressionContext):
+        # Wrapper rule, return the node of the child
+        return (yield ctx.getChild(0))
+
+
+    def visitAssignment(self, ctx:compiscriptParser.AssignmentContext):
+        # Check if the assignment is a wrapper node
+        if ctx.getChildCount() == 1:
+            return (yield ctx.logic_or())
+
+        target = (yield ctx.call()) if ctx.call() else None
+        value = yield ctx.assignment()
+        return self.position(Assignment(target, ctx.IDENTIFIER().getText(), value), ctx)
+
+
+    def visitLogic_or(self, ctx:compiscriptParser.Logic_orContext):
+        # Check if the logic_or is a wrapper node
+        if ctx.getChildCount() == 1:
+            return (yield ctx.getChild(0))
+
+        operands = yield from self.operands(ctx)
+        return self.position(LogicOr(operands), ctx)
+
+
+    def visitLogic_and(self, ctx:compiscriptParser.Logic_andContext):
+        # Check if the logic_and is a wrapper node
+        if ctx.getChildCount() == 1:
+            return (yield ctx.getChild(0))
+
+        operands = yield from self.operands(ctx)
+        return self.position(LogicAnd(operands), ctx)
+
+
+    def visitEquality(self, ctx:compiscriptParser.EqualityContext):
+        return (yield from self.binary(Equality, ctx))
+
+
+    def visitComparison(self, ctx:compiscriptParser.ComparisonContext):
+        return (yield from self.binary(Comparison, ctx))
+
+
+    def visitTerm(self, ctx:compiscriptParser.TermContext):
+        return (yield from self.binary(Term, ctx))
+
+
+    def visitFactor(self, ctx:compiscriptParser.FactorContext):
+        return (yield from self.binary(Factor, ctx))
+
+
+    def operands(self, ctx):
+        """
+        Returns the nodes of the operands of a chain (every even child)
+        """
+        operands = []
+        for i in range(0, ctx.getChildCount(), 2):
+            operands.append((yield ctx.getChild(i)))
+        return operands
+
+
+    def binary(self, node_type, ctx):
+        """
+        Builds a binary chain node, or returns its only operand if the rule is a wrapper
+
+        Args:
+            node_type (type): The Binary subclass to build
+            ctx (ParserRuleContext): The chain rule (operand (operator operand)*)
+        """
+        # Check if the chain is a wrapper node
+        if ctx.getChildCount() == 1:
+            return (yield ctx.getChild(0))
+
+        # The operators are every odd child, keep their token types
+        operators = [ctx.getChild(i).getSymbol().type for i in range(1, ctx.getChildCount(), 2)]
+        operands = yield from self.operands(ctx)
+        return self.position(node_type(operands, operators), ctx)
+
+
+    def visitUnary(self, ctx:compiscriptParser.UnaryContext):
+        # Check if the unary is a wrapper node
+        if ctx.getChildCount() == 1:
+            return (yield ctx.call())
+
+        operand = yield ctx.unary()
+        return self.position(Unary(ctx.getChild(0).getSymbol().type, operand), ctx)
+
+
+    def visitCall(self, ctx:compiscriptParser.CallContext):
+        # Check if the call is a wrapper node (a primary or an anonymous function)
+        if ctx.getChildCount() == 1:
+            return (yield ctx.getChild(0))
+
+        # Group the suffixes with their operands
+        suffixes = []
+        i = 1
+        while i < ctx.getChildCount():
+            operator = ctx.getChild(i).getSymbol().type
+            operand = ctx.getChild(i + 1)
+
+            if operator == DOT:
+                suffixes.append((operator, operand.getText()))
+                i += 2
+
+            # The arguments are optional, the next child may be the ')'
+            elif isinstance(operand, TerminalNode):
+                suffixes.append((operator, None))
+                i += 2
+
+            else:
+                suffixes.append((operator, (yield operand)))
+                i += 3
+
+        callee = yield ctx.primary()
+        return self.position(Call(callee, suffixes), ctx)
+
+
+    def visitPrimary(self, ctx:compiscriptParser.PrimaryContext):
+        # Check if the primary has children, an expression or a super call
+        if ctx.getChildCount() > 1:
+            # The parenthesis are only for grouping, return the expression node
+            if ctx.expression():
+                return (yield ctx.expression())
+            return self.position(Super(ctx.IDENTIFIER().getText()), ctx)
+
+        if ctx.instantiation():
+            return (yield ctx.instantiation())
+
+        # The primary is a single token
+        token = ctx.getChild(0).getSymbol()
+        text = token.text
+
+        if token.type == IDENTIFIER:
+            node = Identifier(text)
+        elif token.type == THIS:
+            node = This()
+        else:
+            # Number, string, true, false or nil, the literal keeps its token type
+            node = Literal(token.type, text)
+
+        return self.position(node, ctx)
+
+
+    def visitInstantiation(self, ctx:compiscriptParser.InstantiationContext):
+        arguments = (yield ctx.arguments()) if ctx.arguments() else None
+        return self.position(Instantiation(ctx.IDENTIFIER().getText(), arguments), ctx)
+
+
+    def visitArguments(self, ctx:compiscriptParser.ArgumentsContext):
+        expressions = []
+        for expression in ctx.expression():
+            expressions.append((yield expression))
+        return self.position(Arguments(expressions), ctx)
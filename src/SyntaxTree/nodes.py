@@ -0,0 +1,620 @@
+from SyntaxTree.tokens import LEFT_PAREN, DOT
+
+
+class Node():
+    """
+    Base class of the nodes of the abstract syntax tree.
+    The nodes are built once from the ANTLR parse tree (see builder.py) and
+    keep only the fields the visitors need, the single child wrapper rules
+    (assignment -> logic_or -> ... -> primary) are collapsed into their child.
+
+    Attr:
+        index (int): The position of the node in the tree (0 to size - 1), used to
+            index the side tables of the later phases (see SemanticAnalyzer/annotations.py).
+        line (int): The line where the node starts in the source file.
+        column (int): The column where the node starts in the source file.
+    """
+    __slots__ = ("index", "line", "column")
+
+    def __init__(self, line=None, column=None):
+        self.index = None
+        self.line = line
+        self.column = column
+
+    def children(self):
+        """
+        Returns the child nodes in source order (used by the default visit)
+        """
+        return ()
+
+    def accept(self, visitor):
+        raise NotImplementedError
+
+
+class Program(Node):
+    """
+    Root of the tree.
+
+    Attr:
+        declarations (list[Node]): The top level declarations and statements.
+        size (int): The number of nodes in the tree.
+    """
+    __slots__ = ("declarations", "size")
+
+    def __init__(self, declarations, line=None, column=None):
+        super().__init__(line, column)
+        self.declarations = declarations
+        self.size = 0
+
+    def children(self):
+        return self.declarations
+
+    def accept(self, visitor):
+        return visitor.visitProgram(self)
+
+
+class ClassDecl(Node):
+    """
+    Class declaration.
+
+    Attr:
+        name (str): The class identifier.
+        parent (str): The identifier of the parent class (None if it doesn't extend one).
+        methods (list[FunDecl]): The functions declared in the class body.
+    """
+    __slots__ = ("name", "parent", "methods")
+
+    def __init__(self, name, parent, methods, line=None, column=None):
+        super().__init__(line, column)
+        self.name = name
+        self.parent = parent
+        self.methods = methods
+
+    def children(self):
+        return self.methods
+
+    def accept(self, visitor):
+        return visitor.visitClassDecl(self)
+
+
+class FunDecl(Node):
+    """
+    Function declaration, either a plain function (fun name(...) {...})
+    or a method of a class.
+
+    Attr:
+        name (str): The function identifier.
+        parameters (Parameters): The parameters of the function (None if it has none).
+        body (Block): The body of the function.
+    """
+    __slots__ = ("name", "parameters", "body")
+
+    def __init__(self, name, parameters, body, line=None, column=None):
+        super().__init__(line, column)
+        self.name = name
+        self.parameters = parameters
+        self.body = body
+
+    def children(self):
+        if self.parameters is None:
+            return (self.body,)
+        return (self.parameters, self.body)
+
+    def accept(self, visitor):
+        return visitor.visitFunDecl(self)
+
+
+class FunAnon(Node):
+    """
+    Anonymous function expression.
+
+    Attr:
+        parameters (Parameters): The parameters of the function (None if it has none).
+        body (Block): The body of the function.
+    """
+    __slots__ = ("parameters", "body")
+
+    def __init__(self, parameters, body, line=None, column=None):
+        super().__init__(line, column)
+        self.parameters = parameters
+        self.body = body
+
+    def children(self):
+        if self.parameters is None:
+            return (self.body,)
+        return (self.parameters, self.body)
+
+    def accept(self, visitor):
+        return visitor.visitFunAnon(self)
+
+
+class Parameters(Node):
+    """
+    Parameter list of a function.
+
+    Attr:
+        names (list[str]): The parameter identifiers.
+    """
+    __slots__ = ("names",)
+
+    def __init__(self, names, line=None, column=None):
+        super().__init__(line, column)
+        self.names = names
+
+    def accept(self, visitor):
+        return visitor.visitParameters(self)
+
+
+class VarDecl(Node):
+    """
+    Variable declaration.
+
+    Attr:
+        name (str): The variable identifier.
+        value (Node): The initializer expression (None if it has none).
+    """
+    __slots__ = ("name", "value")
+
+    def __init__(self, name, value, line=None, column=None):
+        super().__init__(line, column)
+        self.name = name
+        self.value = value
+
+    def children(self):
+        return () if self.value is None else (self.value,)
+
+    def accept(self, visitor):
+        return visitor.visitVarDecl(self)
+
+
+class Block(Node):
+    """
+    Block statement.
+
+    Attr:
+        declarations (list[Node]): The declarations and statements of the block.
+    """
+    __slots__ = ("declarations",)
+
+    def __init__(self, declarations, line=None, column=None):
+        super().__init__(line, column)
+        self.declarations = declarations
+
+    def children(self):
+        return self.declarations
+
+    def accept(self, visitor):
+        return visitor.visitBlock(self)
+
+
+class ExprStmt(Node):
+    """
+    Expression statement.
+
+    Attr:
+        expression (Node): The evaluated expression.
+    """
+    __slots__ = ("expression",)
+
+    def __init__(self, expression, line=None, column=None):
+        super().__init__(line, column)
+        self.expression = expression
+
+    def children(self):
+        return (self.expression,)
+
+    def accept(self, visitor):
+        return visitor.visitExprStmt(self)
+
+
+class IfStmt(Node):
+    """
+    If statement.
+
+    Attr:
+        condition (Node): The condition expression.
+        then_branch (Node): The statement run when the condition is met.
+        else_branch (Node): The statement run otherwise (None if there's no else).
+    """
+    __slots__ = ("condition", "then_branch", "else_branch")
+
+    def __init__(self, condition, then_branch, else_branch, line=None, column=None):
+        super().__init__(line, column)
+        self.condition = condition
+        self.then_branch = then_branch
+        self.else_branch = else_branch
+
+    def children(self):
+        if self.else_branch is None:
+            return (self.condition, self.then_branch)
+        return (self.condition, self.then_branch, self.else_branch)
+
+    def accept(self, visitor):
+        return visitor.visitIfStmt(self)
+
+
+class WhileStmt(Node):
+    """
+    While statement.
+
+    Attr:
+        condition (Node): The condition expression.
+        body (Node): The body of the loop.
+    """
+    __slots__ = ("condition", "body")
+
+    def __init__(self, condition, body, line=None, column=None):
+        super().__init__(line, column)
+        self.condition = condition
+        self.body = body
+
+    def children(self):
+        return (self.condition, self.body)
+
+    def accept(self, visitor):
+        return visitor.visitWhileStmt(self)
+
+
+class ForStmt(Node):
+    """
+    For statement, the clauses are kept by position, so a missing
+    condition or increment is None.
+
+    Attr:
+        initializer (Node): The VarDecl or ExprStmt run before the loop (None if it's empty).
+        condition (Node): The condition expression.
+        increment (Node): The increment expression.
+        body (Node): The body of the loop.
+    """
+    __slots__ = ("initializer", "condition", "increment", "body")
+
+    def __init__(self, initializer, condition, increment, body, line=None, column=None):
+        super().__init__(line, column)
+        self.initializer = initializer
+        self.condition = condition
+        self.increment = increment
+        self.body = body
+
+    def children(self):
+        clauses = (self.initializer, self.condition, self.increment, self.body)
+        return tuple(clause for clause in clauses if clause is not None)
+
+    def accept(self, visitor):
+        return visitor.visitForStmt(self)
+
+
+class ReturnStmt(Node):
+    """
+    Return statement.
+
+    Attr:
+        value (Node): The returned expression (None if it has none).
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value, line=None, column=None):
+        super().__init__(line, column)
+        self.value = value
+
+    def children(self):
+        return () if self.value is None else (self.value,)
+
+    def accept(self, visitor):
+        return visitor.visitReturnStmt(self)
+
+
+class PrintStmt(Node):
+    """
+    Print statement.
+
+    Attr:
+        expression (Node): The printed expression.
+    """
+    __slots__ = ("expression",)
+
+    def __init__(self, expression, line=None, column=None):
+        super().__init__(line, column)
+        self.expression = expression
+
+    def children(self):
+        return (self.expression,)
+
+    def accept(self, visitor):
+        return visitor.visitPrintStmt(self)
+
+
+class Assignment(Node):
+    """
+    Assignment to a variable (name = value) or to an attribute (target.name = value).
+
+    Attr:
+        target (Node): The object holding the attribute (None for variables).
+        name (str): The assigned identifier.
+        value (Node): The assigned expression.
+    """
+    __slots__ = ("target", "name", "value")
+
+    def __init__(self, target, name, value, line=None, column=None):
+        super().__init__(line, column)
+        self.target = target
+        self.name = name
+        self.value = value
+
+    def children(self):
+        if self.target is None:
+            return (self.value,)
+        return (self.target, self.value)
+
+    def accept(self, visitor):
+        return visitor.visitAssignment(self)
+
+
+class LogicOr(Node):
+    """
+    Chain of 'or' operations, only built with two or more operands.
+
+    Attr:
+        operands (list[Node]): The operands of the chain.
+    """
+    __slots__ = ("operands",)
+
+    def __init__(self, operands, line=None, column=None):
+        super().__init__(line, column)
+        self.operands = operands
+
+    def children(self):
+        return self.operands
+
+    def accept(self, visitor):
+        return visitor.visitLogicOr(self)
+
+
+class LogicAnd(Node):
+    """
+    Chain of 'and' operations, only built with two or more operands.
+
+    Attr:
+        operands (list[Node]): The operands of the chain.
+    """
+    __slots__ = ("operands",)
+
+    def __init__(self, operands, line=None, column=None):
+        super().__init__(line, column)
+        self.operands = operands
+
+    def children(self):
+        return self.operands
+
+    def accept(self, visitor):
+        return visitor.visitLogicAnd(self)
+
+
+class Binary(Node):
+    """
+    Base class of the left associative binary chains (equality, comparison, term and factor),
+    only built with two or more operands. The operator i is applied between
+    the operands i and i + 1.
+
+    Attr:
+        operands (list[Node]): The operands of the chain.
+        operators (list[int]): The token types of the operators of the chain (see tokens.py).
+    """
+    __slots__ = ("operands", "operators")
+
+    def __init__(self, operands, operators, line=None, column=None):
+        super().__init__(line, column)
+        self.operands = operands
+        self.operators = operators
+
+    def children(self):
+        return self.operands
+
+
+class Equality(Binary):
+    """
+    Chain of '==' and '!=' operations.
+    """
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitEquality(self)
+
+
+class Comparison(Binary):
+    """
+    Chain of '<', '<=', '>' and '>=' operations.
+    """
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitComparison(self)
+
+
+class Term(Binary):
+    """
+    Chain of '+' and '-' operations.
+    """
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitTerm(self)
+
+
+class Factor(Binary):
+    """
+    Chain of '*', '/' and '%' operations.
+    """
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitFactor(self)
+
+
+class Unary(Node):
+    """
+    Unary operation.
+
+    Attr:
+        operator (int): The token type of the operator (BANG or MINUS).
+        operand (Node): The operand.
+    """
+    __slots__ = ("operator", "operand")
+
+    def __init__(self, operator, operand, line=None, column=None):
+        super().__init__(line, column)
+        self.operator = operator
+        self.operand = operand
+
+    def children(self):
+        return (self.operand,)
+
+    def accept(self, visitor):
+        return visitor.visitUnary(self)
+
+
+class Call(Node):
+    """
+    Chain of calls, attribute accesses and indexing applied to a primary,
+    only built with at least one suffix.
+
+    Attr:
+        callee (Node): The primary the suffixes are applied to.
+        suffixes (list[tuple]): The (operator, operand) suffixes in source order, keyed by token type:
+            (LEFT_PAREN, Arguments or None), (DOT, identifier) or (LEFT_BRACKET, expression).
+    """
+    __slots__ = ("callee", "suffixes")
+
+    def __init__(self, callee, suffixes, line=None, column=None):
+        super().__init__(line, column)
+        self.callee = callee
+        self.suffixes = suffixes
+
+    def arguments(self):
+        """
+        Returns the argument lists of the call suffixes
+        """
+        return [operand for operator, operand in self.suffixes if operator == LEFT_PAREN and operand is not None]
+
+    def children(self):
+        nodes = [self.callee]
+        for operator, operand in self.suffixes:
+            if operator != DOT and operand is not None:
+                nodes.append(operand)
+        return nodes
+
+    def accept(self, visitor):
+        return visitor.visitCall(self)
+
+
+class Arguments(Node):
+    """
+    Argument list of a call or an instantiation.
+
+    Attr:
+        expressions (list[Node]): The argument expressions.
+    """
+    __slots__ = ("expressions",)
+
+    def __init__(self, expressions, line=None, column=None):
+        super().__init__(line, column)
+        self.expressions = expressions
+
+    def children(self):
+        return self.expressions
+
+    def accept(self, visitor):
+        return visitor.visitArguments(self)
+
+
+class Literal(Node):
+    """
+    Literal value.
+
+    Attr:
+        kind (int): The token type of the literal (NUMBER, STRING, TRUE, FALSE or NIL).
+        value (str): The text of the literal (strings keep their quotes).
+    """
+    __slots__ = ("kind", "value")
+
+    def __init__(self, kind, value, line=None, column=None):
+        super().__init__(line, column)
+        self.kind = kind
+        self.value = value
+
+    def accept(self, visitor):
+        return visitor.visitLiteral(self)
+
+
+class Identifier(Node):
+    """
+    Reference to a variable or a function.
+
+    Attr:
+        name (str): The identifier.
+    """
+    __slots__ = ("name",)
+
+    def __init__(self, name, line=None, column=None):
+        super().__init__(line, column)
+        self.name = name
+
+    def accept(self, visitor):
+        return visitor.visitIdentifier(self)
+
+
+class This(Node):
+    """
+    The 'this' keyword.
+    """
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitThis(self)
+
+
+class Super(Node):
+    """
+    Reference to a method of the parent class (super.name).
+
+    Attr:
+        name (str): The method identifier.
+    """
+    __slots__ = ("name",)
+
+    def __init__(self, name, line=None, column=None):
+        super().__init__(line, column)
+        self.name = name
+
+    def accept(self, visitor):
+        return visitor.visitSuper(self)
+
+
+class Instantiation(Node):
+    """
+    Class instantiation (new Name(...)).
+
+    Attr:
+        name (str): The class identifier.
+        arguments (Arguments): The arguments of the initializer (None if it has none).
+    """
+    __slots__ = ("name", "arguments")
+
+    def __init__(self, name, arguments, line=None, column=None):
+        super().__init__(line, column)
+        self.name = name
+        self.arguments = arguments
+
+    def children(self):
+        return () if self.arguments is None else (self.arguments,)
+
+    def accept(self, visitor):
+        return visitor.visitInstantiation(self)
+
+
+# The node types that can be built (used to build the dispatch tables of the visitors)
+NODE_TYPES = (
+    Program, ClassDecl, FunDecl, FunAnon, Parameters, VarDecl, Block,
+    ExprStmt, IfStmt, WhileStmt, ForStmt, ReturnStmt, PrintStmt,
+    Assignment, LogicOr, LogicAnd, Equality, Comparison, Term, Factor,
+    Unary, Call, Arguments, Literal, Identifier, This, Super, Instantiation,
+)
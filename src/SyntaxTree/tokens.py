@@ -0,0 +1,54 @@
+from CompiScript.compiscriptParser import compiscriptParser
+
+
+def literal(text):
+    """
+    Returns the token type of a literal token of the grammar ('+', '(', 'true', ...)
+    ANTLR only names the tokens with a lexer rule, the literal ones are T__0, T__1, ...
+    so they are looked up by their text to keep working if the grammar is regenerated.
+    """
+    return compiscriptParser.literalNames.index(f"'{text}'")
+
+
+def text(token_type):
+    """
+    Returns the text of a literal token type (used for the messages and comments)
+    """
+    return compiscriptParser.literalNames[token_type][1:-1]
+
+
+# Tokens with a lexer rule
+NUMBER = compiscriptParser.NUMBER
+STRING = compiscriptParser.STRING
+IDENTIFIER = compiscriptParser.IDENTIFIER
+
+# Call suffixes
+LEFT_PAREN = literal("(")
+DOT = literal(".")
+LEFT_BRACKET = literal("[")
+
+# Equality operators
+EQUAL_EQUAL = literal("==")
+BANG_EQUAL = literal("!=")
+
+# Comparison operators
+LESS = literal("<")
+LESS_EQUAL = literal("<=")
+GREATER = literal(">")
+GREATER_EQUAL = literal(">=")
+
+# Arithmetic operators
+PLUS = literal("+")
+MINUS = literal("-")
+STAR = literal("*")
+SLASH = literal("/")
+PERCENT = literal("%")
+
+# Unary operators
+BANG = literal("!")
+
+# Keyword literals
+TRUE = literal("true")
+FALSE = literal("false")
+NIL = literal("nil")
+THIS = literal("this")
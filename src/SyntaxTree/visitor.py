@@ -0,0 +1,196 @@
+from types import GeneratorType
+from SyntaxTree.nodes import *
+
+
+def dispatch_table(visitor, node_types, method_name):
+    """
+    Builds the dispatch table of a visitor, it maps each node type to the bound
+    visit method for it, so a visit is a single dictionary lookup instead of the
+    accept double dispatch (node.accept -> visitor.visitX).
+
+    Args:
+        visitor: The visitor whose methods are looked up
+        node_types (iterable): The node types (or parse tree context types) to map
+        method_name (function): Returns the name of the visit method of a node type
+    """
+    return {node_type: getattr(visitor, method_name(node_type)) for node_type in node_types}
+
+
+def traverse(dispatch, node, leave=None):
+    """
+    Runs the visit of a tree with an explicit stack instead of Python recursion.
+
+    A visit method asks for the result of a child with `result = yield child`,
+    it is suspended on the stack until the child is visited and then resumed
+    with the result. Visit methods that don't yield are called as plain functions.
+    The depth of the tree is only limited by the memory of the stack.
+
+    Args:
+        dispatch (dict): Maps each node type to its visit method (see dispatch_table)
+        node: The root of the tree to visit
+        leave (function): Called with each visited node and its result
+    """
+    result = dispatch[type(node)](node)
+    if type(result) is not GeneratorType:
+        if leave:
+            leave(node, result)
+        return result
+
+    stack = [(node, result)]   # The suspended visits (node, generator)
+    value = None                # The result sent to the top of the stack
+    error = None                # The exception raised by the visit of a child
+
+    while stack:
+        node, visit = stack[-1]
+        try:
+            # Resume the visit with the result of its child (or the exception it raised)
+            if error is None:
+                child = visit.send(value)
+            else:
+                child, error = visit.throw(error), None
+        except StopIteration as stop:
+            # The visit finished, pass its result to the parent
+            stack.pop()
+            value = stop.value
+            if leave:
+                leave(node, value)
+            continue
+        except Exception as exception:
+            # Propagate the exception to the parent visit
+            stack.pop()
+            if not stack:
+                raise
+            error = exception
+            continue
+
+        try:
+            result = dispatch[type(child)](child)
+        except Exception as exception:
+            error = exception
+            continue
+
+        if type(result) is GeneratorType:
+            # Suspend the parent until the child is visited
+            stack.append((child, result))
+            value = None
+        else:
+            value = result
+            if leave:
+                leave(child, value)
+
+    return value
+
+
+class ASTVisitor():
+    """
+    Base visitor for the abstract syntax tree.
+    Like the ANTLR generated visitor, every visit method defaults
+    to visiting the children of the node and returns the result of the last one.
+
+    The visit methods are generators that yield the nodes they need visited
+    (`result = yield node`), so the whole tree is walked by traverse() without recursion.
+    A visit method may also delegate to another one with `yield from`.
+    """
+
+    dispatch = None     # Maps each node type to its bound visit method, built on the first visit
+
+    def visit(self, node:Node):
+        if self.dispatch is None:
+            self.dispatch = dispatch_table(self, NODE_TYPES, lambda node_type: "visit" + node_type.__name__)
+        return traverse(self.dispatch, node, self.leave)
+
+    def leave(self, node:Node, result):
+        """
+        Called after each node is visited with the result of its visit
+        """
+        pass
+
+    def visitChildren(self, node:Node):
+        result = None
+        for child in node.children():
+            result = yield child
+        return result
+
+    def visitProgram(self, node:Program):
+        return self.visitChildren(node)
+
+    def visitClassDecl(self, node:ClassDecl):
+        return self.visitChildren(node)
+
+    def visitFunDecl(self, node:FunDecl):
+        return self.visitChildren(node)
+
+    def visitFunAnon(self, node:FunAnon):
+        return self.visitChildren(node)
+
+    def visitParameters(self, node:Parameters):
+        return self.visitChildren(node)
+
+    def visitVarDecl(self, node:VarDecl):
+        return self.visitChildren(node)
+
+    def visitBlock(self, node:Block):
+        return self.visitChildren(node)
+
+    def visitExprStmt(self, node:ExprStmt):
+        return self.visitChildren(node)
+
+    def visitIfStmt(self, node:IfStmt):
+        return self.visitChildren(node)
+
+    def visitWhileStmt(self, node:WhileStmt):
+        return self.visitChildren(node)
+
+    def visitForStmt(self, node:ForStmt):
+        return self.visitChildren(node)
+
+    def visitReturnStmt(self, node:ReturnStmt):
+        return self.visitChildren(node)
+
+    def visitPrintStmt(self, node:PrintStmt):
+        return self.visitChildren(node)
+
+    def visitAssignment(self, node:Assignment):
+        return self.visitChildren(node)
+
+    def visitLogicOr(self, node:LogicOr):
+        return self.visitChildren(node)
+
+    def visitLogicAnd(self, node:LogicAnd):
+        return self.visitChildren(node)
+
+    def visitEquality(self, node:Equality):
+        return self.visitChildren(node)
+
+    def visitComparison(self, node:Comparison):
+        return self.visitChildren(node)
+
+    def visitTerm(self, node:Term):
+        return self.visitChildren(node)
+
+    def visitFactor(self, node:Factor):
+        return self.visitChildren(node)
+
+    def visitUnary(self, node:Unary):
+        return self.visitChildren(node)
+
+    def visitCall(self, node:Call):
+        return self.visitChildren(node)
+
+    def visitArguments(self, node:Arguments):
+        return self.visitChildren(node)
+
+    def visitLiteral(self, node:Literal):
+        return self.visitChildren(node)
+
+    def visitIdentifier(self, node:Identifier):
+        return self.visitChildren(node)
+
+    def visitThis(self, node:This):
+        return self.visitChildren(node)
+
+    def visitSuper(self, node:Super):
+        return self.visitChildren(node)
+
+    def visitInstantiation(self, node:Instantiation):
+        return self.visitChildren(node)
@@ -1,24 +1,50 @@
+import os
+import sys
+import hashlib
+import argparse
+import functools
+import contextlib
 from CompiScript.compiscriptLexer import compiscriptLexer
 from CompiScript.compiscriptParser import compiscriptParser
 from antlr4 import FileStream, CommonTokenStream
 from antlr4.error.ErrorStrategy import DefaultErrorStrategy
 from Utils.custom_exception import ThrowingErrorListener
+from Lexer.fast_lexer import FastLexer
+from Parser.fast_parser import FastParser
+from Parser import dfa_cache
+from SyntaxTree.builder import ASTBuilder
 from SemanticAnalyzer.semantic_analyzer import SemanticAnalyzer
-from IntermediateCode.ci_generator import IntermediateCodeGenerator
+from IntermediateCode.ci_generator import IntermediateCodeGenerator, OUTPUT_PATH
 
 
-def main():
-    # Get the input file and create a file stream
-    input_file = 'src/Input/Examples/Ejemplo1.cspt'
-    input_stream = FileStream(input_file)
+# Lexers that can be selected from the command line
+LEXERS = {
+    "antlr": compiscriptLexer,  # The lexer generated by ANTLR
+    "fast": FastLexer,          # The regex based lexer (see Lexer/fast_lexer.py)
+}
 
-    # Create the lexer and use a custom error listener
-    lexer = compiscriptLexer(input_stream)
-    lexer.removeErrorListeners()  # Remove the default error listener
-    lexer.addErrorListener(ThrowingErrorListener.INSTANCE)  # Add custom error listener
+# Parsers that can be selected from the command line
+PARSERS = ["antlr", "fast"]
+
+# Engines that run the program from the analyzed syntax tree (without its intermediate code)
+SYNTAX_TREE_ENGINES = ["tree", "bytecode"]
 
-    # Create a token stream from the lexer
-    token_stream = CommonTokenStream(lexer)
+
+def parse(token_stream, parser_name):
+    """
+    Parses the tokens and returns the syntax tree of the program
+
+    Args:
+        token_stream (CommonTokenStream): The tokens of the input
+        parser_name (str): "antlr" for the generated parser (and the ASTBuilder)
+            or "fast" for the hand written parser (see Parser/fast_parser.py)
+    """
+    if parser_name == "fast":
+        # The hand written parser builds the syntax tree directly
+        parser = FastParser(token_stream)
+        parser.removeErrorListeners()   # Remove the default error listener
+        parser.addErrorListener(ThrowingErrorListener.INSTANCE) # Add custom error listener
+        return parser.program()
 
     # Create the parser and use a custom error listener
     parser = compiscriptParser(token_stream)
@@ -28,21 +54,262 @@ def main():
 
     # Start parsing from the program rule
     parse_tree = parser.program()
-    
-    # Create a semantic analyzer and visit the parse tree
+
+    # Lower the parse tree into the syntax tree used by both phases
+    # (the parse tree and the tokens it references are freed after this)
+    return ASTBuilder().build(parse_tree)
+
+
+def compile_file(input_file, lexer_name="antlr", parser_name="antlr", session=None, parse_session=None, jobs=1):
+    """
+    Runs every phase of the compiler over a source file and returns the semantic
+    analyzer (with the symbol table) and the CI generator (with the intermediate code)
+
+    Args:
+        input_file (str): The path of the source file
+        lexer_name (str): The lexer used to tokenize the input (see LEXERS)
+        parser_name (str): The parser used to build the syntax tree (see PARSERS)
+        session (IncrementalCompiler): Reuses the work of the previous compiles of the
+            file (see Incremental/incremental_compiler.py), None to compile it from scratch
+        parse_session (IncrementalParser): Reuses the syntax tree of the previous parses
+            of the file (see Parser/incremental_parser.py), None to parse it from scratch
+        jobs (int): The worker processes that generate and optimize the functions and methods
+            (see IntermediateCode/parallel_generator.py), 1 to generate them in this process
+    """
+    if parse_session is not None:
+        # Only the declarations around the edits are lexed and parsed again
+        # (read like the FileStream does, without translating the line endings)
+        with open(input_file, encoding="ascii", newline="") as file:
+            syntax_tree = parse_session.parse(file.read())
+        return analyze(syntax_tree, session, jobs)
+
+    return analyze(parse_file(input_file, lexer_name, parser_name), session, jobs)
+
+
+def parse_file(input_file, lexer_name="antlr", parser_name="antlr"):
+    """
+    Lexes and parses a source file and returns the syntax tree of the program
+
+    Args:
+        input_file (str): The path of the source file
+        lexer_name (str): The lexer used to tokenize the input (see LEXERS)
+        parser_name (str): The parser used to build the syntax tree (see PARSERS)
+    """
+    # Create a file stream of the input file
+    input_stream = FileStream(input_file)
+
+    # Create the lexer and use a custom error listener
+    lexer = LEXERS[lexer_name](input_stream)
+    lexer.removeErrorListeners()  # Remove the default error listener
+    lexer.addErrorListener(ThrowingErrorListener.INSTANCE)  # Add custom error listener
+
+    # Create a token stream from the lexer
+    token_stream = CommonTokenStream(lexer)
+
+    # Parse the tokens into the syntax tree used by both phases
+    # (the tokens are freed once it is built)
+    return parse(token_stream, parser_name)
+
+
+def analyze(syntax_tree, session=None, jobs=1):
+    """
+    Runs the semantic analysis and the CI generation over a syntax tree and returns
+    the semantic analyzer and the CI generator
+
+    Args:
+        syntax_tree (Program): The syntax tree of the program
+        session (IncrementalCompiler): Reuses the work of the previous compiles, None
+            to compile it from scratch
+        jobs (int): The worker processes that generate and optimize the functions and methods
+            (0 for one per CPU, 1 to generate the whole program in this process)
+    """
+    if session is not None:
+        # Only the declarations that changed (and the ones that depend on them) are
+        # analyzed and generated again
+        return session.compile(syntax_tree)
+
+    # Create a semantic analyzer and visit the syntax tree
     semantic_analyzer = SemanticAnalyzer()
-    semantic_analyzer.visit(parse_tree)
-    semantic_analyzer.display_table()
+    semantic_analyzer.visit(syntax_tree)
+
+    # Create a CI Generator and visit the syntax tree
+    if jobs == 1:
+        ci_generator = IntermediateCodeGenerator(semantic_analyzer.symbol_table, semantic_analyzer.annotations)
+    else:
+        # Imported here, the sequential compiles don't need the worker processes
+        from IntermediateCode.parallel_generator import ParallelCodeGenerator
+        # The functions are generated by the workers and linked in source order
+        ci_generator = ParallelCodeGenerator(semantic_analyzer.symbol_table, semantic_analyzer.annotations, jobs=jobs)
+    ci_generator.visit(syntax_tree)
+    return semantic_analyzer, ci_generator
+
+
+def main(input_file, lexer_name="antlr", parser_name="antlr", dfa_path=dfa_cache.DEFAULT_PATH, table_format="fancy_grid", table_path=None, output=OUTPUT_PATH, jobs=1, binary=None, engine=None):
+    # Start the ANTLR recognizers with the DFA warmed up on the training corpus
+    # (if there is a snapshot, see Parser/dfa_cache.py)
+    if lexer_name == "antlr" or parser_name == "antlr":
+        dfa_cache.load(dfa_path)
+
+    if engine in SYNTAX_TREE_ENGINES and binary is None:
+        # Development runs only need the results: the program runs right after the
+        # analysis, the symbol table and the intermediate code aren't written
+        syntax_tree = parse_file(input_file, lexer_name, parser_name)
+        semantic_analyzer = SemanticAnalyzer()
+        semantic_analyzer.visit(syntax_tree)
+        run(engine, syntax_tree, semantic_analyzer, None)
+        return
+
+    # Compile the input file and write the symbol table and the intermediate code
+    # (the progress messages go to stderr when the intermediate code is written to stdout)
+    with contextlib.redirect_stdout(sys.stderr if output == "-" else sys.stdout):
+        syntax_tree = parse_file(input_file, lexer_name, parser_name)
+        semantic_analyzer, ci_generator = analyze(syntax_tree, jobs=jobs)
+        if table_format != "none":
+            semantic_analyzer.display_table(table_format, table_path)
+    ci_generator.generate_intermediate_code(output)
+    if binary is not None:
+        write_binary(ci_generator, semantic_analyzer.symbol_table, binary)
+    if engine is not None:
+        run(engine, syntax_tree, semantic_analyzer, ci_generator)
+
+
+def run(engine, syntax_tree, semantic_analyzer, ci_generator):
+    """
+    Runs the compiled program, its output goes to stdout (see Runtime/ and Bytecode/)
+
+    Args:
+        engine (str): threaded (the code compiled to Python functions), interpreter
+            (the code interpreted line by line), bytecode (the syntax tree compiled
+            to the bytecode of a stack machine) or tree (the syntax tree compiled to
+            closures, see Runtime/tree_interpreter.py)
+    """
+    if engine in SYNTAX_TREE_ENGINES:
+        # Imported here, the programs are only run when it is asked for
+        from Runtime.values import ScriptError
+        if engine == "tree":
+            from Runtime.tree_interpreter import run_program
+        else:
+            from Bytecode.vm import run_program
+        try:
+            run_program(syntax_tree, semantic_analyzer.symbol_table, semantic_analyzer.annotations)
+        except ScriptError as e:
+            print(e)
+            sys.exit(1)
+        return
+
+    # Imported here, the programs are only run when it is asked for
+    from Runtime.program import Program, ExecutionError
+    from Runtime.interpreter import TextInterpreter
+    from Runtime.threaded_code import ThreadedCode
+
+    program = Program.from_generator(ci_generator.instruction_generator, semantic_analyzer.symbol_table)
+    try:
+        (ThreadedCode if engine == "threaded" else TextInterpreter)(program).run()
+    except ExecutionError as e:
+        print(e)
+        sys.exit(1)
+
+
+def write_binary(ci_generator, symbol_table, path):
+    """
+    Writes the intermediate code (and the symbol table) as a binary program
+    (see IntermediateCode/binary_program.py)
+    """
+    # Imported here, the binary program is only written when it is asked for
+    from IntermediateCode.binary_program import write_program
+    write_program(ci_generator.instruction_generator, symbol_table, path)
+
+
+def modules(options):
+    """
+    Compiles the input as an object module, links object modules or builds a program
+    from the modules of its source files (see Linker/)
+    """
+    # Imported here, the single file compiles don't need the linker
+    from Linker.object_module import ObjectModule, OBJECT_EXTENSION, compile_module
+    from Linker.linker import link, module_name, ModuleBuilder
+
+    if options.lexer == "antlr" or options.parser == "antlr":
+        dfa_cache.load(options.dfa_cache)
+
+    # The progress messages go to stderr when the intermediate code is written to stdout
+    with contextlib.redirect_stdout(sys.stderr if options.output == "-" else sys.stdout):
+        if options.compile_only:
+            imports = [ObjectModule.read(path) for path in options.imports]
+            with open(options.input, "rb") as file:
+                digest = hashlib.sha256(file.read()).hexdigest()
+            module, _ = compile_module(module_name(options.input), parse_file(options.input, options.lexer, options.parser), imports, digest)
+            path = options.object or os.path.splitext(options.input)[0] + OBJECT_EXTENSION
+            module.write(path)
+            print(f"SUCCESS -> Object module has been written to {path}")
+            return
+
+        if options.link:
+            ci_generator = link([ObjectModule.read(path) for path in options.link])
+        else:
+            builder = ModuleBuilder(functools.partial(parse_file, lexer_name=options.lexer, parser_name=options.parser), options.object_dir, options.jobs)
+            ci_generator = builder.build(options.build)
+    ci_generator.generate_intermediate_code(options.output)
+    if options.binary is not None:
+        # A linked program has no symbol table
+        write_binary(ci_generator, None, options.binary)
+
+
+def serve(options):
+    """
+    Runs the compiler as a long running server (see Server/compile_server.py)
+    """
+    # Imported here, the single file compiles don't need the server
+    from Server.compile_server import CompileServer
+
+    dfa_cache.load(options.dfa_cache)
+    server = CompileServer(compile_file, options.lexer, options.parser, options.incremental)
+    try:
+        if options.watch:
+            server.watch(options.watch, options.interval, options.output_dir)
+        elif options.socket:
+            server.serve_socket(options.socket)
+        else:
+            server.serve_stdio()
+    except KeyboardInterrupt:
+        pass    # Ctrl+C stops the server
 
-    # Create a CI Generator and visit the parse tree
-    ci_generator = IntermediateCodeGenerator(semantic_analyzer.symbol_table)
-    ci_generator.visit(parse_tree)
-    ci_generator.generate_intermediate_code()
 
 if __name__ == '__main__':
+    arguments = argparse.ArgumentParser(description="CompiScript compiler")
+    arguments.add_argument("input", nargs="?", default="src/Input/Examples/Ejemplo1.cspt", help="source file to compile")
+    arguments.add_argument("--lexer", choices=LEXERS.keys(), default="antlr", help="lexer used to tokenize the input")
+    arguments.add_argument("--parser", choices=PARSERS, default="antlr", help="parser used to build the syntax tree")
+    arguments.add_argument("--dfa-cache", default=dfa_cache.DEFAULT_PATH, help="snapshot of the warmed ANTLR DFA loaded at startup")
+    arguments.add_argument("--symbol-table", default="fancy_grid", metavar="FORMAT", help="format of the symbol table: jsonl, csv, binary, plain, a tabulate format (pretty printed) or none")
+    arguments.add_argument("--output", default=OUTPUT_PATH, help="file the intermediate code is written to (- for stdout)")
+    arguments.add_argument("--binary", metavar="PATH", help="also write the intermediate code and the symbol table as a memory-mappable binary program (.csir)")
+    arguments.add_argument("--run", nargs="?", const="threaded", choices=["threaded", "interpreter"] + SYNTAX_TREE_ENGINES, metavar="ENGINE", help="run the program after compiling it: threaded (the default, the code compiled to Python functions), interpreter, tree or bytecode (these two run the analyzed syntax tree, without writing the symbol table or the intermediate code)")
+    arguments.add_argument("--symbol-table-path", help="file the symbol table is written to (src/SemanticAnalyzer/symbol_table.<extension> by default)")
+    # Server mode: compile requests as JSON lines from stdin (or a Unix socket), or watch directories
+    arguments.add_argument("--serve", action="store_true", help="run as a compile server reading JSON lines from stdin")
+    arguments.add_argument("--socket", help="serve the requests on this Unix socket instead of stdin")
+    arguments.add_argument("--watch", nargs="+", metavar="DIRECTORY", help="recompile the changed .cspt files under the directories")
+    arguments.add_argument("--interval", type=float, default=0.5, help="seconds between the polls of the watched directories")
+    arguments.add_argument("--output-dir", help="directory where the watch mode writes the intermediate code of each file (at its path under the watched directories)")
+    arguments.add_argument("--incremental", action="store_true", help="reanalyze and regenerate only the changed declarations of a file between compiles (with --parser fast they are the only ones parsed again too)")
+    arguments.add_argument("--jobs", type=int, default=1, metavar="N", help="generate and optimize the functions and methods (or compile the modules of --build) in N worker processes (0 for one per CPU)")
+    # Separate compilation: object modules of the source files and the linker
+    arguments.add_argument("--compile-only", action="store_true", help="compile the input as an object module instead of a program")
+    arguments.add_argument("--object", help="file the object module is written to (the input with the .cso extension by default)")
+    arguments.add_argument("--imports", nargs="+", default=[], metavar="OBJECT", help="object modules whose functions, classes and globals the input uses")
+    arguments.add_argument("--link", nargs="+", metavar="OBJECT", help="link object modules into a program (their code runs in the given order)")
+    arguments.add_argument("--build", nargs="+", metavar="SOURCE", help="compile the changed source files as modules (--jobs at a time) and link them")
+    arguments.add_argument("--object-dir", default="build", help="directory where --build keeps the object modules")
+    options = arguments.parse_args()
     # try:
-        main()
+    if options.serve or options.socket or options.watch:
+        serve(options)
+    elif options.compile_only or options.link or options.build:
+        modules(options)
+    else:
+        main(options.input, options.lexer, options.parser, options.dfa_cache, options.symbol_table, options.symbol_table_path, options.output, options.jobs, options.binary, options.run)
     # except ParseCancellationException as e:
     #     print(e)
     # except Exception as e:
-    #     print(f"ERROR -> {e}")
\ No newline at end of file
+    #     print(f"ERROR -> {e}")